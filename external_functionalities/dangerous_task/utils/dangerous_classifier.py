@@ -1,5 +1,5 @@
 from dangerous_task_pb2 import DangerousAssessment
-from utils import logger
+from utils import logger, PhraseMatcher
 
 
 class DangerousClassifier:
@@ -7,10 +7,8 @@ class DangerousClassifier:
     WORDLIST_PATH = 'dangerous_task/utils/wordlist.txt'
 
     def __init__(self):
-        with open(self.WORDLIST_PATH, 'r') as f:
-            self.word_list = []
-            for line in f:
-                self.word_list.append(line.strip().lower())
+        # multi-word phrases are matched anywhere in the utterance, single words only as whole tokens
+        self.matcher = PhraseMatcher.from_file(self.WORDLIST_PATH)
 
     def pred(self, user_utterance: str) -> DangerousAssessment:
 
@@ -18,23 +16,9 @@ class DangerousClassifier:
         dangerous_assessment.is_dangerous = False
         user_utterance = user_utterance.lower()
 
-        for dangerous_word_or_sentence in self.word_list:
-            dangerous_word_or_sentence = dangerous_word_or_sentence.lower()
-            words = dangerous_word_or_sentence.split()
-
-            if len(words) > 1:
-                # dangerous words are multiple, thus we match the whole
-                dangerous_sentence = dangerous_word_or_sentence
-                if dangerous_sentence in user_utterance:
-                    logger.info(f"'{dangerous_sentence}' matched '{user_utterance}' as a dangerous sentence")
-                    dangerous_assessment.is_dangerous = True
-                    return dangerous_assessment
-            else:
-                dangerous_word = dangerous_word_or_sentence
-                tokenized_user_utterance = user_utterance.split()
-                if dangerous_word in tokenized_user_utterance:
-                    logger.info(f"'{dangerous_word}' matched '{user_utterance}' as a dangerous word")
-                    dangerous_assessment.is_dangerous = True
-                    return dangerous_assessment
+        dangerous_word_or_sentence = self.matcher.find(user_utterance)
+        if dangerous_word_or_sentence is not None:
+            logger.info(f"'{dangerous_word_or_sentence}' matched '{user_utterance}' as dangerous")
+            dangerous_assessment.is_dangerous = True
 
         return dangerous_assessment
@@ -1,17 +1,20 @@
 import os
 
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+from grpc_interceptor.exceptions import Aborted
 from searcher_pb2 import SearchLog
 from asr_parser_pb2 import ASRLog
 from taskmap_pb2 import TaskMap, Session, ConversationTurn
 from .abstract_db import AbstractDB
 from utils import (
-    ProtoDB, ComposedDB, logger
+    ProtoDB, ComposedDB, BatchWriter, logger, is_conditional_check_failed
 )
 from theme_pb2 import ThemeResults, ThemeRequest
 from semantic_searcher_pb2 import ThemeMapping
-from database_pb2 import QueryList
-from boto3.dynamodb.conditions import Attr
+from database_pb2 import QueryList, ThemeVersion
 from .staged_enhance import StagedEnhance
+from .theme_index import ThemeIndex
 
 
 class DynamoDB(AbstractDB):
@@ -29,26 +32,45 @@ class DynamoDB(AbstractDB):
                                              'proto_class': ConversationTurn,
                                              'primary_key': 'id'
                                          }
-                                     }
+                                     },
+                                     incremental=True,
+                                     # checked on every save, so it must stay readable in the binary storage format
+                                     projected_attributes=["version"]
                                      )
         self.taskmap_db = ProtoDB(proto_class=TaskMap, prefix=prefix, url=database_url, primary_key="taskmap_id")
         self.search_logs_db = ProtoDB(proto_class=SearchLog, prefix=prefix, url=database_url)
+        # search logs are written in batches off the request path, spilling to disk when overloaded
+        self.search_logs_writer = BatchWriter(self.search_logs_db,
+                                              spill_path=os.environ.get('SEARCH_LOGS_SPILL_PATH',
+                                                                        '/shared/file_system/logs/search_logs.spill'))
         self.asr_logs_db = ProtoDB(proto_class=ASRLog, prefix=prefix, url=database_url)
         self.theme_db = ProtoDB(proto_class=ThemeResults,
                                 prefix=prefix,
                                 primary_key="theme_word",
-                                url=database_url)
+                                url=database_url,
+                                # ThemeIndex scans the dates, so they must stay readable in the binary storage format
+                                projected_attributes=["date"])
 
         self.mapping_db = ProtoDB(ThemeMapping,
                                   primary_key="theme_query",
                                   prefix="Curated",
                                   url=database_url)
+        self.theme_index = ThemeIndex(self.theme_db, self.mapping_db)
         self.taskmap_enhancer = StagedEnhance(prefix=prefix, database_url=database_url)
 
         logger.info("Connection with DynamoDB Tables has been established...")
 
     def save_session(self, session_id: str, session: Session) -> None:
-        self.session_db.put(session)
+        condition = None
+        if session.version > 0:
+            # a stored version as recent as this one means the session was saved by another writer since it was loaded
+            condition = Attr('version').not_exists() | Attr('version').lt(session.version)
+        try:
+            self.session_db.put(session, condition=condition)
+        except ClientError as e:
+            if is_conditional_check_failed(e):
+                raise Aborted(f"Session {session_id} was saved by another writer, version {session.version} rejected")
+            raise
         self.taskmap_enhancer.enhance_descriptions(session, self.session_db, self.taskmap_db)
 
     def load_session(self, session_id: str) -> Session:
@@ -67,7 +89,7 @@ class DynamoDB(AbstractDB):
         return self.taskmap_db.get(taskmap_id)
 
     def save_search_log(self, search_log: SearchLog) -> None:
-        self.search_logs_db.put(search_log)
+        self.search_logs_writer.put(search_log)
 
     def save_asr_log(self, asr_log: ASRLog) -> None:
         self.asr_logs_db.put(asr_log)
@@ -81,12 +103,16 @@ class DynamoDB(AbstractDB):
 
     def get_queries(self) -> QueryList:
         response = QueryList()
-        response.queries.extend(self.mapping_db.scan_ids())
+        response.queries.extend(self.theme_index.get_queries())
         return response
 
     def get_theme_by_date(self, request: ThemeRequest) -> QueryList:
-        date_str = request.date
-        query = Attr("date").eq(date_str)
         response = QueryList()
-        response.queries.extend(self.theme_db.scan_ids(scan_filter=query))
+        response.queries.extend(self.theme_index.get_themes_by_date(request.date))
         return response
+
+    def get_theme_version(self) -> ThemeVersion:
+        return ThemeVersion(version=self.theme_index.get_version())
+
+    def close(self) -> None:
+        self.search_logs_writer.close()
@@ -1,5 +1,5 @@
 from database_pb2_grpc import DatabaseServicer, add_DatabaseServicer_to_server
-from database_pb2 import Void, QueryList
+from database_pb2 import Void, QueryList, ThemeVersion
 from taskmap_pb2 import Session, TaskMap
 from theme_pb2 import ThemeResults
 from . import DefaultDB
@@ -43,3 +43,6 @@ class Servicer (DatabaseServicer):
 
     def get_theme_by_date(self, request, context) -> QueryList:
         return self.instance.get_theme_by_date(request)
+
+    def get_theme_version(self, request, context) -> ThemeVersion:
+        return self.instance.get_theme_version()
@@ -3,11 +3,13 @@ import grpc
 import time
 import threading
 
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
 from concurrent.futures import ThreadPoolExecutor
 
 from taskmap_pb2 import Session
 from staged_enhancer_pb2 import StageState, StagedOutput
-from utils import ProtoDB, logger
+from utils import ProtoDB, logger, is_conditional_check_failed
 
 from .llm_taskmap_enhancer import LLMTaskMapEnhancer
 from llm_pb2 import LLMMultipleDescriptionGenerationRequest
@@ -69,6 +71,18 @@ class StagedEnhance:
             self.db.put(output)
             # Clean up in case of an error during Enhancement
 
+    @staticmethod
+    def __put_session(session_db, session: Session) -> None:
+        # The session was saved with this version just before. A newer stored version means the orchestrator saved
+        # another turn in the meantime, which mustn't be overwritten by this older copy
+        condition = Attr('version').not_exists() | Attr('version').lte(session.version)
+        try:
+            session_db.put(session, condition=condition)
+        except ClientError as e:
+            if not is_conditional_check_failed(e):
+                raise
+            logger.info(f"Session {session.session_id} was saved again, skipping the enhanced descriptions")
+
     def _enhance_desc(self, session_db, taskmap_db, session: Session) -> None:
         taskmaps_to_enhance = []
         request: LLMMultipleDescriptionGenerationRequest = LLMMultipleDescriptionGenerationRequest()
@@ -95,7 +109,7 @@ class StagedEnhance:
         # Return if there is nothing to enhance
         if len(request.task_title) == 0:
             logger.info("Nothing to enhance")
-            session_db.put(session)
+            self.__put_session(session_db, session)
             return
 
         # Generate Descriptions and update session     
@@ -105,7 +119,7 @@ class StagedEnhance:
             taskmap.description = description
             taskmap_db.put(taskmap)
 
-        session_db.put(session)
+        self.__put_session(session_db, session)
 
     def _enhancement_timed_thread(self, function, session_db, taskmap_db, session: Session, default_timeout) -> None:
         with ThreadPoolExecutor(max_workers=1) as executor:
@@ -0,0 +1,74 @@
+import hashlib
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from utils import logger
+
+
+class ThemeIndex:
+    """ In-memory date index over the themes and theme queries tables.
+
+    Looking themes up by date used to scan the whole themes table with a filter on every call.
+    The index scans both tables once, keeping only the ids, dates and modification times, and
+    serves get_theme_by_date / get_queries from dictionaries. It is rebuilt at most every
+    ``refresh_interval`` seconds, by the first request that finds it stale.
+
+    ``version`` is a hash of everything that was scanned, so clients can cheaply check whether
+    their cached themes are still current.
+    """
+
+    def __init__(self, theme_db, mapping_db, refresh_interval: float = 60):
+        self.theme_db = theme_db
+        self.mapping_db = mapping_db
+        self.refresh_interval = refresh_interval
+        self.lock = threading.Lock()
+        self.refreshed_at = None
+        self.themes_by_date: Dict[str, List[str]] = {}
+        self.queries: List[str] = []
+        self.version = ""
+
+    def __refresh(self) -> None:
+        tic = time.perf_counter()
+        digest = hashlib.blake2b(digest_size=16)
+
+        themes_by_date = defaultdict(list)
+        themes = sorted((item.get("theme_word", ""), item.get("date", ""), item.get("last_modified", ""))
+                        for item in self.theme_db.scan_attributes(["theme_word", "date", "last_modified"]))
+        for theme_word, date, last_modified in themes:
+            if date:
+                themes_by_date[date].append(theme_word)
+            digest.update(f"theme\t{theme_word}\t{date}\t{last_modified}\n".encode())
+
+        mappings = sorted((item.get("theme_query", ""), item.get("last_modified", ""))
+                          for item in self.mapping_db.scan_attributes(["theme_query", "last_modified"]))
+        for theme_query, last_modified in mappings:
+            digest.update(f"query\t{theme_query}\t{last_modified}\n".encode())
+
+        self.themes_by_date = dict(themes_by_date)
+        self.queries = [theme_query for theme_query, _ in mappings]
+        self.version = digest.hexdigest()
+        self.refreshed_at = time.monotonic()
+        logger.info(f"Indexed {len(themes)} themes and {len(mappings)} theme queries "
+                    f"in {time.perf_counter() - tic:0.2f} seconds, version {self.version}")
+
+    def __ensure_fresh(self) -> None:
+        if self.refreshed_at is not None and time.monotonic() - self.refreshed_at < self.refresh_interval:
+            return
+        with self.lock:
+            # another request may have refreshed it while this one was waiting
+            if self.refreshed_at is None or time.monotonic() - self.refreshed_at >= self.refresh_interval:
+                self.__refresh()
+
+    def get_themes_by_date(self, date: str) -> List[str]:
+        self.__ensure_fresh()
+        return list(self.themes_by_date.get(date, []))
+
+    def get_queries(self) -> List[str]:
+        self.__ensure_fresh()
+        return list(self.queries)
+
+    def get_version(self) -> str:
+        self.__ensure_fresh()
+        return self.version
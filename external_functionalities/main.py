@@ -1,4 +1,5 @@
 import grpc
+import signal
 from concurrent import futures
 
 from offensive_speech_classifier import Servicer as Offensive_Speech_Servicer
@@ -13,22 +14,31 @@ from dangerous_task import add_to_server as add_dangerous_to_server
 from response_relevance_classifier import Servicer as Response_Relevance_Servicer
 from response_relevance_classifier import add_to_server as add_response_relevance_classifier_to_server
 
-from utils import get_interceptors
+from utils import get_interceptors, SERVER_OPTIONS
 
 
 def serve():
     interceptors = get_interceptors()
 
     server = grpc.server(futures.ThreadPoolExecutor(max_workers=10),
-                         interceptors=interceptors)
+                         interceptors=interceptors,
+                         options=SERVER_OPTIONS)
 
     add_offensive_speech_to_server(Offensive_Speech_Servicer(), server)
     add_dangerous_to_server(Dangerous_Servicer(), server)
-    add_db_to_server(DB_Servicer(), server)
+    db_servicer = DB_Servicer()
+    add_db_to_server(db_servicer, server)
     add_response_relevance_classifier_to_server(Response_Relevance_Servicer(), server)
 
     server.add_insecure_port('[::]:8000')
     server.start()
+
+    def shutdown(signum, frame):
+        # finish the in-flight requests, then write the queued logs before exiting
+        server.stop(grace=5).wait()
+        db_servicer.instance.close()
+
+    signal.signal(signal.SIGTERM, shutdown)
     server.wait_for_termination()
 
 
@@ -2,7 +2,7 @@ import sys
 
 from .abstract_offensive_speech_classifier import AbstractSafetyCheck
 from safety_pb2 import SafetyAssessment, SafetyUtterance
-from utils import logger
+from utils import logger, PhraseMatcher
 
 sys.path.insert(0, '/shared')
 
@@ -12,7 +12,10 @@ class OffensiveSpeechClassifier(AbstractSafetyCheck):
     Mock offensive speech classifier.
     """
     BLACKLIST = ['crap', 'shit', 'hate', 'smell']
-    
+
+    def __init__(self):
+        self.matcher = PhraseMatcher(self.BLACKLIST, substring_words=True)
+
     def test_utterance_safety(self, utterance: SafetyUtterance) -> SafetyAssessment:
         """
         Assesses whether the utterance is safe based on offensive speech.
@@ -21,11 +24,11 @@ class OffensiveSpeechClassifier(AbstractSafetyCheck):
         safety_assessment = SafetyAssessment()
         safety_assessment.is_safe = True
 
-        for w in self.BLACKLIST:
-            if w in utterance.text.lower():
-                safety_assessment.is_safe = True
-                logger.info(f'-> safety_assessment (offensive speech): {safety_assessment.is_safe} -> due to: {w}')
-                return safety_assessment
+        w = self.matcher.find(utterance.text.lower())
+        if w is not None:
+            safety_assessment.is_safe = True
+            logger.info(f'-> safety_assessment (offensive speech): {safety_assessment.is_safe} -> due to: {w}')
+            return safety_assessment
 
         logger.info(f'-> safety_assessment (offensive speech): {safety_assessment.is_safe}')
         return safety_assessment
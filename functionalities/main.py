@@ -61,14 +61,15 @@ from llm_ingredient_substitution import (
     add_to_server as add_llm_ingredient_substitution_to_server
 )
 
-from utils import logger, get_interceptors
+from utils import logger, get_interceptors, SERVER_OPTIONS
 
 
 def serve():
     interceptors = get_interceptors()
 
     server = grpc.server(futures.ThreadPoolExecutor(max_workers=10),
-                         interceptors=interceptors)
+                         interceptors=interceptors,
+                         options=SERVER_OPTIONS)
 
     add_tm_to_server(TM_Servicer(), server)
     add_search_to_server(Searcher_Servicer(), server)
@@ -1,6 +1,6 @@
 from .abstract_safety_check import AbstractSafetyCheck
 from safety_pb2 import SafetyAssessment, SafetyUtterance
-from utils import logger
+from utils import logger, PhraseMatcher
 
 
 class PrivacyCheck(AbstractSafetyCheck):
@@ -8,10 +8,8 @@ class PrivacyCheck(AbstractSafetyCheck):
     WORDLIST_PATH = 'safety_check/utils/wordlist.txt'
 
     def __init__(self):
-        with open(self.WORDLIST_PATH, 'r') as f:
-            self.word_list = []
-            for line in f:
-                self.word_list.append(line.strip().lower())
+        # every entry is matched as a substring, including single words
+        self.matcher = PhraseMatcher.from_file(self.WORDLIST_PATH, substring_words=True)
 
     def test_utterance_safety(self, utterance: SafetyUtterance) -> SafetyAssessment:
         """
@@ -20,12 +18,12 @@ class PrivacyCheck(AbstractSafetyCheck):
         logger.debug(f'privacy utterance: {utterance.text}')
         safety_assessment = SafetyAssessment()
 
-        # Loop of regexes that identify utterances that contain private information.
-        for w in self.word_list:
-            if w in utterance.text:
-                safety_assessment.is_safe = False
-                logger.debug(f'-> safety_assessment (privacy): {safety_assessment.is_safe} -> due to: {w}')
-                return safety_assessment
+        # Identify utterances that contain private information.
+        w = self.matcher.find(utterance.text)
+        if w is not None:
+            safety_assessment.is_safe = False
+            logger.debug(f'-> safety_assessment (privacy): {safety_assessment.is_safe} -> due to: {w}')
+            return safety_assessment
 
         # Return safe if no private regexes identified in utterances.
         safety_assessment.is_safe = True
@@ -1,5 +1,7 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from safety_pb2_grpc import SafetyServicer, add_SafetyServicer_to_server
-from safety_pb2 import SafetyUtterance
+from safety_pb2 import SafetyUtterance, SafetyUtteranceBatch, SafetyReportBatch
 
 from . import DefaultPrivacyCheck, DefaultSensitivityCheck, DefaultOffensiveSpeechCheck, DefaultSuicidePreventionCheck
 
@@ -11,6 +13,15 @@ class Servicer(SafetyServicer):
         self.offensive_speech = DefaultOffensiveSpeechCheck()
         self.suicide_prevention = DefaultSuicidePreventionCheck()
 
+        # (SafetyReport field, check) pairs evaluated by check_all
+        self.checks = [
+            ('privacy_safe', self.privacy),
+            ('sensitivity_safe', self.sensitivity),
+            ('offensive_speech_safe', self.offensive_speech),
+            ('suicide_prevention_safe', self.suicide_prevention),
+        ]
+        self.executor = ThreadPoolExecutor(max_workers=8)
+
     def privacy_check(self, utterance: SafetyUtterance, context):
         return self.privacy.test_utterance_safety(utterance)
 
@@ -19,6 +30,28 @@ class Servicer(SafetyServicer):
 
     def offensive_speech_check(self, utterance: SafetyUtterance, context):
         return self.offensive_speech.test_utterance_safety(utterance)
-    
+
     def suicide_prevention_check(self, utterance: SafetyUtterance, context):
         return self.suicide_prevention.test_utterance_safety(utterance)
+
+    def check_all(self, batch: SafetyUtteranceBatch, context):
+        """
+        Runs every safety check on every utterance in the batch, evaluating the checks concurrently
+        so that the slowest one (the remote offensive speech classifier) bounds the latency.
+        """
+        response = SafetyReportBatch()
+        futures = []
+        for utterance in batch.utterances:
+            report = response.reports.add()
+            if utterance.text == "":
+                # Empty utterances pass every test, same as the orchestrator's shortcut
+                for field, _ in self.checks:
+                    setattr(report, field, True)
+                continue
+            for field, check in self.checks:
+                futures.append((report, field, self.executor.submit(check.test_utterance_safety, utterance)))
+
+        for report, field, future in futures:
+            setattr(report, field, future.result().is_safe)
+
+        return response
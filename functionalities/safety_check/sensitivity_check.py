@@ -1,8 +1,6 @@
-import re
-
 from .abstract_safety_check import AbstractSafetyCheck
 from safety_pb2 import SafetyAssessment, SafetyUtterance
-from utils import logger
+from utils import logger, RegexMatcher
 
 
 class SensitivityCheck(AbstractSafetyCheck):
@@ -30,6 +28,7 @@ class SensitivityCheck(AbstractSafetyCheck):
 
     def __init__(self):
         logger.debug(f'sensitivity regexes: {self.SENSITIVE_REGEXES}')
+        self.matcher = RegexMatcher(self.SENSITIVE_REGEXES)
 
     def test_utterance_safety(self, utterance: SafetyUtterance) -> SafetyAssessment:
         """
@@ -38,12 +37,12 @@ class SensitivityCheck(AbstractSafetyCheck):
         logger.debug(f'sensitivity utterance: {utterance.text}')
         safety_assessment = SafetyAssessment()
 
-        # Loop of regexes that identify sensitive utterances.
-        for q in self.SENSITIVE_REGEXES:
-            if re.search(q, utterance.text.lower()):
-                safety_assessment.is_safe = False
-                logger.debug(f'-> safety_assessment (sensitivity): {safety_assessment.is_safe} -> due to: {q}')
-                return safety_assessment
+        # Single combined regex that identifies sensitive utterances.
+        q = self.matcher.find(utterance.text.lower())
+        if q is not None:
+            safety_assessment.is_safe = False
+            logger.debug(f'-> safety_assessment (sensitivity): {safety_assessment.is_safe} -> due to: {q}')
+            return safety_assessment
 
         # Return safe if no sensitivity regexes identified in utterances.
         safety_assessment.is_safe = True
@@ -1,21 +1,25 @@
 import grpc
 import os
+import threading
 import time
 
-from typing import List, Any
+from typing import List, Any, Tuple
 from concurrent.futures import TimeoutError, ThreadPoolExecutor
 from pyserini.analysis import Analyzer, get_lucene_analyzer
 
-from utils import logger, init, indri_stop_words
+from utils import logger, init, indri_stop_words, theme_cache, NUM_SEARCH_RESULTS
 from database_pb2_grpc import DatabaseStub
 from .feature_reranker import FeatureReRanker
+from .query_cache import QueryResultCache
 from searcher_pb2 import SearchQuery, SearchResults, SearchLog, CandidateList, TaskmapIDs, CategoryIDs, CategoryResults
 from .abstract_searcher import AbstractSearcher
 
 
 class ComposedSearcher(AbstractSearcher):
 
-    def __init__(self, classes_list: List[Any], timeout: int, workers: int = 0):
+    def __init__(self, classes_list: List[Any], timeout: int, workers: int = 0, features_path: str = "",
+                 weights_path: str = "/source/searcher/data/l2r_weights.json", cache_size: int = 1000,
+                 cache_ttl: int = 3600, prewarm_interval: int = 0, prewarm_domains: List[int] = ()):
         self.workers = workers
         self.timeout: int = timeout
         self.searchers_list = []
@@ -31,7 +35,13 @@ class ComposedSearcher(AbstractSearcher):
 
         channel = grpc.insecure_channel(os.environ["EXTERNAL_FUNCTIONALITIES_URL"])
         self.db = DatabaseStub(channel)
-        self.reranker = FeatureReRanker()
+        self.reranker = FeatureReRanker(features_path, weights_path)
+
+        self.cache = QueryResultCache(max_size=cache_size, ttl_seconds=cache_ttl)
+        self.prewarm_domains = list(prewarm_domains)
+        self.prewarmed_queries = set()
+        if prewarm_interval > 0 and self.prewarm_domains:
+            threading.Thread(target=self.__prewarm_loop, args=(prewarm_interval,), daemon=True).start()
 
     def __processing(self, sentence: str):
         """ process queries or sections of documents by removing stopwords before sharding / stemming. """
@@ -85,7 +95,6 @@ class ComposedSearcher(AbstractSearcher):
             search_log = SearchLog()
             search_log.search_query.MergeFrom(query)
             search_log.id = query.session_id + "_" + query.turn_id
-            self.db.save_search_logs(search_log)
 
             # Search results
             search_results = SearchResults()
@@ -94,15 +103,84 @@ class ComposedSearcher(AbstractSearcher):
 
         return search_results
 
-    def search_taskmap(self, query: SearchQuery) -> SearchResults:
-        """ Retrieval across multiple searchers """
+    @staticmethod
+    def __log_save_error(future: grpc.Future) -> None:
+        if future.exception() is not None:
+            logger.warning(f"Saving search log failed: {future.exception()}")
+
+    def __cache_key(self, query: SearchQuery) -> Tuple[str, int, bool, int]:
+        processed = " ".join(self.__processing(query.last_utterance)) or query.last_utterance.strip().lower()
+        return processed, query.domain, query.headless, query.top_k
 
+    def __search(self, query: SearchQuery) -> SearchResults:
         # Retrieval
         retrieval_search_result = self.retrieval(query)
         # Re-Rank
-        reranked_result = self.reranker.re_rank(query, retrieval_search_result)
+        return self.reranker.re_rank(query, retrieval_search_result)
+
+    def search_taskmap(self, query: SearchQuery) -> SearchResults:
+        """ Retrieval across multiple searchers, cached by processed query, domain, headless and top_k """
 
-        return reranked_result
+        tic = time.perf_counter()
+        search_results = self.cache.get_or_compute(self.__cache_key(query), lambda: self.__search(query))
+        logger.info(f"Composed search for '{query.last_utterance}' took {time.perf_counter() - tic:0.4f} seconds, "
+                    f"query cache: {self.cache.stats()}")
+
+        # Results may come from another session's search, so the log is tied to this query
+        search_results.search_log.search_query.CopyFrom(query)
+        search_results.search_log.id = query.session_id + "_" + query.turn_id
+        # Saved after re-ranking so the log includes the L2R features of the returned candidates.
+        # The database queues it for a batched write, so the call isn't waited on.
+        self.db.save_search_logs.future(search_results.search_log).add_done_callback(self.__log_save_error)
+
+        return search_results
+
+    def __get_prewarm_queries(self) -> List[str]:
+        """ Theme queries (ThemeMapping) and the theme words and popular tasks of the coming week (ThemeResults). """
+        queries = theme_cache.get_queries()
+
+        for _, theme_word in theme_cache.get_upcoming_themes():
+            theme = theme_cache.get_theme_by_id(theme_word)
+            queries.append(theme.description if theme_word == "current_recommendation" else theme_word)
+            queries.extend(theme.popular_tasks)
+
+        return list(dict.fromkeys(q for q in queries if q.strip()))
+
+    def prewarm(self) -> None:
+        """ Runs the theme queries through the search pipeline so that they are served from the cache.
+
+        Only the queries that aren't cached are run: new themes, or queries whose entries have expired.
+        """
+        try:
+            queries = self.__get_prewarm_queries()
+        except grpc.RpcError as e:
+            logger.warning(f"Could not get theme queries to pre-warm the search cache: {e}")
+            return
+
+        if set(queries) != self.prewarmed_queries:
+            logger.info(f"Pre-warming search cache with {len(queries)} theme queries")
+
+        tic = time.perf_counter()
+        for domain in self.prewarm_domains:
+            for headless in [False, True]:
+                for text in queries:
+                    query = SearchQuery(text=text, last_utterance=text, top_k=NUM_SEARCH_RESULTS,
+                                        domain=domain, headless=headless, session_id="prewarm")
+                    key = self.__cache_key(query)
+                    if self.cache.get(key) is not None:
+                        continue
+                    try:
+                        self.cache.get_or_compute(key, lambda: self.__search(query))
+                    except Exception as e:
+                        logger.warning(f"Pre-warming search cache failed for '{text}': {e}")
+
+        self.prewarmed_queries = set(queries)
+        logger.info(f"Search cache pre-warmed in {time.perf_counter() - tic:0.2f} seconds: {self.cache.stats()}")
+
+    def __prewarm_loop(self, interval: int) -> None:
+        while True:
+            self.prewarm()
+            time.sleep(interval)
 
     def retrieve_taskmap(self, ids: TaskmapIDs) -> SearchResults:
         """ Retrieval of taskmaps based on IDs from Pyserini Searcher"""
@@ -1,4 +1,8 @@
+import os
+
 from utils import Downloader
+from taskmap_pb2 import Session
+from utils.taskmap_features import TASKMAP_FEATURES_FILENAME
 
 from searcher import ComposedSearcher, SearcherPyserini, RemoteSearcher
 
@@ -31,5 +35,15 @@ searcher_config = {
             }
         ],
         'timeout': 10000,  # 1000 ms
+        # query-independent reranking features precomputed when building the objects index
+        'features_path': os.path.join(downloader.get_artefact_path("objects_idx"), TASKMAP_FEATURES_FILENAME),
+        # per-domain L2R weights, swap for a file written by training/train_l2r_weights.py
+        'weights_path': '/source/searcher/data/l2r_weights.json',
+        # final results of repeated queries are cached for cache_ttl seconds
+        'cache_size': 1000,
+        'cache_ttl': 3600,
+        # theme queries are searched at startup and every prewarm_interval seconds (0 to disable)
+        'prewarm_interval': 600,
+        'prewarm_domains': [Session.Domain.COOKING],
     }
 }
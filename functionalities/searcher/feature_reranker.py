@@ -1,13 +1,14 @@
-import grpc
 import os
 import hashlib
 
-from searcher_pb2 import SearchQuery, CandidateList, SearchResults, ScoreCandidateInput
+from searcher_pb2 import SearchQuery, CandidateList, SearchResults, SearchLog, ScoreCandidateInput
 from taskmap_pb2 import Session
 from searcher_pb2_grpc import ScoreCandidateStub
 
-from utils import logger, indri_stop_words, jaccard_sim
-from pyserini.analysis import Analyzer, get_lucene_analyzer
+from utils import logger, jaccard_sim, get_channel, PhraseMatcher
+from utils.taskmap_features import STATIC_FEATURES
+from utils.l2r_weights import L2RWeights, L2R_FEATURES, feature_matrix
+from .feature_store import FeatureStore
 
 
 def get_docid(url):
@@ -17,30 +18,25 @@ def get_docid(url):
 
 class FeatureReRanker:
 
-    def __init__(self):
-        self.analyzer = Analyzer(get_lucene_analyzer(stemmer='porter', stopwords=True))
-        self.word_tokenizer = Analyzer(get_lucene_analyzer(stemming=False, stopwords=False))
-        neural_channel = grpc.insecure_channel(os.environ["NEURAL_FUNCTIONALITIES_URL"])
+    def __init__(self, features_path: str = "", weights_path: str = "/source/searcher/data/l2r_weights.json"):
+        self.feature_store = FeatureStore(features_path)
+        # Linear L2R weights per domain, hand-tuned or produced by training/train_l2r_weights.py
+        self.l2r_weights = L2RWeights.from_file(weights_path)
+        neural_channel = get_channel(os.environ["NEURAL_FUNCTIONALITIES_URL"])
         self.neural_scorer = ScoreCandidateStub(neural_channel)
 
-        # List of reputable authors.
+        # Set of reputable authors.
         with open('/source/searcher/data/good_authors.txt', 'r') as f:
             lines = f.readlines()
-            self.good_authors = [line.rstrip().lower() for line in lines]
-        # List of reputable domains.
+            self.good_authors = {line.rstrip().lower() for line in lines}
+        # Reputable domains, matched as substrings of the TaskMap domain name.
         with open('/source/searcher/data/good_domains.txt', 'r') as f:
             lines = f.readlines()
-            self.good_domains = [line.rstrip().lower() for line in lines]
-        # List of bad urls.
+            self.good_domains = PhraseMatcher([line.rstrip() for line in lines], substring_words=True)
+        # Set of bad urls.
         with open('/source/searcher/data/bad_urls.txt', 'r') as f:
             lines = f.readlines()
-            self.bad_urls = [line.rstrip().lower() for line in lines]
-
-    def __processing(self, sentence: str):
-        """ process queries or sections of documents by removing stopwords before sharding / stemming. """
-        words = self.word_tokenizer.analyze(sentence)
-        new_sentence = " ".join([w for w in words if w not in indri_stop_words])
-        return self.analyzer.analyze(new_sentence)
+            self.bad_urls = {line.rstrip().lower() for line in lines}
 
     def re_rank(self, query: SearchQuery, retrieval_result: SearchResults) -> SearchResults:
         """ Re-rank list of taskmaps based on features that maximise probability of taskmap being a
@@ -56,61 +52,9 @@ class FeatureReRanker:
         logger.info(f"User Query is conversation: {query.text}, last_utterance {query.last_utterance}")
         top_k: int = query.top_k
 
-        utterance_processed = self.__processing(query.last_utterance)
-
-        # L2R weights for linear combination with scores
-        category_weights = {
-            'neural_score': 22.0,
-            'category_score': 18.0
-        }
-
-        cooking_weights = {
-            'neural_score': 22.0,
-            'title_utterance_score': 3.0,
-            'requirements_utterance_score': 3.0,
-            'tags_utterance_score': 3.0,
-            'step_score': 1.0,
-            'av_w_steps_score': 0.5,
-            'requirements_score': 2.0,
-            'rating_score': 0.5,
-            'image_score': 3.0,
-            'rating_count_score': 1.0,
-            'views_score': 0.5,
-            'domain_score': 3.0,
-            'author_score': 6.0,
-            'image_steps_score': 0.0,
-            'domain_aligns_score': 0.0,
-            'custom_taskmap_score': 0.001,
-            'iain2rank_norm_score': 0.0,
-            'source_domain_score': 5.0,
-            'category_score': 15.0,
-            'staged_score': 3.0,
-        }
-
-        diy_weights = {
-            'neural_score': 22.0,
-            'title_utterance_score': 6.0,
-            'requirements_utterance_score': 4.0,
-            'tags_utterance_score': 3.0,
-            'step_score': 1.0,
-            'av_w_steps_score': 0.5,
-            'requirements_score': 2.0,
-            'rating_score': 0.1,
-            'image_score': 3.0,
-            'rating_count_score': 0.1,
-            'views_score': 0.1,
-            'domain_score': 1.0,
-            'author_score': 0.0,
-            'image_steps_score': 0.0,
-            'domain_aligns_score': 0.0,
-            'custom_taskmap_score': 0.001,
-            'iain2rank_norm_score': 0.0,
-            'source_domain_score': 0.1,
-            'category_score': 18.0,
-            'staged_score': 3.0,
-        }
-
-        weights = cooking_weights if query.domain == Session.Domain.COOKING else diy_weights
+        utterance_processed = set(self.feature_store.processing(query.last_utterance))
+
+        weights = self.l2r_weights.for_domain(Session.Domain.Name(query.domain))
 
         # Build neural feature
         title_list = []
@@ -121,163 +65,47 @@ class FeatureReRanker:
         score_candidate_input.title.extend(title_list)
         score_candidate_output = self.neural_scorer.score_candidate(score_candidate_input)
 
-        # --- group candidates ---
-        l2r_candidates_temp = []
-        i = 0
-        fastrank_l2r_rows = []
-        max_l2r_score = None
-        min_l2r_score = None
-        for candidate in retrieval_result.candidate_list.candidates:
-            l2r_score = 0.0
+        # --- build one feature row per candidate, then score them all at once ---
+        rows = []
+        for i, candidate in enumerate(retrieval_result.candidate_list.candidates):
+            neural_score = score_candidate_output.score[i]
             if candidate.HasField('category'):
-                l2r_score += category_weights['neural_score'] * score_candidate_output.score[i]
-                l2r_score += weights['category_score']
-                i += 1
-                l2r_candidates_temp.append((candidate, l2r_score))
+                rows.append({'category_neural_score': neural_score, 'category_score': 1.0})
                 continue
 
-            candidate_union = candidate
             candidate = candidate.task
+            features = self.feature_store.get(candidate)
+            row = {'neural_score': neural_score}
 
             # >>> depending on domain classification, rank search results from certain scores more
-
             if query.domain == Session.Domain.COOKING:
                 if candidate.domain_name.lower() in ['seriouseats', 'wholefoodmarket', 'wholefoodsmarket',
                                                      'wholefoods']:
-                    l2r_score += weights['source_domain_score'] * 1
+                    row['source_domain_score'] = 1.0
 
-            # >>> title text similarity (neural) <<<
-            neural_score = score_candidate_output.score[i]
-            l2r_score += weights['neural_score'] * neural_score
-
-            # >>> title text similarity (jaccard) <<<
-            title_processed = self.__processing(candidate.title)
-            title_utterance_score = jaccard_sim(utterance_processed, title_processed)
-            l2r_score += weights['title_utterance_score'] * title_utterance_score
-
-            # >>> requirements text similarity (jaccard)  <<<
-            requirements_processed = self.__processing(" ".join([r.name for r in candidate.requirement_list]))
-            requirements_utterance_score = jaccard_sim(utterance_processed, requirements_processed)
-            l2r_score += weights['requirements_utterance_score'] * requirements_utterance_score
-
-            # >>> tag text similarity (jaccard)  <<<
-            tags_processed = self.__processing(" ".join(candidate.tags))
-            tags_utterance_score = jaccard_sim(utterance_processed, tags_processed)
-            l2r_score += weights['tags_utterance_score'] * tags_utterance_score
-
-            # >>> step count <<<
-            num_steps = len(candidate.steps)
-            if num_steps < 4:
-                step_score = 0.5
-            elif 4 <= num_steps < 10:
-                step_score = 1.0
-            elif 10 <= num_steps < 15:
-                step_score = 0.7
-            elif 15 <= num_steps < 20:
-                step_score = 0.4
-            else:
-                step_score = 0.0
-            l2r_score += weights['step_score'] * step_score
-
-            # >>> average words in step <<<
-            w_steps = [len(s.response.speech_text.split(" ")) for s in candidate.steps]
-            av_w_steps = sum(w_steps) / len(w_steps)
-            if av_w_steps < 5:
-                av_w_steps_score = 0.5
-            elif 5 <= av_w_steps < 20:
-                av_w_steps_score = 1.0
-            elif 20 <= av_w_steps < 30:
-                av_w_steps_score = 0.7
-            elif 30 <= av_w_steps < 40:
-                av_w_steps_score = 0.25
-            else:
-                av_w_steps_score = 0.0
-            l2r_score += weights['av_w_steps_score'] * av_w_steps_score
-
-            # >>> requirement count <<<
-            num_requirements = len(candidate.requirement_list)
-            if num_requirements < 4:
-                requirements_score = 0.5
-            elif 4 <= num_requirements < 8:
-                requirements_score = 1.0
-            elif 8 <= num_steps < 12:
-                requirements_score = 0.7
-            elif 12 <= num_steps < 16:
-                requirements_score = 0.5
-            else:
-                requirements_score = 0.0
-            l2r_score += weights['requirements_score'] * requirements_score
-
-            # >>> quality rating <<<
-            rating_score = float(candidate.rating_out_100) / 100 if candidate.rating_out_100 else 0.35
-            l2r_score += weights['rating_score'] * rating_score
-
-            # >>> has image <<<
-            image_score = 1.0 if candidate.thumbnail_url and "https://oat-2-data.s3.amazonaws.com/" != candidate.thumbnail_url else 0.0
-            l2r_score += weights['image_score'] * image_score
-
-            # >>> rating count <<<
-            rating_count = candidate.rating_count
-            if rating_count == 0:
-                rating_count_score = 0.0
-            elif 1 <= rating_count < 25:
-                rating_count_score = 0.2
-            elif 25 <= num_steps < 100:
-                rating_count_score = 0.4
-            elif 100 <= num_steps < 250:
-                rating_count_score = 0.6
-            else:
-                rating_count_score = 1.0
-            l2r_score += weights['rating_count_score'] * rating_count_score
-
-            # >>> views <<<
-            views = candidate.rating_count
-            if views == 0:
-                views_score = 0.0
-            elif 1 <= views < 100:
-                views_score = 0.2
-            elif 100 <= views < 1000:
-                views_score = 0.4
-            elif 1000 <= views < 10000:
-                views_score = 0.6
-            else:
-                views_score = 1.0
-            l2r_score += weights['views_score'] * views_score
+            # >>> title, requirements and tags text similarity (jaccard) <<<
+            row['title_utterance_score'] = jaccard_sim(utterance_processed, features.title)
+            row['requirements_utterance_score'] = jaccard_sim(utterance_processed, features.requirements)
+            row['tags_utterance_score'] = jaccard_sim(utterance_processed, features.tags)
 
-            # >>> reputable domain <<<
-            domain_score = 1.0 if any(d in str(candidate.domain_name).lower() for d in self.good_domains) else 0.0
-            l2r_score += weights['domain_score'] * domain_score
+            # >>> step/requirement counts, ratings, image, views, staged (precomputed) <<<
+            row.update(zip(STATIC_FEATURES, features.static))
 
-            # >>> promote staged <<<
-            staged_score = 1.0 if "staged" in candidate.dataset else 0.0
-            l2r_score += weights['staged_score'] * staged_score
+            # >>> reputable domain <<<
+            row['domain_score'] = 1.0 if self.good_domains.matches(str(candidate.domain_name).lower()) else 0.0
 
             # >>> reputable author <<<
-            author_score = 1.0 if candidate.author.lower() in self.good_authors else 0.0
-            if candidate.author.lower() in self.good_authors:
+            row['author_score'] = 1.0 if candidate.author.lower() in self.good_authors else 0.0
+            if row['author_score']:
                 logger.info(f'GOOD AUTHOR: {candidate.author}')
-            l2r_score += weights['author_score'] * author_score
-
-            # Append L2R score with candidate taskmap
-            l2r_candidates_temp.append((candidate_union, l2r_score))
 
-            i += 1
+            rows.append(row)
 
-            # set st start
-            if not max_l2r_score:
-                max_l2r_score = l2r_score
-            if not min_l2r_score:
-                min_l2r_score = l2r_score
+        matrix = feature_matrix(rows)
+        l2r_scores = matrix @ weights
+        l2r_candidates = [(candidate, float(l2r_score), features) for candidate, l2r_score, features
+                          in zip(retrieval_result.candidate_list.candidates, l2r_scores, matrix)]
 
-            # set st start
-            if max_l2r_score < l2r_score:
-                max_l2r_score = l2r_score
-            if min_l2r_score > l2r_score:
-                min_l2r_score = l2r_score
-
-        l2r_candidates = []
-        for candidates, l2r_score in l2r_candidates_temp:
-            l2r_candidates.append((candidates, l2r_score))
         # Sort by l2r_score and select top_k highest.
         sorted_candidates = sorted(l2r_candidates, key=lambda x: x[1], reverse=True)
 
@@ -293,7 +121,7 @@ class FeatureReRanker:
         filtered_candidates = []
         already_seen_domains_names = []
 
-        for candidate, l2r_score in sorted_candidates:
+        for candidate, l2r_score, features in sorted_candidates:
             task = candidate.task
             # don't include bad urls
             if task.source_url in self.bad_urls:
@@ -308,14 +136,14 @@ class FeatureReRanker:
                         "difficulty": task.difficulty
                     }
                 else:
-                    filtered_candidates.append((candidate, l2r_score))
+                    filtered_candidates.append((candidate, l2r_score, features))
                     if Session.Domain.COOKING:
                         already_seen_domains_names.append(task.domain_name)
             # COOKING task diversification - skip domain names that are not great that we have seen before
             elif task.domain_name in already_seen_domains_names and Session.Domain.COOKING:
                 continue
             else:
-                filtered_candidates.append((candidate, l2r_score))
+                filtered_candidates.append((candidate, l2r_score, features))
                 already_seen_domains_names.append(task.domain_name)
 
         new_sorted_candidates = []
@@ -334,7 +162,7 @@ class FeatureReRanker:
                     filtered_candidates[idx]
 
         logger.info('--- SophIain 2Rank scores ---')
-        for candidate, l2r_score in filtered_candidates[:9]:
+        for candidate, l2r_score, features in filtered_candidates[:9]:
             title = getattr(candidate, candidate.WhichOneof('candidate')).title
             cat_or_task = type(getattr(candidate, candidate.WhichOneof('candidate')))
             if 'TaskMap' in str(cat_or_task):
@@ -348,7 +176,7 @@ class FeatureReRanker:
 
         # Init TaskMapList.
         candidate_list: CandidateList = CandidateList()
-        for candidate, l2r_score in filtered_candidates[:9]:
+        for candidate, l2r_score, features in filtered_candidates[:9]:
             doc_id = get_docid(candidate.task.source_url)
 
             # augment index match with API match data for specific fields
@@ -361,8 +189,27 @@ class FeatureReRanker:
 
             candidate_list.candidates.append(candidate)
 
+        # Log the features of the returned candidates, so that the weights can be learned from clicks
+        search_log = SearchLog()
+        search_log.MergeFrom(retrieval_result.search_log)
+        search_log.feature_names.extend(L2R_FEATURES)
+        search_log.weights_version = self.l2r_weights.version
+        for rank, (candidate, l2r_score, features) in enumerate(filtered_candidates[:9]):
+            union = getattr(candidate, candidate.WhichOneof('candidate'))
+            l2r_doc = search_log.l2r_doc.add()
+            l2r_doc.rank = rank
+            l2r_doc.title = union.title
+            l2r_doc.l2r_score = str(round(l2r_score, 3))
+            l2r_doc.features.extend(features.tolist())
+            if candidate.HasField('task'):
+                l2r_doc.taskmap_id = union.taskmap_id
+                l2r_doc.source_url = union.source_url
+                l2r_doc.domain_name = union.domain_name
+                l2r_doc.author = union.author
+
         # Search results
         search_results = SearchResults()
         search_results.candidate_list.MergeFrom(candidate_list)
+        search_results.search_log.MergeFrom(search_log)
 
         return search_results
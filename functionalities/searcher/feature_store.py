@@ -0,0 +1,69 @@
+import os
+import threading
+from collections import OrderedDict
+
+from taskmap_pb2 import TaskMap
+from utils import logger
+from utils.taskmap_features import TaskMapFeatureExtractor, read_taskmap_features, STATIC_FEATURES
+
+
+class TaskMapFeatures:
+    """ Cached reranking features of a single TaskMap. """
+
+    __slots__ = ['static', 'title', 'requirements', 'tags']
+
+    def __init__(self, features: dict):
+        self.static = [features[name] for name in STATIC_FEATURES]
+        self.title = frozenset(features['title'])
+        self.requirements = frozenset(features['requirements'])
+        self.tags = frozenset(features['tags'])
+
+
+class FeatureStore:
+    """ Lookup of query-independent reranking features by taskmap_id.
+
+    Features for every indexed TaskMap are precomputed by the offline index builder and loaded
+    at startup. TaskMaps that are not in the index (e.g. results from the remote/API searcher)
+    have their features computed on first use and kept in a bounded LRU cache.
+    """
+
+    def __init__(self, features_path: str = "", cache_size: int = 5000):
+        self.extractor = TaskMapFeatureExtractor()
+        self.precomputed = {}
+        self.cache: OrderedDict = OrderedDict()
+        self.cache_size = cache_size
+        self.lock = threading.Lock()
+
+        if features_path and os.path.isfile(features_path):
+            for taskmap_id, features in read_taskmap_features(features_path):
+                self.precomputed[taskmap_id] = TaskMapFeatures(features)
+            logger.info(f"Loaded precomputed features for {len(self.precomputed)} TaskMaps")
+        else:
+            logger.warning(f"No precomputed TaskMap features found at '{features_path}', computing them on demand")
+
+    @staticmethod
+    def __key(taskmap: TaskMap) -> str:
+        return taskmap.taskmap_id or taskmap.source_url
+
+    def get(self, taskmap: TaskMap) -> TaskMapFeatures:
+        key = self.__key(taskmap)
+        features = self.precomputed.get(key)
+        if features is not None:
+            return features
+
+        with self.lock:
+            features = self.cache.get(key)
+            if features is not None:
+                self.cache.move_to_end(key)
+                return features
+
+        features = TaskMapFeatures(self.extractor.extract(taskmap))
+        with self.lock:
+            self.cache[key] = features
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return features
+
+    def processing(self, sentence: str):
+        """ process queries with the same analyzers used to build the cached text features. """
+        return self.extractor.processing(sentence)
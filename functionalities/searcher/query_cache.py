@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, Optional
+
+from searcher_pb2 import SearchResults
+
+
+class QueryResultCache:
+    """ TTL + LRU cache of the final SearchResults of the composed searcher.
+
+    Entries are keyed by the caller (processed query, domain, headless, top_k) and expire
+    ``ttl_seconds`` after being computed. Concurrent misses on the same key are de-duplicated:
+    the first request runs the search and the others wait for its result instead of searching
+    again (singleflight). Results are returned as copies, so callers can modify them freely.
+    """
+
+    def __init__(self, max_size: int = 1000, ttl_seconds: float = 3600):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.entries: OrderedDict = OrderedDict()
+        self.in_flight: Dict[Hashable, Future] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __lookup(self, key: Hashable) -> Optional[SearchResults]:
+        """ Returns the cached results for key if they haven't expired. Must hold the lock. """
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expiry, results = entry
+        if expiry < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return results
+
+    def __store(self, key: Hashable, results: SearchResults) -> None:
+        """ Must hold the lock. """
+        self.entries[key] = (time.monotonic() + self.ttl_seconds, results)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    @staticmethod
+    def __copy(results: SearchResults) -> SearchResults:
+        copied = SearchResults()
+        copied.CopyFrom(results)
+        return copied
+
+    def get(self, key: Hashable) -> Optional[SearchResults]:
+        with self.lock:
+            results = self.__lookup(key)
+        return self.__copy(results) if results is not None else None
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], SearchResults]) -> SearchResults:
+        """ Returns the cached results for key, or runs compute() once for all the concurrent callers.
+
+        Args:
+            key: cache key of the query
+            compute: function running the search, called on a miss
+
+        Empty results aren't cached, as they are usually caused by a searcher timing out.
+        If compute() raises, the exception is passed on to every waiting caller.
+        """
+        with self.lock:
+            results = self.__lookup(key)
+            if results is not None:
+                self.hits += 1
+                return self.__copy(results)
+
+            future = self.in_flight.get(key)
+            owner = future is None
+            if owner:
+                self.misses += 1
+                future = Future()
+                self.in_flight[key] = future
+
+        if not owner:
+            with self.lock:
+                self.hits += 1
+            return self.__copy(future.result())
+
+        try:
+            results = compute()
+        except BaseException as e:
+            with self.lock:
+                del self.in_flight[key]
+            future.set_exception(e)
+            raise
+
+        # waiting callers and the cache get a copy the owner won't modify
+        shared = self.__copy(results)
+        with self.lock:
+            del self.in_flight[key]
+            if len(shared.candidate_list.candidates) > 0:
+                self.__store(key, shared)
+        future.set_result(shared)
+        return results
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {'size': len(self.entries), 'hits': self.hits, 'misses': self.misses}
@@ -15,7 +15,8 @@ import json
 import os
 import grpc
 from google.protobuf.json_format import Parse
-from utils import get_file_system, logger
+from utils import get_file_system, logger, ObjectStore
+from utils.object_store import TASKMAP_STORE, CATEGORY_STORE
 
 
 class SearcherPyserini(AbstractSearcher):
@@ -28,6 +29,10 @@ class SearcherPyserini(AbstractSearcher):
         self.searcher.set_rm3(fb_terms=10, fb_docs=10, original_query_weight=0.5)
         self.taskgraph_retriever = LuceneSearcher(index_dir=task_dir)
         self.category_retriever = LuceneSearcher(index_dir=category_dir)
+        # Serialized TaskMaps/Categories written by the ComposedIndexBuilder. Older indexes only
+        # have the JSON documents stored in Lucene, which are used as a fallback.
+        self.taskmap_store = self.__open_store(task_dir, TASKMAP_STORE, TaskMap)
+        self.category_store = self.__open_store(task_dir, CATEGORY_STORE, CategoryDocument)
         self.hybrid = False
         channel = grpc.insecure_channel(os.environ['FUNCTIONALITIES_URL'])
         self.query_builder = QueryBuilderStub(channel)
@@ -47,6 +52,43 @@ class SearcherPyserini(AbstractSearcher):
 
             self.hybrid_searcher = HybridSearcherOverride(self.custom_searcher_dense, self.searcher)
 
+    @staticmethod
+    def __open_store(directory, name, proto_class):
+        if ObjectStore.exists(directory, name):
+            return ObjectStore(directory, name, proto_class)
+        logger.warning(f"No '{name}' object store in {directory}, reading documents from the Lucene index")
+        return None
+
+    def __get_taskmaps(self, ids):
+        """ Fetch a list of TaskMaps by ID, with None for the ones that are not in the index. """
+        if self.taskmap_store is not None:
+            return self.taskmap_store.get_many(ids)
+
+        taskmaps = []
+        for id in ids:
+            doc = self.taskgraph_retriever.doc(docid=id)
+            taskmap = None
+            if doc is not None:
+                taskmap = TaskMap()
+                Parse(json.dumps(json.loads(doc.raw())['document_json']), taskmap)
+            taskmaps.append(taskmap)
+        return taskmaps
+
+    def __get_categories(self, ids):
+        """ Fetch a list of Categories by ID, with None for the ones that are not in the index. """
+        if self.category_store is not None:
+            return self.category_store.get_many(ids)
+
+        categories = []
+        for id in ids:
+            doc = self.category_retriever.doc(docid=id)
+            category = None
+            if doc is not None:
+                category = CategoryDocument()
+                Parse(json.dumps(json.loads(doc.raw())['category_document_json']), category)
+            categories.append(category)
+        return categories
+
     def processing(self, sentence: str):
         """ process queries or sections of documents by removing stopwords before sharding / stemming. """
         user_utterance = UserUtterance()
@@ -60,7 +102,6 @@ class SearcherPyserini(AbstractSearcher):
         candidate_list = CandidateList()
 
         top_k = query.top_k
-        docs = []
 
         if self.hybrid:
             hits = self.hybrid_searcher.search(
@@ -69,34 +110,22 @@ class SearcherPyserini(AbstractSearcher):
         else:
             hits = self.searcher.search(q=self.processing(query.last_utterance), k=top_k)
 
-        for hit in hits:
-            docid = hit[1] if self.hybrid else hit.docid
-            doc = self.taskgraph_retriever.doc(docid=docid)
-            doc_type = "TaskMap"
-            if doc is None:
-                doc = self.category_retriever.doc(docid=docid)
-                doc_type = "Category"
-
-            if not doc is None:
-                docs.append({"doc_string": doc.raw(), "type": doc_type})
+        docids = [hit[1] if self.hybrid else hit.docid for hit in hits]
+        taskmaps = self.__get_taskmaps(docids)
+        missing_ids = [docid for docid, taskmap in zip(docids, taskmaps) if taskmap is None]
+        categories = dict(zip(missing_ids, self.__get_categories(missing_ids)))
 
         title_set = set()
-        for doc in docs:
-            doc_string, doc_type = doc["doc_string"], doc["type"]
-            doc_json = json.loads(doc_string)
+        for docid, taskmap in zip(docids, taskmaps):
             union = TaskmapCategoryUnion()
-            if doc_type == "TaskMap":
-                obj_json = doc_json['document_json']
-                obj = TaskMap()
-                Parse(json.dumps(obj_json), obj)
+            if taskmap is not None:
+                obj = taskmap
                 union.task.CopyFrom(obj)
-            elif doc_type == "Category":
-                obj_json = doc_json['category_document_json']
-                obj = CategoryDocument()
-                Parse(json.dumps(obj_json), obj)
+            elif categories[docid] is not None:
+                obj = categories[docid]
                 union.category.CopyFrom(obj)
             else:
-                raise Exception("Neither category nor task in search results.")
+                continue
             # This should be moved offline
             if obj.title in title_set:
                 continue
@@ -112,15 +141,11 @@ class SearcherPyserini(AbstractSearcher):
 
         candidate_list = CandidateList()
 
-        for id in ids.ids:
-            doc = self.taskgraph_retriever.doc(docid=id)
-            if doc:
+        for taskmap in self.__get_taskmaps(ids.ids):
+            if taskmap is not None:
                 logger.info("DOC FOUND")
                 union = TaskmapCategoryUnion()
-                obj_json = json.loads(doc.raw())['document_json']
-                obj = TaskMap()
-                Parse(json.dumps(obj_json), obj)
-                union.task.CopyFrom(obj)
+                union.task.CopyFrom(taskmap)
                 candidate_list.candidates.append(union)
             else:
                 logger.info("DOC NOT FOUND")
@@ -134,13 +159,9 @@ class SearcherPyserini(AbstractSearcher):
 
         category_list = []
 
-        for id in ids.ids:
-            doc = self.category_retriever.doc(docid=id)
-            if doc:
-                obj_json = json.loads(doc.raw())['category_document_json']
-                obj = CategoryDocument()
-                Parse(json.dumps(obj_json), obj)
-                category_list.append(obj)
+        for category in self.__get_categories(ids.ids):
+            if category is not None:
+                category_list.append(category)
             else:
                 logger.info("Category NOT FOUND")
 
@@ -0,0 +1,60 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+from taskmap_pb2 import TaskMap
+from task_graph import TaskGraph
+
+
+class TaskGraphCache:
+    """
+    Bounded LRU cache of the TaskGraphs parsed from TaskMap protobufs.
+
+    Every task manager call receives the whole TaskMap of the session, so the same graph is
+    rebuilt on every turn. Graphs are keyed by (taskmap_id, hash of the serialized TaskMap),
+    so an edited TaskMap with the same ID gets its own entry.
+
+    Cached graphs are shared between requests and must not be modified: callers that need
+    to run update_graph/remove_node ask for a mutable copy, which only duplicates the nodes
+    and their connections.
+    """
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self.graphs: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def __key(serialized: bytes, taskmap_id: str) -> Tuple[str, str]:
+        return taskmap_id, hashlib.blake2b(serialized, digest_size=16).hexdigest()
+
+    def get(self, taskmap: TaskMap, mutable: bool = False) -> TaskGraph:
+        serialized = taskmap.SerializeToString(deterministic=True)
+        key = self.__key(serialized, taskmap.taskmap_id)
+
+        with self.lock:
+            graph = self.graphs.get(key)
+            if graph is not None:
+                self.graphs.move_to_end(key)
+                self.hits += 1
+
+        if graph is None:
+            # Parse from a private copy, as the nodes keep references to the proto sub-messages
+            graph = TaskGraph(TaskMap.FromString(serialized))
+            with self.lock:
+                self.misses += 1
+                self.graphs[key] = graph
+                while len(self.graphs) > self.max_size:
+                    self.graphs.popitem(last=False)
+
+        return graph.copy() if mutable else graph
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {'size': len(self.graphs), 'hits': self.hits, 'misses': self.misses}
+
+
+task_graph_cache = TaskGraphCache()
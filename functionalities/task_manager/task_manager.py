@@ -4,6 +4,7 @@ from .abstract_task_manager import AbstractTaskManager
 from task_manager_pb2 import TMResponse, TMRequest, InfoRequest, InfoResponse, Statement, ExtraList, TMInfo
 from taskmap_pb2 import TaskState, TaskMap, OutputInteraction, Transcript, ScreenInteraction
 from .scheduler import schedule
+from .graph_cache import task_graph_cache
 from exceptions import EndOfExecutionException
 from task_graph import TaskGraph
 from task_graph.nodes import *
@@ -98,11 +99,13 @@ def manage_progress(request: TMRequest, action: str) -> TMResponse:
         response_id: str = state.execution_list[state.index_to_next - 1]
 
     # Return the response verbatim from the taskmap.
-    task_graph = TaskGraph(taskmap=taskmap)
+    task_graph = task_graph_cache.get(taskmap)
     exec_node: Any = task_graph.get_node(response_id)
-    output: OutputInteraction = exec_node.response
-    exec_node.response.speech_text = f"{verbal_progress(state.index_to_next, len(state.execution_list))}" \
-                                     f"{exec_node.response.speech_text}"
+    # The cached graph is shared, so the response is copied before being modified
+    output: OutputInteraction = OutputInteraction()
+    output.CopyFrom(exec_node.response)
+    output.speech_text = f"{verbal_progress(state.index_to_next, len(state.execution_list))}" \
+                         f"{exec_node.response.speech_text}"
     output.screen.footer = f'{taskmap.title}'
     output.screen.headline = f"Step {state.index_to_next}"
     output.screen.hint_text = random.choice(["next", "what can you do"])
@@ -136,7 +139,8 @@ def extract_statements(request: InfoRequest, statement_type: str) -> InfoRespons
 
     taskmap: TaskMap = request.taskmap
     state: TaskState = request.state
-    graph: TaskGraph = TaskGraph(taskmap)
+    # conditions and actions update the graph with the current state, so they need their own copy
+    graph: TaskGraph = task_graph_cache.get(taskmap, mutable=statement_type != "requirements")
 
     if len(state.execution_list) > state.index_to_next - 1 > -1 and request.local:
         current_node_id: str = state.execution_list[state.index_to_next - 1]
@@ -217,7 +221,7 @@ class TaskManager(AbstractTaskManager):
         taskmap: TaskMap = request.taskmap
         response_id: str = state.execution_list[state.index_to_next - 1]
         # Return the response verbatim from the taskmap.
-        task_graph = TaskGraph(taskmap=taskmap)
+        task_graph = task_graph_cache.get(taskmap)
         exec_node: Any = task_graph.get_node(response_id)
         return exec_node.response
 
@@ -240,7 +244,7 @@ class TaskManager(AbstractTaskManager):
         response_id: str = state.execution_list[state.index_to_next - 1]
 
         # Return the response verbatim from the taskmap.
-        task_graph = TaskGraph(taskmap=taskmap)
+        task_graph = task_graph_cache.get(taskmap)
         exec_node: Any = task_graph.get_node(response_id)
 
         if exec_node.response.description != "":
@@ -254,7 +258,8 @@ class TaskManager(AbstractTaskManager):
             output.screen.on_click_list.append(f"Back to step {state.index_to_next}")
             output.screen.hint_text = "let's continue"
         else:
-            output: OutputInteraction = exec_node.response
+            output: OutputInteraction = OutputInteraction()
+            output.CopyFrom(exec_node.response)
             output.speech_text = random.choice(NO_MORE_DETAILS)
 
         if not taskmap.headless:
@@ -313,7 +318,7 @@ class TaskManager(AbstractTaskManager):
 
         taskmap: TaskMap = request.taskmap
         state: TaskState = request.state
-        graph: TaskGraph = TaskGraph(taskmap)
+        graph: TaskGraph = task_graph_cache.get(taskmap, mutable=True)
         graph.update_graph(state)
 
         # Fetching current Node
@@ -344,7 +349,7 @@ class TaskManager(AbstractTaskManager):
 
         taskmap: TaskMap = request.taskmap
         state: TaskState = request.state
-        graph: TaskGraph = TaskGraph(taskmap)
+        graph: TaskGraph = task_graph_cache.get(taskmap, mutable=True)
         graph.update_graph(state)  # This should remove all the already resolved conditions
 
         condition_nodes = set()
@@ -0,0 +1,219 @@
+import threading
+import time
+
+from concurrent.futures import Future
+from typing import List, Optional
+
+import torch
+
+from utils import logger
+
+
+class QueueFullError(Exception):
+    """ Raised when a request is rejected because the queue is full (load shedding). """
+
+
+class DeadlineExceededError(Exception):
+    """ Raised when a request's deadline passes before its sequence is complete. """
+
+
+class GenerationRequest:
+    def __init__(self, prompt: str, prompt_ids: List[int], max_tokens: int, deadline: Optional[float]):
+        self.prompt = prompt
+        self.prompt_ids = prompt_ids
+        self.max_tokens = max_tokens
+        self.deadline = deadline
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+
+    def expired(self, now: float) -> bool:
+        return self.deadline is not None and now >= self.deadline
+
+
+class BatchScheduler:
+    """ Runs the prompts of concurrent callers through the model in dynamic batches.
+
+    Requests are queued by ``submit``, and a single worker thread repeatedly takes the oldest
+    request together with up to ``max_batch_size - 1`` other queued requests of a similar prompt
+    length (in buckets of ``bucket_size`` tokens), so little compute is wasted on padding.
+    Each batch is decoded greedily step by step, and every request's future is resolved as
+    soon as its own sequence is complete, without waiting for the rest of the batch.
+
+    Requests whose deadline passes are dropped from the queue or stop being decoded. When the
+    queue can't take ``max_queue_size`` requests more, new ones are rejected with QueueFullError.
+    If the GPU runs out of memory, the batch is split in two and the maximum batch size lowered.
+    """
+
+    def __init__(self, model, tokenizer, device: str, max_batch_size: int = 8, max_queue_size: int = 32,
+                 bucket_size: int = 64, batch_wait: float = 0.005):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.device = device
+        self.max_batch_size = max_batch_size
+        self.max_queue_size = max_queue_size
+        self.bucket_size = bucket_size
+        self.batch_wait = batch_wait
+
+        self.pending: List[GenerationRequest] = []
+        self.condition = threading.Condition()
+        self.stats = {'completed': 0, 'expired': 0, 'rejected': 0, 'failed': 0, 'batches': 0}
+
+        self.thread = threading.Thread(target=self.__run, daemon=True)
+        self.thread.start()
+
+    def submit(self, prompt: str, max_tokens: int, timeout: Optional[float] = None) -> Future:
+        """ Queues a prompt, returning a future for the generated text (prompt included).
+
+        Args:
+            prompt: formatted prompt
+            max_tokens: maximum number of new tokens
+            timeout: seconds until the caller stops waiting, None for no deadline
+        """
+        return self.submit_many([prompt], max_tokens, timeout)[0]
+
+    def submit_many(self, prompts: List[str], max_tokens: int, timeout: Optional[float] = None) -> List[Future]:
+        """ Queues the prompts of a batch request together, returning a future per prompt.
+
+        Either every prompt is queued or, if they don't all fit in the queue, every prompt is rejected
+        with QueueFullError, so a caller never gets back only part of its responses. A batch larger
+        than ``max_queue_size`` is only queued when the queue is empty.
+
+        Args:
+            prompts: formatted prompts
+            max_tokens: maximum number of new tokens of each prompt
+            timeout: seconds until the caller stops waiting, None for no deadline
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        requests = [GenerationRequest(prompt, self.tokenizer(prompt).input_ids, max_tokens, deadline)
+                    for prompt in prompts]
+        with self.condition:
+            if self.pending and len(self.pending) + len(requests) > self.max_queue_size:
+                self.stats['rejected'] += len(requests)
+                raise QueueFullError(f"{len(self.pending)} requests already queued, "
+                                     f"can't queue {len(requests)} more")
+            self.pending.extend(requests)
+            self.condition.notify()
+        return [request.future for request in requests]
+
+    def __bucket(self, request: GenerationRequest) -> int:
+        return len(request.prompt_ids) // self.bucket_size
+
+    def __next_batch(self) -> List[GenerationRequest]:
+        with self.condition:
+            while not self.pending:
+                self.condition.wait()
+
+        # give concurrent callers a moment to join the batch
+        time.sleep(self.batch_wait)
+
+        with self.condition:
+            now = time.monotonic()
+            for request in [request for request in self.pending if request.expired(now)]:
+                self.pending.remove(request)
+                self.__expire(request)
+            if not self.pending:
+                return []
+
+            bucket = self.__bucket(self.pending[0])
+            batch = [request for request in self.pending if self.__bucket(request) == bucket]
+            batch = batch[:self.max_batch_size]
+            for request in batch:
+                self.pending.remove(request)
+            return batch
+
+    def __run(self) -> None:
+        while True:
+            batch = self.__next_batch()
+            if batch:
+                self.__generate_or_split(batch)
+
+    def __expire(self, request: GenerationRequest) -> None:
+        self.stats['expired'] += 1
+        request.future.set_exception(DeadlineExceededError(
+            f"deadline exceeded after {time.monotonic() - request.enqueued_at:0.2f} seconds"))
+
+    def __generate_or_split(self, batch: List[GenerationRequest]) -> None:
+        try:
+            self.__generate(batch)
+        except torch.cuda.OutOfMemoryError as e:
+            torch.cuda.empty_cache()
+            batch = [request for request in batch if not request.future.done()]
+            if len(batch) <= 1:
+                logger.warning(f"Ran out of GPU memory on a single request: {e}")
+                self.__fail(batch, e)
+                return
+            self.max_batch_size = max(1, len(batch) // 2)
+            logger.warning(f"Ran out of GPU memory on a batch of {len(batch)}, "
+                           f"lowering the maximum batch size to {self.max_batch_size}")
+            half = len(batch) // 2
+            self.__generate_or_split(batch[:half])
+            self.__generate_or_split(batch[half:])
+        except Exception as e:
+            logger.warning(f"Running LLM batch failed: {e}")
+            self.__fail(batch, e)
+
+    def __fail(self, batch: List[GenerationRequest], e: BaseException) -> None:
+        for request in batch:
+            if not request.future.done():
+                self.stats['failed'] += 1
+                request.future.set_exception(e)
+
+    def __finish(self, request: GenerationRequest, generated: List[int]) -> None:
+        self.stats['completed'] += 1
+        text = self.tokenizer.decode(request.prompt_ids + generated, skip_special_tokens=True)
+        request.future.set_result(str(text))
+
+    def __generate(self, batch: List[GenerationRequest]) -> None:
+        self.stats['batches'] += 1
+        pad_token_id = self.tokenizer.pad_token_id
+        eos_token_id = self.tokenizer.eos_token_id
+
+        # left padding, so the next token of every sequence is predicted from the last column
+        length = max(len(request.prompt_ids) for request in batch)
+        input_ids = torch.full((len(batch), length), pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(batch), length), dtype=torch.long)
+        for i, request in enumerate(batch):
+            input_ids[i, length - len(request.prompt_ids):] = torch.tensor(request.prompt_ids, dtype=torch.long)
+            attention_mask[i, length - len(request.prompt_ids):] = 1
+        input_ids = input_ids.to(self.device)
+        attention_mask = attention_mask.to(self.device)
+        position_ids = (attention_mask.cumsum(-1) - 1).clamp(min=0)
+
+        generated: List[List[int]] = [[] for _ in batch]
+        active = [True] * len(batch)
+        past_key_values = None
+
+        with torch.no_grad():
+            for _ in range(max(request.max_tokens for request in batch)):
+                outputs = self.model(input_ids=input_ids, attention_mask=attention_mask, position_ids=position_ids,
+                                     past_key_values=past_key_values, use_cache=True)
+                past_key_values = outputs.past_key_values
+                next_tokens = outputs.logits[:, -1, :].argmax(dim=-1)
+
+                now = time.monotonic()
+                for i, request in enumerate(batch):
+                    if not active[i]:
+                        continue
+                    token = int(next_tokens[i])
+                    if token != eos_token_id:
+                        generated[i].append(token)
+                    if token == eos_token_id or len(generated[i]) >= request.max_tokens:
+                        active[i] = False
+                        self.__finish(request, generated[i])
+                    elif request.expired(now):
+                        active[i] = False
+                        self.__expire(request)
+
+                if not any(active):
+                    return
+
+                # finished sequences keep decoding padding until the whole batch is done
+                next_tokens = torch.where(torch.tensor(active, device=next_tokens.device), next_tokens,
+                                          torch.full_like(next_tokens, pad_token_id))
+                input_ids = next_tokens.unsqueeze(-1)
+                attention_mask = torch.cat([attention_mask, attention_mask.new_ones((len(batch), 1))], dim=-1)
+                position_ids = position_ids[:, -1:] + 1
+
+        for i, request in enumerate(batch):
+            if active[i]:
+                self.__finish(request, generated[i])
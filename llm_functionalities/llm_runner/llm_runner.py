@@ -1,73 +1,99 @@
+import os
+from concurrent.futures import TimeoutError
+from typing import Optional
 
 import torch
 
 from transformers import AutoModelForCausalLM, AutoTokenizer
-from torch.cuda import OutOfMemoryError
 
 from utils import logger, Downloader
 from compiled_protobufs.llm_pb2 import ModelRequest, ModelResponse, ModelBatchRequest, ModelBatchResponse
 
+from .batch_scheduler import BatchScheduler, DeadlineExceededError, QueueFullError
+
 
 class LLMRunner:
     def __init__(self):
+        # a (small) model name or path to load instead of Alpaca, which also allows running on CPU for testing
+        model_name = os.environ.get("LLM_MODEL_NAME")
+
         if torch.cuda.is_available():
-            artefact_id = "alpaca_llm"
-            downloader = Downloader()
-            downloader.download([artefact_id])
-            model_name = downloader.get_artefact_path(artefact_id)
+            if model_name is None:
+                artefact_id = "alpaca_llm"
+                downloader = Downloader()
+                downloader.download([artefact_id])
+                model_name = downloader.get_artefact_path(artefact_id)
             self.model = AutoModelForCausalLM.from_pretrained(
                 model_name,
                 torch_dtype=torch.float16,
                 device_map="auto",
                 max_memory={i: '24000MB' for i in range(torch.cuda.device_count())},
             )
-            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-
-            self.batch_tokenizer = AutoTokenizer.from_pretrained(model_name)
-            self.batch_tokenizer.padding_side = "left"
-            self.batch_tokenizer.pad_token = self.batch_tokenizer.eos_token
-
-            logger.info("Finished loading Alpaca model")
+            device = "cuda:0"
+        elif model_name is not None:
+            logger.info(f'No GPU available, loading {model_name} on CPU')
+            self.model = AutoModelForCausalLM.from_pretrained(model_name)
+            device = "cpu"
         else:
             logger.info('No GPU available, not loading LLM...')
             exit(1)
 
-    def call_model(self, model_request: ModelRequest) -> ModelResponse:
-        model_response: ModelResponse = ModelResponse()
+        self.model.eval()
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
 
-        try:
-            formatted_prompt = model_request.formatted_prompt
-            max_tokens = model_request.max_tokens
-            inputs = self.tokenizer(formatted_prompt, return_tensors="pt").to("cuda:0")
-            outputs = self.model.generate(inputs=inputs.input_ids, max_new_tokens=max_tokens)
-            response_text = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-
-            model_response.text = str(response_text)
+        self.scheduler = BatchScheduler(
+            self.model, self.tokenizer, device,
+            max_batch_size=int(os.environ.get("LLM_MAX_BATCH_SIZE", 8)),
+            max_queue_size=int(os.environ.get("LLM_MAX_QUEUE_SIZE", 32)),
+        )
+        logger.info(f"Finished loading {model_name}")
 
+    def __wait(self, future, timeout: Optional[float]) -> str:
+        try:
+            return future.result(timeout=timeout)
+        except (DeadlineExceededError, TimeoutError):
+            logger.info('LLM request timed out before its response was generated')
         except Exception as e:
             logger.info(f'Running LLM failed: {e}')
+        return ""
 
-        return model_response
+    def call_model(self, model_request: ModelRequest, timeout: Optional[float] = None) -> ModelResponse:
+        """ Generates the response to a single prompt, batched with the prompts of concurrent callers.
 
-    def batch_call_model(self, model_request: ModelBatchRequest) -> ModelBatchResponse:
-        model_responses: ModelBatchResponse = ModelBatchResponse()
+        Args:
+            model_request: prompt and maximum number of new tokens
+            timeout: seconds the caller is willing to wait (e.g. the remaining gRPC deadline)
+        """
+        model_response: ModelResponse = ModelResponse()
 
         try:
-            formatted_prompts = list(model_request.formatted_prompts)
-            max_tokens = model_request.max_tokens
+            future = self.scheduler.submit(model_request.formatted_prompt, model_request.max_tokens, timeout)
+        except QueueFullError as e:
+            logger.warning(f'LLM overloaded, dropping request: {e}')
+            return model_response
+
+        model_response.text = self.__wait(future, timeout)
+        return model_response
 
-            encodings = self.batch_tokenizer(formatted_prompts, padding=True, return_tensors='pt').to("cuda:0")
+    def batch_call_model(self, model_request: ModelBatchRequest, timeout: Optional[float] = None) -> ModelBatchResponse:
+        """ Generates the responses to several prompts, which are scheduled like individual requests.
 
-            with torch.no_grad():
-                generated_ids = self.model.generate(**encodings, max_new_tokens=max_tokens, do_sample=False)
-            generated_texts = self.batch_tokenizer.batch_decode(generated_ids, skip_special_tokens=True)
+        Responses are returned in the order of the prompts, with empty texts for prompts that timed
+        out or failed. If the prompts don't all fit in the queue, the whole request is dropped and no
+        responses are returned.
+        """
+        model_responses: ModelBatchResponse = ModelBatchResponse()
+
+        try:
+            futures = self.scheduler.submit_many(list(model_request.formatted_prompts), model_request.max_tokens,
+                                                 timeout)
+        except QueueFullError as e:
+            logger.warning(f'LLM overloaded, dropping batch request: {e}')
+            return model_responses
 
-            for text in generated_texts:
-                model_responses.text.append(text)
+        for future in futures:
+            model_responses.text.append(self.__wait(future, timeout))
 
-        except OutOfMemoryError as e:
-            logger.info(f'We ran out of GPU memory: {e}')
-            torch.cuda.empty_cache()
-            exit(1)
-        
         return model_responses
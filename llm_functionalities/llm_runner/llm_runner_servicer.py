@@ -9,7 +9,8 @@ class Servicer(LLMRunnerServicer):
         self.model = DefaultLLMRunner()
 
     def call_model(self, query: ModelRequest, context) -> ModelResponse:
-        return self.model.call_model(query)
-    
+        # stop generating for callers whose gRPC deadline has passed
+        return self.model.call_model(query, timeout=context.time_remaining())
+
     def batch_call_model(self, query: ModelBatchRequest, context) -> ModelBatchResponse:
-        return self.model.batch_call_model(query)
+        return self.model.batch_call_model(query, timeout=context.time_remaining())
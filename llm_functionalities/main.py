@@ -1,7 +1,7 @@
 import grpc
 from concurrent import futures
 
-from utils import logger, get_interceptors
+from utils import logger, get_interceptors, SERVER_OPTIONS
 
 from llm_runner import (
     Servicer as LLM_Runner_Servicer,
@@ -12,8 +12,9 @@ from llm_runner import (
 def serve():
     interceptors = get_interceptors()
 
+    # requests wait for the LLM runner's batch scheduler, so allow enough of them to form full batches
     server = grpc.server(
-        futures.ThreadPoolExecutor(max_workers=10), interceptors=interceptors
+        futures.ThreadPoolExecutor(max_workers=32), interceptors=interceptors, options=SERVER_OPTIONS
     )
 
     add_llm_runner_to_server(LLM_Runner_Servicer(), server)
@@ -2,7 +2,8 @@ import torch
 
 from category_retrieval_pb2 import CategorySearchResult
 from offline_pb2 import CategoryDocument
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import util
+from sentence_embeddings import get_sentence_encoder
 from utils import logger
 
 
@@ -19,9 +20,7 @@ def order_subcategories(matched_category, idxs) -> CategoryDocument:
 class CategoryRelevanceScorer:
 
     def __init__(self) -> None:
-        self.embedder = SentenceTransformer(
-            'all-MiniLM-L6-v2', cache_folder="/shared/file_system/models/1_Pooling"
-        )
+        self.embedder = get_sentence_encoder('all-MiniLM-L6-v2')
         self.query_list = []
 
     def score_categories(self, search_result: CategorySearchResult) -> CategoryDocument:
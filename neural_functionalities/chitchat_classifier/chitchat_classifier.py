@@ -1,7 +1,8 @@
 from chitchat_classifier_pb2 import ChitChatRequest, ChitChatResponse
 from .abstract_chitchat_classifier import AbstractChitChatClassifier
 
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import util
+from sentence_embeddings import get_sentence_encoder
 
 from utils import (
     CHITCHAT_TUPLE, logger, CHITCHAT_GREETINGS
@@ -11,7 +12,7 @@ from utils import (
 class ChitChatClassifier(AbstractChitChatClassifier):
     def __init__(self):
         logger.info('loading Chit Chat Classifier...')
-        self.model = SentenceTransformer('all-MiniLM-L6-v2', cache_folder="/shared/file_system/models/1_Pooling")
+        self.model = get_sentence_encoder('all-MiniLM-L6-v2')
         self.prompt_embeddings = []
         CHITCHAT_TUPLE.extend(CHITCHAT_GREETINGS)
         self.responses = [pair[1] for pair in CHITCHAT_TUPLE]
@@ -49,14 +49,19 @@ from chitchat_classifier import (
 #     add_to_server as add_query_search_to_server
 # )
 
-from utils import get_interceptors
+from sentence_embeddings import embedding_models
+
+from utils import get_interceptors, SERVER_OPTIONS
 
 
 def serve():
     interceptors = get_interceptors()
 
+    # the sBERT model is shared by most of the modules below, load it once up front
+    embedding_models.get('all-MiniLM-L6-v2')
+
     server = grpc.server(
-        futures.ThreadPoolExecutor(max_workers=10), interceptors=interceptors
+        futures.ThreadPoolExecutor(max_workers=10), interceptors=interceptors, options=SERVER_OPTIONS
     )
 
     add_task_qa_to_server(Task_QA_Servicer(), server)
@@ -73,6 +78,7 @@ def serve():
     add_category_relevance_to_server(Category_Relevance_Scorer(), server)
 
     logger.info('Finished loading all models')
+    embedding_models.log_stats()
 
     server.add_insecure_port("[::]:8000")
     server.start()
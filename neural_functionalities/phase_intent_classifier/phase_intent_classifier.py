@@ -17,7 +17,8 @@ from models.question_classifier.question_classifier_model import TextClassifier
 from utils import logger, Downloader
 
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import util
+from sentence_embeddings import get_sentence_encoder
 
 
 def load_annotations():
@@ -49,9 +50,7 @@ class PhaseIntentClassifier(AbstractClassifier):
     def __init__(self):
 
         logger.info('loading and computing intent embeddings')
-        self.embedder = SentenceTransformer(
-            'all-MiniLM-L6-v2', cache_folder="/shared/file_system/models/1_Pooling"
-        )
+        self.embedder = get_sentence_encoder('all-MiniLM-L6-v2')
         self.intents_tree = json.load(open('/shared/models/RinD/single_utterance_classificaitons.json', 'r'))
         self.intents_map = []
         self.utterances = []
@@ -1,35 +1,28 @@
-import os
 import torch
 import time
 import threading
-import grpc
 
 from .abstract_semantic_searcher import AbstractSemanticSearcher
 from semantic_searcher_pb2 import SemanticQuery, ThemeMapping
-from database_pb2_grpc import DatabaseStub
-from database_pb2 import Void
 
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import util
+from sentence_embeddings import get_sentence_encoder
 
-from utils import logger
+from utils import logger, theme_cache
 
 
 class SemanticSearcher(AbstractSemanticSearcher):
 
     def __init__(self) -> None:
-        self.embedder = SentenceTransformer(
-            'all-MiniLM-L6-v2', cache_folder="/shared/file_system/models/1_Pooling"
-        )
-
-        channel = grpc.insecure_channel(os.environ.get("EXTERNAL_FUNCTIONALITIES_URL"))
-        self.database = DatabaseStub(channel)
+        self.embedder = get_sentence_encoder('all-MiniLM-L6-v2')
 
         self.lock = threading.Lock()
         self.__generate_embeddings()
 
-    def __get_queries(self):
-        response = self.database.get_queries(Void())
-        return list(response.queries)
+    @staticmethod
+    def __get_queries():
+        # served from the shared theme cache, which only goes back to the database when the themes change
+        return theme_cache.get_queries()
 
     def __generate_embeddings(self):
         logger.info('Computing query embeddings for Themes...')
@@ -78,10 +71,7 @@ class SemanticSearcher(AbstractSemanticSearcher):
 
             for count, (score, q_idx) in enumerate(zip(scores, idxs)):
                 if count == 0 and score > 0.7:
-                    request = ThemeMapping()
-                    request.theme_query = self.query_list[q_idx]
-                    response = self.database.get_theme(request)
-                    matched_theme = response
+                    matched_theme = theme_cache.get_theme(self.query_list[q_idx])
                     logger.info(
                         f"RELEVANT QUERY: {self.query_list[q_idx]} <-> Score: {score})"
                     )
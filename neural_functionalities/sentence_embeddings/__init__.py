@@ -0,0 +1,2 @@
+from .batched_encoder import BatchedEncoder
+from .registry import embedding_models, get_sentence_encoder
@@ -0,0 +1,104 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+from queue import Queue, Empty
+from typing import List, Optional, Tuple, Union
+
+import torch
+
+from utils import logger
+
+MAX_BATCH_SIZE = int(os.environ.get('EMBEDDING_MAX_BATCH_SIZE', 32))
+MAX_WAIT_MS = float(os.environ.get('EMBEDDING_MAX_WAIT_MS', 5))
+
+
+class BatchedEncoder:
+    """
+    Wraps a SentenceTransformer so that concurrent encode calls share a single forward pass.
+
+    Each RPC usually encodes one sentence, and the gRPC server runs several RPCs in parallel.
+    Sentences are put on a queue, and a worker thread waits up to `max_wait_ms` after the first
+    one for more to arrive (or until `max_batch_size` are queued). The batch is then encoded
+    at once and every caller gets back its own rows.
+
+    Lists longer than `max_batch_size` (e.g. corpus embeddings computed at startup) are already
+    a full batch, so they're encoded directly in the calling thread. A request that doesn't fit in
+    the batch being gathered starts the next one.
+
+    `model` is a SentenceTransformer, or anything with the same `encode` method.
+    """
+
+    def __init__(self, model, max_batch_size: int = MAX_BATCH_SIZE, max_wait_ms: float = MAX_WAIT_MS):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue: Queue = Queue()
+        # request taken off the queue that didn't fit in the previous batch
+        self.next_request: Optional[Tuple[List[str], Future]] = None
+
+        self.batches = 0
+        self.sentences = 0
+
+        self.worker = threading.Thread(target=self.__run, daemon=True)
+        self.worker.start()
+
+    def encode(self, sentences: Union[str, List[str]], convert_to_tensor: bool = True) -> torch.Tensor:
+        """ Same as SentenceTransformer.encode(sentences, convert_to_tensor=True). """
+        if not convert_to_tensor:
+            raise ValueError("BatchedEncoder only returns tensors")
+
+        if isinstance(sentences, str):
+            return self.__submit([sentences]).result()[0]
+
+        if len(sentences) == 0 or len(sentences) > self.max_batch_size:
+            return self.model.encode(sentences, convert_to_tensor=True)
+        return self.__submit(sentences).result()
+
+    def __submit(self, sentences: List[str]) -> Future:
+        future = Future()
+        self.queue.put((sentences, future))
+        return future
+
+    def __collect(self) -> List[Tuple[List[str], Future]]:
+        """ Blocks for the first request, then gathers more until the batch is full or the window closes. """
+        if self.next_request is not None:
+            requests = [self.next_request]
+            self.next_request = None
+        else:
+            requests = [self.queue.get()]
+        size = len(requests[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self.queue.get(timeout=remaining)
+            except Empty:
+                break
+            if size + len(request[0]) > self.max_batch_size:
+                self.next_request = request
+                break
+            requests.append(request)
+            size += len(request[0])
+        return requests
+
+    def __run(self) -> None:
+        while True:
+            requests = self.__collect()
+            batch = [sentence for sentences, _ in requests for sentence in sentences]
+            try:
+                embeddings = self.model.encode(batch, convert_to_tensor=True)
+            except Exception as e:
+                logger.warning("Batched sentence encoding failed", exc_info=e)
+                for _, future in requests:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.sentences += len(batch)
+            start = 0
+            for sentences, future in requests:
+                future.set_result(embeddings[start:start + len(sentences)])
+                start += len(sentences)
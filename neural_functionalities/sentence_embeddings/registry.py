@@ -0,0 +1,73 @@
+import threading
+import time
+from typing import Dict
+
+from sentence_transformers import SentenceTransformer
+
+from utils import logger
+from .batched_encoder import BatchedEncoder
+
+DEFAULT_MODEL = 'all-MiniLM-L6-v2'
+DEFAULT_CACHE_FOLDER = "/shared/file_system/models/1_Pooling"
+
+
+class EmbeddingModelRegistry:
+    """
+    Process-wide registry of sentence embedding models.
+
+    Several modules in this container use the same sBERT model. The registry loads each model once,
+    the first time it is requested, and hands every caller the same BatchedEncoder, so the weights are
+    kept in memory once and the callers' requests are batched together. The encoders are thread-safe.
+    """
+
+    def __init__(self, cache_folder: str = DEFAULT_CACHE_FOLDER):
+        self.cache_folder = cache_folder
+        self.encoders: Dict[str, BatchedEncoder] = {}
+        self.load_stats: Dict[str, Dict[str, float]] = {}
+        self.lock = threading.Lock()
+
+    def get(self, model_name: str = DEFAULT_MODEL) -> BatchedEncoder:
+        """ Returns the shared encoder for `model_name`, loading the model if needed. """
+        with self.lock:
+            encoder = self.encoders.get(model_name)
+            if encoder is None:
+                encoder = self.__load(model_name)
+                self.encoders[model_name] = encoder
+            return encoder
+
+    def __load(self, model_name: str) -> BatchedEncoder:
+        tic = time.perf_counter()
+        model = SentenceTransformer(model_name, cache_folder=self.cache_folder)
+        load_time = time.perf_counter() - tic
+
+        tensors = list(model.parameters()) + list(model.buffers())
+        memory_mb = sum(t.numel() * t.element_size() for t in tensors) / 1024 ** 2
+        self.load_stats[model_name] = {'load_time_s': round(load_time, 2), 'memory_mb': round(memory_mb, 1)}
+        logger.info(f"Loaded embedding model {model_name} in {load_time:.2f}s ({memory_mb:.1f}MB)")
+
+        return BatchedEncoder(model)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """ Load time, weights size and batching counters of each loaded model. """
+        with self.lock:
+            return {
+                model_name: {
+                    **self.load_stats[model_name],
+                    'batches': encoder.batches,
+                    'sentences': encoder.sentences,
+                }
+                for model_name, encoder in self.encoders.items()
+            }
+
+    def log_stats(self) -> None:
+        for model_name, stats in self.stats().items():
+            logger.info(f"Embedding model {model_name}: loaded in {stats['load_time_s']}s, "
+                        f"{stats['memory_mb']}MB")
+
+
+embedding_models = EmbeddingModelRegistry()
+
+
+def get_sentence_encoder(model_name: str = DEFAULT_MODEL) -> BatchedEncoder:
+    """ Returns the encoder of `model_name` shared by the whole process. """
+    return embedding_models.get(model_name)
@@ -5,16 +5,15 @@ from video_searcher_pb2 import VideoQuery
 from video_document_pb2 import VideoDocument
 from utils import logger
 
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import util
+from sentence_embeddings import get_sentence_encoder
 from google.protobuf.json_format import Parse
 
 
 class VideoSearcher(AbstractVideoSearcher):
 
     def __init__(self) -> None:
-        self.embedder = SentenceTransformer(
-            'all-MiniLM-L6-v2', cache_folder="/shared/file_system/models/1_Pooling"
-        )
+        self.embedder = get_sentence_encoder('all-MiniLM-L6-v2')
         with open("video_searcher/videos_metadata.json") as videos_metadata_file:
             self.videos_metadata = json.load(videos_metadata_file)
             for video in self.videos_metadata:
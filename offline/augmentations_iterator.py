@@ -1,30 +1,74 @@
 from utils import logger
 import os
-import stream
-import shutil
-
-from typing import List
 
 from taskmap_pb2 import TaskMap
+from manifest import BuildManifest, hash_message, hash_stream_file
+from proto_stream import ProtoWriter, iter_batches, iter_protos
 import torch
 
 
 class AugmentationsIterator:
-    
-    def __init__(self, taskgraph_proto_path, augmented_taskgraph_proto_path, augmenters, augment_domains):
+
+    def __init__(self, taskgraph_proto_path, augmented_taskgraph_proto_path, augmenters, augment_domains,
+                 batch_size=256):
         self.taskgraph_proto_path = taskgraph_proto_path
         self.augmented_taskgraph_proto_path = augmented_taskgraph_proto_path
         self.augmenters = augmenters
         self.augment_domains = augment_domains
-    
+        # number of taskmaps passed through the augmenters at once, matching the batch augmenters' batch size
+        self.batch_size = batch_size
+
     def run(self):
         self.augment_taskgraphs()
-    
-    def __write_protobuf_list_to_file(self, path, protobuf_list, buffer_size=1000):
-        stream.dump(path, *protobuf_list, buffer_size=buffer_size)
-        
-    def __read_protobuf_list_from_file(self, path,  proto_message):
-        return [d for d in stream.parse(path, proto_message)]
+
+    @staticmethod
+    def __augment(augmenters, task_maps):
+        for augmenter in augmenters:
+            task_maps = augmenter.augment(task_maps)
+        return task_maps
+
+    def __augment_file(self, in_path, out_path, manifest):
+        """ Augments the new and changed taskmaps of a batch file.
+
+        Taskmaps whose content hash matches the one they were last augmented from are copied
+        from the previous output instead of going through the augmenters again.
+        """
+        previous = {}
+        if os.path.exists(out_path):
+            unchanged = {task_map.taskmap_id for task_map in iter_protos(in_path, TaskMap)
+                         if not manifest.changed(f"{in_path}#{task_map.taskmap_id}", hash_message(task_map))}
+            previous = {task_map.taskmap_id: task_map for task_map in iter_protos(out_path, TaskMap)
+                        if task_map.taskmap_id in unchanged}
+
+        augmenters = None
+        # only recorded once the output file is complete, so a crash can't mark stale outputs as current
+        digests = {}
+        with ProtoWriter(out_path) as writer:
+            for task_maps in iter_batches(iter_protos(in_path, TaskMap), self.batch_size):
+                changed = [task_map for task_map in task_maps if task_map.taskmap_id not in previous]
+                augmented = {}
+                if changed:
+                    if augmenters is None:
+                        augmenters = [augmenter_class() for augmenter_class in self.augmenters]
+                    # hash the taskmaps before the augmenters modify them
+                    for task_map in changed:
+                        digests[f"{in_path}#{task_map.taskmap_id}"] = hash_message(task_map)
+                    augmented = {task_map.taskmap_id: task_map for task_map in self.__augment(augmenters, changed)}
+
+                for task_map in task_maps:
+                    if task_map.taskmap_id in previous:
+                        digests[f"{in_path}#{task_map.taskmap_id}"] = manifest.get(f"{in_path}#{task_map.taskmap_id}")
+                        writer.write(previous[task_map.taskmap_id])
+                    elif task_map.taskmap_id in augmented:
+                        writer.write(augmented[task_map.taskmap_id])
+                logger.info(f"{os.path.basename(in_path)}: augmented {len(changed)} new or changed taskmaps, "
+                            f"kept {len(task_maps) - len(changed)}")
+
+        for key in list(manifest.keys(f"{in_path}#")):
+            if key not in digests:
+                manifest.remove(key)
+        for key, digest in digests.items():
+            manifest.set(key, digest)
 
     def augment_taskgraphs(self):
         if torch.cuda.is_available():
@@ -32,29 +76,40 @@ class AugmentationsIterator:
 
         if not os.path.exists(self.augmented_taskgraph_proto_path):
             os.makedirs(self.augmented_taskgraph_proto_path, exist_ok=True)
-        
+
         if len(self.augment_domains) == 0:
             domain_names = os.listdir(self.taskgraph_proto_path)
         else:
             domain_names = [config["file_path"] for config in self.augment_domains]
 
-        for domain_name in domain_names:
-            domain_path = os.path.join(self.taskgraph_proto_path, domain_name)
-            domain_path_save_to = os.path.join(self.augmented_taskgraph_proto_path, domain_name)
-            if os.path.isdir(domain_path_save_to):
-                shutil.rmtree(domain_path_save_to)
-            os.makedirs(domain_path_save_to, exist_ok=True)
-            
-            if not os.path.isdir(domain_path):
-                os.makedirs(domain_path, exist_ok=True)
-                
-            for batch in os.listdir(domain_path):
-                # if batch.endswith(".bin") and not "taskgraphs_" + batch.split("_")[-1] in os.listdir(self.augmented_taskgraph_proto_path):
-                task_maps = self.__read_protobuf_list_from_file(os.path.join(domain_path, batch), TaskMap)
-                augmented_taskmaps = []
-                for augmenter_class in self.augmenters:
-                    augmenter = augmenter_class()
-                    augmented_taskmaps = augmenter.augment(task_maps)
-                    task_maps = augmented_taskmaps
-                filename = "taskgraphs_" + batch
-                self.__write_protobuf_list_to_file(os.path.join(domain_path_save_to, filename), task_maps)
+        # taskmaps are only re-augmented if they, or the list of augmenters, changed since the last run
+        manifest = BuildManifest("augmentations", {'augmenters': self.augmenters})
+        try:
+            for domain_name in domain_names:
+                domain_path = os.path.join(self.taskgraph_proto_path, domain_name)
+                domain_path_save_to = os.path.join(self.augmented_taskgraph_proto_path, domain_name)
+                os.makedirs(domain_path_save_to, exist_ok=True)
+
+                if not os.path.isdir(domain_path):
+                    os.makedirs(domain_path, exist_ok=True)
+
+                batches = sorted(os.listdir(domain_path))
+                expected_outputs = {"taskgraphs_" + batch for batch in batches}
+                for filename in os.listdir(domain_path_save_to):
+                    if filename not in expected_outputs:
+                        logger.info(f"Removing {filename}, its input no longer exists")
+                        os.remove(os.path.join(domain_path_save_to, filename))
+
+                for batch in batches:
+                    in_path = os.path.join(domain_path, batch)
+                    out_path = os.path.join(domain_path_save_to, "taskgraphs_" + batch)
+                    digest = hash_stream_file(in_path)
+                    if os.path.exists(out_path) and not manifest.changed(in_path, digest):
+                        logger.info(f"{in_path} unchanged since the last build, skipping it")
+                        continue
+
+                    self.__augment_file(in_path, out_path, manifest)
+                    manifest.set(in_path, digest)
+                manifest.save()
+        finally:
+            manifest.save()
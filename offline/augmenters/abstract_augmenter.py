@@ -55,6 +55,9 @@ class AbstractTaskGraphAugmenter(ABC):
 
     def augment(self, task_graphs: List[TaskMap]) -> List[TaskMap]:
         """ Augmentation function """
+        # augment() is called once per mini-batch, so drop the previous batch's inputs and outputs
+        self.process_dict = {}
+        self.output_dict = {}
         self.gather_inputs(task_graphs)
         self.process_inputs_into_outputs()
         return self.gather_outputs(task_graphs)
@@ -199,6 +199,11 @@ offline_config = {
                                   foodnetwork_config, foodandwine_config,
                                   seriouseats_scraped_config, wikihow_scraped_config, allrecipes_scraped_config],
                 # select which domains to parse (leave empty if you wish to parse all)
+                # number of processes converting HTML documents (1 converts in the pipeline's process)
+                'workers': max(1, (os.cpu_count() or 1) - 1),
+                # BeautifulSoup tree builder. "lxml" is much faster, but the parsers were written against
+                # "html.parser" trees, so check the output of a parser before switching it
+                'soup_backend': 'html.parser',
             }
         },
         {
@@ -10,11 +10,15 @@ def url_to_html(url):
 
 class Converter:
 
-    def __init__(self, parsers):
+    def __init__(self, parsers, soup_backend=None):
         self.task_graph = None
         self.html = None
         self.url = None
         self.parsers = parsers
+        # BeautifulSoup tree builder used by the parsers (e.g. "lxml"), None keeps the parsers' default
+        self.soup_backend = soup_backend
+        # parsers are instantiated once and reused for every page of their domain
+        self.parser_instances = {}
 
     def convert_urls(self, url):
         self.url = url
@@ -24,10 +28,19 @@ class Converter:
     def convert_htmls(self, url, html):
         self.task_graph = self.__html_to_taskgraph(url, html)
 
+    def __get_parser(self, parser_config):
+        file_path = parser_config["file_path"]
+        if file_path not in self.parser_instances:
+            parser = parser_config["parser"]()
+            if self.soup_backend is not None:
+                parser.soup_features = self.soup_backend
+            self.parser_instances[file_path] = parser
+        return self.parser_instances[file_path]
+
     def __html_to_taskgraph(self, url, html):
         for parser_config in self.parsers:
             if parser_config["file_path"] in url:
-                parser = parser_config["parser"]()
+                parser = self.__get_parser(parser_config)
                 return parser.parse(url, html)
         else:
             return
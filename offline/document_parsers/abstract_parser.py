@@ -90,6 +90,9 @@ def process_execution_steps(steps: List[Step], task_graph):
 
 class AbstractParser(ABC):
 
+    # BeautifulSoup tree builder, "lxml" is several times faster than the pure-Python "html.parser"
+    soup_features = 'html.parser'
+
     def __init__(self):
         self.soup = None
 
@@ -143,10 +146,9 @@ class AbstractParser(ABC):
         """ Standard cleaning of text. """
         return s.replace('\n', ' ').replace('\t', ' ').strip() if s is not None else s
 
-    @staticmethod
-    def get_soup_object(html):
+    def get_soup_object(self, html):
         """ Build BeautifulSoup object from HTML. """
-        return BeautifulSoup(html, 'html.parser')
+        return BeautifulSoup(html, self.soup_features)
 
     @abstractmethod
     def get_title(self):
@@ -9,6 +9,8 @@ class TasteOfHomeParser(AbstractParser):
     script = {}
 
     def get_script(self):
+        # parser instances are reused across pages, so don't keep the previous page's script
+        self.script = {}
         script = self.soup.find_all('script')
         for scr in script:
             if scr.get('type') == 'application/ld+json' and '"@type": "Recipe"' in scr.text:
@@ -3,6 +3,8 @@ import stream
 import os
 import json
 import shutil
+from manifest import hash_stream_file
+from proto_stream import iter_protos, write_protos
 from utils import logger
 
 
@@ -12,8 +14,8 @@ def get_protobuf_list_messages(path, proto_message):
 
 
 def write_protobuf_list_to_file(path, protobuf_list, buffer_size=10):
-    """Write list of Documents messages to binary file."""
-    stream.dump(path, *protobuf_list, buffer_size=buffer_size)
+    """Write list (or any iterable) of Documents messages to binary file, one group at a time."""
+    write_protos(path, protobuf_list, buffer_size=buffer_size)
 
 
 def write_to_file(output_dir, out_path, docs_list):
@@ -38,8 +40,14 @@ def write_doc_file_from_lucene_indexing(
     include_proto=False,
     out_files_begin_with='',
     remove_prev=True,
+    manifest=None,
 ):
-    """Write into a folder json documents that represent proto messages."""
+    """Write into a folder json documents that represent proto messages.
+
+    With a BuildManifest, the documents of input files which haven't changed since they were last
+    written are kept instead of being rebuilt, and documents with the same prefix whose input file
+    no longer exists are removed (the output folder isn't cleared).
+    """
     # Get list of files from 'in_directory'.
     try:
         file_names = [f for f in os.listdir(input_dir) if '.bin' in f]
@@ -50,10 +58,11 @@ def write_doc_file_from_lucene_indexing(
 
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
-    elif remove_prev:
+    elif remove_prev and manifest is None:
         shutil.rmtree(output_dir)
         os.makedirs(output_dir, exist_ok=True)
 
+    out_paths = set()
     for file_name in file_names:
         # Build in and out paths for file processing.
         in_path = os.path.join(input_dir, file_name)
@@ -63,19 +72,34 @@ def write_doc_file_from_lucene_indexing(
             output_dir,
             out_files_begin_with + file_name[: len(file_name) - 4] + '.jsonl',
         )
+        out_paths.add(out_path)
 
-        # Build list of Pyserini documents.
-        proto_list = get_protobuf_list_messages(
-            path=in_path, proto_message=proto_message
-        )
+        if manifest is not None:
+            digest = f'{hash_stream_file(in_path)}:{build_doc_function.__name__}:{include_proto}'
+            if os.path.exists(out_path) and not manifest.changed(out_path, digest):
+                logger.info(f'{in_path} unchanged, keeping {out_path}')
+                continue
+
+        # Build Pyserini documents lazily, so only one proto is held in memory at a time.
         logger.info(f'INCLUDE PROTO? {include_proto}')
-        docs_list = [
+        docs_list = (
             build_doc_function(proto, include_proto=include_proto)
-            for proto in proto_list
-        ]
+            for proto in iter_protos(in_path, proto_message)
+        )
 
         logger.info(f'out temp path {output_dir}, {out_path}')
         write_to_file(output_dir, out_path, docs_list)
+        if manifest is not None:
+            manifest.set(out_path, digest)
+
+    if manifest is not None:
+        # remove the documents of input files which no longer exist
+        for file_name in os.listdir(output_dir):
+            out_path = os.path.join(output_dir, file_name)
+            if file_name.startswith(out_files_begin_with) and out_path not in out_paths:
+                logger.info(f'Removing {out_path}, its input no longer exists')
+                os.remove(out_path)
+                manifest.remove(out_path)
 
 
 def build_json_docs(
@@ -86,6 +110,7 @@ def build_json_docs(
     build_doc_function: Callable,
     out_files_begin_with='',
     remove_prev=True,
+    manifest=None,
 ):
     """Build index given directory of files containing taskmaps."""
     # Write Pyserini readable documents (i.e. json) to temporary folder.
@@ -101,6 +126,7 @@ def build_json_docs(
         build_doc_function=build_doc_function,
         out_files_begin_with=out_files_begin_with,
         remove_prev=remove_prev,
+        manifest=manifest,
     )
 
 
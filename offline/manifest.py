@@ -0,0 +1,88 @@
+import gzip
+import hashlib
+import json
+import os
+
+from typing import Dict, Iterator, Optional
+
+from google.protobuf.message import Message
+from utils import get_file_system, logger
+
+MANIFEST_DIR = os.path.join(get_file_system(), "offline", "manifests")
+
+
+def hash_message(message: Message) -> str:
+    """ Content hash of a single proto message. """
+    return hashlib.blake2b(message.SerializeToString(deterministic=True), digest_size=16).hexdigest()
+
+
+def hash_stream_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """ Content hash of a (gzipped) stream file.
+
+    The decompressed bytes are hashed, as the gzip header stores the time the file was written
+    and rewriting identical messages would otherwise look like a change.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with gzip.open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _describe(obj) -> str:
+    """ Stable description of config values json can't serialise, e.g. parser or augmenter classes. """
+    if hasattr(obj, "__qualname__"):
+        return f"{obj.__module__}.{obj.__qualname__}"
+    return repr(obj)
+
+
+def hash_config(config) -> str:
+    """ Hash of a step configuration (a dict of its output-affecting kwargs). """
+    data = json.dumps(config, sort_keys=True, default=_describe)
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+
+class BuildManifest:
+    """ Content hashes of the inputs a pipeline step has already processed.
+
+    Each step keeps a manifest in ``offline/manifests/<name>.json`` mapping keys (e.g. an input
+    file or a taskmap id) to the hash of the content they were built from. When the step's
+    configuration hash changes, the previous entries are discarded so everything is rebuilt.
+    Deleting the manifest file forces a full rebuild of the step.
+    """
+
+    def __init__(self, name: str, config, manifest_dir: Optional[str] = None):
+        self.name = name
+        self.path = os.path.join(manifest_dir or MANIFEST_DIR, f"{name}.json")
+        self.config_hash = hash_config(config)
+        self.entries: Dict[str, str] = {}
+
+        if os.path.isfile(self.path):
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get("config") == self.config_hash:
+                self.entries = data.get("entries", {})
+            else:
+                logger.info(f"Configuration of {name} changed, rebuilding all its outputs")
+
+    def changed(self, key: str, digest: str) -> bool:
+        return self.entries.get(key) != digest
+
+    def get(self, key: str) -> Optional[str]:
+        return self.entries.get(key)
+
+    def set(self, key: str, digest: str) -> None:
+        self.entries[key] = digest
+
+    def remove(self, key: str) -> None:
+        self.entries.pop(key, None)
+
+    def keys(self, prefix: str = "") -> Iterator[str]:
+        return iter([key for key in self.entries if key.startswith(prefix)])
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"config": self.config_hash, "entries": self.entries}, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,103 @@
+import os
+import stream
+
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Tuple, Type
+
+from google.protobuf.message import Message
+from utils import logger
+
+
+def iter_protos(path: str, proto_message: Type[Message]) -> Iterator[Message]:
+    """ Lazily yields the messages of a stream file, one at a time. """
+    yield from stream.parse(path, proto_message)
+
+
+def iter_batches(iterable: Iterable, batch_size: int) -> Iterator[List]:
+    """ Groups an iterable into lists of at most batch_size items. """
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+class ProtoWriter:
+    """ Writes messages to a stream file as they are produced.
+
+    Messages are written in groups of ``buffer_size``, so only one group is held in memory.
+    The file is written as "<path>.tmp" and renamed once the writer is closed without an
+    error, so a crash never leaves a truncated file that later stages would read as complete.
+    """
+
+    def __init__(self, path: str, buffer_size: int = 1000):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.count = 0
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+        self.__stream = stream.open(self.tmp_path, "wb", buffer_size=buffer_size)
+
+    def write(self, *messages: Message) -> None:
+        self.__stream.write(*messages)
+        self.count += len(messages)
+
+    def close(self) -> None:
+        self.__stream.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self) -> None:
+        self.__stream.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_protos(path: str, messages: Iterable[Message], buffer_size: int = 1000) -> int:
+    """ Writes an iterable of messages to a stream file without materialising it. Returns the count. """
+    with ProtoWriter(path, buffer_size=buffer_size) as writer:
+        for message in messages:
+            writer.write(message)
+    return writer.count
+
+
+def run_stage(in_path: str, out_path: str, proto_message: Type[Message],
+              process: Callable[[List[Message]], Iterable[Message]],
+              batch_size: int = 100, buffer_size: int = 1000) -> Tuple[int, int]:
+    """ Streams a stream file through a processing function into another stream file.
+
+    The input is read lazily and handed to ``process`` in mini-batches of ``batch_size``
+    messages, whose outputs are written straight away. Peak memory is therefore bounded
+    by the batch and buffer sizes instead of the size of the input file.
+
+    Args:
+        in_path: stream file to read
+        out_path: stream file to write, replaced only once the whole input is processed
+        proto_message: message class of the input file
+        process: function taking a list of messages and returning the messages to write,
+            e.g. an augmenter's augment() or a filter
+        batch_size: number of input messages passed to process at once
+        buffer_size: number of messages per group in the output file
+
+    Returns:
+        (messages read, messages written)
+    """
+    read = 0
+    with ProtoWriter(out_path, buffer_size=buffer_size) as writer:
+        for batch in iter_batches(iter_protos(in_path, proto_message), batch_size):
+            read += len(batch)
+            outputs = list(process(batch))
+            if outputs:
+                writer.write(*outputs)
+    logger.info(f"Processed {in_path} => {out_path}: {read} read, {writer.count} written")
+    return read, writer.count
@@ -1,6 +1,15 @@
 import os
 import shutil
 
+import stream
+
+from compiled_protobufs.taskmap_pb2 import TaskMap
+from compiled_protobufs.offline_pb2 import CategoryDocument
+from utils import logger, ObjectStoreWriter
+from utils.object_store import TASKMAP_STORE, CATEGORY_STORE
+from utils.taskmap_features import TaskMapFeatureExtractor, write_taskmap_features, TASKMAP_FEATURES_FILENAME
+from manifest import BuildManifest, hash_stream_file
+
 from .dense_index_builder import DenseIndexBuilder
 from .sparse_index_builder import SparseIndexBuilder
 
@@ -19,35 +28,135 @@ class ComposedIndexBuilder:
 
         self.index_objects_dir = index_objects_dir
 
-    def __flatten_taskgraph_folder(self):
-        domains_folders = os.listdir(self.taskgraph_proto_path)
-        if os.path.isdir(self.taskgraph_proto_path_flattened):
-            shutil.rmtree(self.taskgraph_proto_path_flattened)
+        self.manifest = BuildManifest("search_index", {
+            'rebuild_objects_only': rebuild_objects_only,
+            'index_objects_dir': index_objects_dir,
+            'index_search_dir_sparse': index_search_dir_sparse,
+            'index_search_dir_dense': index_search_dir_dense,
+        })
+
+    def __flatten_taskgraph_folder(self) -> bool:
+        """ Copies the new and changed taskgraph files to the flattened folder, and removes the files
+        whose input no longer exists. Returns whether anything changed. """
+        domains_folders = sorted(os.listdir(self.taskgraph_proto_path))
         os.makedirs(self.taskgraph_proto_path_flattened, exist_ok=True)
 
+        changed = False
+        destination_files = set()
         for domain in domains_folders:
             if os.path.isdir(os.path.join(self.taskgraph_proto_path, domain)):
                 folder_path = os.path.join(self.taskgraph_proto_path, domain)
-                files = os.listdir(folder_path)
+                files = sorted(os.listdir(folder_path))
 
                 for file in files:
                     source_file = os.path.join(folder_path, file)
                     destination_file = os.path.join(self.taskgraph_proto_path_flattened, f"{domain}_{file}")
+                    destination_files.add(destination_file)
+                    digest = hash_stream_file(source_file)
+                    if os.path.exists(destination_file) and not self.manifest.changed(destination_file, digest):
+                        continue
                     shutil.copy(source_file, destination_file)
+                    self.manifest.set(destination_file, digest)
+                    changed = True
+
+        for file in os.listdir(self.taskgraph_proto_path_flattened):
+            destination_file = os.path.join(self.taskgraph_proto_path_flattened, file)
+            if destination_file not in destination_files:
+                logger.info(f"Removing {destination_file}, its input no longer exists")
+                os.remove(destination_file)
+                self.manifest.remove(destination_file)
+                changed = True
+
+        return changed
+
+    def __categories_changed(self) -> bool:
+        category_proto_path = self.proto_paths["CategoryDocument"]
+        changed = False
+        category_files = set()
+        if os.path.isdir(category_proto_path):
+            for file in sorted(os.listdir(category_proto_path)):
+                path = os.path.join(category_proto_path, file)
+                category_files.add(path)
+                digest = hash_stream_file(path)
+                if self.manifest.changed(path, digest):
+                    self.manifest.set(path, digest)
+                    changed = True
+        for path in self.manifest.keys(category_proto_path + os.sep):
+            if path not in category_files:
+                self.manifest.remove(path)
+                changed = True
+        return changed
+
+    def __outputs_exist(self) -> bool:
+        outputs = [self.index_objects_dir]
+        if not self.rebuild_objects_only:
+            outputs.append(self.index_search_dir_sparse)
+            if self.index_search_dir_dense != "":
+                outputs.append(self.index_search_dir_dense)
+        return all(os.path.isdir(path) and len(os.listdir(path)) > 0 for path in outputs)
+
+    @staticmethod
+    def __stream_protos(proto_path, proto_message):
+        for file_name in sorted(os.listdir(proto_path)):
+            if not file_name.endswith(".bin"):
+                continue
+            for proto in stream.parse(os.path.join(proto_path, file_name), proto_message):
+                yield proto
+
+    def __build_object_stores(self):
+        """ Write the serialized TaskMaps and Categories to memory-mapped stores in the objects index,
+        so that the searcher can fetch them without parsing JSON documents from Lucene. """
+        logger.info(f"Building TaskMap object store in {self.index_objects_dir}")
+        with ObjectStoreWriter(self.index_objects_dir, TASKMAP_STORE) as writer:
+            for taskmap in self.__stream_protos(self.taskgraph_proto_path_flattened, TaskMap):
+                writer.add(taskmap.taskmap_id, taskmap)
+
+        category_proto_path = self.proto_paths["CategoryDocument"]
+        if not os.path.isdir(category_proto_path):
+            logger.warning(f"No categories found in {category_proto_path}, skipping the category object store")
+            return
+        logger.info(f"Building Category object store in {self.index_objects_dir}")
+        with ObjectStoreWriter(self.index_objects_dir, CATEGORY_STORE) as writer:
+            for category in self.__stream_protos(category_proto_path, CategoryDocument):
+                writer.add(category.cat_id, category)
+
+    def __build_taskmap_features(self):
+        """ Precompute the query-independent reranking features of every TaskMap in the objects index. """
+        extractor = TaskMapFeatureExtractor()
+
+        def _records():
+            for taskmap in self.__stream_protos(self.taskgraph_proto_path_flattened, TaskMap):
+                yield taskmap.taskmap_id, extractor.extract(taskmap)
+
+        features_path = os.path.join(self.index_objects_dir, TASKMAP_FEATURES_FILENAME)
+        logger.info(f"Building TaskMap reranking features at {features_path}")
+        write_taskmap_features(features_path, _records())
 
     def run(self):
 
-        self.__flatten_taskgraph_folder()
+        taskmaps_changed = self.__flatten_taskgraph_folder()
+        categories_changed = self.__categories_changed()
+        if not taskmaps_changed and not categories_changed and self.__outputs_exist():
+            logger.info("No taskgraphs or categories changed since the last build, keeping the current indexes")
+            return
 
+        # Only the JSON documents of changed proto files are regenerated. Pyserini can't update
+        # existing Lucene or ColBERT indexes, so those are still rebuilt from all the documents.
         if self.rebuild_objects_only:
-            sparse_builder = SparseIndexBuilder(self.proto_paths, "", self.index_objects_dir)
+            sparse_builder = SparseIndexBuilder(self.proto_paths, "", self.index_objects_dir, self.manifest)
             sparse_builder.run()
         else:
             sparse_builder = SparseIndexBuilder(self.proto_paths,
                                                 self.index_search_dir_sparse,
-                                                self.index_objects_dir)
+                                                self.index_objects_dir,
+                                                self.manifest)
             sparse_builder.run()
 
             if self.index_search_dir_dense != "":
-                dense_builder = DenseIndexBuilder(self.proto_paths, self.index_search_dir_dense)
+                dense_builder = DenseIndexBuilder(self.proto_paths, self.index_search_dir_dense, self.manifest)
                 dense_builder.run()
+
+        self.__build_object_stores()
+        self.__build_taskmap_features()
+        # only saved once every index is built, so a failed build is retried on the next run
+        self.manifest.save()
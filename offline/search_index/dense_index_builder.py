@@ -9,8 +9,10 @@ from .build_docs_helper import build_doc_task, build_doc_category
 
 class DenseIndexBuilder(PyseriniColbertBuilder):
 
-    def __init__(self, proto_paths, index_search_dir_dense):
+    def __init__(self, proto_paths, index_search_dir_dense, manifest=None):
         self.proto_paths = proto_paths
+        # when set, JSON documents are only regenerated for changed proto files
+        self.manifest = manifest
         self.index_search_dir_dense = index_search_dir_dense
         self.output_temp_search_dir = os.path.join(get_file_system(), "offline", "system_index_temp", "search")
 
@@ -29,11 +31,11 @@ class DenseIndexBuilder(PyseriniColbertBuilder):
             if proto_type == "TaskMap":
                  build_json_docs(input_dir=proto_path, output_dir=dense_temp_dir,
                     proto_message=TaskMap, include_proto=False, build_doc_function=build_doc_task, 
-                    out_files_begin_with = "taskmaps_", remove_prev = False)
+                    out_files_begin_with = "taskmaps_", remove_prev = False, manifest=self.manifest)
             elif proto_type == "CategoryDocument":
                 build_json_docs(input_dir=proto_path, output_dir=dense_temp_dir,
                     proto_message=CategoryDocument, include_proto=False, build_doc_function=build_doc_category,
-                    out_files_begin_with = "categories_")
+                    out_files_begin_with = "categories_", manifest=self.manifest)
             else:
                 raise Exception(f"Proto type {proto_type} not valid in dense index builder.")
                 
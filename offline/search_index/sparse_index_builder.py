@@ -11,8 +11,10 @@ from .build_docs_helper import build_doc_task, build_doc_category
 
 class SparseIndexBuilder(PyseriniBM25Builder):
 
-    def __init__(self, proto_paths, index_search_dir_sparse, index_objects_dir):
+    def __init__(self, proto_paths, index_search_dir_sparse, index_objects_dir, manifest=None):
         self.proto_paths = proto_paths
+        # when set, JSON documents are only regenerated for changed proto files
+        self.manifest = manifest
         self.index_search_dir_sparse = index_search_dir_sparse
         self.index_objects_dir = index_objects_dir
         self.output_temp_objects_dir = os.path.join(get_file_system(), "offline", "system_index_temp", "objects")
@@ -29,7 +31,8 @@ class SparseIndexBuilder(PyseriniBM25Builder):
         if not os.path.exists(self.output_temp_objects_dir):
             os.makedirs(self.output_temp_objects_dir)
         build_json_docs(input_dir=self.proto_paths["TaskMap"], output_dir=self.output_temp_objects_dir,
-                        proto_message=TaskMap, include_proto = True, build_doc_function=build_doc_task)
+                        proto_message=TaskMap, include_proto = True, build_doc_function=build_doc_task,
+                        manifest=self.manifest)
         self.build_index(input_dir=self.output_temp_objects_dir, output_dir=self.index_objects_dir)
 
         if self.index_search_dir_sparse != "":
@@ -42,11 +45,11 @@ class SparseIndexBuilder(PyseriniBM25Builder):
                 if proto_type == "TaskMap":
                     build_json_docs(input_dir = proto_path, output_dir = self.output_temp_sparse_dir,
                         proto_message = TaskMap, include_proto = False, build_doc_function = build_doc_task, 
-                        out_files_begin_with = "taskmaps_", remove_prev = False)
+                        out_files_begin_with = "taskmaps_", remove_prev = False, manifest=self.manifest)
                 elif proto_type == "CategoryDocument":
                     build_json_docs(input_dir = proto_path, output_dir = self.output_temp_sparse_dir,
                         proto_message = CategoryDocument, include_proto = False, build_doc_function = build_doc_category,
-                        out_files_begin_with = "categories_")
+                        out_files_begin_with = "categories_", manifest=self.manifest)
                 else:
                     raise Exception(f"Proto type {proto_type} not valid in sparse index builder.")
 
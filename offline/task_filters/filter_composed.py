@@ -2,6 +2,8 @@ import os
 
 from .filter_abstract import AbstractTaskFilter
 from .stats_collector import StatsCollector
+from manifest import BuildManifest, hash_stream_file
+from proto_stream import run_stage
 from utils import get_file_system, logger
 from taskmap_pb2 import TaskMap
 
@@ -11,7 +13,7 @@ from typing import List
 class ComposedFilter(AbstractTaskFilter):
     """ Collects all TaskGraph filters and measures statistics regarding filtering """
 
-    def __init__(self, path_in: str, path_out: str, task_filters: List[AbstractTaskFilter]):
+    def __init__(self, path_in: str, path_out: str, task_filters: List[AbstractTaskFilter], batch_size: int = 1000):
         super().__init__()
         if not os.path.exists(path_in):
             raise Exception(f"path_in = {path_in} is not a directory (ComposedFilter).")
@@ -27,27 +29,58 @@ class ComposedFilter(AbstractTaskFilter):
         self.passed_urls = []
         self.passed_taskmap_count = 0
         self.failed_taskmap_count = 0
+        self.batch_size = batch_size
+
+    def __list_batches(self) -> List[str]:
+        batches = []
+        for domain in sorted(os.listdir(self.path_in)):
+            if os.path.isdir(os.path.join(self.path_in, domain)):
+                domain_path = os.path.join(self.path_in, domain)
+                for batch_name in sorted(os.listdir(domain_path)):
+                    if batch_name.endswith(".bin"):
+                        batches.append(os.path.join(domain, batch_name))
+        return batches
 
     def run(self) -> None:
         """ Batch Retrieval Filtering """
         if not os.path.isdir(self.path_out):
             os.makedirs(self.path_out, exist_ok=True)
-        for domain in os.listdir(self.path_in):
-            if os.path.isdir(os.path.join(self.path_in, domain)):
-                domain_path = os.path.join(self.path_in, domain)
-                for batch_name in os.listdir(domain_path):
-                    if batch_name.endswith(".bin"):
-                        self.__filter_tasks(domain, batch_name)
-                        logger.info(f"Filtered batch: {batch_name}")
+
+        # Filters such as the duplicates filter need to see every task, so filtering is either skipped
+        # as a whole (no input changed since the last run) or rerun for all the batches.
+        manifest = BuildManifest("task_filters", {'task_filters': [type(f) for f in self.task_filters]})
+        batches = self.__list_batches()
+        digests = {batch: hash_stream_file(os.path.join(self.path_in, batch)) for batch in batches}
+        outputs_exist = all(os.path.exists(self.__output_path(batch)) for batch in batches)
+        if outputs_exist and dict(manifest.entries) == digests:
+            logger.info(f"No taskgraphs changed since the last run, skipping {self.filter_name}")
+            return
+
+        for batch in manifest.keys():
+            if batch not in digests:
+                if os.path.exists(self.__output_path(batch)):
+                    logger.info(f"Removing filtered tasks of {batch}, its input no longer exists")
+                    os.remove(self.__output_path(batch))
+                manifest.remove(batch)
+
+        for batch in batches:
+            domain, batch_name = os.path.split(batch)
+            self.__filter_tasks(domain, batch_name)
+            logger.info(f"Filtered batch: {batch_name}")
+            manifest.set(batch, digests[batch])
+        manifest.save()
         self.__save_stats()
 
+    def __output_path(self, batch: str) -> str:
+        domain, batch_name = os.path.split(batch)
+        return os.path.join(self.path_out, domain, "filtered_tasks_" + batch_name)
+
     def __filter_tasks(self, domain: str, batch_name: str) -> None:
-        taskmaps = self.read_tasks_from_proto(os.path.join(self.path_in, domain, batch_name))
-        logger.info(len(taskmaps))
-        filtered_tasks = [taskmap for taskmap in taskmaps if self.is_task_valid(taskmap)]
-        filename_saved = "filtered_tasks_" + batch_name
-        domain_path = os.path.join(self.path_out, domain)
-        self.write_tasks_to_proto(domain_path, filename_saved, filtered_tasks)
+        read, written = run_stage(os.path.join(self.path_in, domain, batch_name),
+                                  self.__output_path(os.path.join(domain, batch_name)), TaskMap,
+                                  lambda taskmaps: [taskmap for taskmap in taskmaps if self.is_task_valid(taskmap)],
+                                  batch_size=self.batch_size)
+        logger.info(f"{written}/{read} tasks passed the filters")
 
     def __save_stats(self):
         """Save measurements"""
@@ -3,6 +3,7 @@ from typing import List
 from .filter_abstract import AbstractTaskFilter
 from taskmap_pb2 import TaskMap
 from dangerous_task_pb2 import DangerousAssessment
+from utils import PhraseMatcher
 
 
 class DangerousTaskFilter(AbstractTaskFilter):
@@ -36,10 +37,8 @@ class DangerousClassifier:
 
     def __init__(self):
         self.failed_examples: List[str] = []
-        with open(self.WORDLIST_PATH, 'r') as f:
-            self.word_list = []
-            for line in f:
-                self.word_list.append(line.strip().lower())
+        # multi-word phrases are matched anywhere in the title, single words only as whole tokens
+        self.matcher = PhraseMatcher.from_file(self.WORDLIST_PATH)
 
     def pred(self, user_utterance: str) -> DangerousAssessment:
 
@@ -47,24 +46,9 @@ class DangerousClassifier:
         dangerous_assessment.is_dangerous = False
         user_utterance = user_utterance.lower()
 
-        for dangerous_word_or_sentence in self.word_list:
-            dangerous_word_or_sentence = dangerous_word_or_sentence.lower()
-            words = dangerous_word_or_sentence.split()
-
-            if len(words) > 1:
-                # dangerous words are multiple, thus we match the whole
-                dangerous_sentence = dangerous_word_or_sentence
-                if dangerous_sentence in user_utterance:
-                    self.failed_examples.append(
-                        f"'{dangerous_sentence}' matched '{user_utterance}' as a dangerous sentence")
-                    dangerous_assessment.is_dangerous = True
-                    return dangerous_assessment
-            else:
-                dangerous_word = dangerous_word_or_sentence
-                tokenized_user_utterance = user_utterance.split()
-                if dangerous_word in tokenized_user_utterance:
-                    self.failed_examples.append(f"'{dangerous_word}' matched '{user_utterance}' as a dangerous word")
-                    dangerous_assessment.is_dangerous = True
-                    return dangerous_assessment
+        dangerous_word_or_sentence = self.matcher.find(user_utterance)
+        if dangerous_word_or_sentence is not None:
+            self.failed_examples.append(f"'{dangerous_word_or_sentence}' matched '{user_utterance}' as dangerous")
+            dangerous_assessment.is_dangerous = True
 
         return dangerous_assessment
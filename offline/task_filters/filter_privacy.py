@@ -3,7 +3,7 @@ from abc import ABC
 from .filter_abstract import AbstractTaskFilter
 from safety_pb2 import SafetyAssessment
 from taskmap_pb2 import TaskMap
-from utils import logger
+from utils import logger, PhraseMatcher
 
 
 class PrivacyTaskFilter(AbstractTaskFilter):
@@ -33,10 +33,8 @@ class PrivacyClassifier:
     WORDLIST_PATH = "task_filters/privacy_wordlist.txt"
 
     def __init__(self):
-        with open(self.WORDLIST_PATH, 'r') as f:
-            self.word_list = []
-            for line in f:
-                self.word_list.append(line.strip().lower())
+        # every entry is matched as a substring, including single words
+        self.matcher = PhraseMatcher.from_file(self.WORDLIST_PATH, substring_words=True)
 
     def test_utterance_safety(self, utterance) -> SafetyAssessment:
         """
@@ -45,12 +43,12 @@ class PrivacyClassifier:
         logger.debug(f'privacy utterance: {utterance}')
         safety_assessment = SafetyAssessment()
 
-        # Loop of regexes that identify utterances that contain private information.
-        for w in self.word_list:
-            if w in utterance:
-                safety_assessment.is_safe = False
-                logger.debug(f'-> safety_assessment (privacy): {safety_assessment.is_safe} -> due to: {w}')
-                return safety_assessment
+        # Identify utterances that contain private information.
+        w = self.matcher.find(utterance)
+        if w is not None:
+            safety_assessment.is_safe = False
+            logger.debug(f'-> safety_assessment (privacy): {safety_assessment.is_safe} -> due to: {w}')
+            return safety_assessment
 
         # Return safe if no private regexes identified in utterances.
         safety_assessment.is_safe = True
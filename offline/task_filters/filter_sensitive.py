@@ -1,10 +1,8 @@
-import re
-
 from .filter_abstract import AbstractTaskFilter
 from safety_pb2 import SafetyAssessment
 from taskmap_pb2 import TaskMap
 
-from utils import logger
+from utils import logger, RegexMatcher
 from typing import List
 
 
@@ -56,6 +54,7 @@ class SensitiveClassifier:
 
     def __init__(self):
         logger.debug(f'sensitivity regexes: {self.SENSITIVE_REGEXES}')
+        self.matcher = RegexMatcher(self.SENSITIVE_REGEXES)
 
     def test_utterance_safety(self, utterance) -> SafetyAssessment:
         """
@@ -64,12 +63,12 @@ class SensitiveClassifier:
         logger.debug(f'sensitivity utterance: {utterance}')
         safety_assessment = SafetyAssessment()
 
-        # Loop of regexes that identify sensitive utterances.
-        for q in self.SENSITIVE_REGEXES:
-            if re.search(q, utterance):
-                safety_assessment.is_safe = False
-                logger.debug(f'-> safety_assessment (sensitivity): {safety_assessment.is_safe} -> due to: {q}')
-                return safety_assessment
+        # Single combined regex that identifies sensitive utterances.
+        q = self.matcher.find(utterance)
+        if q is not None:
+            safety_assessment.is_safe = False
+            logger.debug(f'-> safety_assessment (sensitivity): {safety_assessment.is_safe} -> due to: {q}')
+            return safety_assessment
 
         # Return safe if no sensitivity regexes identified in utterances.
         safety_assessment.is_safe = True
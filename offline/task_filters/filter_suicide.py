@@ -1,7 +1,7 @@
 from .filter_abstract import AbstractTaskFilter
 from safety_pb2 import SafetyAssessment
 from taskmap_pb2 import TaskMap
-from utils import logger
+from utils import logger, PhraseMatcher
 
 from typing import List
 
@@ -32,33 +32,16 @@ class SuicideTaskFilter(AbstractTaskFilter):
 class SuicideClassifier:
 
     def __init__(self) -> None:
-        with open("task_filters/suicidal_phrases.txt") as suicidal_phrases_list:
-            self.suicidal_phrases = []
-
-            for line in suicidal_phrases_list:
-                self.suicidal_phrases.append(line.strip().lower())
+        # multi-word phrases are matched anywhere in the title, single words only as whole tokens
+        self.matcher = PhraseMatcher.from_file("task_filters/suicidal_phrases.txt")
 
     def test_utterance_safety(self, user_utterance) -> SafetyAssessment:
         safety_assessment: SafetyAssessment = SafetyAssessment()
         safety_assessment.is_safe = True
 
-        for suicidal_word_or_sentence in self.suicidal_phrases:
-            suicidal_word_or_sentence = suicidal_word_or_sentence.lower()
-            words = suicidal_word_or_sentence.split()
-
-            if len(words) > 1:
-                # dangerous words are multiple, thus we match the whole
-                suicidal_sentence = suicidal_word_or_sentence
-                if suicidal_sentence in user_utterance:
-                    logger.info(f"'{suicidal_sentence}' matched '{user_utterance}' as a suicide sentence")
-                    safety_assessment.is_safe = False
-                    return safety_assessment
-            else:
-                suicidal_word = suicidal_word_or_sentence
-                tokenized_user_utterance = user_utterance.split()
-                if suicidal_word in tokenized_user_utterance:
-                    logger.info(f"'{suicidal_word}' matched '{user_utterance}' as a suicide word")
-                    safety_assessment.is_safe = False
-                    return safety_assessment
+        suicidal_word_or_sentence = self.matcher.find(user_utterance)
+        if suicidal_word_or_sentence is not None:
+            logger.info(f"'{suicidal_word_or_sentence}' matched '{user_utterance}' as suicidal")
+            safety_assessment.is_safe = False
 
-        return safety_assessment 
+        return safety_assessment
@@ -1,58 +1,149 @@
 import os
-import stream
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 from offline_pb2 import HTMLDocument
 from utils import logger
 from converter import Converter
+from manifest import BuildManifest, hash_stream_file
+from proto_stream import ProtoWriter, iter_batches, iter_protos
+
+# converter of the current process, set up once by _init_converter
+_converter = None
+
+
+def _init_converter(parsers, soup_backend):
+    global _converter
+    _converter = Converter(parsers, soup_backend=soup_backend)
+
+
+def _convert_shard(webpages):
+    """ Converts a shard of HTMLDocuments with the process' converter.
+
+    Returns the TaskMaps in input order, the number of pages no parser could convert
+    and the number of pages whose parser raised an exception.
+    """
+    taskmaps = []
+    skipped = 0
+    failed = 0
+    for webpage in webpages:
+        try:
+            _converter.convert_htmls(webpage.url, webpage.html)
+            taskmap = _converter.get_taskgraph_proto()
+        except Exception as e:
+            logger.warning(f"Failed to convert {webpage.url} to taskgraph: {e}")
+            failed += 1
+            continue
+        if taskmap is None:
+            skipped += 1
+        else:
+            taskmaps.append(taskmap)
+    return taskmaps, skipped, failed
 
 
 class TaskgraphConstruction:
-    def __init__(self, html_proto_path, taskgraph_proto_path, parsers, parse_domains):
+    def __init__(self, html_proto_path, taskgraph_proto_path, parsers, parse_domains, batch_size=100, workers=1,
+                 soup_backend=None):
         self.html_proto_path = html_proto_path
         self.taskgraph_proto_path = taskgraph_proto_path
         self.parsers = parsers
         self.which_domains = parse_domains
-    
+        # number of webpages in each shard, bounding the memory used per batch file
+        self.batch_size = batch_size
+        # number of conversion processes, 1 converts in the current process
+        self.workers = workers
+        # BeautifulSoup tree builder used by the parsers, e.g. "lxml" (None keeps "html.parser")
+        self.soup_backend = soup_backend
+        self.stats = {'converted': 0, 'skipped': 0, 'failed': 0}
+
     def run(self):
         self.load_taskgraphs_from_html()
 
-    @staticmethod
-    def __write_protobuf_list_to_file(path, protobuf_list, buffer_size=1000):
-        stream.dump(path, *protobuf_list, buffer_size=buffer_size)
+    def __convert_file(self, in_path, out_path, pool):
+        """ Converts a batch file shard by shard, writing the shards' TaskMaps in input order.
+
+        With a pool, up to two shards per worker are in flight while the oldest one is written.
+        """
+        file_stats = {'converted': 0, 'skipped': 0, 'failed': 0}
+        pending = deque()
+
+        def write_oldest(writer):
+            shard_id, shard_size, result = pending.popleft()
+            taskmaps, skipped, failed = result.result() if pool is not None else result
+            writer.write(*taskmaps)
+            file_stats['converted'] += len(taskmaps)
+            file_stats['skipped'] += skipped
+            file_stats['failed'] += failed
+            logger.info(f"{os.path.basename(in_path)} shard {shard_id}: {len(taskmaps)}/{shard_size} converted, "
+                        f"{skipped} skipped, {failed} failed")
+
+        with ProtoWriter(out_path) as writer:
+            for shard_id, webpages in enumerate(iter_batches(iter_protos(in_path, HTMLDocument), self.batch_size)):
+                if pool is None:
+                    pending.append((shard_id, len(webpages), _convert_shard(webpages)))
+                else:
+                    pending.append((shard_id, len(webpages), pool.submit(_convert_shard, webpages)))
+                while len(pending) > (0 if pool is None else 2 * self.workers):
+                    write_oldest(writer)
+            while pending:
+                write_oldest(writer)
+
+        for key, value in file_stats.items():
+            self.stats[key] += value
+        logger.info(f"Converted {in_path} => {out_path}: {file_stats['converted']} taskgraphs, "
+                    f"{file_stats['skipped']} skipped, {file_stats['failed']} failed")
 
-    @staticmethod
-    def __read_protobuf_list_from_file(path,  proto_message):
-        return [d for d in stream.parse(path, proto_message)]
-    
     def load_taskgraphs_from_html(self):
         if not os.path.exists(self.taskgraph_proto_path):
             os.makedirs(self.taskgraph_proto_path, exist_ok=True)
-        
+
         if len(self.which_domains) == 0:
             domain_names = os.listdir(self.html_proto_path)
         else:
             domain_names = [parser_config["file_path"] for parser_config in self.which_domains]
 
-        for domain_name in domain_names[1:]:
-            
-            html_filepath = os.path.join(self.html_proto_path, domain_name)
-            domain_task_path = os.path.join(self.taskgraph_proto_path, domain_name)
-
-            if not os.path.isdir(domain_task_path):
-                os.makedirs(domain_task_path, exist_ok=True)
-
-            if not os.path.isdir(html_filepath):
-                os.makedirs(html_filepath, exist_ok=True)
-
-            for batch in os.listdir(html_filepath):
-                filename = "taskgraphs_" + batch.split("_")[-1]
-                taskgraph_protos = []
-                logger.info(f"Reading from {os.path.join(self.html_proto_path, domain_name, batch)}")
-                webpages = self.__read_protobuf_list_from_file(os.path.join(self.html_proto_path,domain_name, batch), HTMLDocument)
-                for webpage in webpages:
-                    c = Converter(self.parsers)
-                    c.convert_htmls(webpage.url, webpage.html)
-                    if c.get_taskgraph_proto() is not None:
-                        taskgraph_protos.append(c.get_taskgraph_proto())
-                    logger.info(f'{webpage.url} to taskgraph')
-                self.__write_protobuf_list_to_file(os.path.join(self.taskgraph_proto_path, domain_name, filename), taskgraph_protos)
+        if self.workers > 1:
+            logger.info(f"Converting taskgraphs with {self.workers} processes")
+            pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_converter,
+                                       initargs=(self.parsers, self.soup_backend))
+        else:
+            _init_converter(self.parsers, self.soup_backend)
+            pool = None
+
+        # batch files whose content and parsers haven't changed since the last run are skipped
+        manifest = BuildManifest("taskgraph_construction",
+                                 {'parsers': self.parsers, 'soup_backend': self.soup_backend})
+        try:
+            for domain_name in domain_names[1:]:
+
+                html_filepath = os.path.join(self.html_proto_path, domain_name)
+                domain_task_path = os.path.join(self.taskgraph_proto_path, domain_name)
+
+                if not os.path.isdir(domain_task_path):
+                    os.makedirs(domain_task_path, exist_ok=True)
+
+                if not os.path.isdir(html_filepath):
+                    os.makedirs(html_filepath, exist_ok=True)
+
+                for batch in sorted(os.listdir(html_filepath)):
+                    filename = "taskgraphs_" + batch.split("_")[-1]
+                    in_path = os.path.join(self.html_proto_path, domain_name, batch)
+                    out_path = os.path.join(self.taskgraph_proto_path, domain_name, filename)
+
+                    digest = hash_stream_file(in_path)
+                    if os.path.exists(out_path) and not manifest.changed(in_path, digest):
+                        logger.info(f"{in_path} unchanged since the last build, skipping it")
+                        continue
+
+                    logger.info(f"Reading from {in_path}")
+                    self.__convert_file(in_path, out_path, pool)
+                    manifest.set(in_path, digest)
+                manifest.save()
+        finally:
+            manifest.save()
+            if pool is not None:
+                pool.shutdown()
+
+        logger.info(f"Taskgraph construction: {self.stats['converted']} converted, {self.stats['skipped']} skipped, "
+                    f"{self.stats['failed']} failed")
@@ -36,6 +36,8 @@ class ThemeBuilder:
             prefix=self.db_prefix,
             primary_key="theme_word",
             url=self.db_url,
+            # the theme index scans the dates, so they must stay readable in the binary storage format
+            projected_attributes=["date"],
         )
 
         mapping_db = ProtoDB(ThemeMapping, primary_key="theme_query", prefix="Curated", url=self.db_url)
@@ -0,0 +1,53 @@
+import os
+
+from typing import Dict, Tuple, Type
+
+from utils import get_aio_channel
+
+
+"""Asyncio gRPC clients for the services the orchestrator calls.
+
+Stubs built on ``grpc.aio`` channels return awaitable calls, so an event loop can keep
+thousands of requests waiting on downstream services without a thread for each one.
+``AsyncClients.stub`` hands out one stub per (stub class, service) on the pooled aio
+channels.
+"""
+
+# service name => environment variable holding its URL
+SERVICE_URLS = {
+    'functionalities': 'FUNCTIONALITIES_URL',
+    'neural_functionalities': 'NEURAL_FUNCTIONALITIES_URL',
+    'external_functionalities': 'EXTERNAL_FUNCTIONALITIES_URL',
+    'llm_functionalities': 'LLM_FUNCTIONALITIES_URL',
+}
+
+
+class AsyncClients:
+    """Lazily created ``grpc.aio`` stubs, keyed by stub class and service.
+
+    Stubs must be requested from the event loop they will be used on, e.g. inside a request
+    handler of the ASGI application.
+    """
+
+    def __init__(self):
+        self.stubs: Dict[Tuple[type, str], object] = {}
+
+    def stub(self, stub_class: Type, service: str):
+        """Returns the aio stub of ``stub_class`` for a service.
+
+        Args:
+            stub_class: generated stub class, e.g. ``DatabaseStub``
+            service (str): one of the keys of ``SERVICE_URLS``
+
+        Returns:
+            an instance of ``stub_class`` whose methods return awaitable calls
+        """
+        key = (stub_class, service)
+        if key not in self.stubs:
+            if service not in SERVICE_URLS:
+                raise ValueError(f"Unknown service {service}, expected one of {list(SERVICE_URLS)}")
+            self.stubs[key] = stub_class(get_aio_channel(os.environ[SERVICE_URLS[service]]))
+        return self.stubs[key]
+
+
+aio_clients = AsyncClients()
@@ -1,5 +1,5 @@
 import os
-import grpc
+from utils import get_channel
 from ..abstract_parser import AbstractParser
 
 from asr_parser_pb2_grpc import ASRParserStub
@@ -10,7 +10,7 @@ from taskmap_pb2 import Session
 class ASRParser(AbstractParser):
 
     def __init__(self):
-        channel = grpc.insecure_channel(os.environ['FUNCTIONALITIES_URL'])
+        channel = get_channel(os.environ['FUNCTIONALITIES_URL'])
         self.asr_service = ASRParserStub(channel)
 
     def __call__(self, session: Session) -> Session:
@@ -1,51 +1,55 @@
 from ..abstract_parser import AbstractParser
 from taskmap_pb2 import Session
-import grpc
 import os
-from utils import logger
+from typing import List, Tuple
+from utils import logger, get_channel
 from safety_pb2_grpc import SafetyStub
-from safety_pb2 import SafetyUtterance
+from safety_pb2 import SafetyUtteranceBatch
 
 
 class SafetyParser(AbstractParser):
 
     def __init__(self):
-        channel = grpc.insecure_channel(os.environ['FUNCTIONALITIES_URL'])
+        channel = get_channel(os.environ['FUNCTIONALITIES_URL'])
         self.safety_service = SafetyStub(channel)
 
-    def check_utterance(self, utterance):
-        # return True, True, True, True
+    def check_utterances(self, utterances: List[str]) -> List[Tuple[bool, bool, bool, bool]]:
+        """ Run every safety check on every utterance with a single check_all RPC """
 
-        if utterance == "":
-            # If empty string, we consider all tests to be positive
-            return True, True, True, True
+        # If empty string, we consider all tests to be positive
+        results = [(True, True, True, True)] * len(utterances)
+        to_check = [i for i, utterance in enumerate(utterances) if utterance != ""]
+        if len(to_check) == 0:
+            return results
 
-        utterance_request = SafetyUtterance()
-        utterance_request.text = utterance
+        batch = SafetyUtteranceBatch()
+        for i in to_check:
+            batch.utterances.add().text = utterances[i]
 
-        # Safety checks.
-        privacy_assessment = self.safety_service.privacy_check(utterance_request)
-        sensitivity_assessment = self.safety_service.sensitivity_check(utterance_request)
-        offensive_speech_assessment = self.safety_service.offensive_speech_check(utterance_request)
-        suicide_prevention_assessment = self.safety_service.suicide_prevention_check(utterance_request)
-
-        return (
-            privacy_assessment.is_safe,
-            sensitivity_assessment.is_safe,
-            offensive_speech_assessment.is_safe,
-            suicide_prevention_assessment.is_safe
-        )
+        response = self.safety_service.check_all(batch)
 
-    def __call__(self, session: Session) -> Session:
-        """ Assess safety of user utterance """
+        for i, report in zip(to_check, response.reports):
+            results[i] = (
+                report.privacy_safe,
+                report.sensitivity_safe,
+                report.offensive_speech_safe,
+                report.suicide_prevention_safe
+            )
+        return results
 
-        # Safety checks.
+    def check_utterance(self, utterance):
+        # return True, True, True, True
+        return self.check_utterances([utterance])[0]
+
+    @staticmethod
+    def add_violation_intents(session: Session, checks: Tuple[bool, bool, bool, bool]) -> Session:
+        """ Append an intent to the user's turn for each failed check, as returned by check_utterance """
         (
             privacy_safe,
             sensitivity_safe,
             offensive_speech_safe,
             suicide_prevention_safe
-        ) = self.check_utterance(session.turn[-1].user_request.interaction.text)
+        ) = checks
 
         if not privacy_safe:
             session.turn[-1].user_request.interaction.intents.append('PrivacyViolationIntent')
@@ -57,3 +61,10 @@ class SafetyParser(AbstractParser):
             session.turn[-1].user_request.interaction.intents.append('SuicideIntent')
 
         return session
+
+    def __call__(self, session: Session) -> Session:
+        """ Assess safety of user utterance """
+
+        # Safety checks.
+        checks = self.check_utterance(session.turn[-1].user_request.interaction.text)
+        return self.add_violation_intents(session, checks)
@@ -1,5 +1,5 @@
 import os
-import grpc
+from utils import get_channel
 from ..abstract_parser import AbstractParser
 from taskmap_pb2 import Session
 from dangerous_task_pb2_grpc import DangerousStub
@@ -8,7 +8,7 @@ from dangerous_task_pb2_grpc import DangerousStub
 class DangerousQueryParser(AbstractParser):
 
     def __init__(self):
-        external_channel = grpc.insecure_channel(os.environ['EXTERNAL_FUNCTIONALITIES_URL'])
+        external_channel = get_channel(os.environ['EXTERNAL_FUNCTIONALITIES_URL'])
         self.__parser = DangerousStub(external_channel)
 
     def __call__(self, session: Session) -> Session:
@@ -1,5 +1,5 @@
 import os
-import grpc
+from utils import get_channel
 from ..abstract_parser import AbstractParser
 from taskmap_pb2 import Session
 from phase_intent_classifier_pb2_grpc import PhaseIntentClassifierStub
@@ -9,7 +9,7 @@ from phase_intent_classifier_pb2 import IntentRequest
 class IntentParser(AbstractParser):
 
     def __init__(self):
-        neural_channel = grpc.insecure_channel(os.environ["NEURAL_FUNCTIONALITIES_URL"])
+        neural_channel = get_channel(os.environ["NEURAL_FUNCTIONALITIES_URL"])
         self.phase_intent_classifier = PhaseIntentClassifierStub(neural_channel)
 
     def __call__(self, session: Session) -> Session:
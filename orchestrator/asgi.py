@@ -0,0 +1,206 @@
+import asyncio
+import json
+import os
+
+import grpc
+
+from google.protobuf.json_format import MessageToDict, ParseDict
+
+from database_pb2 import SessionRequest
+from database_pb2_grpc import DatabaseStub
+from taskmap_pb2 import Session
+from aio_clients import aio_clients
+from policy import AsyncPolicyAdapter, DefaultPolicy
+from session_cache import create_session_cache
+from turns import add_agent_response, add_user_turn
+from utils import aio_channel_registry, channel_registry, get_channel, log_latency, logger
+
+
+"""ASGI entry point of the orchestrator, serving the same API as ``main``.
+
+The Flask application in ``main`` runs every request on one of waitress's threads,
+which stays blocked on each downstream call, so the number of turns in flight is
+capped by the number of threads. This application runs on an asyncio event loop
+instead (e.g. ``uvicorn asgi:app``). Loading and saving sessions are native
+``grpc.aio`` calls, and the sync ``PhasedPolicy.step`` runs through an
+``AsyncPolicyAdapter``, so a single process can hold thousands of requests while
+only ``ORCHESTRATOR_POLICY_THREADS`` policy steps run at a time.
+
+When the ``SessionCache`` is enabled (see ``session_cache``), sessions go through it
+instead, and the cache misses and writes use a sync stub on its worker threads.
+"""
+
+
+class ASGIApp:
+    """Minimal ASGI application routing JSON requests to the orchestrator endpoints.
+
+    Every endpoint takes the JSON request body (if any) and returns a JSON serialisable dict.
+    """
+
+    def __init__(self, policy_threads: int = 64):
+        self.policy = AsyncPolicyAdapter(DefaultPolicy(), max_workers=policy_threads)
+        self.routes = {
+            '/run': self.run,
+            '/last_response': self.repeat_last_response,
+            '/update_timers': self.update_timers,
+            '/channel_stats': self.channel_stats,
+        }
+        # sessions being saved in the background, awaited before shutting down
+        self.pending_saves = set()
+        self.sessions = create_session_cache(DatabaseStub(get_channel(os.environ['EXTERNAL_FUNCTIONALITIES_URL'])))
+
+    @property
+    def db(self) -> DatabaseStub:
+        return aio_clients.stub(DatabaseStub, 'external_functionalities')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.__lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.__http(scope, receive, send)
+
+    async def __lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.pending_saves:
+                    logger.info(f"Waiting for {len(self.pending_saves)} sessions to be saved")
+                    await asyncio.gather(*self.pending_saves, return_exceptions=True)
+                await asyncio.get_running_loop().run_in_executor(None, self.sessions.close)
+                await aio_channel_registry.close()
+                self.policy.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def __http(self, scope, receive, send):
+        handler = self.routes.get(scope['path'])
+        if handler is None:
+            await self.__respond(send, 404, {'error': f"Unknown endpoint {scope['path']}"})
+            return
+
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body', False):
+                break
+
+        try:
+            request_json = json.loads(body) if body else {}
+            response = await handler(request_json)
+        except Exception as e:
+            logger.error(f"Error handling {scope['path']}", exc_info=e)
+            await self.__respond(send, 500, {'error': str(e)})
+            return
+        await self.__respond(send, 200, response)
+
+    @staticmethod
+    async def __respond(send, status: int, response: dict):
+        body = json.dumps(response).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def __load_session(self, session_id: str) -> Session:
+        if self.sessions.enabled:
+            return await asyncio.get_running_loop().run_in_executor(None, self.sessions.load, session_id)
+        return await self.db.load_session(SessionRequest(id=session_id))
+
+    async def __save_session(self, session_id: str, session: Session, wait: bool) -> None:
+        if self.sessions.enabled:
+            if wait:
+                await asyncio.get_running_loop().run_in_executor(None, self.sessions.save, session_id, session, True)
+            else:
+                self.sessions.save(session_id, session)
+            return
+
+        # same versioning as SessionCache.save, so the database service can reject conflicting writes
+        session.version += 1
+        session_request = SessionRequest(id=session_id)
+        session_request.session.ParseFromString(session.SerializeToString())
+        if wait:
+            await self.__write(session_request)
+        else:
+            self.__save_in_background(session_request)
+
+    async def __write(self, session_request: SessionRequest) -> None:
+        try:
+            await self.db.save_session(session_request)
+        except grpc.aio.AioRpcError as e:
+            if e.code() != grpc.StatusCode.ABORTED:
+                raise
+            logger.warning(f"Session {session_request.id} was not saved: {e.details()}")
+
+    def __save_in_background(self, session_request: SessionRequest) -> None:
+        task = asyncio.ensure_future(self.__write(session_request))
+        self.pending_saves.add(task)
+
+        def done(finished):
+            self.pending_saves.discard(finished)
+            if not finished.cancelled() and finished.exception() is not None:
+                logger.error("Saving session failed", exc_info=finished.exception())
+
+        task.add_done_callback(done)
+
+    @log_latency
+    async def run(self, request_json: dict) -> dict:
+        """Main client endpoint, see ``main.run``. """
+        session_id = request_json['id']
+
+        logger.info("Loading session.")
+        session = await self.__load_session(session_id)
+        logger.info("Session loaded.")
+
+        session = add_user_turn(session, request_json)
+
+        logger.info("Calling policy step.")
+        try:
+            session, output_interaction = await self.policy.step(session)
+        except Exception as e:
+            logger.error("Error executing Policy", exc_info=e)
+            raise e
+
+        session = add_agent_response(session, output_interaction)
+
+        await self.__save_session(session_id, session, wait=request_json.get('wait_save', False))
+
+        return MessageToDict(output_interaction)
+
+    @log_latency
+    async def repeat_last_response(self, request_json: dict) -> dict:
+        """Return the most recent system response for the given session ID, see ``main.repeat_last_response``. """
+        logger.info("Loading session.")
+        session = await self.__load_session(request_json['id'])
+        logger.info("Session loaded.")
+
+        return MessageToDict(session.turn[-1].agent_response.interaction)
+
+    @log_latency
+    async def update_timers(self, request_json: dict) -> dict:
+        """Add/update timers for a session, see ``main.update_timers``. """
+        session_id = request_json['id']
+        session = await self.__load_session(session_id)
+
+        del session.task.state.user_timers[:]
+
+        for timer_dict in request_json['timers']:
+            timer = session.task.state.user_timers.add()
+            ParseDict(timer_dict, timer)
+
+        await self.__save_session(session_id, session, wait=True)
+
+        logger.info("Updated the Timers inside the session")
+
+        return {}
+
+    async def channel_stats(self, request_json: dict) -> dict:
+        """Report gRPC channel reuse, for both the sync channels of the policies and the aio channels. """
+        return {'sync': channel_registry.stats(), 'aio': aio_channel_registry.stats()}
+
+
+app = ASGIApp(policy_threads=int(os.environ.get('ORCHESTRATOR_POLICY_THREADS', 64)))
@@ -1,17 +1,15 @@
+import atexit
 import os
-import threading
-import uuid
 
-import grpc
 from flask import Flask, request
 from google.protobuf.json_format import MessageToDict, ParseDict
 from waitress import serve
 
-from asr_info_pb2 import ASRInfo
-from database_pb2 import SessionRequest
 from database_pb2_grpc import DatabaseStub
 from policy import DefaultPolicy
-from utils import logger, log_latency
+from session_cache import create_session_cache
+from turns import add_agent_response, add_user_turn
+from utils import logger, log_latency, get_channel, channel_registry
 
 
 """This module receives client requests and sends back system responses.
@@ -22,6 +20,15 @@ Flask application which exposes 3 endpoints:
     - last_response (repeat the last response from a session)
     - update_timers (update/add timers in a session)
 
+A fourth endpoint, channel_stats, reports how often the pooled gRPC channels
+to the other services have been reused.
+
+Sessions are loaded and saved through a ``SessionCache``, which can keep them
+in memory between turns and write them back in the background (see ``session_cache``).
+
+The same endpoints are also served by the ASGI application in ``asgi``, which
+makes its own gRPC calls with ``grpc.aio`` instead of holding a thread for each.
+
 The work of generating a system response is the responsibility of the policy 
 package. The ``run`` method calls the ``PhasedPolicy.step`` method, and this in
 turn will call other lower level policies until a response is generated and 
@@ -33,6 +40,10 @@ System responses are instances of the ``OutputInteraction`` proto serialized to
 
 app = Flask(__name__)
 policy = DefaultPolicy()
+db = DatabaseStub(get_channel(os.environ['EXTERNAL_FUNCTIONALITIES_URL']))
+sessions = create_session_cache(db)
+# gunicorn workers and waitress exit normally on SIGTERM, so the unsaved sessions are written on shutdown
+atexit.register(sessions.close)
 
 @app.route('/run', methods=['GET', 'POST'])
 @log_latency
@@ -43,8 +54,8 @@ def run() -> dict:
     interact with OAT. It expects to receive a JSON request body containing things
     like a client ID, client text, etc.
 
-    The client ID is used to create or retrieve a Session object from the database 
-    service before passing this on to the DefaultPolicy class (an instance of 
+    The client ID is used to create or retrieve a Session object from the session
+    cache or the database service before passing this on to the DefaultPolicy class (an instance of 
     PhasedPolicy in the current system).
 
     After the necessary policy step(s) have been executed, the Session is updated
@@ -57,48 +68,13 @@ def run() -> dict:
     Returns:
         JSON copy of an OutputInteraction object
     """
-    channel = grpc.insecure_channel(os.environ['EXTERNAL_FUNCTIONALITIES_URL'])
-    db = DatabaseStub(channel)
-
-    session_request: SessionRequest = SessionRequest()
-    session_request.id = request.json['id']
+    session_id = request.json['id']
 
-    logger.info("Calling DB to load session.")
-    session = db.load_session(session_request)
+    logger.info("Loading session.")
+    session = sessions.load(session_id)
     logger.info("Session loaded.")
 
-    resume_task = request.json.get('resume_task', None)
-    logger.info(f'RESUME TASK FLAG IS SET TO {resume_task}')
-    if resume_task is None:
-        session.resume_task = True
-    else:
-        session.resume_task = resume_task
-
-    has_list_permissions = request.json.get('list_permissions', False)
-    session.has_list_permissions = has_list_permissions
-    asr_message = ParseDict(request.json.get('asr_info', {}), ASRInfo())
-    headless = request.json.get('headless', 'true')
-
-    if not isinstance(headless, bool):
-        if headless == 'true':
-            session.headless = True
-        else:
-            session.headless = False
-    else:
-        session.headless = headless
-
-    # POPULATING NEW USER TURN
-    new_turn = session.turn.add()
-    new_turn.id = "turn_" + str(uuid.uuid4())
-    new_turn.user_request.interaction.text = request.json['text'] or ''
-
-    intents = request.json.get('intents', []) or []
-    new_turn.user_request.interaction.intents.extend(intents)
-    new_turn.user_request.time.GetCurrentTime()  # this method actually populates the object with the current time
-    new_turn.user_request.interaction.asr_info.CopyFrom(asr_message)
-
-    if "general" in intents:
-        new_turn.user_request.interaction.intents.remove("general")
+    session = add_user_turn(session, request.json)
 
     logger.info("Calling policy step.")
     try:
@@ -107,23 +83,10 @@ def run() -> dict:
         logger.error("Error executing Policy", exc_info=e)
         raise e
 
-    session.turn[-1].agent_response.interaction.ParseFromString(output_interaction.SerializeToString())
-    session.turn[-1].agent_response.time.GetCurrentTime() # this method populates the object with the current time
+    session = add_agent_response(session, output_interaction)
 
-    # Re-using session_request that already contains the correct ID for convenience
-    session_request.session.ParseFromString(session.SerializeToString())
+    sessions.save(session_id, session, wait=request.json.get('wait_save', False))
 
-    def save_session():
-        db.save_session(session_request)
-
-    if request.json.get('wait_save', False):
-        save_session()
-    else:
-        thread = threading.Thread(target=save_session)
-        thread.start()
-
-    if len(output_interaction.source.policy) == 0:
-        logger.warning('MISSING POLICY SOURCE')
     response = MessageToDict(output_interaction)
 
     return response
@@ -134,8 +97,8 @@ def run() -> dict:
 def repeat_last_response() -> dict:
     """Return the most recent system respones for the given session ID.
 
-    This method uses the supplied ID to retrieve a session from the database,
-    then simply returns the last OutputInteraction from the list of turns. 
+    This method uses the supplied ID to retrieve a session from the session cache
+    or the database, then simply returns the last OutputInteraction from the list of turns. 
 
     Args:
         none (JSON data accessed via the Flask "request" object)
@@ -143,14 +106,8 @@ def repeat_last_response() -> dict:
     Returns:
         JSON copy of an OutputInteraction object
     """
-    channel = grpc.insecure_channel(os.environ['EXTERNAL_FUNCTIONALITIES_URL'])
-    db = DatabaseStub(channel)
-
-    session_request: SessionRequest = SessionRequest()
-    session_request.id = request.json['id']
-
-    logger.info("Calling DB to load session.")
-    session = db.load_session(session_request)
+    logger.info("Loading session.")
+    session = sessions.load(request.json['id'])
     logger.info("Session loaded.")
 
     output_interaction = session.turn[-1].agent_response.interaction
@@ -175,12 +132,8 @@ def update_timers() -> dict:
     Returns:
         Empty JSON blob
     """
-    channel = grpc.insecure_channel(os.environ['EXTERNAL_FUNCTIONALITIES_URL'])
-    db = DatabaseStub(channel)
-
-    session_request: SessionRequest = SessionRequest()
-    session_request.id = request.json['id']
-    session = db.load_session(session_request)
+    session_id = request.json['id']
+    session = sessions.load(session_id)
 
     del session.task.state.user_timers[:]
 
@@ -189,14 +142,27 @@ def update_timers() -> dict:
         timer = session.task.state.user_timers.add()
         ParseDict(timer_dict, timer)
 
-    session_request.session.ParseFromString(session.SerializeToString())
-    db.save_session(session_request)
+    sessions.save(session_id, session, wait=True)
 
     logger.info("Updated the Timers inside the session")
 
     return {}
 
 
+@app.route('/channel_stats', methods=['GET'])
+def channel_stats() -> dict:
+    """Report gRPC channel reuse.
+
+    All downstream stubs share one channel per service URL (see ``utils.channels``).
+    This returns, for each URL, how many channels were opened and how many times
+    an existing one was handed out again.
+
+    Returns:
+        JSON dict of {target: {'created': int, 'reused': int}}
+    """
+    return channel_registry.stats()
+
+
 if __name__ == "__main__":
     logger.info("Orchestrator will run on port 8000")
     serve(app,
@@ -2,3 +2,4 @@ from .phased_policy import PhasedPolicy as DefaultPolicy
 from .abstract_policy import AbstractPolicy
 from .qa_policy import DefaultPolicy as DefaultQAPolicy
 from .chitchat_policy import DefaultPolicy as DefaultChitChatPolicy
+from .async_adapter import AsyncPolicyAdapter
@@ -0,0 +1,32 @@
+import asyncio
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple
+
+from taskmap_pb2 import OutputInteraction, Session
+
+from .abstract_policy import AbstractPolicy
+
+
+class AsyncPolicyAdapter:
+    """Exposes the sync ``step`` of a policy as a coroutine.
+
+    The policies make blocking gRPC calls, so ``step`` runs in a bounded pool of worker threads
+    while the event loop carries on serving other requests. Requests beyond ``max_workers``
+    wait for a free thread without holding one.
+
+    Args:
+        policy (AbstractPolicy): the policy to run, usually a ``PhasedPolicy``
+        max_workers (int): number of policy steps running at the same time
+    """
+
+    def __init__(self, policy: AbstractPolicy, max_workers: int = 64):
+        self.policy = policy
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='policy')
+
+    async def step(self, session: Session) -> Tuple[Session, OutputInteraction]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, self.policy.step, session)
+
+    def shutdown(self) -> None:
+        self.pool.shutdown(wait=True)
@@ -1,11 +1,12 @@
 import os
 import random
-import grpc
 import re
 
 from typing import Tuple
 
 from utils import (
+    get_channel,
+    compact_session,
     logger, set_source, CHITCHAT_GREETINGS, get_helpful_prompt,
     consume_intents, is_in_user_interaction, repeat_screen_response,
     HELPFUL_PROMPT_PAIRS, JOKE_TRIGGER_WORDS, build_joke_screen,
@@ -33,8 +34,8 @@ class ChitChatPolicy(AbstractPolicy):
 
     def __init__(self) -> None:
 
-        neural_functionalities_channel = grpc.insecure_channel(os.environ['NEURAL_FUNCTIONALITIES_URL'])
-        functionalities_channel = grpc.insecure_channel(os.environ['FUNCTIONALITIES_URL'])
+        neural_functionalities_channel = get_channel(os.environ['NEURAL_FUNCTIONALITIES_URL'])
+        functionalities_channel = get_channel(os.environ['FUNCTIONALITIES_URL'])
 
         self.llm_chit_chat = LLMChitChatStub(functionalities_channel)
         self.chitchat_classifier = ChitChatClassifierStub(neural_functionalities_channel)
@@ -85,7 +86,7 @@ class ChitChatPolicy(AbstractPolicy):
         output: OutputInteraction = OutputInteraction()
 
         if session.task.phase != Task.TaskPhase.DOMAIN:
-            domain_response: DomainClassification = self.domain_classifier.classify_domain(session)
+            domain_response: DomainClassification = self.domain_classifier.classify_domain(compact_session(session))
             confidence = domain_response.confidence
             top_domain = domain_response.domain
         else:
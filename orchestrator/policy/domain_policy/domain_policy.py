@@ -2,21 +2,23 @@ import os
 import random
 from typing import Dict, Tuple, Union
 
-import grpc
 
 from dangerous_task_pb2_grpc import DangerousStub
 from exceptions import PhaseChangeException
 from intent_classifier_pb2 import DomainClassification
 from intent_classifier_pb2_grpc import IntentClassifierStub
 from policy.abstract_policy import AbstractPolicy
+from policy.turn_executor import intent_prefetch
 from taskmap_pb2 import Image, OutputInteraction, ScreenInteraction, Session, Task
 from utils import (
+    get_channel,
+    build_intent_request,
+    compact_session,
     DANGEROUS_TASK_RESPONSES, close_session, consume_intents, is_in_user_interaction, set_source,
     repeat_screen_response, logger, INTRO_PROMPTS, build_chat_screen, should_trigger_theme, PAUSING_PROMPTS,
     JOKE_TRIGGER_WORDS
 )
 from theme_pb2 import ThemeResults
-from phase_intent_classifier_pb2 import IntentRequest
 from phase_intent_classifier_pb2_grpc import PhaseIntentClassifierStub
 from semantic_searcher_pb2 import SemanticQuery, ThemeMapping, ThemeDocument
 from semantic_searcher_pb2_grpc import SemanticSearcherStub
@@ -35,12 +37,12 @@ class DomainPolicy(AbstractPolicy):
     def __init__(self):
 
         self.rulebook = rulebook
-        external_channel = grpc.insecure_channel(os.environ['EXTERNAL_FUNCTIONALITIES_URL'])
+        external_channel = get_channel(os.environ['EXTERNAL_FUNCTIONALITIES_URL'])
         self.dangerous_task_filter = DangerousStub(external_channel)
         self.theme_suggester = ThemeSuggestion()
-        neural_channel = grpc.insecure_channel(os.environ["NEURAL_FUNCTIONALITIES_URL"])
+        neural_channel = get_channel(os.environ["NEURAL_FUNCTIONALITIES_URL"])
         self.phase_intent_classifier = PhaseIntentClassifierStub(neural_channel)
-        channel = grpc.insecure_channel(os.environ['FUNCTIONALITIES_URL'])
+        channel = get_channel(os.environ['FUNCTIONALITIES_URL'])
         self.domain_classifier = IntentClassifierStub(channel)
         self.search_again = False
         self.chitchat_policy = DefaultChitChatPolicy()
@@ -266,12 +268,10 @@ class DomainPolicy(AbstractPolicy):
             classify_intent = False
 
         if classify_intent:
-            intent_request = IntentRequest()
-            intent_request.utterance = session.turn[-1].user_request.interaction.text
-            for turn in session.turn:
-                intent_request.turns.append(turn)
+            intent_request = build_intent_request(session)
 
-            intent_classification = self.phase_intent_classifier.classify_intent(intent_request)
+            intent_classification = intent_prefetch.classify_intent(self.phase_intent_classifier, session,
+                                                                    intent_request)
             session.turn[-1].user_request.interaction.params.append(intent_classification.attributes.raw)
             translation_dict = {"yes": "YesIntent", "stop": "StopIntent", "answer_question": "QuestionIntent",
                                 "chit_chat": "ChitChatIntent", "confused": "ConfusedIntent",
@@ -359,7 +359,9 @@ class DomainPolicy(AbstractPolicy):
 
                     # check if QA/ chitchat is within domain before answering
 
-                    domain_response: DomainClassification = self.domain_classifier.classify_domain(session)
+                    domain_response: DomainClassification = self.domain_classifier.classify_domain(
+                        compact_session(session)
+                    )
                     confidence = domain_response.confidence
                     top_domain = domain_response.domain
 
@@ -538,7 +540,9 @@ class DomainPolicy(AbstractPolicy):
                     confidence = "high"
                     top_domain = "UndefinedDomain"
                 else:
-                    domain_response: DomainClassification = self.domain_classifier.classify_domain(session)
+                    domain_response: DomainClassification = self.domain_classifier.classify_domain(
+                        compact_session(session)
+                    )
 
                     confidence = domain_response.confidence
                     top_domain = domain_response.domain
@@ -1,5 +1,4 @@
 import random
-import grpc
 import os
 
 from compiled_protobufs.taskmap_pb2 import ScreenInteraction, Image, OutputInteraction
@@ -7,14 +6,14 @@ from compiled_protobufs.theme_pb2 import ThemeResults, ThemeRequest
 from compiled_protobufs.semantic_searcher_pb2_grpc import SemanticSearcherStub
 from compiled_protobufs.database_pb2_grpc import DatabaseStub
 
-from utils import logger
+from utils import logger, get_channel
 
 
 class HandCraftedHome:
 
     def __init__(self) -> None:
-        external_channel = grpc.insecure_channel(os.environ['EXTERNAL_FUNCTIONALITIES_URL'])
-        neural_channel = grpc.insecure_channel(os.environ["NEURAL_FUNCTIONALITIES_URL"])
+        external_channel = get_channel(os.environ['EXTERNAL_FUNCTIONALITIES_URL'])
+        neural_channel = get_channel(os.environ["NEURAL_FUNCTIONALITIES_URL"])
 
         self.semantic_searcher = SemanticSearcherStub(neural_channel)
         self.database = DatabaseStub(external_channel)
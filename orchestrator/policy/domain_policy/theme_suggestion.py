@@ -1,4 +1,3 @@
-import grpc
 import os
 import random
 
@@ -8,6 +7,7 @@ from searcher_pb2_grpc import QueryBuilderStub, SearcherStub
 from semantic_searcher_pb2_grpc import SemanticSearcherStub
 from theme_pb2 import ThemeResults
 from utils import (
+    get_channel,
     logger, SUGGESTED_THEME_WEEK, SUGGESTED_THEME_DAY, SUGGESTED_THEME_DAY_COUNTDOWN,
     SUGGESTED_THEME_WEEK_with_examples
 )
@@ -15,9 +15,9 @@ from utils import (
 
 class ThemeSuggestion:
     def __init__(self) -> None:
-        channel = grpc.insecure_channel(os.environ['FUNCTIONALITIES_URL'])
-        external_channel = grpc.insecure_channel(os.environ['EXTERNAL_FUNCTIONALITIES_URL'])
-        neural_channel = grpc.insecure_channel(os.environ["NEURAL_FUNCTIONALITIES_URL"])
+        channel = get_channel(os.environ['FUNCTIONALITIES_URL'])
+        external_channel = get_channel(os.environ['EXTERNAL_FUNCTIONALITIES_URL'])
+        neural_channel = get_channel(os.environ["NEURAL_FUNCTIONALITIES_URL"])
 
         self.semantic_searcher = SemanticSearcherStub(neural_channel)
         self.database = DatabaseStub(external_channel)
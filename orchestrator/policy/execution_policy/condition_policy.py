@@ -1,11 +1,10 @@
 import os
-import grpc
 
 from policy.abstract_policy import AbstractPolicy
 from task_manager_pb2 import InfoRequest, InfoResponse, Statement
 from task_manager_pb2_grpc import TaskManagerStub
 from taskmap_pb2 import OutputInteraction, Session, Task
-from utils import is_in_user_interaction, logger, repeat_screen_response, set_source
+from utils import is_in_user_interaction, logger, repeat_screen_response, set_source, get_channel
 
 from exceptions import PhaseChangeException
 from typing import List, Optional, Tuple
@@ -14,7 +13,7 @@ from typing import List, Optional, Tuple
 class ConditionPolicy(AbstractPolicy):
 
     def __init__(self):
-        channel = grpc.insecure_channel(os.environ["FUNCTIONALITIES_URL"])
+        channel = get_channel(os.environ["FUNCTIONALITIES_URL"])
         self.task_manager = TaskManagerStub(channel)
 
     def __get_conditions(self, session: Session) -> List[Statement]:
@@ -4,12 +4,11 @@ import re
 import grpc
 
 from typing import List, Tuple
-from datetime import datetime, timedelta
 
 from exceptions import PhaseChangeException
-from phase_intent_classifier_pb2 import IntentRequest
 from phase_intent_classifier_pb2_grpc import PhaseIntentClassifierStub
 from policy.abstract_policy import AbstractPolicy
+from policy.turn_executor import intent_prefetch
 from policy.qa_policy import DefaultPolicy as DefaultQAPolicy
 from policy.chitchat_policy import DefaultPolicy as DefaultChitChatPolicy
 
@@ -21,6 +20,9 @@ from compiled_protobufs.llm_pb2_grpc import LLMExecutionSearchManagerStub
 from compiled_protobufs.llm_pb2 import ExecutionSearchRequest, ExecutionSearchResponse
 
 from utils import (
+    get_channel,
+    theme_cache,
+    build_intent_request,
     ASR_ERROR,
     PAUSING_PROMPTS,
     RIND_FALLBACK_RESPONSE,
@@ -40,12 +42,12 @@ from utils import (
 )
 from video_searcher_pb2 import TaskStep, VideoQuery
 from video_searcher_pb2_grpc import ActionClassifierStub, VideoSearcherStub
-from compiled_protobufs.theme_pb2 import ThemeRequest
 from compiled_protobufs.database_pb2_grpc import DatabaseStub
 
 from .actions import perform_action
 from .condition_policy import ConditionPolicy
 from .extra_info_policy import ExtraInfoPolicy
+from .video_prefetcher import VideoPrefetcher
 
 
 def route_to_domain(session):
@@ -112,9 +114,9 @@ def route_to_planning(session: Session) -> None:
 
 class ExecutionPolicy(AbstractPolicy):
     def __init__(self) -> None:
-        channel = grpc.insecure_channel(os.environ["FUNCTIONALITIES_URL"])
-        neural_channel = grpc.insecure_channel(os.environ["NEURAL_FUNCTIONALITIES_URL"])
-        external_channel = grpc.insecure_channel(os.environ["EXTERNAL_FUNCTIONALITIES_URL"])
+        channel = get_channel(os.environ["FUNCTIONALITIES_URL"])
+        neural_channel = get_channel(os.environ["NEURAL_FUNCTIONALITIES_URL"])
+        external_channel = get_channel(os.environ["EXTERNAL_FUNCTIONALITIES_URL"])
 
         self.task_manager = TaskManagerStub(channel)
         self.phase_intent_classifier = PhaseIntentClassifierStub(neural_channel)
@@ -128,6 +130,12 @@ class ExecutionPolicy(AbstractPolicy):
         self.extra_info_policy = ExtraInfoPolicy()
         self.database = DatabaseStub(external_channel)
 
+        self.video_prefetcher = VideoPrefetcher(
+            self.__search_video,
+            lookahead=int(os.environ.get("VIDEO_PREFETCH_LOOKAHEAD", 3)),
+            session_budget=int(os.environ.get("VIDEO_PREFETCH_SESSION_BUDGET", 4)),
+        )
+
         self.search_triggered = False
 
     def __check_and_perform_actions(self, session: Session, output: OutputInteraction) -> None:
@@ -209,7 +217,21 @@ class ExecutionPolicy(AbstractPolicy):
         raise PhaseChangeException()
 
     def __retrieve_video(self, session: Session) -> Video:
-        """Search for and return a video for the current step (if possible).
+        """Return a video for the current step (if possible).
+
+        The video is taken from the ``VideoPrefetcher`` if it was looked up while
+        the user was on an earlier step, otherwise it's searched for now.
+
+        Args:
+            session (Session): the current Session object
+
+        Returns:
+            Video: a possibly-empty Video protobuf object
+        """
+        return self.video_prefetcher.retrieve(session)
+
+    def __search_video(self, request: TMRequest) -> Video:
+        """Search for and return a video for the current step of the request's state (if possible).
 
         This method will construct a query for the VideoSearcher service
         based on the current step text, and return the result.
@@ -217,16 +239,12 @@ class ExecutionPolicy(AbstractPolicy):
         See the full description in doc/video_searcher_documentation.md.
 
         Args:
-            session (Session): the current Session object
+            request (TMRequest): the TaskMap and the TaskState pointing at the step
 
         Returns:
             Video: a possibly-empty Video protobuf object
         """
         # retrieve current step text
-        request = TMRequest()
-        request.taskmap.ParseFromString(session.task.taskmap.SerializeToString())
-        request.state.ParseFromString(session.task.state.SerializeToString())
-
         step: TaskStep = TaskStep()
         video_message: Video = Video()
 
@@ -283,21 +301,8 @@ class ExecutionPolicy(AbstractPolicy):
 
     def __get_theme_keywords(self) -> List[str]:
 
-        request = ThemeRequest()
-
-        relevant_dates = []
-        now_date = datetime.today()
-        for i in range(7):
-            date = now_date + timedelta(days=i)
-            relevant_dates.append(date.strftime("%d-%m-%Y"))
-
         # get themed holidays
-        holiday_themes = []
-        for date in relevant_dates:
-            request.date = date
-            theme = self.database.get_theme_by_date(request)
-            if len(theme.queries) > 0:
-                holiday_themes.extend([(date, theme_sug) for theme_sug in theme.queries])
+        holiday_themes = theme_cache.get_upcoming_themes()
 
         logger.info(f"Found date themes: {holiday_themes}")
 
@@ -382,14 +387,12 @@ class ExecutionPolicy(AbstractPolicy):
         """
 
         if len(session.turn[-1].user_request.interaction.intents) == 0:
-            intent_request = IntentRequest()
-            for turn in session.turn:
-                intent_request.turns.append(turn)
+            intent_request = build_intent_request(session)
 
             output: OutputInteraction = OutputInteraction()
 
             intent_classification = (
-                self.phase_intent_classifier.classify_intent(intent_request)
+                intent_prefetch.classify_intent(self.phase_intent_classifier, session, intent_request)
             )
             session.turn[-1].user_request.interaction.params.append(intent_classification.attributes.raw)
 
@@ -809,6 +812,10 @@ class ExecutionPolicy(AbstractPolicy):
             )
             output = tm_response.interaction
 
+            if not session.headless:
+                # look up the next steps' videos while the user is on this one
+                self.video_prefetcher.prefetch(session)
+
             if len(output.screen.image_list) == 0:
                 image = self.__retrieve_image(session)
                 output.screen.image_list.append(image)
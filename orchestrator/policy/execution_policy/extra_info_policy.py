@@ -1,6 +1,5 @@
 import os
 import random
-import grpc
 
 from typing import Optional, Tuple
 
@@ -10,6 +9,7 @@ from task_manager_pb2 import ExtraList, TMRequest
 from task_manager_pb2_grpc import TaskManagerStub
 from taskmap_pb2 import ExtraInfo, OutputInteraction, Session
 from utils import (
+    get_channel,
     is_in_user_interaction, logger, repeat_screen_response, set_source,
     BOT_THINKS_HE_IS_FUNNY, CONTINUE_PROMPTS,
     EXPERTS_THINK_PROMPT, JOKE_INTRO_PROMPT
@@ -19,7 +19,7 @@ from utils import (
 class ExtraInfoPolicy(AbstractPolicy):
 
     def __init__(self) -> None:
-        channel = grpc.insecure_channel(os.environ["FUNCTIONALITIES_URL"])
+        channel = get_channel(os.environ["FUNCTIONALITIES_URL"])
         self.task_manager = TaskManagerStub(channel)
         self.safety_parser = SafetyParser()
         self.extra_info = None
@@ -0,0 +1,160 @@
+import threading
+
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from task_manager_pb2 import TMRequest
+from taskmap_pb2 import Session, Video
+from utils import logger
+
+
+class VideoPrefetcher:
+    """Looks up the videos of the upcoming steps of a task in the background.
+
+    Finding the video for a step takes three RPCs in series (the step text from the
+    TaskManager, the ActionClassifier and the VideoSearcher). Once a task is being executed
+    its ``execution_list`` is known, so ``prefetch`` starts these lookups for the next
+    ``lookahead`` steps while the user is still reading the current one, and ``get``
+    returns the result when they reach it.
+
+    Results are kept per session and keyed by the step's node ID, so they stay valid if the
+    user goes back or jumps to another step. Each session can have at most ``session_budget``
+    steps prefetched or in flight, and only the ``max_sessions`` most recently active
+    sessions are kept. ``retrieve`` falls back to looking the video up inline when it
+    wasn't prefetched.
+
+    Args:
+        search_fn (callable): finds the Video for the current step of a TMRequest's state
+        lookahead (int): number of upcoming steps to prefetch
+        session_budget (int): maximum number of steps prefetched for a session at once
+        max_sessions (int): number of sessions to keep prefetched videos for
+        max_workers (int): number of lookups running at the same time across all sessions
+    """
+
+    def __init__(self, search_fn: Callable[[TMRequest], Video], lookahead: int = 3, session_budget: int = 4,
+                 max_sessions: int = 1000, max_workers: int = 8):
+        self.search_fn = search_fn
+        self.lookahead = lookahead
+        self.session_budget = session_budget
+        self.max_sessions = max_sessions
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='video_prefetch')
+        self.lock = threading.Lock()
+        # session ID => (taskmap ID, {node ID: Future of the Video}), least recently used first
+        self.sessions: "OrderedDict[str, tuple]" = OrderedDict()
+        self.stats = {'submitted': 0, 'hits': 0, 'misses': 0}
+
+    @staticmethod
+    def __current_node(session: Session) -> Optional[str]:
+        state = session.task.state
+        if state.index_to_next < 1 or state.index_to_next > len(state.execution_list):
+            return None
+        return state.execution_list[state.index_to_next - 1]
+
+    def __entries(self, session: Session) -> Dict[str, Future]:
+        """Returns the session's prefetched videos, dropping them if the session moved to another task. """
+        taskmap_id, entries = self.sessions.get(session.session_id, (None, {}))
+        if taskmap_id != session.task.taskmap.taskmap_id:
+            for future in entries.values():
+                future.cancel()
+            entries = {}
+        self.sessions[session.session_id] = (session.task.taskmap.taskmap_id, entries)
+        self.sessions.move_to_end(session.session_id)
+        while len(self.sessions) > self.max_sessions:
+            _, (_, evicted) = self.sessions.popitem(last=False)
+            for future in evicted.values():
+                future.cancel()
+        return entries
+
+    def prefetch(self, session: Session) -> None:
+        """Starts looking up the videos of the steps after the current one.
+
+        Prefetched steps that are no longer coming up are dropped to free the session's budget.
+
+        Args:
+            session (Session): the current Session object, after the current step was set
+        """
+        state = session.task.state
+        upcoming: List[str] = list(state.execution_list[state.index_to_next:state.index_to_next + self.lookahead])
+        current = self.__current_node(session)
+        keep = set(upcoming) | ({current} if current is not None else set())
+
+        to_submit = []
+        with self.lock:
+            entries = self.__entries(session)
+            for node_id in [node_id for node_id in entries if node_id not in keep]:
+                entries.pop(node_id).cancel()
+            for node_id in upcoming:
+                if node_id in entries or node_id in to_submit:
+                    continue
+                if len(entries) + len(to_submit) >= self.session_budget:
+                    break
+                to_submit.append(node_id)
+
+            for node_id in to_submit:
+                # the request is built now, as the Session keeps changing after this turn
+                request = TMRequest()
+                request.taskmap.ParseFromString(session.task.taskmap.SerializeToString())
+                request.state.ParseFromString(state.SerializeToString())
+                request.state.index_to_next = list(state.execution_list).index(node_id) + 1
+                entries[node_id] = self.pool.submit(self.search_fn, request)
+                self.stats['submitted'] += 1
+
+        if to_submit:
+            logger.info(f"Prefetching videos for {len(to_submit)} upcoming steps")
+
+    def get(self, session: Session, timeout: Optional[float] = None) -> Optional[Video]:
+        """Returns the prefetched video of the current step, or None if it wasn't prefetched.
+
+        A lookup that is still running is waited for, as starting it again would take longer.
+        A failed lookup is dropped, so that the step can be prefetched again.
+
+        Args:
+            session (Session): the current Session object
+            timeout (float): maximum number of seconds to wait for a running lookup
+
+        Returns:
+            a copy of the prefetched Video, possibly empty if the step has no video, or None
+        """
+        current = self.__current_node(session)
+        with self.lock:
+            taskmap_id, entries = self.sessions.get(session.session_id, (None, {}))
+            future = entries.get(current) if taskmap_id == session.task.taskmap.taskmap_id else None
+            if future is None or future.cancelled():
+                self.stats['misses'] += 1
+                return None
+
+        try:
+            prefetched = future.result(timeout=timeout)
+        except Exception as e:
+            logger.info(f"Prefetched video lookup failed: {e}")
+            with self.lock:
+                self.stats['misses'] += 1
+                if future.done() and entries.get(current) is future:
+                    # free the session's budget, so the next prefetch can look the step up again
+                    del entries[current]
+            return None
+
+        with self.lock:
+            self.stats['hits'] += 1
+        video = Video()
+        video.CopyFrom(prefetched)
+        return video
+
+    def retrieve(self, session: Session) -> Video:
+        """Returns the video of the current step, searching for it now if it wasn't prefetched.
+
+        Args:
+            session (Session): the current Session object
+
+        Returns:
+            Video: a possibly-empty Video protobuf object
+        """
+        video = self.get(session)
+        if video is not None:
+            return video
+
+        request = TMRequest()
+        request.taskmap.ParseFromString(session.task.taskmap.SerializeToString())
+        request.state.ParseFromString(session.task.state.SerializeToString())
+        return self.search_fn(request)
@@ -1,21 +1,21 @@
 import os
 import random
-import grpc
 
 from typing import Tuple
-from datetime import datetime, timedelta
 from exceptions import PhaseChangeException
 
 from policy.abstract_policy import AbstractPolicy
-from phase_intent_classifier_pb2 import IntentRequest
 from phase_intent_classifier_pb2_grpc import PhaseIntentClassifierStub
 from task_manager_pb2 import TMRequest
 from task_manager_pb2_grpc import TaskManagerStub
 from taskmap_pb2 import Image, OutputInteraction, ScreenInteraction, Session, Task, Transcript
 from database_pb2_grpc import DatabaseStub
-from theme_pb2 import ThemeRequest, ThemeResults
+from theme_pb2 import ThemeResults
 
 from utils import (
+    get_channel,
+    theme_cache,
+    build_intent_request,
     COOKING_FAREWELL,
     close_session,
     consume_intents,
@@ -86,9 +86,9 @@ def route_to_execution(session: Session) -> None:
 class FarewellPolicy(AbstractPolicy):
 
     def __init__(self):
-        neural_channel = grpc.insecure_channel(os.environ["NEURAL_FUNCTIONALITIES_URL"])
-        channel = grpc.insecure_channel(os.environ['FUNCTIONALITIES_URL'])
-        external_channel = grpc.insecure_channel(os.environ['EXTERNAL_FUNCTIONALITIES_URL'])
+        neural_channel = get_channel(os.environ["NEURAL_FUNCTIONALITIES_URL"])
+        channel = get_channel(os.environ['FUNCTIONALITIES_URL'])
+        external_channel = get_channel(os.environ['EXTERNAL_FUNCTIONALITIES_URL'])
         self.task_manager = TaskManagerStub(channel=channel)
         self.phase_intent_classifier = PhaseIntentClassifierStub(neural_channel)
         self.database = DatabaseStub(external_channel)
@@ -138,21 +138,8 @@ class FarewellPolicy(AbstractPolicy):
 
     def __get_theme(self, session: Session) -> ThemeResults:
 
-        request = ThemeRequest()
-
-        relevant_dates = []
-        now_date = datetime.today()
-        for i in range(7):
-            date = now_date + timedelta(days=i)
-            relevant_dates.append(date.strftime("%d-%m-%Y"))
-
         # get themed holidays
-        holiday_themes = []
-        for date in relevant_dates:
-            request.date = date
-            theme = self.database.get_theme_by_date(request)
-            if len(theme.queries) > 0:
-                holiday_themes.extend([(date, theme_sug) for theme_sug in theme.queries])
+        holiday_themes = theme_cache.get_upcoming_themes()
 
         logger.info(f"Found date themes: {holiday_themes}")
 
@@ -160,11 +147,9 @@ class FarewellPolicy(AbstractPolicy):
 
         for date, theme in holiday_themes:
             if theme != current_theme and "day" in theme.lower():
-                request.theme_word = theme
-                return self.database.get_theme_by_id(request)
+                return theme_cache.get_theme_by_id(theme)
 
-        request.theme_word = "Desserts"
-        return self.database.get_theme_by_id(request)
+        return theme_cache.get_theme_by_id("Desserts")
 
     def step(self, session: Session) -> Tuple[Session, OutputInteraction]:
         """Step method for the FarewellPolicy class.
@@ -191,8 +176,7 @@ class FarewellPolicy(AbstractPolicy):
         """
 
         if len(session.turn[-1].user_request.interaction.intents) == 0:
-            intent_request = IntentRequest()
-            intent_request.turns.append(session.turn[-1])
+            intent_request = build_intent_request(session, window=1)
 
             output: OutputInteraction = OutputInteraction()
             intent_classification = self.phase_intent_classifier.classify_intent(intent_request)
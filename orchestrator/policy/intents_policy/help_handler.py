@@ -1,16 +1,16 @@
 import random
-import grpc
 import os
 
-from datetime import datetime, timedelta
 from typing import Tuple, List
 
 from taskmap_pb2 import OutputInteraction, Session, Task
-from theme_pb2 import ThemeResults, ThemeRequest
+from theme_pb2 import ThemeResults
 from database_pb2_grpc import DatabaseStub
 from exceptions import PhaseChangeException
 
 from utils import (
+    get_channel,
+    theme_cache,
     repeat_screen_response, set_source, is_in_user_interaction, CHITCHAT_FALLBACK,
     get_helpful_prompt, build_help_grid_screen, logger, get_helpful_options,
 )
@@ -21,26 +21,13 @@ from .abstract_intent_handler import AbstractIntentHandler
 class HelpHandler(AbstractIntentHandler):
 
     def __init__(self):
-        external_channel = grpc.insecure_channel(os.environ['EXTERNAL_FUNCTIONALITIES_URL'])
+        external_channel = get_channel(os.environ['EXTERNAL_FUNCTIONALITIES_URL'])
         self.database = DatabaseStub(external_channel)
 
     def __get_theme(self, session: Session) -> ThemeResults:
 
-        request = ThemeRequest()
-
-        relevant_dates = []
-        now_date = datetime.today()
-        for i in range(7):
-            date = now_date + timedelta(days=i)
-            relevant_dates.append(date.strftime("%d-%m-%Y"))
-
         # no current marketing event, so get themed holidays
-        holiday_themes = []
-        for date in relevant_dates:
-            request.date = date
-            theme = self.database.get_theme_by_date(request)
-            if len(theme.queries) > 0:
-                holiday_themes.extend([(date, theme_sug) for theme_sug in theme.queries])
+        holiday_themes = theme_cache.get_upcoming_themes()
 
         logger.info(f"Found date themes: {holiday_themes}")
 
@@ -48,11 +35,9 @@ class HelpHandler(AbstractIntentHandler):
 
         for date, theme in holiday_themes:
             if theme != current_theme:
-                request.theme_word = theme
-                return self.database.get_theme_by_id(request)
+                return theme_cache.get_theme_by_id(theme)
 
-        request.theme_word = "Desserts"
-        return self.database.get_theme_by_id(request)
+        return theme_cache.get_theme_by_id("Desserts")
 
     @property
     def caught_intents(self) -> List[str]:
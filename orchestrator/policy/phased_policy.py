@@ -1,20 +1,23 @@
 import os
 import random
-import grpc
 
 from typing import Optional, Tuple
 
 from analytics.general.safety_parser import SafetyParser
 from exceptions import PhaseChangeException
-from personality_pb2 import PersonalityRequest
+from personality_pb2 import PersonalityRequest, PersonalityResponse
+from phase_intent_classifier_pb2_grpc import PhaseIntentClassifierStub
 from personality_pb2_grpc import PersonalityStub
 from taskmap_pb2 import OutputInteraction, Session, SessionState, Task
 from utils import (
+    build_intent_request,
+    get_channel,
     UNSAFE_BOT_RESPONSE,
     close_session,
     filter_speech_text,
     is_in_user_interaction,
     logger,
+    PhraseMatcher,
     repeat_screen_response,
     set_source,
     SAFE_FALLBACK_RESPONSE
@@ -27,8 +30,14 @@ from .farewell_policy import DefaultPolicy as DefaultFarewellPolicy
 from .intents_policy import DefaultPolicy as DefaultIntentsPolicy
 from .planning_policy import DefaultPolicy as DefaultPlanningPolicy
 from .resuming_policy import DefaultPolicy as DefaultResumePolicy
+from .turn_executor import intent_prefetch, TurnExecutor, TurnResults, TurnStep
 from .validation_policy import DefaultPolicy as DefaultValidationPolicy
 
+# multi-word sequences match anywhere in the utterance, single words only as whole tokens
+STOP_SEQUENCES = PhraseMatcher(['end this', 'end the', 'finish', 'terminate', "don't talk",
+                                'not talk', 'why are you still speaking', 'why are you still talking', 'shut up',
+                                'zip it', 'make it end', 'go away', 'piss off', 'keep quiet', "shush"])
+
 
 class PhasedPolicy(AbstractPolicy):
     """Top-level policy responsible for generating a response to a client request.
@@ -38,6 +47,10 @@ class PhasedPolicy(AbstractPolicy):
     utterance, the ``step`` method of the class will call the ``__route_policy`` method to decide
     which sub-policy should deal with the current request given the Session state. 
 
+    The RPCs every turn needs before routing (the user utterance safety check, the personality check
+    and, where a phase policy will need it, intent classification) don't depend on each other, so
+    ``__run_turn_checks`` issues them concurrently with a ``TurnExecutor`` and joins them before routing.
+
     Note that ``__route_policy`` may receive ``PhaseChangeExceptions`` from a policy to signal that
     the phase of the Session has been updated, and it should now be passed on to a different sub-policy.
     For example, an initial utterance of "pasta" will be initially routed to the DomainPolicy, where a
@@ -56,12 +69,75 @@ class PhasedPolicy(AbstractPolicy):
         self.intents_policy = DefaultIntentsPolicy()
 
         self.safety_parser = SafetyParser()
+        self.personality = PersonalityStub(get_channel(os.environ['FUNCTIONALITIES_URL']))
+        self.phase_intent_classifier = PhaseIntentClassifierStub(
+            get_channel(os.environ['NEURAL_FUNCTIONALITIES_URL']))
+        self.turn_executor = TurnExecutor()
+
+    def __prefetch_intent(self, session: Session) -> bool:
+        """Checks if a phase policy is expected to classify the intent of the current utterance.
+
+        The phase policies classify the utterance when it arrives without intents, so in these
+        cases the classification can be requested together with the other per-turn checks.
+
+        Args:
+            session (Session): the current Session object
+
+        Returns:
+            bool: True if the intent classification should be prefetched
+        """
+        user_interaction = session.turn[-1].user_request.interaction
+        return user_interaction.text != '' and \
+            len(user_interaction.intents) == 0 and \
+            session.state == SessionState.RUNNING and \
+            session.task.phase in [Task.TaskPhase.DOMAIN, Task.TaskPhase.PLANNING,
+                                   Task.TaskPhase.VALIDATING, Task.TaskPhase.EXECUTING] and \
+            not self.__stop_intent(session)
+
+    def __run_turn_checks(self, session: Session) -> TurnResults:
+        """Runs the per-turn RPCs concurrently.
+
+        The steps are:
+
+        - "safety": the safety checks of the user utterance (skipped for an empty utterance). A
+          failed check short-circuits the turn, cancelling the other steps.
+        - "personality": the ``PersonalityProcessor`` check of the utterance
+        - "intent": the ``PhaseIntentClassifier`` classification the phase policy would request,
+          stored in ``intent_prefetch`` for the policy to pick up
+
+        Args:
+            session (Session): the current Session object
+
+        Returns:
+            TurnResults holding the response of each step
+        """
+        text = session.turn[-1].user_request.interaction.text
+
+        # requests are built up front, so the steps don't read the Session while it may change
+        personality_request = PersonalityRequest()
+        personality_request.utterance = text
+        steps = [TurnStep('personality', lambda _: self.personality.process_utterance(personality_request))]
+
+        if text != '':
+            steps.append(TurnStep('safety', lambda _: self.safety_parser.check_utterance(text),
+                                  short_circuit=lambda checks: not all(checks)))
+
+        intent_request = None
+        if self.__prefetch_intent(session):
+            intent_request = build_intent_request(session)
+            steps.append(TurnStep('intent', lambda _: self.phase_intent_classifier.classify_intent(intent_request)))
+
+        results = self.turn_executor.run(steps)
+        # a failed prefetch isn't fatal, the phase policy will call the classifier itself
+        if intent_request is not None and 'intent' in results:
+            intent_prefetch.put(session, intent_request, results.get('intent'))
+        return results
 
-    def __handle_user_utterance_safety(self, session: Session) -> Optional[OutputInteraction]:
+    def __handle_user_utterance_safety(self, session: Session, checks: TurnResults) -> Optional[OutputInteraction]:
         """Check if the current user utterance triggers any safety checks. 
 
-        This method extracts the utterance text from the Session and uses the SafetyService in
-        ``functionalities`` to check for different problems (suicidal intent, privacy, etc.).
+        This method uses the results of the SafetyService in ``functionalities``, which checks the
+        utterance for different problems (suicidal intent, privacy, etc.), to add the matching intents.
 
         If the text is empty, all tests will always pass. 
 
@@ -69,6 +145,7 @@ class PhasedPolicy(AbstractPolicy):
 
         Args:
             session (Session): the current Session object
+            checks (TurnResults): results of ``__run_turn_checks``
 
         Returns:
             OutputInteraction if any checks trigger, None otherwise
@@ -80,8 +157,7 @@ class PhasedPolicy(AbstractPolicy):
         if user_interaction.text == '':
             return None
 
-        # Parses the
-        self.safety_parser(session)
+        self.safety_parser.add_violation_intents(session, checks.get('safety'))
 
         if is_in_user_interaction(user_interaction=user_interaction,
                                   intents_list=['SuicideIntent']):
@@ -144,7 +220,7 @@ class PhasedPolicy(AbstractPolicy):
 
         It will first check for a "StopIntent" in the current ``InputInteraction`` object, and
         return True if one exists. If that fails, it will check for any occurrence of the words
-        and phrases in ``stop_sequences`` and return True if any match is found.
+        and phrases in ``STOP_SEQUENCES`` and return True if any match is found.
 
         Args:
             session (Session): the current Session object
@@ -155,63 +231,38 @@ class PhasedPolicy(AbstractPolicy):
 
         last_interaction = session.turn[-1].user_request.interaction
 
-        stop_sequences = ['end this', 'end the', 'finish', 'terminate', "don't talk",
-                          'not talk', 'why are you still speaking', 'why are you still talking', 'shut up',
-                          'zip it', 'make it end', 'go away', 'piss off', 'keep quiet', "shush"]
-
         # check if we have a stop intent First
         if "StopIntent" in last_interaction.intents:
             return True
 
         # check for a stop sequence
-        else:
-            for stop_word_or_sentence in stop_sequences:
-                stop_word_or_sentence = stop_word_or_sentence.lower()
-                words = stop_word_or_sentence.split()
-
-                if len(words) > 1:
-                    stop_sentence = stop_word_or_sentence
-                    if stop_sentence in last_interaction.text.lower():
-                        logger.info(f"'{stop_sentence}' matched '{last_interaction.text}' as a stop sentence")
-                        return True
-
-                else:
-                    stop_word = stop_word_or_sentence
-                    tokenized_user_utterance = last_interaction.text.lower().split()
-                    if stop_word in tokenized_user_utterance:
-                        logger.info(f"'{stop_word}' matched '{last_interaction.text}' as a stop word")
-                        return True
+        stop_word_or_sentence = STOP_SEQUENCES.find(last_interaction.text.lower())
+        if stop_word_or_sentence is not None:
+            logger.info(f"'{stop_word_or_sentence}' matched '{last_interaction.text}' as a stop sequence")
+            return True
 
         return False
 
-    @staticmethod
-    def __handle_personality(session: Session) -> Optional[OutputInteraction]:
+    def __handle_personality(self, session: Session, response: PersonalityResponse) -> Optional[OutputInteraction]:
         """Checks if the current utterance should trigger the OAT's "personality" response.
 
         This method is intended to handle responses to questions like "what are you", "who
         made you", etc. 
 
-        The utterance is checked by an RPC to the ``PersonalityProcessor`` class in ``functionalities``. 
+        The utterance is checked by an RPC to the ``PersonalityProcessor`` class in ``functionalities``,
+        made by ``__run_turn_checks``.
 
         If the check fails, None is returned. If the check succeeds, then the text returned by
         ``PersonalityProcessor`` is used to populate and return a new ``OutputInteraction``.
 
         Args:
             session (Session): the current Session object
+            response (PersonalityResponse): the ``PersonalityProcessor`` response for the utterance
 
         Returns:
             A new OutputInteraction if a personality utterance is detected, None otherwise
 
         """
-        channel = grpc.insecure_channel(os.environ['FUNCTIONALITIES_URL'])
-        personality = PersonalityStub(channel)
-
-        # Build utterance as input to safety check functionalities.
-        request = PersonalityRequest()
-        request.utterance = session.turn[-1].user_request.interaction.text
-
-        response = personality.process_utterance(request)
-
         if not response.is_personalilty_question:
             return None
 
@@ -230,6 +281,7 @@ class PhasedPolicy(AbstractPolicy):
         This method is the entrypoint from the orchestrator into the policy package. It follows a simple
         process for each request:
 
+        #. Run the safety, personality and intent classification RPCs concurrently
         #. Safety check user utterance
         #. Check if a bot personality response is required
         #. Check if the user utterance indicates the session should stop
@@ -245,24 +297,30 @@ class PhasedPolicy(AbstractPolicy):
         """
         self.recursive_depth = 0  # counts the number of recursive calls made via PhaseChangeException
 
-        # --- Check safety of user utterance --- #
-        agent_response = self.__handle_user_utterance_safety(session)
-        # If user utterance is not safe --> respond with default prompts.
-        if agent_response is not None:
-            logger.warning('user utterance is not safe -> returning default response.')
-            return session, agent_response
-
-        # Here we handle OAT's personality which includes proper handling of sensitive and private information
-        personality_response = self.__handle_personality(session)
-        if personality_response is not None:
-            return session, personality_response
-
-        # Generate agent response based on policy.
-        if self.__stop_intent(session):
-            # session.state = SessionState.RESUME
-            session, agent_response = self.farewell_policy.step(session)
-        else:
-            session, agent_response = self.__route_policy(session)
+        try:
+            checks = self.__run_turn_checks(session)
+
+            # --- Check safety of user utterance --- #
+            agent_response = self.__handle_user_utterance_safety(session, checks)
+            # If user utterance is not safe --> respond with default prompts.
+            if agent_response is not None:
+                logger.warning('user utterance is not safe -> returning default response.')
+                return session, agent_response
+
+            # Here we handle OAT's personality which includes proper handling of sensitive and private information
+            personality_response = self.__handle_personality(session, checks.get('personality'))
+            if personality_response is not None:
+                return session, personality_response
+
+            # Generate agent response based on policy.
+            if self.__stop_intent(session):
+                # session.state = SessionState.RESUME
+                session, agent_response = self.farewell_policy.step(session)
+            else:
+                session, agent_response = self.__route_policy(session)
+        finally:
+            # drop the prefetched intent classification if no policy used it
+            intent_prefetch.discard(session)
 
         if not session.greetings and not session.state == SessionState.CLOSED:
             if session.task.taskmap.title != '':
@@ -1,6 +1,5 @@
 import os
 import random
-import grpc
 
 from typing import Tuple, Optional
 
@@ -15,6 +14,7 @@ from offline_pb2 import SubCategory
 from exceptions import PhaseChangeException
 
 from utils import (
+    get_channel,
     close_session,
     is_in_user_interaction,
     logger,
@@ -31,7 +31,7 @@ class CategoryPolicy(AbstractPolicy):
 
     def __init__(self):
 
-        channel = grpc.insecure_channel(os.environ['FUNCTIONALITIES_URL'])
+        channel = get_channel(os.environ['FUNCTIONALITIES_URL'])
 
         self.searcher = SearcherStub(channel)
         self.query_builder = QueryBuilderStub(channel)
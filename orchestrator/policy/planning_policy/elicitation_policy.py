@@ -1,5 +1,4 @@
 import random
-import grpc
 import os
 from typing import Dict, Tuple
 
@@ -10,6 +9,7 @@ from searcher_pb2_grpc import SearcherStub
 from exceptions import PhaseChangeException
 
 from utils import (
+    get_channel,
     close_session,
     is_in_user_interaction,
     logger,
@@ -24,7 +24,7 @@ from .schema import CONVERSATION_TREE, REFERENCE_QUERIES, VAGUE_QUERIES, RECOMME
 class ElicitationPolicy(AbstractPolicy):
     
     def __init__(self):
-        channel = grpc.insecure_channel(os.environ['FUNCTIONALITIES_URL'])
+        channel = get_channel(os.environ['FUNCTIONALITIES_URL'])
         self.searcher = SearcherStub(channel)
         self.category_recommendations = CategoryResults()
         self.recommendations_count = 0
@@ -1,15 +1,14 @@
 import os
 import random
-import grpc
 
 from typing import Tuple
 
 from dangerous_task_pb2_grpc import DangerousStub
 from database_pb2_grpc import DatabaseStub
 from exceptions import PhaseChangeException
-from phase_intent_classifier_pb2 import IntentRequest
 from phase_intent_classifier_pb2_grpc import PhaseIntentClassifierStub
 from policy.abstract_policy import AbstractPolicy
+from policy.turn_executor import intent_prefetch
 from policy.qa_policy import DefaultPolicy as DefaultQAPolicy
 from policy.chitchat_policy import DefaultPolicy as DefaultChitChatPolicy
 from .elicitation_policy import ElicitationPolicy
@@ -20,6 +19,8 @@ from searcher_pb2 import SearchQuery, CandidateList, UserUtterance, ProcessedStr
 from searcher_pb2_grpc import QueryBuilderStub, SearcherStub
 from taskmap_pb2 import OutputInteraction, Session, Task, TaskmapCategoryUnion
 from utils import (
+    get_channel,
+    build_intent_request,
     ALL_RESULTS_PROMPT,
     ASR_ERROR,
     DANGEROUS_TASK_RESPONSES,
@@ -83,9 +84,9 @@ def route_to_domain(session: Session) -> None:
 class PlannerPolicyV2(AbstractPolicy):
 
     def __init__(self) -> None:
-        channel = grpc.insecure_channel(os.environ['FUNCTIONALITIES_URL'])
-        neural_channel = grpc.insecure_channel(os.environ["NEURAL_FUNCTIONALITIES_URL"])
-        external_channel = grpc.insecure_channel(os.environ['EXTERNAL_FUNCTIONALITIES_URL'])
+        channel = get_channel(os.environ['FUNCTIONALITIES_URL'])
+        neural_channel = get_channel(os.environ["NEURAL_FUNCTIONALITIES_URL"])
+        external_channel = get_channel(os.environ['EXTERNAL_FUNCTIONALITIES_URL'])
 
         self.searcher = SearcherStub(channel)
         self.query_builder = QueryBuilderStub(channel)
@@ -154,17 +155,15 @@ class PlannerPolicyV2(AbstractPolicy):
         Returns:
             tuple(updated Session, OutputInteraction)
         """
-        intent_request = IntentRequest()
-        intent_request.utterance = session.turn[-1].user_request.interaction.text
-        for turn in session.turn:
-            intent_request.turns.append(turn)
+        intent_request = build_intent_request(session)
         # theme_words = session.turn[-1].user_request.interaction.params
 
         output = OutputInteraction()
 
         if len(session.turn[-1].user_request.interaction.intents) == 0:
 
-            intent_classification = self.phase_intent_classifier.classify_intent(intent_request)
+            intent_classification = intent_prefetch.classify_intent(self.phase_intent_classifier, session,
+                                                                    intent_request)
 
             session.turn[-1].user_request.interaction.params.append(intent_classification.attributes.raw)
 
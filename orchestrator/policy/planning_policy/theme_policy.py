@@ -1,6 +1,5 @@
 import os
 import random
-import grpc
 
 from typing import Optional, Tuple
 from datetime import datetime, timedelta
@@ -13,9 +12,11 @@ from searcher_pb2_grpc import QueryBuilderStub, SearcherStub
 from semantic_searcher_pb2 import SemanticQuery, ThemeMapping
 from semantic_searcher_pb2_grpc import SemanticSearcherStub
 from taskmap_pb2 import InputInteraction, OutputInteraction, Session, TaskmapCategoryUnion, Task
-from theme_pb2 import ThemeRequest, ThemeResults
+from theme_pb2 import ThemeResults
 
 from utils import (
+    get_channel,
+    theme_cache,
     display_screen_results,
     is_in_user_interaction,
     populate_choices,
@@ -32,9 +33,9 @@ class ThemePolicy(AbstractPolicy):
     """
 
     def __init__(self) -> None:
-        channel = grpc.insecure_channel(os.environ['FUNCTIONALITIES_URL'])
-        external_channel = grpc.insecure_channel(os.environ['EXTERNAL_FUNCTIONALITIES_URL'])
-        neural_channel = grpc.insecure_channel(os.environ["NEURAL_FUNCTIONALITIES_URL"])
+        channel = get_channel(os.environ['FUNCTIONALITIES_URL'])
+        external_channel = get_channel(os.environ['EXTERNAL_FUNCTIONALITIES_URL'])
+        neural_channel = get_channel(os.environ["NEURAL_FUNCTIONALITIES_URL"])
 
         self.semantic_searcher = SemanticSearcherStub(neural_channel)
         self.database = DatabaseStub(external_channel)
@@ -65,9 +66,7 @@ class ThemePolicy(AbstractPolicy):
                 date = now_date + timedelta(days=i)
                 relevant_dates.append(date.strftime("%d-%m-%Y"))
 
-            request = ThemeRequest()
-            request.theme_word = matched_theme.theme
-            current_theme_results: ThemeResults = self.database.get_theme_by_id(request)
+            current_theme_results: ThemeResults = theme_cache.get_theme_by_id(matched_theme.theme)
 
             if current_theme_results.date != "":
                 theme_date = datetime.strptime(current_theme_results.date, "%d-%m-%Y")
@@ -92,9 +91,7 @@ class ThemePolicy(AbstractPolicy):
         Returns:
             a ThemeResults object
         """
-        request = ThemeRequest()
-        request.theme_word = theme
-        theme_results: ThemeResults = self.database.get_theme_by_id(request)
+        theme_results: ThemeResults = theme_cache.get_theme_by_id(theme)
         return theme_results
 
     def __augment_theme_results(self, session: Session, theme_results: ThemeResults) -> CandidateList:
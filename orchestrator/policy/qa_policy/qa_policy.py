@@ -1,6 +1,5 @@
 import os
 import random
-import grpc
 import re
 
 from typing import Tuple
@@ -17,6 +16,8 @@ from qa_pb2_grpc import QuestionAnsweringStub, TaskQuestionAnsweringStub
 from taskmap_pb2 import OutputInteraction, Session, Task
 
 from utils import (
+    get_channel,
+    compact_session,
     logger, set_source, CHITCHAT_FALLBACK, consume_intents,
     LEVEL_ONE_MEDICAL_RESPONSES, LEVEL_TWO_MEDICAL_RESPONSES, LEVEL_ONE_LEGAL_RESPONSES,
     LEVEL_TWO_LEGAL_RESPONSES, LEVEL_ONE_FINANCIAL_RESPONSES, LEVEL_TWO_FINANCIAL_RESPONSES,
@@ -29,9 +30,9 @@ class QAPolicy(AbstractPolicy):
 
     def __init__(self) -> None:
 
-        functionalities_channel = grpc.insecure_channel(os.environ['FUNCTIONALITIES_URL'])
-        neural_functionalities_channel = grpc.insecure_channel(os.environ['NEURAL_FUNCTIONALITIES_URL'])
-        external_functionalities_channel = grpc.insecure_channel(os.environ['EXTERNAL_FUNCTIONALITIES_URL'])
+        functionalities_channel = get_channel(os.environ['FUNCTIONALITIES_URL'])
+        neural_functionalities_channel = get_channel(os.environ['NEURAL_FUNCTIONALITIES_URL'])
+        external_functionalities_channel = get_channel(os.environ['EXTERNAL_FUNCTIONALITIES_URL'])
 
         self.qa_systems = {
             "GENERAL_QA": QuestionAnsweringStub(functionalities_channel),  # all three searchers in one
@@ -86,7 +87,7 @@ class QAPolicy(AbstractPolicy):
         output: OutputInteraction = OutputInteraction()
 
         if session.task.phase != Task.TaskPhase.DOMAIN:
-            domain_response: DomainClassification = self.domain_classifier.classify_domain(session)
+            domain_response: DomainClassification = self.domain_classifier.classify_domain(compact_session(session))
             confidence = domain_response.confidence
             top_domain = domain_response.domain
         else:
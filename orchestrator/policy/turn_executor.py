@@ -0,0 +1,155 @@
+import threading
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from phase_intent_classifier_pb2 import IntentRequest
+from taskmap_pb2 import Session
+from utils import logger
+
+
+class TurnStep:
+    """A unit of per-turn work, usually a single RPC, for the ``TurnExecutor``.
+
+    Args:
+        name (str): key of the step's result
+        func (callable): called with a dict holding the results of the steps it requires
+        requires (iterable of str): names of the steps whose results ``func`` needs
+        short_circuit (callable): optional predicate on the step's result; if it returns True,
+            the steps still pending are cancelled and the executor returns straight away
+    """
+
+    def __init__(self, name: str, func: Callable[[Dict[str, Any]], Any], requires: Iterable[str] = (),
+                 short_circuit: Optional[Callable[[Any], bool]] = None):
+        self.name = name
+        self.func = func
+        self.requires = set(requires)
+        self.short_circuit = short_circuit
+
+
+class TurnResults:
+    """Results of the steps run by the ``TurnExecutor`` for one turn. """
+
+    def __init__(self):
+        self.values: Dict[str, Any] = {}
+        self.errors: Dict[str, BaseException] = {}
+        # name of the step whose result stopped the turn early, if any
+        self.short_circuited_by: Optional[str] = None
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.values
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Returns the result of a step, re-raising the exception if the step failed. """
+        if name in self.errors:
+            raise self.errors[name]
+        return self.values.get(name, default)
+
+    def failed(self, name: str) -> bool:
+        return name in self.errors
+
+
+class TurnExecutor:
+    """Runs the independent RPCs of a turn concurrently, following their declared dependencies.
+
+    Every step is submitted to a shared thread pool as soon as the steps it requires have
+    finished, so a turn takes about as long as its slowest chain of calls rather than the sum
+    of all of them. When a step's ``short_circuit`` predicate matches, steps that haven't
+    started are cancelled and ``run`` returns without waiting for the ones in flight, whose
+    results are discarded.
+
+    A step that raises doesn't stop the others, but the steps requiring it are not run and
+    the exception is re-raised when its result is read with ``TurnResults.get``.
+    """
+
+    def __init__(self, max_workers: int = 48):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='turn')
+
+    def run(self, steps: Iterable[TurnStep]) -> TurnResults:
+        steps = {step.name: step for step in steps}
+        for step in steps.values():
+            missing = step.requires - steps.keys()
+            if missing:
+                raise ValueError(f"Step {step.name} requires unknown steps {missing}")
+
+        results = TurnResults()
+        waiting = dict(steps)
+        running: Dict[Future, TurnStep] = {}
+
+        def submit_ready():
+            for name, step in list(waiting.items()):
+                if step.requires & results.errors.keys():
+                    del waiting[name]
+                    results.errors[name] = RuntimeError(f"Step {name} skipped, a step it requires failed")
+                elif step.requires <= results.values.keys():
+                    del waiting[name]
+                    inputs = {required: results.values[required] for required in step.requires}
+                    running[self.pool.submit(step.func, inputs)] = step
+
+        submit_ready()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step = running.pop(future)
+                try:
+                    results.values[step.name] = future.result()
+                except Exception as e:
+                    logger.warning(f"Turn step {step.name} failed: {e}")
+                    results.errors[step.name] = e
+                    continue
+
+                if step.short_circuit is not None and step.short_circuit(results.values[step.name]):
+                    results.short_circuited_by = step.name
+                    for pending in running:
+                        pending.cancel()
+                    logger.info(f"Turn step {step.name} short-circuited the turn, "
+                                f"cancelled {len(running) + len(waiting)} other steps")
+                    return results
+            submit_ready()
+
+        if waiting:
+            raise ValueError(f"Steps {list(waiting)} have circular requirements")
+        return results
+
+
+class IntentPrefetch:
+    """Intent classifications requested ahead of the policies that need them.
+
+    ``PhasedPolicy`` classifies the utterance alongside its other per-turn checks and stores
+    the response here. The phase policies then call ``classify_intent``, which reuses it if
+    their ``IntentRequest`` matches the prefetched one, and calls the classifier otherwise.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.responses = {}
+
+    def put(self, session: Session, intent_request: IntentRequest, response) -> None:
+        with self.lock:
+            self.responses[session.turn[-1].id] = (intent_request.SerializeToString(deterministic=True), response)
+
+    def discard(self, session: Session) -> None:
+        with self.lock:
+            self.responses.pop(session.turn[-1].id, None)
+
+    def classify_intent(self, classifier, session: Session, intent_request: IntentRequest):
+        """Returns the prefetched classification of ``intent_request``, or calls ``classifier`` for it.
+
+        A prefetched response is only used once, so a re-routed turn classifying again gets a fresh one.
+
+        Args:
+            classifier (PhaseIntentClassifierStub): stub to use if nothing matching was prefetched
+            session (Session): the current Session object
+            intent_request (IntentRequest): the request the policy would send
+
+        Returns:
+            IntentClassification
+        """
+        with self.lock:
+            prefetched = self.responses.pop(session.turn[-1].id, None)
+        if prefetched is not None and prefetched[0] == intent_request.SerializeToString(deterministic=True):
+            return prefetched[1]
+        return classifier.classify_intent(intent_request)
+
+
+intent_prefetch = IntentPrefetch()
@@ -1,14 +1,13 @@
 import os
 import random
-import grpc
 
 from typing import List, Tuple
 
 from exceptions import PhaseChangeException
-from phase_intent_classifier_pb2 import IntentRequest
 from phase_intent_classifier_pb2_grpc import PhaseIntentClassifierStub
 
 from policy.abstract_policy import AbstractPolicy
+from policy.turn_executor import intent_prefetch
 from policy.qa_policy import DefaultPolicy as DefaultQAPolicy
 from policy.chitchat_policy import DefaultPolicy as DefaultChitChatPolicy
 
@@ -18,6 +17,8 @@ from llm_pb2_grpc import LLMReplacementGenerationStub
 
 from taskmap_pb2 import OutputInteraction, Session, Task
 from utils import (
+    get_channel,
+    build_intent_request,
     ASR_ERROR,
     RIND_FALLBACK_RESPONSE,
     consume_intents,
@@ -108,15 +109,15 @@ class ValidationPolicy(AbstractPolicy):
                      'Remember, safety first! '
 
     def __init__(self) -> None:
-        channel = grpc.insecure_channel(os.environ['FUNCTIONALITIES_URL'])
-        neural_channel = grpc.insecure_channel(os.environ["NEURAL_FUNCTIONALITIES_URL"])
+        channel = get_channel(os.environ['FUNCTIONALITIES_URL'])
+        neural_channel = get_channel(os.environ["NEURAL_FUNCTIONALITIES_URL"])
 
         self.task_manager: TaskManagerStub = TaskManagerStub(channel)
         self.phase_intent_classifier = PhaseIntentClassifierStub(
             neural_channel)
         self.qa_policy = DefaultQAPolicy()
         self.chitchat_policy = DefaultChitChatPolicy()
-        channel = grpc.insecure_channel(os.environ["FUNCTIONALITIES_URL"])
+        channel = get_channel(os.environ["FUNCTIONALITIES_URL"])
         self.replacement_step_rewriter = LLMReplacementGenerationStub(channel)
 
     def build_ingredients_output(self, session, output):
@@ -364,14 +365,13 @@ class ValidationPolicy(AbstractPolicy):
                                   intents_list=['CancelIntent']):
             route_to_planning(session)
 
-        intent_request = IntentRequest()
-        for turn in session.turn:
-            intent_request.turns.append(turn)
+        intent_request = build_intent_request(session)
 
         output = OutputInteraction()
 
         if len(session.turn[-1].user_request.interaction.intents) == 0:
-            intent_classification = self.phase_intent_classifier.classify_intent(intent_request)
+            intent_classification = intent_prefetch.classify_intent(self.phase_intent_classifier, session,
+                                                                    intent_request)
 
             session.turn[-1].user_request.interaction.params.append(intent_classification.attributes.raw)
 
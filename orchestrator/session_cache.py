@@ -0,0 +1,320 @@
+import os
+import threading
+import time
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+import grpc
+
+from database_pb2 import SessionRequest
+from database_pb2_grpc import DatabaseStub
+from taskmap_pb2 import Session, Task
+from utils import logger
+
+
+"""In-process cache of the sessions the orchestrator is serving.
+
+Without it every turn loads the ``Session`` from the database service and saves it back.
+Consecutive turns of a conversation usually reach the same process, so ``SessionCache``
+keeps the most recently used sessions in memory and writes them back behind the requests:
+a session saved several times before its flush is due is written once, with its latest state.
+
+Every save increments ``Session.version``, and the database service rejects a save whose
+version isn't newer than the stored one (see ``DynamoDB.save_session``). A process working on
+a stale copy, e.g. because another one served the previous turn, gets a ``VersionConflict``
+instead of silently overwriting the newer turns, and drops its copy.
+"""
+
+
+class VersionConflict(Exception):
+    """Raised when a session is saved with a version that isn't newer than the stored one. """
+
+
+class _Entry:
+
+    def __init__(self, session: Session, persisted: int):
+        self.session = session
+        self.persisted = persisted
+        self.due: Optional[float] = None
+        self.flushing = False
+
+    @property
+    def version(self) -> int:
+        return self.session.version
+
+    @property
+    def dirty(self) -> bool:
+        return self.version > self.persisted
+
+
+class SessionCache:
+    """Size-bounded LRU cache of sessions with write-behind flushing.
+
+    ``load`` returns a copy of the cached session, and only calls ``load_fn`` on a miss.
+    ``save`` stores a copy and schedules its flush ``flush_delay`` seconds later, so the turns
+    arriving in the meantime are written in a single ``save_fn`` call. Sessions the database
+    service still post-processes (see ``cacheable``) are flushed straight away and reloaded on
+    the next turn. ``close`` flushes every pending session and must be called on shutdown.
+
+    With ``max_sessions`` set to 0 the cache is disabled: sessions are loaded on every turn and
+    saved in a new thread, as the orchestrator used to.
+
+    Args:
+        load_fn (callable): loads a session from the database given its ID
+        save_fn (callable): saves a session to the database given its ID, raising a
+            ``VersionConflict`` if the stored version is as recent
+        max_sessions (int): number of sessions kept in memory
+        flush_delay (float): seconds a saved session can wait before being written
+        retry_delay (float): seconds to wait before retrying a failed write
+        max_workers (int): number of sessions written at the same time
+    """
+
+    def __init__(self, load_fn: Callable[[str], Session], save_fn: Callable[[str, Session], None],
+                 max_sessions: int = 1000, flush_delay: float = 5.0, retry_delay: float = 1.0, max_workers: int = 8):
+        self.load_fn = load_fn
+        self.save_fn = save_fn
+        self.max_sessions = max_sessions
+        self.flush_delay = flush_delay
+        self.retry_delay = retry_delay
+        self.enabled = max_sessions > 0
+
+        self.lock = threading.Condition()
+        # session ID => _Entry, least recently used first
+        self.entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # entries with unsaved changes, including the evicted ones not written yet
+        self.dirty: Dict[str, _Entry] = {}
+        self.stats = {'hits': 0, 'misses': 0, 'saves': 0, 'writes': 0, 'conflicts': 0, 'errors': 0}
+        self.__closed = False
+
+        if self.enabled:
+            self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='session_flush')
+            self.flusher = threading.Thread(target=self.__flush_loop, name='session_flusher', daemon=True)
+            self.flusher.start()
+
+    @staticmethod
+    def cacheable(session: Session) -> bool:
+        """Whether a session can be served from the cache on its next turn.
+
+        The database service replaces the TaskMap of a session with its enhanced version when loading
+        it, until the enhancement is done, and adds descriptions to the search results after saving a
+        session in the planning phase. These sessions have to go through the database.
+        """
+        if session.task.taskmap.taskmap_id != "" and not session.task.state.enhanced:
+            return False
+        return session.task.phase != Task.TaskPhase.PLANNING
+
+    @staticmethod
+    def __copy(session: Session) -> Session:
+        copy = Session()
+        copy.CopyFrom(session)
+        return copy
+
+    def load(self, session_id: str) -> Session:
+        """Returns the session with the given ID, from the cache if possible.
+
+        If the session has unsaved changes that can't be served from the cache, they are written
+        before loading it from the database.
+        """
+        if not self.enabled:
+            return self.load_fn(session_id)
+
+        with self.lock:
+            entry = self.entries.get(session_id) or self.dirty.get(session_id)
+            if entry is not None and self.cacheable(entry.session):
+                self.entries[session_id] = entry
+                self.entries.move_to_end(session_id)
+                self.__evict()
+                self.stats['hits'] += 1
+                return self.__copy(entry.session)
+            self.stats['misses'] += 1
+
+        if entry is not None:
+            self.flush(session_id)
+
+        session = self.load_fn(session_id)
+        with self.lock:
+            entry = self.entries.get(session_id) or self.dirty.get(session_id)
+            if entry is not None and entry.version > session.version:
+                # the unsaved changes couldn't be written, they are still the latest state of the session
+                logger.warning(f"Serving unsaved version {entry.version} of session {session_id}")
+                return self.__copy(entry.session)
+            self.entries[session_id] = _Entry(self.__copy(session), persisted=session.version)
+            self.entries.move_to_end(session_id)
+            self.__evict()
+        return session
+
+    def save(self, session_id: str, session: Session, wait: bool = False) -> None:
+        """Saves a session loaded with ``load``, incrementing its version.
+
+        A save that isn't based on the latest version of the session, i.e. another request saved
+        it since it was loaded, is rejected with a warning.
+
+        Args:
+            session_id (str): the session ID
+            session (Session): the updated session, its version is incremented in place
+            wait (bool): write the session before returning instead of behind the request
+        """
+        session.version += 1
+        if not self.enabled or self.__closed:
+            if wait:
+                self.__write(session_id, session)
+            else:
+                threading.Thread(target=self.__write, args=(session_id, self.__copy(session))).start()
+            return
+
+        with self.lock:
+            entry = self.entries.get(session_id) or self.dirty.get(session_id)
+            if entry is not None and entry.version >= session.version:
+                self.stats['conflicts'] += 1
+                logger.warning(f"Session {session_id} was saved by another request, version {session.version} "
+                               f"rejected")
+                return
+
+            if entry is None:
+                entry = _Entry(self.__copy(session), persisted=session.version - 1)
+            else:
+                entry.session = self.__copy(session)
+            self.entries[session_id] = entry
+            self.entries.move_to_end(session_id)
+            self.dirty[session_id] = entry
+            self.stats['saves'] += 1
+
+            if wait or not self.cacheable(session):
+                entry.due = time.monotonic()
+            elif entry.due is None:
+                # saves arriving before the flush is due are written together with this one
+                entry.due = time.monotonic() + self.flush_delay
+            self.__evict()
+            self.lock.notify_all()
+
+        if wait:
+            self.flush(session_id)
+
+    def flush(self, session_id: str, timeout: float = 10.0) -> bool:
+        """Writes the unsaved changes of a session now, returning whether they were written. """
+        with self.lock:
+            entry = self.dirty.get(session_id)
+            if entry is None:
+                return True
+            entry.due = time.monotonic()
+            self.lock.notify_all()
+            written = self.lock.wait_for(lambda: self.dirty.get(session_id) is not entry, timeout=timeout)
+        if not written:
+            logger.error(f"Session {session_id} could not be written within {timeout} seconds")
+        return written
+
+    def close(self, timeout: float = 30.0) -> None:
+        """Writes every session with unsaved changes and stops flushing. """
+        if not self.enabled:
+            return
+        with self.lock:
+            if self.__closed:
+                return
+            self.__closed = True
+            logger.info(f"Flushing {len(self.dirty)} sessions before shutting down")
+            now = time.monotonic()
+            for entry in self.dirty.values():
+                entry.due = now
+            self.lock.notify_all()
+            flushed = self.lock.wait_for(lambda: not self.dirty, timeout=timeout)
+            if not flushed:
+                logger.error(f"{len(self.dirty)} sessions could not be written before shutting down")
+            self.dirty.clear()
+            self.lock.notify_all()
+        self.flusher.join()
+        self.pool.shutdown(wait=True)
+
+    def __evict(self) -> None:
+        """Drops the least recently used sessions, flushing the ones with unsaved changes first. """
+        overflow = len(self.entries) - self.max_sessions
+        for session_id in list(self.entries):
+            if overflow <= 0:
+                break
+            entry = self.entries.pop(session_id)
+            if entry.dirty:
+                entry.due = time.monotonic()
+                self.lock.notify_all()
+            overflow -= 1
+
+    def __write(self, session_id: str, session: Session) -> None:
+        """Writes a session directly, when the cache is disabled. """
+        try:
+            self.save_fn(session_id, session)
+        except VersionConflict as e:
+            logger.warning(f"Session {session_id} was not saved: {e}")
+
+    def __flush_loop(self) -> None:
+        with self.lock:
+            while True:
+                if self.__closed and not self.dirty:
+                    return
+                now = time.monotonic()
+                next_due = None
+                for session_id, entry in list(self.dirty.items()):
+                    if entry.flushing:
+                        continue
+                    if entry.due <= now:
+                        entry.flushing = True
+                        self.pool.submit(self.__flush_entry, session_id, entry, entry.session)
+                    elif next_due is None or entry.due < next_due:
+                        next_due = entry.due
+                self.lock.wait(timeout=None if next_due is None else next_due - now)
+
+    def __flush_entry(self, session_id: str, entry: _Entry, session: Session) -> None:
+        # entries get a new copy on every save, so the session can be serialized without holding the lock
+        try:
+            self.save_fn(session_id, session)
+            error = None
+        except Exception as e:
+            error = e
+
+        with self.lock:
+            entry.flushing = False
+            if error is None:
+                self.stats['writes'] += 1
+                entry.persisted = max(entry.persisted, session.version)
+                if not entry.dirty:
+                    entry.due = None
+                    self.dirty.pop(session_id, None)
+            elif isinstance(error, VersionConflict):
+                # a newer version was saved elsewhere, the next turn has to load it
+                self.stats['conflicts'] += 1
+                logger.warning(f"Session {session_id} was not saved: {error}")
+                entry.due = None
+                self.dirty.pop(session_id, None)
+                if self.entries.get(session_id) is entry:
+                    del self.entries[session_id]
+            else:
+                self.stats['errors'] += 1
+                logger.error(f"Writing session {session_id} failed, retrying", exc_info=error)
+                entry.due = time.monotonic() + self.retry_delay
+            self.lock.notify_all()
+
+
+def create_session_cache(db: DatabaseStub) -> SessionCache:
+    """Creates a ``SessionCache`` backed by the database service.
+
+    The cache is configured by the SESSION_CACHE_SIZE (0 by default, i.e. disabled) and
+    SESSION_CACHE_FLUSH_DELAY environment variables. It should only be enabled if the turns of
+    a session are routed to the same process, e.g. a single worker or sticky sessions, as other
+    processes read the sessions from the database and can't see the unsaved changes.
+    """
+
+    def load_session(session_id: str) -> Session:
+        return db.load_session(SessionRequest(id=session_id))
+
+    def save_session(session_id: str, session: Session) -> None:
+        session_request = SessionRequest(id=session_id)
+        session_request.session.ParseFromString(session.SerializeToString())
+        try:
+            db.save_session(session_request)
+        except grpc.RpcError as e:
+            if e.code() == grpc.StatusCode.ABORTED:
+                raise VersionConflict(e.details()) from e
+            raise
+
+    return SessionCache(load_session, save_session,
+                        max_sessions=int(os.environ.get('SESSION_CACHE_SIZE', 0)),
+                        flush_delay=float(os.environ.get('SESSION_CACHE_FLUSH_DELAY', 5.0)))
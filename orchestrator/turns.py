@@ -0,0 +1,78 @@
+import uuid
+
+from google.protobuf.json_format import ParseDict
+
+from asr_info_pb2 import ASRInfo
+from taskmap_pb2 import OutputInteraction, Session
+from utils import logger
+
+
+"""Request handling shared by the WSGI (``main``) and ASGI (``asgi``) entry points.
+
+Both servers accept the same JSON request bodies, and use these functions to turn
+them into a new turn of the ``Session`` and to record the system response.
+"""
+
+
+def add_user_turn(session: Session, body: dict) -> Session:
+    """Populates the session flags and a new user turn from a /run request body.
+
+    Args:
+        session (Session): the Session loaded from the database
+        body (dict): JSON body of the client request
+
+    Returns:
+        the updated Session
+    """
+    resume_task = body.get('resume_task', None)
+    logger.info(f'RESUME TASK FLAG IS SET TO {resume_task}')
+    if resume_task is None:
+        session.resume_task = True
+    else:
+        session.resume_task = resume_task
+
+    has_list_permissions = body.get('list_permissions', False)
+    session.has_list_permissions = has_list_permissions
+    asr_message = ParseDict(body.get('asr_info', {}), ASRInfo())
+    headless = body.get('headless', 'true')
+
+    if not isinstance(headless, bool):
+        if headless == 'true':
+            session.headless = True
+        else:
+            session.headless = False
+    else:
+        session.headless = headless
+
+    # POPULATING NEW USER TURN
+    new_turn = session.turn.add()
+    new_turn.id = "turn_" + str(uuid.uuid4())
+    new_turn.user_request.interaction.text = body['text'] or ''
+
+    intents = body.get('intents', []) or []
+    new_turn.user_request.interaction.intents.extend(intents)
+    new_turn.user_request.time.GetCurrentTime()  # this method actually populates the object with the current time
+    new_turn.user_request.interaction.asr_info.CopyFrom(asr_message)
+
+    if "general" in intents:
+        new_turn.user_request.interaction.intents.remove("general")
+
+    return session
+
+
+def add_agent_response(session: Session, output_interaction: OutputInteraction) -> Session:
+    """Stores the system response in the last turn of the session.
+
+    Args:
+        session (Session): the current Session object
+        output_interaction (OutputInteraction): the response generated by the policy
+
+    Returns:
+        the updated Session
+    """
+    session.turn[-1].agent_response.interaction.ParseFromString(output_interaction.SerializeToString())
+    session.turn[-1].agent_response.time.GetCurrentTime()  # this method populates the object with the current time
+
+    if len(output_interaction.source.policy) == 0:
+        logger.warning('MISSING POLICY SOURCE')
+    return session
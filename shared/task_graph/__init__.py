@@ -1,2 +1,3 @@
 from .task_graph import TaskGraph
+from .scheduler import TaskGraphScheduler
 from .nodes import *
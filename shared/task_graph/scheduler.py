@@ -0,0 +1,145 @@
+import heapq
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from taskmap_pb2 import TaskState
+from .nodes import AbstractNode, ExecutionNode, StatementResolution
+from .task_graph import TaskGraph
+
+
+class TaskGraphScheduler:
+    """
+    Kahn-style topological scheduler over a TaskGraph.
+
+    Instead of scanning the whole graph for a node without parents after every step, the scheduler
+    keeps the number of pending parents of each node (its in-degree) and a ready-queue of the
+    schedulable nodes that have none left. Scheduling a node only touches its children, so a graph
+    with N nodes and E connections is scheduled in O((N + E) log N).
+
+    A node is done once it has been executed, or if it is a statement (condition, requirement, logic
+    node...) that resolves to TRUE. Statements are resolved with the full graph, so the result is the
+    same as calling TaskGraph.update_graph with the state the steps have been scheduled into. When the
+    ready-queue runs out, only the descendants of the nodes resolved since the last check are
+    re-evaluated, rather than rebuilding the graph.
+
+    Ready nodes are returned in the order they were added to the graph, matching
+    TaskGraph.get_root_node. The scheduler updates the resolution status of the nodes, so it should be
+    given a graph that is not shared (e.g. a TaskGraph.copy()).
+    """
+
+    def __init__(self, graph: TaskGraph, task_state: TaskState = None):
+        self.graph = graph
+        self.position: Dict[str, int] = {node_id: idx for idx, node_id in enumerate(graph.node_set)}
+        self.done: Set[str] = set()
+        self.in_degree: Dict[str, int] = {}
+        self.ready: List[Tuple[int, str]] = []
+        # nodes whose resolution changed since the statements were last re-evaluated
+        self.changed: List[AbstractNode] = []
+
+        resolved_ids: Dict[str, bool] = {}
+        executed_ids: Set[str] = set()
+        if task_state is not None:
+            for node_id in task_state.true_statements_ids:
+                resolved_ids[node_id] = True
+            for node_id in task_state.false_statements_ids:
+                resolved_ids[node_id] = False
+            if task_state.index_to_next != 0:
+                executed_ids = {node_id for node_id in task_state.execution_list[:task_state.index_to_next]
+                                if node_id in graph}
+            for node_id in executed_ids:
+                resolved_ids[node_id] = True
+
+        for node in graph.node_set.values():
+            node.update_resolution(resolved_id_list=resolved_ids)
+
+        for node in graph.node_set.values():
+            if node.node_id in executed_ids or self.__is_resolved_statement(node):
+                self.done.add(node.node_id)
+
+        for node in graph.node_set.values():
+            if node.node_id in self.done:
+                continue
+            self.in_degree[node.node_id] = sum(1 for parent in node.parent_list if parent.node_id not in self.done)
+            if self.in_degree[node.node_id] == 0 and node.is_schedulable():
+                self.__push(node)
+
+    @staticmethod
+    def __is_resolved_statement(node: AbstractNode) -> bool:
+        return not isinstance(node, ExecutionNode) and node.resolution_status() == StatementResolution.TRUE
+
+    def __push(self, node: AbstractNode) -> None:
+        heapq.heappush(self.ready, (self.position[node.node_id], node.node_id))
+
+    def __complete(self, node: AbstractNode) -> None:
+        """ Marks a node as done and releases its children. """
+        self.done.add(node.node_id)
+        for child in node.child_list:
+            if child.node_id in self.done:
+                continue
+            self.in_degree[child.node_id] -= 1
+            if self.in_degree[child.node_id] == 0 and child.is_schedulable():
+                self.__push(child)
+
+    def __propagate(self) -> None:
+        """
+        Re-evaluates the descendants of the nodes whose resolution changed, completing the statements
+        that are now TRUE (e.g. an AnyNode after one of its parent steps has been executed).
+        """
+        visited: Set[str] = set()
+        frontier: List[AbstractNode] = []
+        for node in self.changed:
+            frontier.extend(node.child_list)
+        self.changed = []
+
+        while frontier:
+            node = frontier.pop()
+            if node.node_id in visited or node.node_id in self.done:
+                continue
+            visited.add(node.node_id)
+            if self.__is_resolved_statement(node):
+                self.__complete(node)
+            # the resolution of a node depends on its parents, so it can change for all the descendants
+            frontier.extend(node.child_list)
+
+    def resolve(self, true_ids: Iterable[str] = (), false_ids: Iterable[str] = ()) -> None:
+        """
+        Updates the graph with newly resolved statements (e.g. a condition answered by the user).
+        Statements that become TRUE are completed, releasing the nodes that depend on them.
+        """
+        resolved_ids: Dict[str, bool] = {node_id: True for node_id in true_ids}
+        resolved_ids.update({node_id: False for node_id in false_ids})
+
+        for node_id, value in resolved_ids.items():
+            node = self.graph.get_node(node_id)
+            if node is None or node.node_id in self.done:
+                continue
+            node.update_resolution(resolved_id_list={node_id: value})
+            if self.__is_resolved_statement(node):
+                self.__complete(node)
+            self.changed.append(node)
+        self.__propagate()
+
+    def next_node(self) -> Optional[AbstractNode]:
+        """
+        Returns the next node that can be executed and marks it as executed, or None if nothing can
+        be scheduled until more statements are resolved.
+        """
+        if not self.ready:
+            self.__propagate()
+        if not self.ready:
+            return None
+
+        _, node_id = heapq.heappop(self.ready)
+        node = self.graph.get_node(node_id)
+        node.update_resolution(resolved_id_list={node_id: True})
+        self.__complete(node)
+        self.changed.append(node)
+        return node
+
+    def schedule(self) -> List[str]:
+        """ Returns the IDs of the nodes that can be executed, in order. """
+        topological_order: List[str] = []
+        node = self.next_node()
+        while node is not None:
+            topological_order.append(node.node_id)
+            node = self.next_node()
+        return topological_order
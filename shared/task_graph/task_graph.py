@@ -1,5 +1,6 @@
 from taskmap_pb2 import TaskMap, TaskState, Connection, ExtraInfo
 from typing import List, Dict, Optional, Tuple, Set
+import copy
 import uuid
 from .nodes import *
 from .abstract_task_graph_interface import TaskGraphInterface
@@ -78,6 +79,28 @@ class TaskGraph (TaskGraphInterface):
                                     node_id_to=connection.id_to,
                                     )
 
+    def copy(self) -> 'TaskGraph':
+        """
+        Returns a copy of the graph that can be modified (e.g. by update_graph or remove_node)
+        without affecting this one. Nodes and their connections are duplicated, while the node
+        payloads (e.g. the response protobufs of the ExecutionNodes) are shared, so they should
+        be treated as read-only.
+        """
+        graph = TaskGraph()
+        for attr_name, attr_value in self.__dict__.items():
+            if attr_name != 'node_set':
+                setattr(graph, attr_name, attr_value)
+        graph.tags = list(self.tags)
+        graph.faq = [dict(faq) for faq in self.faq]
+
+        node_copies: Dict[str, AbstractNode] = {node_id: copy.copy(node) for node_id, node in self.node_set.items()}
+        for node in node_copies.values():
+            node.child_list = [node_copies[child.node_id] for child in node.child_list]
+            node.parent_list = [node_copies[parent.node_id] for parent in node.parent_list]
+        graph.node_set = node_copies
+
+        return graph
+
     def get_node(self, node_id: str) -> AbstractNode:
         return self.node_set.get(node_id, None)
 
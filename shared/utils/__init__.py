@@ -8,6 +8,13 @@ from .general import log_latency
 from .general import get_file_system
 from .general import get_taskmap_id
 
+from .channels import get_channel
+from .channels import channel_registry
+from .channels import SERVER_OPTIONS
+from .channels import get_aio_channel
+from .channels import aio_channel_registry
+from .theme_cache import ThemeCache, theme_cache
+
 from .session import get_credit_from_taskmap
 from .session import get_credit_from_url
 from .session import close_session
@@ -29,6 +36,10 @@ from .session import set_source
 from .session import get_helpful_prompt
 from .session import get_recommendations
 from .session import should_trigger_theme
+from .session import compact_turns
+from .session import build_intent_request
+from .session import compact_session
+from .session import INTENT_CONTEXT_TURNS
 
 from .search import theme_recommendations
 
@@ -43,15 +54,21 @@ from .screen import compile_joke_screen
 from .downloads import Downloader
 
 from .nlp import jaccard_sim
+from .phrase_matcher import PhraseMatcher, RegexMatcher
+from .object_store import ObjectStore, ObjectStoreWriter
 from .constants.global_variables import *
 from .constants.prompts import *
 
 from .aws.timeit import *
+from .aws.batch_writer import BatchWriter
 
 try:
     # if Boto3 is not installed, skip importing ProtoDB and ComposedDB
     from .aws.new_proto_db import ProtoDB
     from .aws.composed_db import ComposedDB
+    from .aws.proto_db_migration import ProtoDBMigration
+    from .aws.memory_table import MEMORY_URL
+    from .aws.conditions import is_conditional_check_failed
 except ImportError as e:
     # logger.info("Boto3 is not installed, skipping ProtoDB from utils!")
     pass
@@ -0,0 +1,186 @@
+import atexit
+import os
+import queue
+import struct
+import threading
+import time
+from typing import List, Optional
+
+from google.protobuf.message import Message
+
+from .. import logger
+
+# length prefix of each message in the spill file
+_LENGTH = struct.Struct(">I")
+
+
+def _is_validation_error(error: Exception) -> bool:
+    """ Whether boto3 rejected a request as invalid, rather than failing to send it. """
+    response = getattr(error, "response", None) or {}
+    return response.get("Error", {}).get("Code") == "ValidationException"
+
+
+class BatchWriter:
+    """
+    Writes protobuf messages to a ProtoDB in the background.
+
+    ``put`` only adds the message to a bounded in-memory queue, and a flusher thread writes them
+    with ``ProtoDB.batch_put`` once ``batch_size`` messages are waiting or ``flush_interval`` seconds
+    have passed. When the queue is full, ``put`` waits for up to ``put_timeout`` seconds for the
+    flusher to catch up (backpressure). If it is still full, the message is appended to the spill
+    file, or dropped when no ``spill_path`` is set. Messages in the spill file, including those of
+    failed writes, are written once the queue is empty again (at most every ``retry_interval`` seconds
+    after a failed write), or on the next start. A spilled batch the database rejects as invalid is
+    dropped instead of being spilled again. Within a batch, only the last message put with a given
+    key is written.
+
+    ``close`` flushes everything that is queued, and is also run at interpreter exit.
+    """
+
+    def __init__(self, db, batch_size: int = 25, max_queue_size: int = 1000, flush_interval: float = 1.0,
+                 put_timeout: float = 0.05, spill_path: Optional[str] = None, retry_interval: float = 30.0):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.spill_path = spill_path
+        self.retry_interval = retry_interval
+        self.last_failure = 0.0
+        self.queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self.spill_lock = threading.Lock()
+        self.closed = threading.Event()
+
+        self.written = 0
+        self.spilled = 0
+        self.dropped = 0
+
+        self.thread = threading.Thread(target=self.__run, daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def put(self, message: Message) -> None:
+        if self.closed.is_set():
+            self.__overflow([message])
+            return
+        try:
+            self.queue.put(message, timeout=self.put_timeout)
+        except queue.Full:
+            self.__overflow([message])
+
+    def __overflow(self, messages: List[Message]) -> None:
+        if self.spill_path is None:
+            self.dropped += len(messages)
+            logger.warning(f"{self.db.proto_class.__name__} writer overloaded, dropped {len(messages)} "
+                           f"messages ({self.dropped} in total)")
+            return
+        with self.spill_lock:
+            os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+            with open(self.spill_path, "ab") as f:
+                for message in messages:
+                    data = message.SerializeToString()
+                    f.write(_LENGTH.pack(len(data)))
+                    f.write(data)
+        self.spilled += len(messages)
+
+    def __read_spill(self) -> List[Message]:
+        """ Takes the messages out of the spill file. """
+        with self.spill_lock:
+            if self.spill_path is None or not os.path.isfile(self.spill_path):
+                return []
+            with open(self.spill_path, "rb") as f:
+                data = f.read()
+            os.remove(self.spill_path)
+
+        messages = []
+        offset = 0
+        while offset + _LENGTH.size <= len(data):
+            (length,) = _LENGTH.unpack_from(data, offset)
+            offset += _LENGTH.size
+            if offset + length > len(data):
+                logger.warning(f"Truncated message at the end of {self.spill_path}, skipping it")
+                break
+            messages.append(self.db.proto_class.FromString(data[offset:offset + length]))
+            offset += length
+        return messages
+
+    def __deduplicate(self, messages: List[Message]) -> List[Message]:
+        """ Keeps the last message for each key, DynamoDB rejects a batch holding the same key twice. """
+        latest = {}
+        for message in messages:
+            key = getattr(message, self.db.primary_key)
+            latest.pop(key, None)
+            latest[key] = message
+        return list(latest.values())
+
+    def __write(self, messages: List[Message], replaying: bool = False) -> None:
+        if not messages:
+            return
+        messages = self.__deduplicate(messages)
+        try:
+            # messages are new log entries, so there is nothing to compare against
+            self.db.batch_put(messages, check_for_changes=False)
+            self.written += len(messages)
+        except Exception as e:
+            if replaying and _is_validation_error(e):
+                # the batch would fail on every retry, keep it from blocking the rest of the spill file
+                self.dropped += len(messages)
+                logger.error(f"Dropped {len(messages)} spilled messages rejected by the database: {e}")
+                return
+            self.last_failure = time.monotonic()
+            logger.warning(f"Batch write of {len(messages)} messages failed: {e}")
+            self.__overflow(messages)
+
+    def __next_batch(self) -> List[Message]:
+        """ Waits for up to flush_interval seconds for a full batch, returning early on close. """
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and not self.closed.is_set():
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self.queue.get(timeout=min(max(remaining, 0), 0.1)))
+            except queue.Empty:
+                if remaining <= 0:
+                    break
+        return batch
+
+    def __run(self) -> None:
+        # messages left from a previous run
+        self.__replay_spill()
+        while not self.closed.is_set():
+            self.__write(self.__next_batch())
+            if self.spilled and self.queue.empty() and time.monotonic() - self.last_failure > self.retry_interval:
+                self.__replay_spill()
+
+    def __replay_spill(self) -> None:
+        messages = self.__read_spill()
+        if messages:
+            logger.info(f"Writing {len(messages)} spilled messages from {self.spill_path}")
+            self.spilled = 0
+        for start in range(0, len(messages), self.batch_size):
+            self.__write(messages[start:start + self.batch_size], replaying=True)
+
+    def flush(self) -> None:
+        """ Writes everything that is currently queued, from the calling thread. """
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) == self.batch_size:
+                self.__write(batch)
+                batch = []
+        self.__write(batch)
+
+    def close(self) -> None:
+        if self.closed.is_set():
+            return
+        self.closed.set()
+        self.thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+        logger.info(f"Closed {self.db.proto_class.__name__} writer: {self.written} written, "
+                    f"{self.spilled} spilled, {self.dropped} dropped")
+
+    def stats(self) -> dict:
+        return {'queued': self.queue.qsize(), 'written': self.written, 'spilled': self.spilled,
+                'dropped': self.dropped}
@@ -1,7 +1,15 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from boto3.dynamodb.conditions import ConditionBase
+from botocore.exceptions import ClientError
 from google.protobuf.message import Message
 from google.protobuf.internal.containers import MessageMap, RepeatedCompositeFieldContainer
 
 from .timeit import *
+from .conditions import conditional_check_failed, evaluate_condition, is_conditional_check_failed
 from .new_proto_db import ProtoDB, check_attr
 from datetime import datetime
 from google.protobuf.json_format import MessageToDict
@@ -20,7 +28,12 @@ class ComposedDB(ProtoDB):
                  url=None,
                  prefix: str = "Undefined",
                  primary_key: str = 'id',
-                 sub_proto_config: list = None):
+                 sub_proto_config: list = None,
+                 incremental: bool = False,
+                 max_tracked_items: int = 1024,
+                 storage: Optional[str] = None,
+                 compression: Optional[str] = None,
+                 projected_attributes: List[str] = None):
         """
             Initialization method for the Composed DB object, that aims to provide an easy interface between
             protobuf objects and a dynamodb Instance
@@ -37,6 +50,14 @@ class ComposedDB(ProtoDB):
                         'proto_class': SubMessageClass
                         'primary_key': 'sub_message_id'
                 }
+            @param incremental: if True, the DB remembers a fingerprint of every sub-message it loads or saves,
+                and on the next put only the sub-messages that are new or have changed since then are written.
+                The parent row keeps the full list of sub-message ids, so loading is unaffected
+            @param max_tracked_items: maximum number of parent objects whose sub-message fingerprints are kept
+                in memory when running in incremental mode (least recently used ones are dropped first)
+            @param storage, compression, projected_attributes: storage format of the parent and sub-message
+                tables, see ProtoDB. In the binary format the parent blob doesn't include the sub-messages,
+                whose ids are kept as top-level attributes
 
             @return None
 
@@ -48,12 +69,21 @@ class ComposedDB(ProtoDB):
         super().__init__(proto_class,
                          url=url,
                          prefix=prefix,
-                         primary_key=primary_key)
+                         primary_key=primary_key,
+                         storage=storage,
+                         compression=compression,
+                         projected_attributes=projected_attributes)
 
         self.sub_tables = {}
         self.param_list = []
         self.config = sub_proto_config
 
+        self.incremental = incremental
+        self.max_tracked_items = max_tracked_items
+        # parent id -> {param -> {sub-message id -> fingerprint}}, ordered from least to most recently used
+        self.__fingerprints: OrderedDict = OrderedDict()
+        self.__lock = threading.Lock()
+
         for param, config in sub_proto_config.items():
             proto_class = config['proto_class']
             primary_key = config['primary_key']
@@ -65,7 +95,9 @@ class ComposedDB(ProtoDB):
             self.sub_tables[proto_class.__name__] = ProtoDB(proto_class,
                                                             primary_key=primary_key,
                                                             url=url,
-                                                            prefix=prefix)
+                                                            prefix=prefix,
+                                                            storage=storage,
+                                                            compression=compression)
 
     def __put_sub(self, sub_message):
 
@@ -104,14 +136,135 @@ class ComposedDB(ProtoDB):
 
         return output
 
-    def _encode_dict(self, obj: Message) -> dict:
+    @staticmethod
+    def __fingerprint(sub_message: Message) -> bytes:
+        return hashlib.blake2b(sub_message.SerializeToString(deterministic=True), digest_size=16).digest()
+
+    def __sub_fingerprints(self, obj: Message) -> Dict[str, Dict[str, bytes]]:
+        fingerprints = {}
+        for param in self.param_list:
+            sub_key = self.config[param]['primary_key']
+            sub_message = getattr(obj, param)
+            if isinstance(sub_message, Message):
+                sub_message = [sub_message]
+            fingerprints[param] = {
+                getattr(item, sub_key): self.__fingerprint(item) for item in sub_message
+            }
+        return fingerprints
+
+    def __get_tracked(self, item_id: str) -> Optional[Dict[str, Dict[str, bytes]]]:
+        with self.__lock:
+            fingerprints = self.__fingerprints.get(item_id)
+            if fingerprints is not None:
+                self.__fingerprints.move_to_end(item_id)
+            return fingerprints
 
-        payload = super()._encode_dict(obj)
+    def __track(self, item_id: str, fingerprints: Dict[str, Dict[str, bytes]]) -> None:
+        with self.__lock:
+            self.__fingerprints[item_id] = fingerprints
+            self.__fingerprints.move_to_end(item_id)
+            while len(self.__fingerprints) > self.max_tracked_items:
+                self.__fingerprints.popitem(last=False)
 
+    def __put_sub_delta(self, sub_message, param: str, known: Dict[str, bytes], current: Dict[str, bytes]):
+        """
+            Writes only the sub-messages whose fingerprint differs from the one recorded at the last load/save
+            and returns the same id manifest that __put_sub would have returned
+        """
+        if issubclass(type(sub_message), MessageMap):
+            raise NotImplementedError()
+
+        table = self.sub_tables[self.config[param]['proto_class'].__name__]
+        sub_key = self.config[param]['primary_key']
+
+        if isinstance(sub_message, Message):
+            item_id = getattr(sub_message, sub_key)
+            if known.get(item_id) != current[item_id]:
+                table.put(sub_message, check_for_changes=False)
+            return item_id
+
+        item_ids = [getattr(item, sub_key) for item in sub_message]
+        dirty = [item for item, item_id in zip(sub_message, item_ids) if known.get(item_id) != current[item_id]]
+        if len(dirty) > 0:
+            table.batch_put(dirty, check_for_changes=False)
+        return item_ids
+
+    def __encode(self, obj: Message, encode_parent) -> dict:
+        """
+            Writes the sub-messages to their tables and encodes the parent with `encode_parent`,
+            replacing the sub-messages by their ids
+        """
+        known = None
+        if self.incremental:
+            known = self.__get_tracked(getattr(obj, self.primary_key))
+
+        # Only the parent fields need to be encoded, the sub-messages are replaced by their ids
+        parent = self.proto_class()
+        parent.CopyFrom(obj)
         for param in self.param_list:
-            payload[param] = self.__put_sub(getattr(obj, param))
+            parent.ClearField(param)
+        payload = encode_parent(parent)
+
+        if known is None:
+            for param in self.param_list:
+                payload[param] = self.__put_sub(getattr(obj, param))
+            if self.incremental:
+                self.__track(getattr(obj, self.primary_key), self.__sub_fingerprints(obj))
+            return payload
+
+        current = self.__sub_fingerprints(obj)
+        for param in self.param_list:
+            payload[param] = self.__put_sub_delta(getattr(obj, param), param, known.get(param, {}), current[param])
+        self.__track(getattr(obj, self.primary_key), current)
         return payload
 
+    def _encode_dict(self, obj: Message) -> dict:
+        return self.__encode(obj, super()._encode_dict)
+
+    def _encode_blob(self, obj: Message) -> dict:
+        return self.__encode(obj, super()._encode_blob)
+
+    def __untrack(self, item_id: str) -> None:
+        with self.__lock:
+            self.__fingerprints.pop(item_id, None)
+
+    def put(self, proto_obj: Message, check_for_changes: bool = True, condition: ConditionBase = None) -> str:
+        item_id = getattr(proto_obj, self.primary_key)
+        if self.incremental and self.__get_tracked(item_id) is not None:
+            # the fingerprints already tell us what changed, no need to load the whole object to compare
+            check_for_changes = False
+        try:
+            if condition is not None:
+                # the sub-messages are written before the parent, so the condition is checked up front for a
+                # rejected put to leave them untouched. The parent put checks it again, in case of a concurrent write
+                if not evaluate_condition(condition, self._get_item(item_id) or {}):
+                    raise conditional_check_failed()
+            return super().put(proto_obj, check_for_changes, condition)
+        except ClientError as e:
+            if is_conditional_check_failed(e):
+                # the recorded fingerprints may describe the rejected object rather than the stored one
+                self.__untrack(item_id)
+            raise
+
+    def get(self, item_id: str, decode: bool = True) -> Message:
+        proto_obj = super().get(item_id, decode)
+        if self.incremental and decode:
+            self.__track(item_id, self.__sub_fingerprints(proto_obj))
+        return proto_obj
+
+    def _decode_blob(self, item: dict) -> Message:
+        proto_obj = super()._decode_blob(item)
+        for param, config in self.config.items():
+            table = self.sub_tables[config['proto_class'].__name__]
+            item_ids = item.get(param, [])
+            if isinstance(item_ids, str):
+                getattr(proto_obj, param).CopyFrom(table.get(item_ids))
+            else:
+                sub_messages = table.batch_get(list(item_ids))
+                getattr(proto_obj, param).extend([sub_message for sub_message in sub_messages
+                                                  if sub_message is not None])
+        return proto_obj
+
     def _decode_dict(self, message_dict: dict) -> dict:
         for param, config in self.config.items():
             proto_name = config['proto_class'].__name__
@@ -0,0 +1,58 @@
+from boto3.dynamodb.conditions import ConditionBase
+from botocore.exceptions import ClientError
+
+
+def conditional_check_failed() -> ClientError:
+    """ The error boto3 raises when the condition of a conditional write isn't met. """
+    return ClientError({'Error': {'Code': 'ConditionalCheckFailedException',
+                                  'Message': 'The conditional request failed'}}, 'PutItem')
+
+
+def is_conditional_check_failed(error: ClientError) -> bool:
+    return error.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException'
+
+
+def evaluate_condition(condition: ConditionBase, item: dict) -> bool:
+    """ Evaluates a boto3 condition (as used in scan filters and conditional writes) against a decoded item. """
+    expression = condition.get_expression()
+    operator = expression['operator']
+    values = expression['values']
+
+    def value(operand):
+        if hasattr(operand, 'name'):
+            return item.get(operand.name)
+        return operand
+
+    if operator == 'AND':
+        return evaluate_condition(values[0], item) and evaluate_condition(values[1], item)
+    if operator == 'OR':
+        return evaluate_condition(values[0], item) or evaluate_condition(values[1], item)
+    if operator == 'NOT':
+        return not evaluate_condition(values[0], item)
+    if operator == 'attribute_exists':
+        return values[0].name in item
+    if operator == 'attribute_not_exists':
+        return values[0].name not in item
+
+    left = value(values[0])
+    if operator == 'begins_with':
+        return isinstance(left, str) and left.startswith(value(values[1]))
+    if operator == 'contains':
+        return left is not None and value(values[1]) in left
+    if left is None:
+        return False
+    if operator == '=':
+        return left == value(values[1])
+    if operator == '<>':
+        return left != value(values[1])
+    if operator == '<':
+        return left < value(values[1])
+    if operator == '<=':
+        return left <= value(values[1])
+    if operator == '>':
+        return left > value(values[1])
+    if operator == '>=':
+        return left >= value(values[1])
+    if operator == 'BETWEEN':
+        return value(values[1]) <= left <= value(values[2])
+    raise NotImplementedError(f"Condition operator {operator} isn't supported")
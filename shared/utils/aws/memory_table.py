@@ -0,0 +1,141 @@
+import copy
+import threading
+
+from typing import Dict, List, Optional
+
+from boto3.dynamodb.conditions import ConditionBase
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+from .conditions import conditional_check_failed, evaluate_condition
+
+# passing this as the url of a ProtoDB stores its table in memory instead of DynamoDB
+MEMORY_URL = "memory://"
+
+
+class _Store:
+    """ Tables of the in-memory stand-in, shared by every ProtoDB of the process like a real database. """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tables: Dict[str, Dict[str, dict]] = {}
+        self.primary_keys: Dict[str, str] = {}
+
+    def create(self, table_name: str, primary_key: str) -> Dict[str, dict]:
+        with self.lock:
+            self.primary_keys[table_name] = primary_key
+            return self.tables.setdefault(table_name, {})
+
+    def clear(self) -> None:
+        with self.lock:
+            for items in self.tables.values():
+                items.clear()
+
+
+memory_store = _Store()
+
+
+class _BatchWriter:
+
+    def __init__(self, table: "InMemoryTable"):
+        self.table = table
+
+    def put_item(self, Item: dict) -> None:
+        self.table.put_item(Item=Item)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+class InMemoryTable:
+    """ Stands in for a boto3 DynamoDB Table resource, for tests and benchmarks.
+
+    Items are stored in their DynamoDB wire format, so types DynamoDB rejects (e.g. floats)
+    fail here too, and items are read back the way boto3 returns them (e.g. numbers as Decimals
+    and binary attributes as ``Binary``). Only the calls ProtoDB makes are implemented.
+    """
+
+    page_size = 1000
+
+    def __init__(self, name: str, primary_key: str):
+        self.name = name
+        self.primary_key = primary_key
+        self.items = memory_store.create(name, primary_key)
+        self.serializer = TypeSerializer()
+        self.deserializer = TypeDeserializer()
+
+    def wait_until_exists(self) -> None:
+        pass
+
+    def put_item(self, Item: dict, ConditionExpression: ConditionBase = None) -> dict:
+        stored = {key: self.serializer.serialize(value) for key, value in Item.items()}
+        with memory_store.lock:
+            if ConditionExpression is not None:
+                current = self.items.get(Item[self.primary_key], {})
+                current = {key: self.deserializer.deserialize(value) for key, value in current.items()}
+                if not evaluate_condition(ConditionExpression, current):
+                    raise conditional_check_failed()
+            self.items[Item[self.primary_key]] = stored
+        return {}
+
+    def raw_item(self, item_id: str) -> Optional[dict]:
+        with memory_store.lock:
+            return copy.deepcopy(self.items.get(item_id))
+
+    def get_item(self, Key: dict) -> dict:
+        stored = self.raw_item(Key[self.primary_key])
+        if stored is None:
+            return {}
+        return {'Item': {key: self.deserializer.deserialize(value) for key, value in stored.items()}}
+
+    def batch_writer(self) -> _BatchWriter:
+        return _BatchWriter(self)
+
+    def scan(self, ProjectionExpression: str = None, ExpressionAttributeNames: dict = None,
+             FilterExpression: ConditionBase = None, ExclusiveStartKey: dict = None) -> dict:
+        with memory_store.lock:
+            item_ids = sorted(self.items)
+        if ExclusiveStartKey is not None:
+            item_ids = [item_id for item_id in item_ids if item_id > ExclusiveStartKey[self.primary_key]]
+
+        attributes = None
+        if ProjectionExpression is not None:
+            names = ExpressionAttributeNames or {}
+            attributes = [names.get(name.strip(), name.strip()) for name in ProjectionExpression.split(',')]
+
+        page: List[dict] = []
+        for item_id in item_ids[:self.page_size]:
+            stored = self.raw_item(item_id)
+            if stored is None:
+                continue
+            item = {key: self.deserializer.deserialize(value) for key, value in stored.items()}
+            if FilterExpression is not None and not evaluate_condition(FilterExpression, item):
+                continue
+            if attributes is not None:
+                item = {key: value for key, value in item.items() if key in attributes}
+            page.append(item)
+
+        response = {'Items': page}
+        if len(item_ids) > self.page_size:
+            response['LastEvaluatedKey'] = {self.primary_key: item_ids[self.page_size - 1]}
+        return response
+
+
+class InMemoryClient:
+    """ Stands in for the boto3 DynamoDB client, implementing batch_get_item over InMemoryTables. """
+
+    def batch_get_item(self, RequestItems: dict) -> dict:
+        responses = {}
+        for table_name, request in RequestItems.items():
+            items = memory_store.tables.get(table_name, {})
+            primary_key = memory_store.primary_keys[table_name]
+            found = []
+            for key in request['Keys']:
+                with memory_store.lock:
+                    stored = copy.deepcopy(items.get(key[primary_key]['S']))
+                if stored is not None:
+                    found.append(stored)
+            responses[table_name] = found
+        return {'Responses': responses, 'UnprocessedKeys': {}}
@@ -1,5 +1,6 @@
 import boto3
-from typing import List, Dict, Iterator, Iterable, Tuple
+import os
+from typing import List, Dict, Iterator, Iterable, Optional, Tuple
 from datetime import datetime
 from botocore.exceptions import ClientError
 from google.protobuf.message import Message
@@ -7,12 +8,27 @@ from google.protobuf.json_format import MessageToDict, ParseDict
 
 import time
 from .decimal_ops import convert_decimals_to_float, convert_floats_to_decimals
+from .memory_table import MEMORY_URL, InMemoryClient, InMemoryTable
 from itertools import islice
 
+from boto3.dynamodb.conditions import Attr, ConditionBase
 from boto3.dynamodb.types import TypeDeserializer
 
+try:
+    import zstandard
+except ImportError:
+    # only needed for the zstd compression of the binary storage mode
+    zstandard = None
+
+# attributes holding the serialized message in the binary storage mode, and how it was compressed
+BLOB_ATTRIBUTE = 'proto_blob'
+FORMAT_ATTRIBUTE = 'proto_format'
+
 
 def init_table(table_name, primary_key, url):
+    if url == MEMORY_URL:
+        return InMemoryTable(table_name, primary_key)
+
     dynamodb = boto3.resource('dynamodb', endpoint_url=url, region_name='us-east-1')
 
     try:
@@ -59,12 +75,31 @@ def check_attr(proto_class, param: str):
 
 
 class ProtoDB:
+    """
+        Stores protobuf messages of a single class in a DynamoDB table, one item per message.
+
+        Two storage formats are supported:
+            - "dict" (the default) stores the MessageToDict representation of the message, one attribute
+              per field
+            - "binary" stores the SerializeToString bytes, optionally zstd-compressed, in a single binary
+              attribute. Only the primary key, the `projected_attributes` and `last_modified` are stored
+              as top-level attributes, so they can still be used in scans and filters
+
+        Items are decoded according to the format they were written in, so a table can be switched to the
+        binary format and migrated in the background (see proto_db_migration.py) while it's in use.
+        The defaults come from the PROTO_DB_STORAGE and PROTO_DB_COMPRESSION environment variables.
+
+        Setting `url` to MEMORY_URL keeps the table in memory, for tests and benchmarks.
+    """
 
     def __init__(self,
                  proto_class,
                  primary_key: str = 'id',
                  url: str = None,
-                 prefix: str = "Undefined"):
+                 prefix: str = "Undefined",
+                 storage: Optional[str] = None,
+                 compression: Optional[str] = None,
+                 projected_attributes: List[str] = None):
 
         assert issubclass(proto_class, Message), "ProtoDB works only with protobuf classes"
 
@@ -74,9 +109,25 @@ class ProtoDB:
         check_attr(proto_class, primary_key)
         self.primary_key = primary_key
 
+        self.storage = storage or os.environ.get('PROTO_DB_STORAGE', 'dict')
+        assert self.storage in ('dict', 'binary'), f"unknown storage format {self.storage}"
+        self.compression = compression or os.environ.get('PROTO_DB_COMPRESSION') or None
+        assert self.compression in (None, 'zstd'), f"unknown compression {self.compression}"
+        if self.compression == 'zstd' and zstandard is None:
+            raise ImportError("the zstandard package is needed for zstd compression")
+
+        self.projected_attributes = projected_attributes or []
+        for attribute in self.projected_attributes:
+            check_attr(proto_class, attribute)
+            field = proto_class.DESCRIPTOR.fields_by_name[attribute]
+            assert field.message_type is None, f"only scalar fields can be projected, {attribute} is a message"
+
         self.deserializer = TypeDeserializer()
         self.__table = init_table(table_name, primary_key, url)
-        self.__client = boto3.client('dynamodb', endpoint_url=url, region_name='us-east-1')
+        if url == MEMORY_URL:
+            self.__client = InMemoryClient()
+        else:
+            self.__client = boto3.client('dynamodb', endpoint_url=url, region_name='us-east-1')
 
     def _encode_dict(self, obj: Message) -> dict:
         """
@@ -98,7 +149,77 @@ class ProtoDB:
         message_dict = convert_decimals_to_float(message_dict)
         return message_dict
 
-    def put(self, proto_obj: Message, check_for_changes: bool = True) -> str:
+    def _encode_blob(self, obj: Message) -> dict:
+        """
+            Protected method building the item of the binary storage format: the serialized message plus
+            the primary key and projected attributes as top-level attributes
+        """
+        assert isinstance(obj, self.proto_class), f"expecting object of type {self.proto_class}," \
+                                                  f"but got {type(obj)}"
+
+        blob = obj.SerializeToString()
+        if self.compression == 'zstd':
+            blob = zstandard.ZstdCompressor().compress(blob)
+
+        payload = {
+            self.primary_key: getattr(obj, self.primary_key),
+            BLOB_ATTRIBUTE: blob,
+            FORMAT_ATTRIBUTE: self.compression or 'raw',
+            'last_modified': datetime.now().isoformat(),
+        }
+        for attribute in self.projected_attributes:
+            value = getattr(obj, attribute)
+            if not isinstance(value, (str, bytes, bool, int, float)):
+                # repeated scalar field
+                value = list(value)
+            payload[attribute] = convert_floats_to_decimals(value)
+        return payload
+
+    def _decode_blob(self, item: dict) -> Message:
+        """
+            Protected method parsing the message stored by the binary storage format
+        """
+        blob = item[BLOB_ATTRIBUTE]
+        # boto3 wraps binary attributes in a Binary object
+        blob = getattr(blob, 'value', blob)
+        if item.get(FORMAT_ATTRIBUTE) == 'zstd':
+            if zstandard is None:
+                raise ImportError("the zstandard package is needed to read zstd compressed items")
+            blob = zstandard.ZstdDecompressor().decompress(blob)
+
+        proto_obj = self.proto_class()
+        proto_obj.ParseFromString(bytes(blob))
+        return proto_obj
+
+    def _encode_item(self, obj: Message) -> dict:
+        if self.storage == 'binary':
+            return self._encode_blob(obj)
+        return self._encode_dict(obj)
+
+    def _decode_item(self, item: dict, decode: bool = True):
+        """
+            Decodes an item read from the table, whichever format it was stored in. Binary items are returned
+            as dictionaries like the dict format ones when `decode` is False
+        """
+        if item.get("last_modified") is not None:
+            del item['last_modified']
+
+        if BLOB_ATTRIBUTE in item:
+            proto_obj = self._decode_blob(item)
+            if decode:
+                return proto_obj
+            return MessageToDict(proto_obj, preserving_proto_field_name=True)
+
+        item = self._decode_dict(item)
+        if decode:
+            return ParseDict(item, self.proto_class())
+        return item
+
+    def put(self, proto_obj: Message, check_for_changes: bool = True, condition: ConditionBase = None) -> str:
+        """
+            Writes a message to the table. If a boto3 `condition` is given, the write only happens if the stored
+            item satisfies it, otherwise a ClientError with the ConditionalCheckFailedException code is raised
+        """
 
         item_id = getattr(proto_obj, self.primary_key)
         assert item_id != '', f'Protobuf Message of type {self.proto_class.__name__} has set primary key' \
@@ -110,35 +231,39 @@ class ProtoDB:
             if old_proto == proto_obj:
                 return item_id
 
-        item_payload = self._encode_dict(proto_obj)
+        item_payload = self._encode_item(proto_obj)
 
-        self.__table.put_item(
-            Item=item_payload,
-        )
+        if condition is None:
+            self.__table.put_item(
+                Item=item_payload,
+            )
+        else:
+            self.__table.put_item(
+                Item=item_payload,
+                ConditionExpression=condition,
+            )
         return item_id
 
-    def get(self, item_id: str, decode: bool = True) -> Message:
-
+    def _get_item(self, item_id: str) -> Optional[dict]:
+        """
+            Protected method returning the item stored for `item_id` as read from the table, or None
+        """
         response = self.__table.get_item(
             Key={
                 self.primary_key: item_id,
             }
         )
-        proto_dict = response.get('Item', None)
+        return response.get('Item', None)
+
+    def get(self, item_id: str, decode: bool = True) -> Message:
+
+        proto_dict = self._get_item(item_id)
         if proto_dict is None:
             new_obj = self.proto_class()
             setattr(new_obj, self.primary_key, item_id)
             return new_obj
 
-        if proto_dict.get("last_modified") is not None:
-            del proto_dict['last_modified']
-
-        proto_dict = self._decode_dict(proto_dict)
-
-        if decode:
-            return ParseDict(proto_dict, self.proto_class())
-        else:
-            return proto_dict
+        return self._decode_item(proto_dict, decode)
 
     def batch_put(self,
                   proto_obj_list: List[Message],
@@ -150,7 +275,11 @@ class ProtoDB:
             assert item_id != '', f'Protobuf Message of type {self.proto_class.__name__} has set primary key' \
                                   f' {self.primary_key} as the empty string. This will cause collisions in ' \
                                   f'the database and duplicate keys problems'
-        old_protos = self.batch_get(item_ids)
+        if check_for_changes:
+            old_protos = self.batch_get(item_ids)
+        else:
+            # the caller already knows these objects changed, skip the read-and-compare round trip
+            old_protos = [None] * len(item_ids)
 
         if len(proto_obj_list) > 25:
             out = []
@@ -174,7 +303,7 @@ class ProtoDB:
                     # Object to insert in database without any change, skipping
                     continue
 
-                item_payload = self._encode_dict(proto_obj)
+                item_payload = self._encode_item(proto_obj)
 
                 writer.put_item(
                     Item=item_payload,
@@ -240,19 +369,12 @@ class ProtoDB:
         output_dict = {}
         for item in items_list:
 
-            if item.get("last_modified") is not None:
-                del item['last_modified']
-
             # Remove type information from the returned dictionary
             for key, value in item.items():
                 item[key] = self.deserializer.deserialize(value)
 
-            item = self._decode_dict(item)
             item_id = item[self.primary_key]
-            if decode:
-                output_dict[item_id] = ParseDict(item, self.proto_class())
-            else:
-                output_dict[item_id] = item
+            output_dict[item_id] = self._decode_item(item, decode)
 
         unprocessed_keys = response['UnprocessedKeys'].get(self.__table.name)
         if unprocessed_keys is not None:
@@ -280,3 +402,31 @@ class ProtoDB:
             response = self.__table.scan(**scan_kwargs)
             for item_id in response['Items']:
                 yield item_id.get(self.primary_key)
+
+    def scan_legacy_ids(self) -> Iterator[str]:
+        """
+            Scans the table for the ids of the items that are not stored in the binary format
+        """
+        return self.scan_ids(scan_filter=Attr(BLOB_ATTRIBUTE).not_exists())
+
+    def scan_attributes(self, attributes: List[str], scan_filter=None) -> Iterator[dict]:
+        """
+            Scans the table returning only the given attributes of each item, as raw dictionaries.
+            Attribute names are passed as placeholders, so reserved words such as 'date' can be used.
+        """
+        names = {f"#attr{idx}": attribute for idx, attribute in enumerate(attributes)}
+        scan_kwargs = {
+            'ProjectionExpression': ", ".join(names.keys()),
+            'ExpressionAttributeNames': names,
+        }
+
+        if scan_filter is not None:
+            scan_kwargs['FilterExpression'] = scan_filter
+
+        response = self.__table.scan(**scan_kwargs)
+        yield from response['Items']
+
+        while response.get('LastEvaluatedKey'):
+            scan_kwargs['ExclusiveStartKey'] = response.get('LastEvaluatedKey')
+            response = self.__table.scan(**scan_kwargs)
+            yield from response['Items']
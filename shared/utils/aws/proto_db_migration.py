@@ -0,0 +1,67 @@
+import threading
+import time
+
+from typing import Dict, Optional
+
+from .new_proto_db import ProtoDB, grouper
+from .. import logger
+
+
+class ProtoDBMigration:
+    """
+        Rewrites the items of a ProtoDB table that are still in the dict format in the table's binary format.
+
+        Items are read with the legacy fallback and written back in batches, pausing `pause` seconds between
+        batches to leave write capacity for the live traffic. For a ComposedDB, the sub-messages are rewritten
+        with their parent, and the sub-message tables are checked for leftovers afterwards. Items written in the
+        meantime are already binary and are skipped, so the migration can run while the services are using the
+        table and can safely be restarted.
+
+        @param db: a ProtoDB (or ComposedDB) created with storage="binary"
+        @param batch_size: number of items read and written at once (at most 25 per DynamoDB write batch)
+        @param pause: seconds to wait between batches
+    """
+
+    def __init__(self, db: ProtoDB, batch_size: int = 25, pause: float = 0.0):
+        assert db.storage == 'binary', "the table to migrate must be configured with storage='binary'"
+        self.db = db
+        self.batch_size = batch_size
+        self.pause = pause
+        self.stats: Dict[str, int] = {'migrated': 0, 'failed': 0}
+        self.__stop = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+
+    def __migrate_table(self, table: ProtoDB) -> None:
+        for item_ids in grouper(table.scan_legacy_ids(), self.batch_size):
+            if self.__stop.is_set():
+                return
+            try:
+                proto_objs = [proto_obj for proto_obj in table.batch_get(list(item_ids)) if proto_obj is not None]
+                table.batch_put(proto_objs, check_for_changes=False)
+                self.stats['migrated'] += len(proto_objs)
+            except Exception as e:
+                logger.error(f"Failed to migrate {len(item_ids)} items of {table.proto_class.__name__}", exc_info=e)
+                self.stats['failed'] += len(item_ids)
+            if self.pause > 0:
+                time.sleep(self.pause)
+
+    def run(self) -> Dict[str, int]:
+        """ Migrates every legacy item and returns the number of migrated and failed items """
+        tables = [self.db] + list(getattr(self.db, 'sub_tables', {}).values())
+        for table in tables:
+            logger.info(f"Migrating {table.proto_class.__name__} items to the binary format")
+            self.__migrate_table(table)
+        logger.info(f"Migration finished: {self.stats['migrated']} items migrated, {self.stats['failed']} failed")
+        return self.stats
+
+    def start(self) -> threading.Thread:
+        """ Runs the migration in a background daemon thread """
+        self.__thread = threading.Thread(target=self.run, daemon=True)
+        self.__thread.start()
+        return self.__thread
+
+    def stop(self) -> None:
+        """ Stops a background migration after the current batch """
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join()
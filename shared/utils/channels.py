@@ -0,0 +1,271 @@
+import asyncio
+import itertools
+import threading
+from typing import Any, Dict, List, Sequence
+
+import grpc
+
+from . import logger
+
+# Options applied to every channel handed out by the registry. Keepalive pings stop idle HTTP/2
+# connections from being silently dropped by proxies/NAT between the containers, and the
+# round_robin policy spreads calls across every address a single DNS name resolves to.
+CHANNEL_OPTIONS = [
+    ('grpc.keepalive_time_ms', 30000),
+    ('grpc.keepalive_timeout_ms', 10000),
+    ('grpc.keepalive_permit_without_calls', 1),
+    ('grpc.http2.max_pings_without_data', 0),
+    ('grpc.lb_policy_name', 'round_robin'),
+]
+
+# Options for every service's grpc.server, matching the client keepalive above. By default a server
+# only accepts a ping every 5 minutes while there are no calls and answers more frequent ones with a
+# GOAWAY (too_many_pings), which would close the idle pooled channels the pings are meant to keep open.
+SERVER_OPTIONS = [
+    ('grpc.keepalive_permit_without_calls', 1),
+    ('grpc.http2.min_ping_interval_without_data_ms', 20000),
+]
+
+
+class _RoundRobinMultiCallable:
+    """Dispatches each call to the next backend's multicallable in turn."""
+
+    def __init__(self, callables: Sequence[Any]):
+        self._callables = list(callables)
+        self._cycle = itertools.cycle(self._callables)
+        self._lock = threading.Lock()
+
+    def _next(self):
+        with self._lock:
+            return next(self._cycle)
+
+    def __call__(self, *args, **kwargs):
+        return self._next()(*args, **kwargs)
+
+    def with_call(self, *args, **kwargs):
+        return self._next().with_call(*args, **kwargs)
+
+    def future(self, *args, **kwargs):
+        return self._next().future(*args, **kwargs)
+
+
+class RoundRobinChannel(grpc.Channel):
+    """A ``grpc.Channel`` that spreads calls over several backend addresses.
+
+    gRPC's own round_robin policy only balances across the addresses a single
+    target resolves to, which doesn't cover a list of distinct hostnames (e.g.
+    several docker compose services). This channel keeps one real channel per
+    address and rotates between them on every call, so stubs built on top of it
+    don't need to know how many backends there are.
+    """
+
+    def __init__(self, channels: List[grpc.Channel]):
+        self._channels = channels
+
+    def _multicallable(self, factory: str, method: str, *args, **kwargs) -> _RoundRobinMultiCallable:
+        return _RoundRobinMultiCallable(
+            [getattr(channel, factory)(method, *args, **kwargs) for channel in self._channels]
+        )
+
+    def subscribe(self, callback, try_to_connect=False):
+        for channel in self._channels:
+            channel.subscribe(callback, try_to_connect)
+
+    def unsubscribe(self, callback):
+        for channel in self._channels:
+            channel.unsubscribe(callback)
+
+    def unary_unary(self, method, *args, **kwargs):
+        return self._multicallable('unary_unary', method, *args, **kwargs)
+
+    def unary_stream(self, method, *args, **kwargs):
+        return self._multicallable('unary_stream', method, *args, **kwargs)
+
+    def stream_unary(self, method, *args, **kwargs):
+        return self._multicallable('stream_unary', method, *args, **kwargs)
+
+    def stream_stream(self, method, *args, **kwargs):
+        return self._multicallable('stream_stream', method, *args, **kwargs)
+
+    def close(self):
+        for channel in self._channels:
+            channel.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+
+class ChannelRegistry:
+    """Process-wide pool of long-lived gRPC channels.
+
+    Creating a channel per request means a new TCP connection and HTTP/2
+    handshake on the hot path. The registry instead keeps exactly one channel
+    per target URL and hands the same object to every caller. gRPC channels
+    are thread-safe, so they can be shared by all the request threads.
+
+    A target may be a comma-separated list of addresses (for example
+    "functionalities-1:8000,functionalities-2:8000"), in which case the
+    returned channel round-robins calls across all of them.
+    """
+
+    def __init__(self, options: List = None):
+        self.options = CHANNEL_OPTIONS if options is None else options
+        self._channels: Dict[str, grpc.Channel] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _create(self, target: str) -> grpc.Channel:
+        addresses = [address.strip() for address in target.split(',') if address.strip() != '']
+        if len(addresses) == 1:
+            return grpc.insecure_channel(addresses[0], options=self.options)
+        return RoundRobinChannel([grpc.insecure_channel(address, options=self.options) for address in addresses])
+
+    def get_channel(self, target: str) -> grpc.Channel:
+        """Return the shared channel for ``target``, creating it on first use.
+
+        Args:
+            target (str): address of the service, or a comma-separated list of addresses
+
+        Returns:
+            a grpc.Channel shared with every other caller using the same target
+        """
+        with self._lock:
+            channel = self._channels.get(target)
+            if channel is None:
+                logger.info(f"Opening gRPC channel to {target}")
+                channel = self._create(target)
+                self._channels[target] = channel
+                self._stats[target] = {'created': 1, 'reused': 0}
+            else:
+                self._stats[target]['reused'] += 1
+            return channel
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Return the number of times each channel was created and reused.
+
+        Only ``get_channel`` lookups are counted, i.e. usually one per stub constructed, not one per
+        RPC made on the channel afterwards.
+        """
+        with self._lock:
+            return {target: dict(counts) for target, counts in self._stats.items()}
+
+    def close(self) -> None:
+        """Close every open channel, e.g. when the process is shutting down."""
+        with self._lock:
+            for channel in self._channels.values():
+                channel.close()
+            self._channels.clear()
+
+
+class AioRoundRobinChannel:
+    """``grpc.aio`` counterpart of ``RoundRobinChannel``, rotating calls over several addresses."""
+
+    def __init__(self, channels: List[grpc.aio.Channel]):
+        self._channels = channels
+
+    def _multicallable(self, factory: str, method: str, *args, **kwargs) -> _RoundRobinMultiCallable:
+        return _RoundRobinMultiCallable(
+            [getattr(channel, factory)(method, *args, **kwargs) for channel in self._channels]
+        )
+
+    def unary_unary(self, method, *args, **kwargs):
+        return self._multicallable('unary_unary', method, *args, **kwargs)
+
+    def unary_stream(self, method, *args, **kwargs):
+        return self._multicallable('unary_stream', method, *args, **kwargs)
+
+    def stream_unary(self, method, *args, **kwargs):
+        return self._multicallable('stream_unary', method, *args, **kwargs)
+
+    def stream_stream(self, method, *args, **kwargs):
+        return self._multicallable('stream_stream', method, *args, **kwargs)
+
+    async def close(self, grace=None):
+        await asyncio.gather(*[channel.close(grace) for channel in self._channels])
+
+
+class AioChannelRegistry:
+    """Process-wide pool of ``grpc.aio`` channels, for services running an asyncio event loop.
+
+    Behaves like ``ChannelRegistry``, but its channels are bound to the event loop that was
+    running when they were created, so one registry should only be used from a single loop.
+    Unlike sync calls, a pending call on an aio channel doesn't hold a thread.
+    """
+
+    def __init__(self, options: List = None):
+        self.options = CHANNEL_OPTIONS if options is None else options
+        self._channels: Dict[str, Any] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _create(self, target: str):
+        addresses = [address.strip() for address in target.split(',') if address.strip() != '']
+        if len(addresses) == 1:
+            return grpc.aio.insecure_channel(addresses[0], options=self.options)
+        return AioRoundRobinChannel([grpc.aio.insecure_channel(address, options=self.options)
+                                     for address in addresses])
+
+    def get_channel(self, target: str):
+        """Return the shared aio channel for ``target``, creating it on first use.
+
+        Args:
+            target (str): address of the service, or a comma-separated list of addresses
+
+        Returns:
+            a grpc.aio.Channel (or AioRoundRobinChannel) shared with every other caller using the same target
+        """
+        channel = self._channels.get(target)
+        if channel is None:
+            logger.info(f"Opening gRPC aio channel to {target}")
+            channel = self._create(target)
+            self._channels[target] = channel
+            self._stats[target] = {'created': 1, 'reused': 0}
+        else:
+            self._stats[target]['reused'] += 1
+        return channel
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Return the number of times each channel was created and reused."""
+        return {target: dict(counts) for target, counts in self._stats.items()}
+
+    async def close(self) -> None:
+        """Close every open channel, e.g. when the event loop is shutting down."""
+        channels = list(self._channels.values())
+        self._channels.clear()
+        await asyncio.gather(*[channel.close() for channel in channels])
+
+
+channel_registry = ChannelRegistry()
+aio_channel_registry = AioChannelRegistry()
+
+
+def get_channel(target: str) -> grpc.Channel:
+    """Return a pooled, keepalive-configured channel for the given service URL.
+
+    This is a drop-in replacement for ``grpc.insecure_channel(url)`` which
+    reuses a single channel per URL for the lifetime of the process.
+
+    Args:
+        target (str): address of the service, or a comma-separated list of addresses
+
+    Returns:
+        a shared grpc.Channel
+    """
+    return channel_registry.get_channel(target)
+
+
+def get_aio_channel(target: str):
+    """Return a pooled ``grpc.aio`` channel for the given service URL.
+
+    Must be called from the event loop the channel will be used on.
+
+    Args:
+        target (str): address of the service, or a comma-separated list of addresses
+
+    Returns:
+        a shared grpc.aio.Channel
+    """
+    return aio_channel_registry.get_channel(target)
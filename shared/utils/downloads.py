@@ -1,6 +1,9 @@
+import hashlib
 import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Callable, List, Optional
+from typing import Callable, Dict, List, Optional
 import shutil
 
 import dacite
@@ -19,6 +22,8 @@ class DownloadSource:
     id: str
     urls: List[List[str]]
     artefacts: List[List[str]] = field(default_factory=list)
+    # optional [local name, sha256 hex digest] pairs checked after downloading
+    checksums: List[List[str]] = field(default_factory=list)
     base_path: str = ""
     local_path: str = ""
     enabled: bool = True
@@ -33,6 +38,11 @@ class DownloadConfig:
     sources: List[DownloadSource]
     http_timeout: float = 5.0
     enabled: bool = True
+    # number of files downloaded at the same time, across all sources
+    workers: int = 4
+    chunk_size: int = 1024 * 1024
+    # attempts per file, resuming from what was already downloaded
+    retries: int = 3
 
 
 class Downloader:
@@ -46,6 +56,7 @@ class Downloader:
         self._prefix = f"Downloader({self.config.name})"
         self._failed_downloads = 0
         self._successful_downloads = 0
+        self._counter_lock = threading.Lock()
         self._artefacts = {
             s.id: {v[0]: v[1] for v in s.artefacts} for s in self.config.sources
         }
@@ -111,7 +122,8 @@ class Downloader:
             f"{self._prefix}: processing {len(sources_to_download)}/{len(self.config.sources)} sources"
         )
 
-        for i, source in enumerate(sources_to_download.values()):
+        sources_urls = {}
+        for source in sources_to_download.values():
             if len(source.urls) == 0:
                 raise Exception(
                     f"Source {source.id} in service {self.config.name} has no URLs!"
@@ -123,36 +135,83 @@ class Downloader:
                 logger.info(
                     f"{self._prefix}: Filtered URLs from {len(source.urls)} to {len(urls)}"
                 )
+            sources_urls[source.id] = urls
+
+        # Files are downloaded concurrently across all sources. Once every file of a source has
+        # been downloaded, its archives are extracted in a separate thread while the remaining
+        # downloads carry on. The extraction pool is shut down last, so downloads finishing
+        # late can still queue their extraction.
+        with ThreadPoolExecutor(max_workers=1) as extract_pool, \
+                ThreadPoolExecutor(max_workers=max(1, self.config.workers)) as download_pool:
+            source_futures: Dict[str, List[Future]] = {}
+            extracted = set()
+            extractions: List[Future] = []
+            for i, source in enumerate(sources_to_download.values()):
+                urls = sources_urls[source.id]
+                logger.info(
+                    f"{self._prefix}: source {i+1}/{len(sources_to_download)}, # URLs = {len(urls)}"
+                )
 
-            logger.info(
-                f"{self._prefix}: source {i+1}/{len(sources_to_download)}, # URLs = {len(urls)}"
-            )
+                if not self._pre_download(source):
+                    self._count(succeeded=len(urls))
+                    # still extract any archives whose artefacts have been removed
+                    extractions.append(extract_pool.submit(self._post_download, source))
+                    continue
+
+                futures = [download_pool.submit(self._download, url, local_name, source) for url, local_name in urls]
+                source_futures[source.id] = futures
+                if len(futures) == 0:
+                    extractions.append(extract_pool.submit(self._post_download, source))
+                for future in futures:
+                    future.add_done_callback(
+                        lambda _, source=source, futures=futures: self._on_download_done(
+                            source, futures, extracted, extractions, extract_pool
+                        )
+                    )
 
-            source_failed = 0
-            for url, local_name in urls:
-                result = self._download(url, local_name, source)
-                if not result:
-                    self._failed_downloads += 1
-                    source_failed += 1
-                else:
-                    self._successful_downloads += 1
+            for futures in source_futures.values():
+                for future in futures:
+                    future.result()
 
-            if source_failed == 0:
-                self._post_download(source)
+        for extraction in extractions:
+            extraction.result()
 
         logger.info(
             f"{self._prefix}: {self._successful_downloads} downloads completed, {self._failed_downloads} downloads failed"
         )
         return self._successful_downloads > 0
 
-    def _download(self, url: str, local_name: str, source: DownloadSource) -> bool:
-        if not self._pre_download(source):
-            return True
+    def _count(self, succeeded: int = 0, failed: int = 0) -> None:
+        with self._counter_lock:
+            self._successful_downloads += succeeded
+            self._failed_downloads += failed
 
+    def _on_download_done(self, source: DownloadSource, futures: List[Future], extracted: set,
+                          extractions: List[Future], extract_pool: ThreadPoolExecutor) -> None:
+        """
+        Called when each of a source's downloads completes. Once the last one finishes, the source is
+        post-processed if none of them failed.
+        """
+        with self._counter_lock:
+            if not all(future.done() for future in futures) or source.id in extracted:
+                return
+            # only the first callback to see all the downloads done queues the post-processing
+            extracted.add(source.id)
+
+        failed = sum(1 for future in futures if future.exception() is not None or not future.result())
+        if failed == 0:
+            extractions.append(extract_pool.submit(self._post_download, source))
+        else:
+            logger.warning(f"{self._prefix}: {failed} downloads failed for {source.id}, not extracting it")
+
+    def _download(self, url: str, local_name: str, source: DownloadSource) -> bool:
         if url.lower().startswith("http"):
-            return self._download_http(url, local_name, source)
+            result = self._download_http(url, local_name, source)
+        else:
+            raise Exception(f"Unsupported URL scheme: {url}")
 
-        raise Exception(f"Unsupported URL scheme: {url}")
+        self._count(succeeded=int(result), failed=int(not result))
+        return result
 
     def _marker_for_source(self, source: DownloadSource) -> str:
         """
@@ -314,9 +373,23 @@ class Downloader:
 
         return True
 
+    def _expected_checksum(self, source: DownloadSource, local_name: str) -> Optional[str]:
+        """
+        Return the sha256 digest declared for a file in the source's checksums, if any.
+        """
+        for name, digest in source.checksums:
+            if name == local_name:
+                return digest.lower()
+        return None
+
     def _download_http(self, url: str, local_name: str, source: DownloadSource) -> bool:
         """
-        Download a file over HTTP(S).
+        Download a file over HTTP(S), retrying failed attempts.
+
+        The file is written to "<name>.part" and only moved into place once it is complete
+        (and matches its checksum, if one is declared). If a partial file is left behind by a
+        failed attempt or an interrupted run, the download resumes from where it stopped using
+        an HTTP Range request.
         """
 
         download_path = os.path.join(self.get_path(source.id), local_name)
@@ -325,31 +398,81 @@ class Downloader:
         os.makedirs(os.path.dirname(download_path), exist_ok=True)
         logger.info(f'{self._prefix}: downloading "{url}" => {download_path}')
 
-        try:
-            response = requests.get(url, timeout=self.config.http_timeout, stream=True)
+        expected_checksum = self._expected_checksum(source, local_name)
+        partial_path = download_path + ".part"
+
+        for attempt in range(1, max(1, self.config.retries) + 1):
+            try:
+                if not self._fetch_http(url, partial_path, local_name):
+                    return False
+            except Exception as e:
+                logger.warning(f"GET failed on {url} with error {e} (attempt {attempt}/{self.config.retries})")
+                continue
+
+            if expected_checksum is not None:
+                checksum = self._sha256(partial_path)
+                if checksum != expected_checksum:
+                    logger.warning(f"{self._prefix}: checksum mismatch for {local_name}: expected "
+                                   f"{expected_checksum}, got {checksum} (attempt {attempt}/{self.config.retries})")
+                    # the partial file can't be trusted, so start the next attempt from scratch
+                    os.remove(partial_path)
+                    continue
+
+            os.replace(partial_path, download_path)
+            return True
+
+        return False
+
+    def _fetch_http(self, url: str, partial_path: str, local_name: str) -> bool:
+        """
+        Fetch (the rest of) a file into partial_path. Returns False if the server rejected the request.
+        """
+        offset = os.path.getsize(partial_path) if os.path.exists(partial_path) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset > 0 else {}
+
+        with requests.get(url, timeout=self.config.http_timeout, stream=True, headers=headers) as response:
+            if response.status_code == 416:
+                # the partial file is at least as long as the remote one, start again
+                logger.info(f"{self._prefix}: range not satisfiable for {local_name}, restarting download")
+                os.remove(partial_path)
+                return self._fetch_http(url, partial_path, local_name)
+
             # this is False for return codes >= 400
             if not response.ok:
                 logger.warning(f"GET on {url} returned code {response.status_code}")
                 return False
 
+            if offset > 0 and response.status_code == 206:
+                logger.info(f"{self._prefix}: resuming {local_name} from byte {offset}")
+                mode = "ab"
+            else:
+                # the server ignored the Range header and is sending the whole file
+                offset = 0
+                mode = "wb"
+
             # https://gist.github.com/yanqd0/c13ed29e29432e3cf3e7c38467f42f51
-            file_size = int(response.headers.get("content-length", 0))
+            file_size = offset + int(response.headers.get("content-length", 0))
 
-            with open(download_path, "wb") as f, tqdm.tqdm(
+            with open(partial_path, mode) as f, tqdm.tqdm(
                 desc=local_name,
+                initial=offset,
                 total=file_size,
                 unit="iB",
                 unit_scale=True,
                 unit_divisor=1024,
             ) as progress:
-                for chunk in response.iter_content(chunk_size=4096):
+                for chunk in response.iter_content(chunk_size=self.config.chunk_size):
                     progress.update(f.write(chunk))
-        except Exception as e:
-            logger.warning(f"GET failed on {url} with error {e}")
-            return False
 
         return True
 
+    def _sha256(self, path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(self.config.chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
     def _check_valid_source(self, source_id: str) -> None:
         """
         Raise an exception if an invalid source ID is supplied.
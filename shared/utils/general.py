@@ -1,4 +1,5 @@
 import hashlib
+import inspect
 from typing import Any, Callable, ClassVar, Type
 import time
 import os
@@ -111,13 +112,27 @@ def get_interceptors():
 
 
 def log_latency(fn):
+    def log(start):
+        latency = time.time() - start
+        container_name = os.environ.get('CONTAINER_NAME', "Undefined_Container_Name")
+        logger.info(f"[SYSTEM_LATENCY_LOG] {container_name}/{fn.__name__} {latency:.2f}")
+
+    # coroutine functions are timed until they complete, not until they return a coroutine
+    if inspect.iscoroutinefunction(fn):
+        @wraps(fn)
+        async def decorated_async(*args, **kwargs):
+            start = time.time()
+            response = await fn(*args, **kwargs)
+            log(start)
+            return response
+
+        return decorated_async
+
     @wraps(fn)
     def decorated(*args, **kwargs):
         start = time.time()
         response = fn(*args, **kwargs)
-        latency = time.time() - start
-        container_name = os.environ.get('CONTAINER_NAME', "Undefined_Container_Name")
-        logger.info(f"[SYSTEM_LATENCY_LOG] {container_name}/{fn.__name__} {latency:.2f}")
+        log(start)
 
         return response
 
@@ -0,0 +1,101 @@
+import json
+import os
+from typing import Dict, List
+
+import numpy as np
+
+from . import logger
+
+# Features combined by the learning-to-rank model, in the order of the columns of the
+# feature matrix built by the searcher's FeatureReRanker. The static TaskMap features
+# follow the order of utils.taskmap_features.STATIC_FEATURES.
+L2R_FEATURES = [
+    'neural_score',
+    'category_neural_score',
+    'category_score',
+    'title_utterance_score',
+    'requirements_utterance_score',
+    'tags_utterance_score',
+    'step_score',
+    'av_w_steps_score',
+    'requirements_score',
+    'rating_score',
+    'image_score',
+    'rating_count_score',
+    'views_score',
+    'staged_score',
+    'domain_score',
+    'author_score',
+    'source_domain_score',
+]
+
+# weights used for any domain that has no entry of its own in the weights file
+DEFAULT_DOMAIN = 'DIY'
+
+
+class L2RWeights:
+    """Per-domain linear L2R weights, stored as NumPy vectors aligned with ``L2R_FEATURES``.
+
+    The weights are read from a JSON file of the form::
+
+        {
+            "version": "hand-tuned-v1",
+            "features": ["neural_score", ...],
+            "weights": {"COOKING": {"neural_score": 22.0, ...}, "DIY": {...}}
+        }
+
+    Weights are looked up by feature name, so a file written for an older feature set
+    still loads: features it doesn't mention get a weight of 0.
+    """
+
+    def __init__(self, version: str, weights: Dict[str, Dict[str, float]]):
+        self.version = version
+        self.vectors: Dict[str, np.ndarray] = {}
+        for domain, domain_weights in weights.items():
+            unknown = set(domain_weights) - set(L2R_FEATURES)
+            if unknown:
+                logger.warning(f"Ignoring unknown L2R features for {domain}: {sorted(unknown)}")
+            missing = set(L2R_FEATURES) - set(domain_weights)
+            if missing:
+                logger.warning(f"No L2R weights for {domain} features {sorted(missing)}, using 0")
+            self.vectors[domain] = np.array([float(domain_weights.get(name, 0.0)) for name in L2R_FEATURES],
+                                            dtype=np.float64)
+        if DEFAULT_DOMAIN not in self.vectors:
+            raise ValueError(f"L2R weights must define the default domain '{DEFAULT_DOMAIN}'")
+
+    @classmethod
+    def from_file(cls, path: str) -> 'L2RWeights':
+        with open(path, 'r') as f:
+            data = json.load(f)
+        weights = cls(data.get('version', os.path.basename(path)), data['weights'])
+        logger.info(f"Loaded L2R weights '{weights.version}' for domains {sorted(weights.vectors)} from {path}")
+        return weights
+
+    def for_domain(self, domain: str) -> np.ndarray:
+        """Return the weight vector for a domain name (e.g. "COOKING"), falling back to the default domain."""
+        return self.vectors.get(domain, self.vectors[DEFAULT_DOMAIN])
+
+    def to_dict(self) -> dict:
+        return {
+            'version': self.version,
+            'features': L2R_FEATURES,
+            'weights': {
+                domain: {name: round(float(w), 6) for name, w in zip(L2R_FEATURES, vector)}
+                for domain, vector in self.vectors.items()
+            },
+        }
+
+    def save(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        logger.info(f"Saved L2R weights '{self.version}' to {path}")
+
+
+def feature_matrix(rows: List[Dict[str, float]]) -> np.ndarray:
+    """Stack per-candidate {feature name: value} dicts into a (candidates x features) matrix."""
+    matrix = np.zeros((len(rows), len(L2R_FEATURES)), dtype=np.float64)
+    index = {name: i for i, name in enumerate(L2R_FEATURES)}
+    for row_idx, row in enumerate(rows):
+        for name, value in row.items():
+            matrix[row_idx, index[name]] = value
+    return matrix
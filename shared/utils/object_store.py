@@ -0,0 +1,124 @@
+import json
+import mmap
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from . import logger
+
+# names of the stores written next to the objects index
+TASKMAP_STORE = "taskmaps"
+CATEGORY_STORE = "categories"
+
+
+def _paths(directory: str, name: str) -> Tuple[str, str]:
+    return os.path.join(directory, f"{name}.bin"), os.path.join(directory, f"{name}.idx.json")
+
+
+class ObjectStoreWriter:
+    """Writes protobuf messages to an ObjectStore.
+
+    The messages are serialized back to back into ``<name>.bin``, and ``<name>.idx.json``
+    maps each id to the (offset, length) of its bytes. Both files are written under a
+    temporary name and moved into place on ``close``, so a reader never sees a partial store.
+    """
+
+    def __init__(self, directory: str, name: str):
+        os.makedirs(directory, exist_ok=True)
+        self.data_path, self.index_path = _paths(directory, name)
+        self.index: Dict[str, Tuple[int, int]] = {}
+        self.offset = 0
+        self.duplicates = 0
+        self.data_file = open(self.data_path + ".tmp", "wb")
+
+    def add(self, object_id: str, message: Any) -> bool:
+        """Append a message, returning False if the id was already written."""
+        if object_id in self.index:
+            self.duplicates += 1
+            return False
+        data = message.SerializeToString()
+        self.data_file.write(data)
+        self.index[object_id] = (self.offset, len(data))
+        self.offset += len(data)
+        return True
+
+    def close(self) -> None:
+        self.data_file.close()
+        with open(self.index_path + ".tmp", "w") as f:
+            json.dump(self.index, f)
+        os.replace(self.data_path + ".tmp", self.data_path)
+        os.replace(self.index_path + ".tmp", self.index_path)
+        logger.info(f"Wrote {len(self.index)} objects ({self.offset} bytes) to {self.data_path}, "
+                    f"skipped {self.duplicates} duplicate ids")
+
+    def __enter__(self) -> 'ObjectStoreWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+
+class ObjectStore:
+    """Read-only, memory-mapped store of serialized protobuf messages, looked up by id.
+
+    Retrieving an object is a dictionary lookup, a slice of the mapped file and a single
+    ``ParseFromString``. The file is shared between processes through the page cache
+    instead of being loaded into each one.
+    """
+
+    def __init__(self, directory: str, name: str, proto_class: Any):
+        self.proto_class = proto_class
+        data_path, index_path = _paths(directory, name)
+        with open(index_path, "r") as f:
+            self.index: Dict[str, List[int]] = json.load(f)
+
+        self.data_file = open(data_path, "rb")
+        if os.path.getsize(data_path) > 0:
+            self.mmap: Optional[mmap.mmap] = mmap.mmap(self.data_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.data = memoryview(self.mmap)
+        else:
+            # mmap can't map an empty file
+            self.mmap = None
+            self.data = memoryview(b"")
+        logger.info(f"Opened object store {data_path} with {len(self.index)} objects")
+
+    @staticmethod
+    def exists(directory: str, name: str) -> bool:
+        return all(os.path.isfile(path) for path in _paths(directory, name))
+
+    def __contains__(self, object_id: str) -> bool:
+        return object_id in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def get(self, object_id: str) -> Optional[Any]:
+        """Return the message stored under ``object_id``, or None if there isn't one."""
+        location = self.index.get(object_id)
+        if location is None:
+            return None
+        offset, length = location
+        message = self.proto_class()
+        message.ParseFromString(self.data[offset:offset + length])
+        return message
+
+    def get_many(self, object_ids: Iterable[str]) -> List[Optional[Any]]:
+        """Return the messages for a list of ids, in the same order, with None for missing ids.
+
+        The objects are read in file order so that a whole hit list is fetched with a
+        forward pass over the mapped pages.
+        """
+        object_ids = list(object_ids)
+        found = sorted((self.index[object_id][0], idx) for idx, object_id in enumerate(object_ids)
+                       if object_id in self.index)
+        messages: List[Optional[Any]] = [None] * len(object_ids)
+        for _, idx in found:
+            messages[idx] = self.get(object_ids[idx])
+        return messages
+
+    def close(self) -> None:
+        # the mapping can only be closed once no memoryview of it is left
+        self.data.release()
+        if self.mmap is not None:
+            self.mmap.close()
+        self.data_file.close()
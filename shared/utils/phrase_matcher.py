@@ -0,0 +1,127 @@
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+
+class AhoCorasick:
+    """Aho-Corasick automaton for finding any of a set of substrings in one pass.
+
+    The automaton is built once from the phrase list, after which a search
+    is linear in the length of the text, regardless of how many phrases
+    there are.
+    """
+
+    def __init__(self, phrases: Iterable[str]):
+        # state 0 is the root; each state has a goto dict, a failure link and
+        # the phrase (if any) that ends at it or at one of its suffix states
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[Optional[str]] = [None]
+
+        for phrase in phrases:
+            self.__add(phrase)
+        self.__build_links()
+
+    def __add(self, phrase: str) -> None:
+        state = 0
+        for char in phrase:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(None)
+            state = next_state
+        if self.output[state] is None:
+            self.output[state] = phrase
+
+    def __build_links(self) -> None:
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                if self.output[next_state] is None:
+                    self.output[next_state] = self.output[self.fail[next_state]]
+
+    def search(self, text: str) -> Optional[str]:
+        """Return a phrase occurring in ``text``, or None if there is no match."""
+        if self.output[0] is not None:
+            # the empty string was one of the phrases
+            return self.output[0]
+        state = 0
+        for char in text:
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            if self.output[state] is not None:
+                return self.output[state]
+        return None
+
+
+class PhraseMatcher:
+    """Matches text against a wordlist of single words and multi-word phrases.
+
+    This implements the matching rule shared by the safety checks and task
+    filters: a multi-word phrase matches if it occurs anywhere in the text,
+    while a single word only matches a whole whitespace-separated token. With
+    ``substring_words=True`` single words are also matched as substrings.
+
+    Phrases are lowercased once when the matcher is built. The text is used
+    as given, so callers lowercase it themselves if they need to.
+    """
+
+    def __init__(self, phrases: Iterable[str], substring_words: bool = False):
+        phrases = [phrase.strip().lower() for phrase in phrases]
+        if substring_words:
+            substrings, words = phrases, []
+        else:
+            substrings = [phrase for phrase in phrases if len(phrase.split()) > 1]
+            words = [phrase for phrase in phrases if len(phrase.split()) <= 1]
+
+        self.automaton = AhoCorasick(substrings)
+        self.words = frozenset(words)
+
+    @classmethod
+    def from_file(cls, path: str, substring_words: bool = False) -> 'PhraseMatcher':
+        """Build a matcher from a wordlist file with one word/phrase per line."""
+        with open(path, 'r') as f:
+            return cls([line for line in f], substring_words=substring_words)
+
+    def find(self, text: str) -> Optional[str]:
+        """Return a word/phrase from the list found in ``text``, or None."""
+        if self.words:
+            for token in text.split():
+                if token in self.words:
+                    return token
+        return self.automaton.search(text)
+
+    def matches(self, text: str) -> bool:
+        return self.find(text) is not None
+
+
+class RegexMatcher:
+    """Combines a list of regular expressions into one compiled alternation.
+
+    Each pattern becomes a named group, so a single ``search`` call checks all
+    of them and still reports which pattern matched.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = list(patterns)
+        self.regex = re.compile('|'.join(f'(?P<p{i}>{pattern})' for i, pattern in enumerate(self.patterns)))
+
+    def find(self, text: str) -> Optional[str]:
+        """Return the pattern that matched ``text``, or None."""
+        match = self.regex.search(text)
+        if match is None:
+            return None
+        return self.patterns[int(match.lastgroup[1:])]
+
+    def matches(self, text: str) -> bool:
+        return self.regex.search(text) is not None
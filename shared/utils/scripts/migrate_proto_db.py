@@ -0,0 +1,47 @@
+import sys
+import argparse
+
+sys.path.append('../..')
+sys.path.append('../../compiled_protobufs')
+
+from utils import ComposedDB, ProtoDB, ProtoDBMigration
+from asr_parser_pb2 import ASRLog
+from searcher_pb2 import SearchLog
+from taskmap_pb2 import TaskMap, Session, ConversationTurn
+
+# Rewrites the items of the OAT tables that are still stored as dicts in the binary ProtoDB format.
+# Items are read with the legacy fallback, so the services can keep running during the migration.
+
+
+def get_tables(prefix, database_url, compression):
+    kwargs = dict(url=database_url, prefix=prefix, storage='binary', compression=compression)
+    return {
+        'sessions': ComposedDB(proto_class=Session,
+                               primary_key='session_id',
+                               sub_proto_config={
+                                   'turn': {
+                                       'proto_class': ConversationTurn,
+                                       'primary_key': 'id'
+                                   }
+                               },
+                               projected_attributes=['version'],
+                               **kwargs),
+        'taskmaps': ProtoDB(proto_class=TaskMap, primary_key='taskmap_id', **kwargs),
+        'search_logs': ProtoDB(proto_class=SearchLog, **kwargs),
+        'asr_logs': ProtoDB(proto_class=ASRLog, **kwargs),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate ProtoDB tables to the binary storage format")
+    parser.add_argument('--prefix', default='Undefined', help="table prefix, i.e. the DB_ENV of the services")
+    parser.add_argument('--database_url', default=None, help="DynamoDB endpoint, e.g. http://dynamodb-local:8000")
+    parser.add_argument('--compression', default=None, choices=['zstd'])
+    parser.add_argument('--pause', type=float, default=0.1, help="seconds to wait between batches")
+    parser.add_argument('tables', nargs='*', default=['sessions', 'taskmaps', 'search_logs', 'asr_logs'])
+    args = parser.parse_args()
+
+    tables = get_tables(args.prefix, args.database_url, args.compression)
+    for name in args.tables:
+        stats = ProtoDBMigration(tables[name], pause=args.pause).run()
+        print(f"{name}: {stats['migrated']} items migrated, {stats['failed']} failed")
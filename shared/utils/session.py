@@ -21,8 +21,10 @@ from taskmap_pb2 import (
     TaskmapCategoryUnion,
     InputInteraction,
     TaskSelection,
-    Task
+    Task,
+    ConversationTurn
 )
+from phase_intent_classifier_pb2 import IntentRequest
 from video_document_pb2 import VideoDocument
 
 from .constants.prompts import (
@@ -945,3 +947,69 @@ def should_trigger_theme(user_utterance, theme_word):
         
     logger.info('No theme found in user utterance')
     return False, ""
+
+
+# number of turns the intent classifiers read: the user's utterance, the reply it answers and the
+# exchange before that
+INTENT_CONTEXT_TURNS = 3
+
+
+def compact_turns(session: Session, window: int = INTENT_CONTEXT_TURNS) -> List[ConversationTurn]:
+    """Returns lightweight copies of the last ``window`` turns of a Session.
+
+    Each copy keeps only the turn ID, the user's utterance and intents, and the agent's
+    speech text. Full turns carry screens, images and sometimes TaskMap fragments, so
+    this is what should be sent to services that only need the recent conversation.
+
+    Args:
+        session (Session): the current Session object
+        window (int): number of turns to keep, counting back from the current one
+
+    Returns:
+        list of ConversationTurn objects, oldest first
+    """
+    turns = []
+    for turn in session.turn[-window:]:
+        compact_turn = ConversationTurn()
+        compact_turn.id = turn.id
+        compact_turn.user_request.interaction.text = turn.user_request.interaction.text
+        compact_turn.user_request.interaction.intents.extend(turn.user_request.interaction.intents)
+        compact_turn.agent_response.interaction.speech_text = turn.agent_response.interaction.speech_text
+        turns.append(compact_turn)
+    return turns
+
+
+def build_intent_request(session: Session, window: int = INTENT_CONTEXT_TURNS) -> IntentRequest:
+    """Builds the IntentRequest for the PhaseIntentClassifier from the last ``window`` turns.
+
+    Args:
+        session (Session): the current Session object
+        window (int): number of turns to send, counting back from the current one
+
+    Returns:
+        IntentRequest
+    """
+    intent_request = IntentRequest()
+    intent_request.utterance = session.turn[-1].user_request.interaction.text
+    intent_request.turns.extend(compact_turns(session, window))
+    return intent_request
+
+
+def compact_session(session: Session, window: int = 1) -> Session:
+    """Returns a copy of the Session holding only its IDs, domain and last ``window`` compact turns.
+
+    Used for the classifier RPCs that take a Session but only read the latest utterances.
+
+    Args:
+        session (Session): the current Session object
+        window (int): number of turns to keep, counting back from the current one
+
+    Returns:
+        Session
+    """
+    compact = Session()
+    compact.session_id = session.session_id
+    compact.domain = session.domain
+    compact.headless = session.headless
+    compact.turn.extend(compact_turns(session, window))
+    return compact
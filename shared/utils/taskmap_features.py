@@ -0,0 +1,168 @@
+import json
+import os
+from typing import Iterable, Iterator, List, Tuple
+
+from . import logger, indri_stop_words
+
+try:
+    from pyserini.analysis import Analyzer, get_lucene_analyzer
+except ImportError:
+    # without pyserini only the static features can be computed
+    Analyzer = get_lucene_analyzer = None
+
+# name of the file written next to the objects index, holding one JSON record per TaskMap
+TASKMAP_FEATURES_FILENAME = "taskmap_features.jsonl"
+
+# query-independent features, in the order they are stored
+STATIC_FEATURES = [
+    'step_score',
+    'av_w_steps_score',
+    'requirements_score',
+    'rating_score',
+    'image_score',
+    'rating_count_score',
+    'views_score',
+    'staged_score',
+]
+
+# analyzed text fields, compared against the analyzed user utterance at query time
+TEXT_FEATURES = ['title', 'requirements', 'tags']
+
+
+class TaskMapFeatureExtractor:
+    """Computes the query-independent reranking features of a TaskMap.
+
+    These only depend on the content of the TaskMap, so they can be computed
+    once when the index is built and looked up by taskmap_id at search time
+    (see ``functionalities/searcher/feature_store.py``).
+    """
+
+    def __init__(self):
+        if Analyzer is None:
+            raise ImportError("TaskMapFeatureExtractor needs pyserini to analyze the text fields")
+        self.analyzer = Analyzer(get_lucene_analyzer(stemmer='porter', stopwords=True))
+        self.word_tokenizer = Analyzer(get_lucene_analyzer(stemming=False, stopwords=False))
+
+    def processing(self, sentence: str) -> List[str]:
+        """ process queries or sections of documents by removing stopwords before sharding / stemming. """
+        words = self.word_tokenizer.analyze(sentence)
+        new_sentence = " ".join([w for w in words if w not in indri_stop_words])
+        return self.analyzer.analyze(new_sentence)
+
+    def extract(self, taskmap) -> dict:
+        """Return the analyzed text fields and numeric features of a TaskMap proto."""
+        features = {
+            'title': sorted(set(self.processing(taskmap.title))),
+            'requirements': sorted(set(self.processing(" ".join([r.name for r in taskmap.requirement_list])))),
+            'tags': sorted(set(self.processing(" ".join(taskmap.tags)))),
+        }
+        features.update(static_features(taskmap))
+        return features
+
+
+def static_features(taskmap) -> dict:
+    """Return the numeric features of a TaskMap proto, named as in ``STATIC_FEATURES``."""
+    features = {}
+
+    # >>> step count <<<
+    num_steps = len(taskmap.steps)
+    if num_steps < 4:
+        step_score = 0.5
+    elif 4 <= num_steps < 10:
+        step_score = 1.0
+    elif 10 <= num_steps < 15:
+        step_score = 0.7
+    elif 15 <= num_steps < 20:
+        step_score = 0.4
+    else:
+        step_score = 0.0
+    features['step_score'] = step_score
+
+    # >>> average words in step <<<
+    w_steps = [len(s.response.speech_text.split(" ")) for s in taskmap.steps]
+    av_w_steps = sum(w_steps) / len(w_steps) if len(w_steps) > 0 else 0
+    if av_w_steps < 5:
+        av_w_steps_score = 0.5
+    elif 5 <= av_w_steps < 20:
+        av_w_steps_score = 1.0
+    elif 20 <= av_w_steps < 30:
+        av_w_steps_score = 0.7
+    elif 30 <= av_w_steps < 40:
+        av_w_steps_score = 0.25
+    else:
+        av_w_steps_score = 0.0
+    features['av_w_steps_score'] = av_w_steps_score
+
+    # >>> requirement count <<<
+    num_requirements = len(taskmap.requirement_list)
+    if num_requirements < 4:
+        requirements_score = 0.5
+    elif 4 <= num_requirements < 8:
+        requirements_score = 1.0
+    elif 8 <= num_steps < 12:
+        requirements_score = 0.7
+    elif 12 <= num_steps < 16:
+        requirements_score = 0.5
+    else:
+        requirements_score = 0.0
+    features['requirements_score'] = requirements_score
+
+    # >>> quality rating <<<
+    features['rating_score'] = float(taskmap.rating_out_100) / 100 if taskmap.rating_out_100 else 0.35
+
+    # >>> has image <<<
+    features['image_score'] = 1.0 if taskmap.thumbnail_url and \
+        "https://oat-2-data.s3.amazonaws.com/" != taskmap.thumbnail_url else 0.0
+
+    # >>> rating count <<<
+    rating_count = taskmap.rating_count
+    if rating_count == 0:
+        rating_count_score = 0.0
+    elif 1 <= rating_count < 25:
+        rating_count_score = 0.2
+    elif 25 <= num_steps < 100:
+        rating_count_score = 0.4
+    elif 100 <= num_steps < 250:
+        rating_count_score = 0.6
+    else:
+        rating_count_score = 1.0
+    features['rating_count_score'] = rating_count_score
+
+    # >>> views <<<
+    views = taskmap.rating_count
+    if views == 0:
+        views_score = 0.0
+    elif 1 <= views < 100:
+        views_score = 0.2
+    elif 100 <= views < 1000:
+        views_score = 0.4
+    elif 1000 <= views < 10000:
+        views_score = 0.6
+    else:
+        views_score = 1.0
+    features['views_score'] = views_score
+
+    # >>> promote staged <<<
+    features['staged_score'] = 1.0 if "staged" in taskmap.dataset else 0.0
+
+    return features
+
+
+def write_taskmap_features(path: str, records: Iterable[Tuple[str, dict]]) -> int:
+    """Write (taskmap_id, features) pairs to a JSON lines file, returning the number written."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    count = 0
+    with open(path, 'w') as f:
+        for taskmap_id, features in records:
+            f.write(json.dumps({'id': taskmap_id, 'features': features}) + '\n')
+            count += 1
+    logger.info(f"Wrote features for {count} TaskMaps to {path}")
+    return count
+
+
+def read_taskmap_features(path: str) -> Iterator[Tuple[str, dict]]:
+    """Read (taskmap_id, features) pairs written by ``write_taskmap_features``."""
+    with open(path, 'r') as f:
+        for line in f:
+            record = json.loads(line)
+            yield record['id'], record['features']
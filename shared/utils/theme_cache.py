@@ -0,0 +1,116 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import grpc
+
+from database_pb2 import Void, QueryList
+from database_pb2_grpc import DatabaseStub
+from semantic_searcher_pb2 import ThemeMapping
+from theme_pb2 import ThemeRequest, ThemeResults
+
+from . import logger
+from .channels import get_channel
+
+
+class ThemeCache:
+    """Process-wide cache of the theme lookups served by the database service.
+
+    Themes change a few times a day at most, but the policies look them up on every
+    turn (e.g. one ``get_theme_by_date`` call per upcoming day). The cache keeps every
+    response it has fetched, and once ``ttl_seconds`` have passed it asks the database
+    for its theme version stamp: everything is kept if the version hasn't changed, and
+    dropped otherwise. If the database can't report a version, the cache is simply
+    cleared every ``ttl_seconds``.
+
+    Responses are returned as copies, so callers are free to modify them.
+    """
+
+    def __init__(self, database: Optional[DatabaseStub] = None, ttl_seconds: float = 300):
+        self.__database = database
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self.entries: Dict[Tuple[str, str], object] = {}
+        self.version: Optional[str] = None
+        self.checked_at: Optional[float] = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def database(self) -> DatabaseStub:
+        if self.__database is None:
+            self.__database = DatabaseStub(get_channel(os.environ["EXTERNAL_FUNCTIONALITIES_URL"]))
+        return self.__database
+
+    def __check_version(self) -> None:
+        """ Drops the cached responses if they are older than the TTL and the themes have changed. """
+        with self.lock:
+            if self.checked_at is not None and time.monotonic() - self.checked_at < self.ttl_seconds:
+                return
+            self.checked_at = time.monotonic()
+
+        try:
+            version = self.database.get_theme_version(Void()).version
+        except grpc.RpcError as e:
+            logger.info(f"Could not get the theme version ({e.code()}), refreshing all themes")
+            version = None
+
+        with self.lock:
+            if version is None or version != self.version:
+                self.entries.clear()
+            self.version = version
+
+    def __get(self, key: Tuple[str, str], fetch: Callable[[], object]):
+        self.__check_version()
+        with self.lock:
+            response = self.entries.get(key)
+            if response is not None:
+                self.hits += 1
+        if response is None:
+            response = fetch()
+            with self.lock:
+                self.misses += 1
+                self.entries[key] = response
+
+        copied = type(response)()
+        copied.CopyFrom(response)
+        return copied
+
+    def get_theme_by_id(self, theme_word: str) -> ThemeResults:
+        return self.__get(("theme", theme_word),
+                          lambda: self.database.get_theme_by_id(ThemeRequest(theme_word=theme_word)))
+
+    def get_theme_by_date(self, date: str) -> QueryList:
+        return self.__get(("date", date), lambda: self.database.get_theme_by_date(ThemeRequest(date=date)))
+
+    def get_theme(self, theme_query: str) -> ThemeMapping:
+        return self.__get(("mapping", theme_query),
+                          lambda: self.database.get_theme(ThemeMapping(theme_query=theme_query)))
+
+    def get_queries(self) -> List[str]:
+        return list(self.__get(("queries", ""), lambda: self.database.get_queries(Void())).queries)
+
+    def get_upcoming_themes(self, days: int = 7) -> List[Tuple[str, str]]:
+        """Returns the (date, theme word) pairs of the themes of the next ``days`` days, starting today.
+
+        Args:
+            days (int): number of days to look ahead
+
+        Returns:
+            list of (date as %d-%m-%Y, theme word) tuples, in date order
+        """
+        now_date = datetime.today()
+        themes = []
+        for i in range(days):
+            date = (now_date + timedelta(days=i)).strftime("%d-%m-%Y")
+            themes.extend((date, theme_word) for theme_word in self.get_theme_by_date(date).queries)
+        return themes
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {'size': len(self.entries), 'hits': self.hits, 'misses': self.misses}
+
+
+theme_cache = ThemeCache()
@@ -0,0 +1,34 @@
+import importlib.util
+import os
+import sys
+
+from types import ModuleType
+
+import pytest
+
+# the service directories are mounted here by docker-compose.yml, OAT_SERVICES_ROOT points to a checkout instead
+SERVICES_ROOT = os.environ.get('OAT_SERVICES_ROOT', '/services')
+
+
+def load_service_module(service: str, path: str) -> ModuleType:
+    """Loads a single module of a service from its file, skipping the test if the service isn't available.
+
+    Args:
+        service (str): the service directory, e.g. "orchestrator"
+        path (str): path of the module inside the service directory, e.g. "policy/turn_executor.py"
+
+    Returns:
+        the loaded module, also registered in sys.modules as "<service>.<module path>"
+    """
+    file_path = os.path.join(SERVICES_ROOT, service, path)
+    if not os.path.isfile(file_path):
+        pytest.skip(f"{service} isn't mounted at {SERVICES_ROOT}", allow_module_level=True)
+
+    name = f"{service}.{path[:-len('.py')].replace('/', '.')}"
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, file_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
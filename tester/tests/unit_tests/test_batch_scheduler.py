@@ -0,0 +1,145 @@
+import threading
+import time
+
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from service_modules import load_service_module
+
+batch_scheduler = load_service_module('llm_functionalities', 'llm_runner/batch_scheduler.py')
+BatchScheduler = batch_scheduler.BatchScheduler
+DeadlineExceededError = batch_scheduler.DeadlineExceededError
+QueueFullError = batch_scheduler.QueueFullError
+
+PAD, EOS, VOCAB = 0, 99, 100
+
+
+class CountingTokenizer:
+    """ Tokenizes "3 4 5" as [3, 4, 5]. """
+
+    pad_token_id = PAD
+    eos_token_id = EOS
+
+    def __call__(self, prompt: str):
+        return SimpleNamespace(input_ids=[int(token) for token in prompt.split()])
+
+    def decode(self, token_ids: List[int], skip_special_tokens: bool = True) -> str:
+        return " ".join(str(token_id) for token_id in token_ids)
+
+
+class CountingModel:
+    """ Stub causal LM predicting the last token + 1, or EOS after 98.
+
+    Records the (batch size, prompt length) of every batch, and waits for `release` before
+    decoding so that tests can keep the scheduler busy.
+    """
+
+    def __init__(self):
+        self.batches = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, input_ids, attention_mask, position_ids, past_key_values, use_cache):
+        self.release.wait()
+        if past_key_values is None:
+            self.batches.append(tuple(input_ids.shape))
+        next_tokens = torch.clamp(input_ids[:, -1] + 1, max=EOS)
+        logits = torch.nn.functional.one_hot(next_tokens, VOCAB).float().unsqueeze(1)
+        return SimpleNamespace(logits=logits, past_key_values=())
+
+
+@pytest.fixture
+def model():
+    return CountingModel()
+
+
+def test_batches_requests_by_prompt_length(model) -> None:
+    scheduler = BatchScheduler(model, CountingTokenizer(), device='cpu', max_batch_size=8, bucket_size=4,
+                               batch_wait=0.2)
+    short_prompts = ["1 2", "10 11 12", "20"]
+    long_prompts = ["1 2 3 4 5 6", "30 31 32 33 34 35 36"]
+    futures = {prompt: scheduler.submit(prompt, max_tokens=2) for prompt in short_prompts + long_prompts}
+
+    results = {prompt: future.result(timeout=5) for prompt, future in futures.items()}
+    assert results["1 2"] == "1 2 3 4"
+    assert results["20"] == "20 21 22"
+    assert results["30 31 32 33 34 35 36"] == "30 31 32 33 34 35 36 37 38"
+    # one batch per length bucket, padded to its longest prompt
+    assert sorted(model.batches) == [(2, 7), (3, 3)]
+    assert scheduler.stats['completed'] == 5
+
+
+def test_sequences_finish_independently(model) -> None:
+    scheduler = BatchScheduler(model, CountingTokenizer(), device='cpu', batch_wait=0.2)
+    ends_early = scheduler.submit("96 97", max_tokens=10)
+    runs_long = scheduler.submit("1 2", max_tokens=4)
+
+    # 98 is followed by EOS, which isn't part of the output
+    assert ends_early.result(timeout=5) == "96 97 98"
+    assert runs_long.result(timeout=5) == "1 2 3 4 5 6"
+    assert model.batches == [(2, 2)]
+
+
+def test_expired_requests_are_dropped(model) -> None:
+    scheduler = BatchScheduler(model, CountingTokenizer(), device='cpu', bucket_size=4, batch_wait=0)
+    model.release.clear()
+    busy = scheduler.submit("1", max_tokens=1)
+    expiring = scheduler.submit("50 51 52 53 54 55 56 57 58", max_tokens=1, timeout=0.05)
+
+    # the deadline passes while the worker is busy, the request is dropped when it takes the next batch
+    time.sleep(0.1)
+    model.release.set()
+    assert busy.result(timeout=5) == "1 2"
+    with pytest.raises(DeadlineExceededError):
+        expiring.result(timeout=5)
+    assert model.batches == [(1, 1)]
+    assert scheduler.stats['expired'] == 1
+
+
+def test_full_queue_rejects_requests(model) -> None:
+    scheduler = BatchScheduler(model, CountingTokenizer(), device='cpu', max_batch_size=1, max_queue_size=2,
+                               batch_wait=0)
+    model.release.clear()
+    futures = [scheduler.submit("1", max_tokens=1)]
+    # wait for the worker to take the first request off the queue
+    while scheduler.pending:
+        time.sleep(0.01)
+    futures += [scheduler.submit("2", max_tokens=1), scheduler.submit("3", max_tokens=1)]
+
+    with pytest.raises(QueueFullError):
+        scheduler.submit("4", max_tokens=1)
+    model.release.set()
+    assert [future.result(timeout=5) for future in futures] == ["1 2", "2 3", "3 4"]
+    assert scheduler.stats['rejected'] == 1
+
+
+def test_batch_request_is_admitted_all_at_once(model) -> None:
+    scheduler = BatchScheduler(model, CountingTokenizer(), device='cpu', max_batch_size=1, max_queue_size=3,
+                               batch_wait=0)
+    model.release.clear()
+    futures = [scheduler.submit("1", max_tokens=1)]
+    while scheduler.pending:
+        time.sleep(0.01)
+    futures += scheduler.submit_many(["2", "3"], max_tokens=1)
+
+    # two of these three prompts would fit, none of them is queued
+    with pytest.raises(QueueFullError):
+        scheduler.submit_many(["4", "5", "6"], max_tokens=1)
+    assert len(scheduler.pending) == 2
+    futures += scheduler.submit_many(["7"], max_tokens=1)
+
+    model.release.set()
+    assert [future.result(timeout=5) for future in futures] == ["1 2", "2 3", "3 4", "7 8"]
+    assert scheduler.stats['rejected'] == 3
+
+
+def test_oversized_batch_request_waits_for_an_empty_queue(model) -> None:
+    scheduler = BatchScheduler(model, CountingTokenizer(), device='cpu', max_queue_size=2, batch_wait=0)
+    futures = scheduler.submit_many(["1", "2", "3"], max_tokens=1)
+
+    assert [future.result(timeout=5) for future in futures] == ["1 2", "2 3", "3 4"]
+    assert scheduler.stats['rejected'] == 0
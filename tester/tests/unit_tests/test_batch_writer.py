@@ -0,0 +1,95 @@
+import pathlib
+import time
+from typing import List
+
+from botocore.exceptions import ClientError
+from searcher_pb2 import SearchLog, SearchQuery
+from utils import BatchWriter
+
+
+class InMemoryDB:
+    """ Stands in for a ProtoDB, optionally failing every write, and rejecting batches like DynamoDB. """
+
+    proto_class = SearchLog
+    primary_key = "id"
+
+    def __init__(self, fail: bool = False, invalid_ids: List[str] = ()):
+        self.fail = fail
+        self.invalid_ids = set(invalid_ids)
+        self.batches: List[List[str]] = []
+        self.items = {}
+
+    def batch_put(self, proto_obj_list, check_for_changes: bool = True):
+        if self.fail:
+            raise RuntimeError("database unavailable")
+        item_ids = [proto_obj.id for proto_obj in proto_obj_list]
+        if len(set(item_ids)) < len(item_ids) or self.invalid_ids.intersection(item_ids):
+            raise ClientError({'Error': {'Code': 'ValidationException',
+                                         'Message': 'Provided list of item keys contains duplicates'}},
+                              'BatchWriteItem')
+        self.batches.append(item_ids)
+        for proto_obj in proto_obj_list:
+            self.items[proto_obj.id] = proto_obj
+
+
+def test_writes_in_batches_on_close() -> None:
+    db = InMemoryDB()
+    writer = BatchWriter(db, batch_size=4, flush_interval=60)
+    for idx in range(10):
+        writer.put(SearchLog(id=f"log_{idx}"))
+    writer.close()
+
+    assert [item_id for batch in db.batches for item_id in batch] == [f"log_{idx}" for idx in range(10)]
+    assert all(len(batch) <= 4 for batch in db.batches)
+    assert writer.stats()['written'] == 10
+
+
+def test_failed_writes_are_spilled_and_replayed(tmp_path: pathlib.Path) -> None:
+    spill_path = str(tmp_path / "search_logs.spill")
+
+    writer = BatchWriter(InMemoryDB(fail=True), flush_interval=60, spill_path=spill_path)
+    writer.put(SearchLog(id="log_0"))
+    writer.put(SearchLog(id="log_1"))
+    writer.close()
+    assert writer.stats()['spilled'] == 2
+
+    # the next writer picks the spilled logs up when it starts
+    db = InMemoryDB()
+    writer = BatchWriter(db, flush_interval=60, spill_path=spill_path)
+    writer.close()
+    assert db.batches == [["log_0", "log_1"]]
+    assert not pathlib.Path(spill_path).exists()
+
+
+def test_last_log_with_the_same_id_is_written() -> None:
+    db = InMemoryDB()
+    writer = BatchWriter(db, batch_size=3, flush_interval=60)
+    writer.put(SearchLog(id="session_turn", search_query=SearchQuery(text="first search")))
+    writer.put(SearchLog(id="other_turn"))
+    writer.put(SearchLog(id="session_turn", search_query=SearchQuery(text="rerouted search")))
+    # the flusher writes the batch as soon as it is full
+    deadline = time.monotonic() + 5
+    while not db.batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    writer.close()
+
+    assert db.batches == [["other_turn", "session_turn"]]
+    assert db.items["session_turn"].search_query.text == "rerouted search"
+
+
+def test_invalid_spilled_batches_are_dropped(tmp_path: pathlib.Path) -> None:
+    spill_path = str(tmp_path / "search_logs.spill")
+
+    writer = BatchWriter(InMemoryDB(fail=True), batch_size=2, flush_interval=60, spill_path=spill_path)
+    for idx in range(4):
+        writer.put(SearchLog(id=f"log_{idx}"))
+    writer.close()
+    assert writer.stats()['spilled'] == 4
+
+    # the batch holding log_1 fails on every retry, the other one is still written
+    db = InMemoryDB(invalid_ids=["log_1"])
+    writer = BatchWriter(db, batch_size=2, flush_interval=60, spill_path=spill_path)
+    writer.close()
+    assert db.batches == [["log_2", "log_3"]]
+    assert writer.stats()['dropped'] == 2
+    assert not pathlib.Path(spill_path).exists()
@@ -0,0 +1,85 @@
+import threading
+import time
+
+from typing import List
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from service_modules import load_service_module
+
+batched_encoder = load_service_module('neural_functionalities', 'sentence_embeddings/batched_encoder.py')
+BatchedEncoder = batched_encoder.BatchedEncoder
+
+
+class NumberEncoder:
+    """ Stub SentenceTransformer embedding "3" as [3.0, -3.0], recording the batches it encodes. """
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls: List[List[str]] = []
+
+    def encode(self, sentences: List[str], convert_to_tensor: bool = True) -> torch.Tensor:
+        self.calls.append(list(sentences))
+        if self.fail:
+            raise RuntimeError("CUDA error")
+        return torch.tensor([[float(sentence), -float(sentence)] for sentence in sentences])
+
+
+def encode_concurrently(encoder: BatchedEncoder, requests: list, delay: float = 0.02) -> list:
+    """ Calls encode for each request from its own thread, starting them `delay` seconds apart. """
+    results = [None] * len(requests)
+
+    def encode(idx):
+        try:
+            results[idx] = encoder.encode(requests[idx])
+        except Exception as e:
+            results[idx] = e
+
+    threads = [threading.Thread(target=encode, args=(idx,)) for idx in range(len(requests))]
+    for thread in threads:
+        thread.start()
+        time.sleep(delay)
+    for thread in threads:
+        thread.join(timeout=5)
+    return results
+
+
+def test_concurrent_calls_share_a_batch() -> None:
+    model = NumberEncoder()
+    encoder = BatchedEncoder(model, max_batch_size=8, max_wait_ms=300)
+    results = encode_concurrently(encoder, ["1", ["2", "3"], "4"])
+
+    assert model.calls == [["1", "2", "3", "4"]]
+    assert results[0].tolist() == [1.0, -1.0]
+    assert results[1].tolist() == [[2.0, -2.0], [3.0, -3.0]]
+    assert results[2].tolist() == [4.0, -4.0]
+    assert (encoder.batches, encoder.sentences) == (1, 4)
+
+
+def test_batches_stop_at_the_maximum_size() -> None:
+    model = NumberEncoder()
+    encoder = BatchedEncoder(model, max_batch_size=3, max_wait_ms=300)
+    results = encode_concurrently(encoder, [["1", "2"], ["3", "4"], "5"])
+
+    # the second request doesn't fit next to the first one and starts the next batch
+    assert model.calls == [["1", "2"], ["3", "4", "5"]]
+    assert results[1].tolist() == [[3.0, -3.0], [4.0, -4.0]]
+    assert results[2].tolist() == [5.0, -5.0]
+
+
+def test_long_lists_are_encoded_directly() -> None:
+    model = NumberEncoder()
+    encoder = BatchedEncoder(model, max_batch_size=2)
+
+    assert encoder.encode(["1", "2", "3"]).shape == (3, 2)
+    assert model.calls == [["1", "2", "3"]]
+    assert encoder.batches == 0
+
+
+def test_model_error_reaches_every_caller() -> None:
+    encoder = BatchedEncoder(NumberEncoder(fail=True), max_batch_size=8, max_wait_ms=300)
+    results = encode_concurrently(encoder, ["1", ["2", "3"]])
+
+    assert all(isinstance(result, RuntimeError) for result in results)
@@ -0,0 +1,102 @@
+import gzip
+import json
+import os
+
+from typing import List
+
+import pytest
+
+from taskmap_pb2 import TaskMap
+from service_modules import load_service_module
+
+manifest = load_service_module('offline', 'manifest.py')
+BuildManifest = manifest.BuildManifest
+hash_message = manifest.hash_message
+hash_stream_file = manifest.hash_stream_file
+
+
+def write_stream_file(path: str, content: bytes, mtime: int = 0) -> None:
+    with open(path, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb", mtime=mtime) as f:
+            f.write(content)
+
+
+def build(manifest_dir: str, input_dir: str, config=None) -> List[str]:
+    """ Runs a pipeline step over the input files, returning the ones it rebuilt. """
+    build_manifest = BuildManifest("step", config or {'augmenters': [TaskMap]}, manifest_dir=manifest_dir)
+    rebuilt = []
+    for file_name in sorted(os.listdir(input_dir)):
+        digest = hash_stream_file(os.path.join(input_dir, file_name))
+        if build_manifest.changed(file_name, digest):
+            rebuilt.append(file_name)
+            build_manifest.set(file_name, digest)
+    build_manifest.save()
+    return rebuilt
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    input_dir = tmp_path / "inputs"
+    input_dir.mkdir()
+    write_stream_file(str(input_dir / "batch_0.bin"), b"first batch")
+    write_stream_file(str(input_dir / "batch_1.bin"), b"second batch")
+    return str(tmp_path / "manifests"), str(input_dir)
+
+
+def test_unchanged_inputs_are_skipped(dirs) -> None:
+    manifest_dir, input_dir = dirs
+    assert build(manifest_dir, input_dir) == ["batch_0.bin", "batch_1.bin"]
+
+    # rewriting the same content only changes the gzip header
+    write_stream_file(os.path.join(input_dir, "batch_0.bin"), b"first batch", mtime=1234)
+    assert build(manifest_dir, input_dir) == []
+
+
+def test_changed_inputs_are_rebuilt(dirs) -> None:
+    manifest_dir, input_dir = dirs
+    build(manifest_dir, input_dir)
+
+    write_stream_file(os.path.join(input_dir, "batch_1.bin"), b"second batch, updated")
+    write_stream_file(os.path.join(input_dir, "batch_2.bin"), b"third batch")
+    assert build(manifest_dir, input_dir) == ["batch_1.bin", "batch_2.bin"]
+    assert build(manifest_dir, input_dir) == []
+
+
+def test_config_change_rebuilds_everything(dirs) -> None:
+    manifest_dir, input_dir = dirs
+    build(manifest_dir, input_dir)
+
+    assert build(manifest_dir, input_dir, config={'augmenters': [TaskMap, BuildManifest]}) == \
+        ["batch_0.bin", "batch_1.bin"]
+
+
+def test_message_hash_follows_the_content() -> None:
+    assert hash_message(TaskMap(taskmap_id="1", title="Pancakes")) == \
+        hash_message(TaskMap(title="Pancakes", taskmap_id="1"))
+    assert hash_message(TaskMap(taskmap_id="1", title="Pancakes")) != \
+        hash_message(TaskMap(taskmap_id="1", title="Waffles"))
+
+
+def test_interrupted_save_keeps_the_previous_manifest(dirs, monkeypatch) -> None:
+    manifest_dir, input_dir = dirs
+    build(manifest_dir, input_dir)
+    path = os.path.join(manifest_dir, "step.json")
+    with open(path) as f:
+        saved = f.read()
+
+    def interrupted_dump(data, f):
+        f.write('{"config": ')
+        raise KeyboardInterrupt
+
+    build_manifest = BuildManifest("step", {'augmenters': [TaskMap]}, manifest_dir=manifest_dir)
+    build_manifest.set("batch_2.bin", "digest")
+    monkeypatch.setattr(manifest.json, "dump", interrupted_dump)
+    with pytest.raises(KeyboardInterrupt):
+        build_manifest.save()
+    monkeypatch.undo()
+
+    # the partial write went to a temporary file, the manifest is still complete
+    with open(path) as f:
+        assert f.read() == saved
+    assert set(json.loads(saved)["entries"]) == {"batch_0.bin", "batch_1.bin"}
+    assert build(manifest_dir, input_dir) == []
@@ -0,0 +1,61 @@
+from concurrent import futures
+
+import grpc
+import pytest
+
+from utils import SERVER_OPTIONS
+from utils.channels import ChannelRegistry, RoundRobinChannel
+
+
+def start_server(name: bytes) -> (grpc.Server, int):
+    """ Starts a server answering every call to /test.Echo/Who with its name. """
+    handler = grpc.method_handlers_generic_handler('test.Echo', {
+        'Who': grpc.unary_unary_rpc_method_handler(lambda request, context: name),
+    })
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2), handlers=[handler], options=SERVER_OPTIONS)
+    port = server.add_insecure_port('localhost:0')
+    server.start()
+    return server, port
+
+
+@pytest.fixture
+def servers():
+    started = [start_server(name) for name in (b'first', b'second', b'third')]
+    yield [port for _, port in started]
+    for server, _ in started:
+        server.stop(grace=None)
+
+
+def test_one_channel_per_target(servers) -> None:
+    registry = ChannelRegistry()
+    target = f'localhost:{servers[0]}'
+    channel = registry.get_channel(target)
+
+    assert registry.get_channel(target) is channel
+    assert registry.get_channel(f'localhost:{servers[1]}') is not channel
+    assert registry.stats()[target] == {'created': 1, 'reused': 1}
+    assert channel.unary_unary('/test.Echo/Who')(b'') == b'first'
+    registry.close()
+
+
+def test_round_robin_order(servers) -> None:
+    registry = ChannelRegistry()
+    channel = registry.get_channel(','.join(f'localhost:{port}' for port in servers))
+    assert isinstance(channel, RoundRobinChannel)
+
+    who = channel.unary_unary('/test.Echo/Who')
+    assert [who(b'') for _ in range(6)] == [b'first', b'second', b'third'] * 2
+    registry.close()
+
+
+def test_close_drops_the_channels(servers) -> None:
+    registry = ChannelRegistry()
+    target = f'localhost:{servers[0]},localhost:{servers[1]}'
+    channel = registry.get_channel(target)
+    registry.close()
+
+    with pytest.raises(ValueError):
+        channel.unary_unary('/test.Echo/Who')(b'')
+    # a closed registry opens a new channel on the next lookup
+    assert registry.get_channel(target) is not channel
+    registry.close()
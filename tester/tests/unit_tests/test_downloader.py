@@ -1,5 +1,8 @@
+import hashlib
+import http.server
 import os
 import pathlib
+import threading
 
 import tomli
 import pytest
@@ -215,3 +218,113 @@ def test_download_missing_values(missing_values_downloads_path: str) -> None:
     """
     with pytest.raises(MissingValueError):
         Downloader(missing_values_downloads_path)
+
+
+class RangeRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Serves the files in `self.server.files`, supporting "Range: bytes=N-" requests.
+    """
+
+    def do_GET(self) -> None:
+        data = self.server.files.get(self.path)
+        if data is None:
+            self.send_error(404)
+            return
+
+        range_header = self.headers.get("Range")
+        self.server.ranges.append(range_header)
+        if range_header is not None:
+            data = data[int(range_header.split("=")[1].rstrip("-")):]
+            self.send_response(206)
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def http_server():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), RangeRequestHandler)
+    server.files = {f"/file_{i}.bin": os.urandom(64 * 1024 + i) for i in range(6)}
+    server.ranges = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def write_http_config(server, tmp_path: pathlib.Path, checksums: str = "") -> str:
+    """
+    Write a config with 2 sources of 3 files each, served by the local HTTP server.
+    """
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    config = f'name = "test"\nbase_path = "{tmp_path / "downloads"}"\nworkers = 3\n'
+    for source_id, indexes in [("source_a", range(0, 3)), ("source_b", range(3, 6))]:
+        urls = ", ".join(f'["{base_url}/file_{i}.bin", "file_{i}.bin"]' for i in indexes)
+        artefacts = ", ".join(f'["file_{i}", "file_{i}.bin"]' for i in indexes)
+        config += f'\n[[sources]]\nid = "{source_id}"\nurls = [{urls}]\nartefacts = [{artefacts}]\n{checksums}'
+    path = tmp_path / "downloads.toml"
+    path.write_text(config)
+    return str(path)
+
+
+def test_download_http_concurrent(http_server, tmp_path: pathlib.Path) -> None:
+    """
+    Test downloading several sources with multiple files at the same time.
+    """
+    d = Downloader(write_http_config(http_server, tmp_path))
+    d.download()
+    assert d.failed == 0
+    assert d.succeeded == 6
+
+    for i in range(6):
+        with open(d.get_artefact_path(f"file_{i}"), "rb") as f:
+            assert f.read() == http_server.files[f"/file_{i}.bin"]
+    for source_id in ["source_a", "source_b"]:
+        assert f".{source_id}.downloaded" in d.list_contents(source_id)
+        assert not any(name.endswith(".part") for name in d.list_contents(source_id))
+
+
+def test_download_http_resume(http_server, tmp_path: pathlib.Path) -> None:
+    """
+    Test that a partially downloaded file is resumed with a Range request.
+    """
+    d = Downloader(write_http_config(http_server, tmp_path))
+    data = http_server.files["/file_0.bin"]
+    partial_path = os.path.join(d.get_path("source_a"), "file_0.bin.part")
+    os.makedirs(os.path.dirname(partial_path), exist_ok=True)
+    with open(partial_path, "wb") as f:
+        f.write(data[:1000])
+
+    d.download(["file_0"])
+    assert d.failed == 0
+    assert d.succeeded == 3
+    assert "bytes=1000-" in http_server.ranges
+    with open(d.get_artefact_path("file_0"), "rb") as f:
+        assert f.read() == data
+    assert not os.path.exists(partial_path)
+
+
+def test_download_http_checksums(http_server, tmp_path: pathlib.Path) -> None:
+    """
+    Test that files are only kept if they match their declared checksums.
+    """
+    digest = hashlib.sha256(http_server.files["/file_0.bin"]).hexdigest()
+    checksums = f'checksums = [["file_0.bin", "{digest}"], ["file_3.bin", "{"0" * 64}"]]\n'
+    d = Downloader(write_http_config(http_server, tmp_path, checksums))
+    d.config.retries = 2
+
+    d.download()
+    assert d.failed == 1
+    assert d.succeeded == 5
+    assert os.path.isfile(d.get_artefact_path("file_0"))
+    # the mismatching file is discarded, and its source isn't marked as downloaded
+    assert not os.path.exists(d.get_artefact_path("file_3"))
+    assert not os.path.exists(os.path.join(d.get_path("source_b"), "file_3.bin.part"))
+    assert ".source_b.downloaded" not in d.list_contents("source_b")
+    assert ".source_a.downloaded" in d.list_contents("source_a")
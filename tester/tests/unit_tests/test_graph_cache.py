@@ -0,0 +1,53 @@
+from taskmap_pb2 import TaskState
+from task_graph import TaskGraphScheduler
+from service_modules import load_service_module
+from test_task_graph_scheduler import build_taskmap
+
+graph_cache = load_service_module('functionalities', 'task_manager/graph_cache.py')
+TaskGraphCache = graph_cache.TaskGraphCache
+
+
+def snapshot(graph) -> dict:
+    """ The nodes of a graph with their status and connections. """
+    return {node_id: (node.resolution_status(),
+                      [child.node_id for child in node.child_list],
+                      [parent.node_id for parent in node.parent_list])
+            for node_id, node in graph.node_set.items()}
+
+
+def test_mutable_copy_leaves_the_cached_graph_unchanged() -> None:
+    cache = TaskGraphCache()
+    taskmap = build_taskmap()
+    cached = cache.get(taskmap)
+    before = snapshot(cached)
+
+    state = TaskState()
+    state.execution_list.extend(["step_1", "step_2"])
+    state.index_to_next = 2
+    state.true_statements_ids.append("condition")
+    graph = cache.get(taskmap, mutable=True)
+    graph.update_graph(state)
+    graph.remove_node(graph.get_node("step_3"))
+    assert "step_1" not in graph and "condition" not in graph
+
+    scheduler = TaskGraphScheduler(cache.get(taskmap, mutable=True), state)
+    assert scheduler.schedule() == ["step_3", "step_4", "step_5"]
+
+    assert cache.get(taskmap) is cached
+    assert snapshot(cached) == before
+    assert TaskGraphScheduler(cache.get(taskmap, mutable=True)).schedule() == \
+        ["step_1", "step_2", "step_3", "step_4"]
+    assert cache.stats() == {'size': 1, 'hits': 4, 'misses': 1}
+
+
+def test_changed_taskmap_gets_its_own_entry() -> None:
+    cache = TaskGraphCache()
+    taskmap = build_taskmap()
+    graph = cache.get(taskmap)
+
+    taskmap.steps[0].response.speech_text = "Step 1, edited"
+    edited = cache.get(taskmap)
+    assert edited is not graph
+    assert edited.get_node("step_1").to_proto().response.speech_text == "Step 1, edited"
+    assert graph.get_node("step_1").to_proto().response.speech_text == "Step 1"
+    assert cache.stats() == {'size': 2, 'hits': 0, 'misses': 2}
@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+from service_modules import SERVICES_ROOT
+from utils.l2r_weights import L2RWeights, L2R_FEATURES, feature_matrix
+
+WEIGHTS_PATH = os.path.join(SERVICES_ROOT, 'functionalities', 'searcher', 'data', 'l2r_weights.json')
+
+# the weights FeatureReRanker.re_rank used before they moved to l2r_weights.json
+CATEGORY_WEIGHTS = {'neural_score': 22.0, 'category_score': 18.0}
+COOKING_WEIGHTS = {
+    'neural_score': 22.0, 'title_utterance_score': 3.0, 'requirements_utterance_score': 3.0,
+    'tags_utterance_score': 3.0, 'step_score': 1.0, 'av_w_steps_score': 0.5, 'requirements_score': 2.0,
+    'rating_score': 0.5, 'image_score': 3.0, 'rating_count_score': 1.0, 'views_score': 0.5, 'domain_score': 3.0,
+    'author_score': 6.0, 'image_steps_score': 0.0, 'domain_aligns_score': 0.0, 'custom_taskmap_score': 0.001,
+    'iain2rank_norm_score': 0.0, 'source_domain_score': 5.0, 'category_score': 15.0, 'staged_score': 3.0,
+}
+DIY_WEIGHTS = {
+    'neural_score': 22.0, 'title_utterance_score': 6.0, 'requirements_utterance_score': 4.0,
+    'tags_utterance_score': 3.0, 'step_score': 1.0, 'av_w_steps_score': 0.5, 'requirements_score': 2.0,
+    'rating_score': 0.1, 'image_score': 3.0, 'rating_count_score': 0.1, 'views_score': 0.1, 'domain_score': 1.0,
+    'author_score': 0.0, 'image_steps_score': 0.0, 'domain_aligns_score': 0.0, 'custom_taskmap_score': 0.001,
+    'iain2rank_norm_score': 0.0, 'source_domain_score': 0.1, 'category_score': 18.0, 'staged_score': 3.0,
+}
+
+TASK_ROWS = [
+    {'neural_score': 0.8, 'title_utterance_score': 0.5, 'requirements_utterance_score': 0.25,
+     'tags_utterance_score': 0.0, 'step_score': 1.0, 'av_w_steps_score': 0.7, 'requirements_score': 0.5,
+     'rating_score': 0.92, 'image_score': 1.0, 'rating_count_score': 0.2, 'views_score': 0.2, 'staged_score': 0.0,
+     'domain_score': 1.0, 'author_score': 1.0, 'source_domain_score': 1.0},
+    # features that don't apply to a candidate are left out of its row
+    {'neural_score': 0.3, 'title_utterance_score': 0.0, 'step_score': 0.4, 'rating_score': 0.35,
+     'staged_score': 1.0},
+    {'neural_score': 0.0},
+]
+CATEGORY_ROW = {'category_neural_score': 0.6, 'category_score': 1.0}
+
+
+def baseline_score(row: dict, weights: dict) -> float:
+    """ Adds up weight * value for every feature of a task candidate, as re_rank used to. """
+    return sum(weights[name] * value for name, value in row.items())
+
+
+def baseline_category_score(row: dict, weights: dict) -> float:
+    return CATEGORY_WEIGHTS['neural_score'] * row['category_neural_score'] + weights['category_score']
+
+
+@pytest.fixture(scope='module')
+def l2r_weights() -> L2RWeights:
+    if not os.path.isfile(WEIGHTS_PATH):
+        pytest.skip(f"functionalities isn't mounted at {SERVICES_ROOT}")
+    return L2RWeights.from_file(WEIGHTS_PATH)
+
+
+@pytest.mark.parametrize("domain, weights", [("COOKING", COOKING_WEIGHTS), ("DIY", DIY_WEIGHTS)])
+def test_scores_match_the_baseline(l2r_weights, domain, weights) -> None:
+    scores = feature_matrix(TASK_ROWS + [CATEGORY_ROW]) @ l2r_weights.for_domain(domain)
+
+    expected = [baseline_score(row, weights) for row in TASK_ROWS] + \
+        [baseline_category_score(CATEGORY_ROW, weights)]
+    assert scores.tolist() == pytest.approx(expected)
+
+
+def test_unknown_domains_use_the_default_weights(l2r_weights) -> None:
+    scores = feature_matrix(TASK_ROWS) @ l2r_weights.for_domain("UNKNOWN")
+    assert scores.tolist() == pytest.approx([baseline_score(row, DIY_WEIGHTS) for row in TASK_ROWS])
+
+
+def test_unknown_features_are_ignored_and_missing_ones_weigh_nothing() -> None:
+    # the baseline weights name features that were never computed, and have no category_neural_score
+    l2r_weights = L2RWeights("baseline", {"COOKING": COOKING_WEIGHTS, "DIY": DIY_WEIGHTS})
+
+    assert len(l2r_weights.for_domain("COOKING")) == len(L2R_FEATURES)
+    assert l2r_weights.for_domain("COOKING")[L2R_FEATURES.index('category_neural_score')] == 0.0
+    scores = feature_matrix(TASK_ROWS) @ l2r_weights.for_domain("COOKING")
+    assert scores.tolist() == pytest.approx([baseline_score(row, COOKING_WEIGHTS) for row in TASK_ROWS])
+
+
+def test_weights_file_round_trip(l2r_weights, tmp_path) -> None:
+    path = str(tmp_path / "l2r_weights.json")
+    l2r_weights.save(path)
+    loaded = L2RWeights.from_file(path)
+
+    assert loaded.version == l2r_weights.version
+    for domain in l2r_weights.vectors:
+        assert loaded.for_domain(domain).tolist() == l2r_weights.for_domain(domain).tolist()
+
+
+def test_default_domain_is_required() -> None:
+    with pytest.raises(ValueError):
+        L2RWeights("cooking only", {"COOKING": COOKING_WEIGHTS})
@@ -0,0 +1,65 @@
+import pytest
+
+from taskmap_pb2 import TaskMap
+from utils import ObjectStore, ObjectStoreWriter
+
+
+@pytest.fixture
+def directory(tmp_path) -> str:
+    with ObjectStoreWriter(str(tmp_path), "taskmaps") as writer:
+        for idx in range(5):
+            writer.add(f"taskmap_{idx}", TaskMap(taskmap_id=f"taskmap_{idx}", title=f"Task {idx}"))
+    return str(tmp_path)
+
+
+def test_written_objects_are_read_back(directory) -> None:
+    assert ObjectStore.exists(directory, "taskmaps")
+    store = ObjectStore(directory, "taskmaps", TaskMap)
+
+    assert len(store) == 5
+    assert "taskmap_3" in store and "taskmap_9" not in store
+    assert store.get("taskmap_3") == TaskMap(taskmap_id="taskmap_3", title="Task 3")
+    assert store.get("taskmap_9") is None
+    store.close()
+
+
+def test_get_many_keeps_the_order_of_the_ids(directory) -> None:
+    store = ObjectStore(directory, "taskmaps", TaskMap)
+    taskmaps = store.get_many(["taskmap_4", "missing", "taskmap_0", "taskmap_2"])
+
+    assert [taskmap.title if taskmap is not None else None for taskmap in taskmaps] == \
+        ["Task 4", None, "Task 0", "Task 2"]
+    store.close()
+
+
+def test_first_write_of_an_id_is_kept(tmp_path) -> None:
+    with ObjectStoreWriter(str(tmp_path), "taskmaps") as writer:
+        assert writer.add("taskmap_0", TaskMap(title="First"))
+        assert not writer.add("taskmap_0", TaskMap(title="Second"))
+    assert writer.duplicates == 1
+
+    store = ObjectStore(str(tmp_path), "taskmaps", TaskMap)
+    assert len(store) == 1
+    assert store.get("taskmap_0").title == "First"
+    store.close()
+
+
+def test_store_without_objects(tmp_path) -> None:
+    assert not ObjectStore.exists(str(tmp_path), "categories")
+    ObjectStoreWriter(str(tmp_path), "categories").close()
+
+    # an empty file can't be memory-mapped
+    store = ObjectStore(str(tmp_path), "categories", TaskMap)
+    assert store.mmap is None
+    assert len(store) == 0
+    assert store.get_many(["category_0"]) == [None]
+    store.close()
+
+
+def test_close_unmaps_the_file(directory) -> None:
+    store = ObjectStore(directory, "taskmaps", TaskMap)
+    store.get("taskmap_0")
+    store.close()
+
+    assert store.mmap.closed
+    assert store.data_file.closed
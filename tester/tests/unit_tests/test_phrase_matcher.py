@@ -0,0 +1,39 @@
+from utils import PhraseMatcher, RegexMatcher
+
+
+def test_phrases_and_words():
+    matcher = PhraseMatcher(['Shut up', 'finish', 'go away'])
+
+    # multi-word phrases match anywhere, even inside longer words
+    assert matcher.find('please shut upstairs door') == 'shut up'
+    assert matcher.matches('just go away now')
+
+    # single words only match whole tokens
+    assert matcher.find("i'm finished") is None
+    assert matcher.find('i want to finish') == 'finish'
+    assert not matcher.matches('')
+
+
+def test_substring_words():
+    matcher = PhraseMatcher(['card number', 'pin'], substring_words=True)
+
+    assert matcher.find('my spinach') == 'pin'
+    assert matcher.find('my card number is') == 'card number'
+    assert matcher.find('how do i bake bread') is None
+
+
+def test_overlapping_phrases():
+    matcher = PhraseMatcher(['he said', 'she sells', 'sells sea shells'], substring_words=True)
+
+    assert matcher.find('she sells sea shells') == 'she sells'
+    assert matcher.find('bob sells sea shells') == 'sells sea shells'
+    assert matcher.find('she sell') is None
+
+
+def test_regex_matcher():
+    patterns = [r'\brelig(ion|ious)\b', r'\bdea(th|d)\b']
+    matcher = RegexMatcher(patterns)
+
+    assert matcher.find('are you religious?') == patterns[0]
+    assert matcher.find('the battery is dead') == patterns[1]
+    assert not matcher.matches('deadline tomorrow')
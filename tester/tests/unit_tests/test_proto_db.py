@@ -0,0 +1,189 @@
+import pytest
+
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+from searcher_pb2 import SearchLog
+from taskmap_pb2 import ConversationTurn, Session, TaskMap
+from theme_pb2 import ThemeResults
+from utils import ComposedDB, ProtoDB, ProtoDBMigration, MEMORY_URL
+from utils.aws.memory_table import memory_store
+
+
+@pytest.fixture(autouse=True)
+def clear_memory_tables():
+    yield
+    memory_store.clear()
+
+
+def make_taskmap(taskmap_id: str) -> TaskMap:
+    taskmap = TaskMap(taskmap_id=taskmap_id, title=f"title of {taskmap_id}")
+    taskmap.rating_out_100 = 87
+    taskmap.steps.add().response.speech_text = "Preheat the oven."
+    return taskmap
+
+
+def make_log(log_id: str) -> SearchLog:
+    search_log = SearchLog(id=log_id)
+    search_log.search_query.text = "pancakes"
+    return search_log
+
+
+@pytest.mark.parametrize("compression", [None, "zstd"])
+def test_binary_round_trip(compression) -> None:
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    db = ProtoDB(TaskMap, primary_key="taskmap_id", url=MEMORY_URL, storage="binary", compression=compression)
+    db.put(make_taskmap("t1"))
+    db.batch_put([make_taskmap(f"t{idx}") for idx in range(2, 30)])
+
+    assert db.get("t1") == make_taskmap("t1")
+    assert db.batch_get(["t29", "t2", "missing"]) == [make_taskmap("t29"), make_taskmap("t2"), None]
+    assert db.get("t2", decode=False)["title"] == "title of t2"
+    scanned_ids = set(db.scan_ids(scan_filter=Key("taskmap_id").begins_with("t2")))
+    assert scanned_ids == {"t2"} | {f"t2{idx}" for idx in range(10)}
+
+
+def test_projected_attributes_can_be_scanned() -> None:
+    db = ProtoDB(ThemeResults, primary_key="theme_word", url=MEMORY_URL, storage="binary",
+                 projected_attributes=["date"])
+    db.put(ThemeResults(theme_word="pancake day", date="2023-02-21", description="flip them"))
+
+    items = list(db.scan_attributes(["theme_word", "date"]))
+    assert items == [{"theme_word": "pancake day", "date": "2023-02-21"}]
+
+
+def test_legacy_items_are_read_and_migrated() -> None:
+    legacy_db = ProtoDB(SearchLog, url=MEMORY_URL, prefix="Migration", storage="dict")
+    legacy_db.batch_put([make_log(f"log_{idx}") for idx in range(40)])
+
+    db = ProtoDB(SearchLog, url=MEMORY_URL, prefix="Migration", storage="binary")
+    db.put(make_log("log_new"))
+    # legacy items are readable before the migration
+    assert db.get("log_3") == make_log("log_3")
+    assert len(list(db.scan_legacy_ids())) == 40
+
+    stats = ProtoDBMigration(db, batch_size=16).run()
+    assert stats == {'migrated': 40, 'failed': 0}
+    assert list(db.scan_legacy_ids()) == []
+    assert db.batch_get(["log_0", "log_new"]) == [make_log("log_0"), make_log("log_new")]
+
+
+def test_composed_db_binary_round_trip() -> None:
+    db = ComposedDB(Session, url=MEMORY_URL, primary_key="session_id", storage="binary", incremental=True,
+                    sub_proto_config={'turn': {'proto_class': ConversationTurn, 'primary_key': 'id'}})
+    session = Session(session_id="session_1")
+    for idx in range(3):
+        turn = session.turn.add(id=f"turn_{idx}")
+        turn.user_request.interaction.text = f"utterance {idx}"
+    db.put(session)
+
+    loaded = ComposedDB(Session, url=MEMORY_URL, primary_key="session_id", storage="binary",
+                        sub_proto_config={'turn': {'proto_class': ConversationTurn, 'primary_key': 'id'}})
+    assert loaded.get("session_1") == session
+
+
+@pytest.mark.parametrize("storage", ["dict", "binary"])
+def test_conditional_put_rejects_stale_versions(storage) -> None:
+    db = ComposedDB(Session, url=MEMORY_URL, primary_key="session_id", storage=storage, incremental=True,
+                    projected_attributes=["version"],
+                    sub_proto_config={'turn': {'proto_class': ConversationTurn, 'primary_key': 'id'}})
+
+    def newer_than_stored(version):
+        return Attr("version").not_exists() | Attr("version").lt(version)
+
+    session = Session(session_id="session_1", version=1)
+    session.turn.add(id="turn_1")
+    db.put(session, condition=newer_than_stored(1))
+    session.version = 2
+    db.put(session, condition=newer_than_stored(2))
+
+    stale = Session()
+    stale.CopyFrom(session)
+    stale.turn.add(id="turn_stale")
+    with pytest.raises(ClientError) as error:
+        db.put(stale, condition=newer_than_stored(2))
+
+    assert error.value.response['Error']['Code'] == 'ConditionalCheckFailedException'
+    assert db.get("session_1") == session
+    # the rejected put didn't write its turns
+    assert db.sub_tables['ConversationTurn']._get_item("turn_stale") is None
+
+
+def record_turn_writes(db: ComposedDB, monkeypatch) -> list:
+    """ Records the ids of the turns written to the sub-table of a Session ComposedDB. """
+    table = db.sub_tables['ConversationTurn']
+    written = []
+    batch_put, put = table.batch_put, table.put
+
+    def record_batch_put(proto_obj_list, check_for_changes=True):
+        written.extend(turn.id for turn in proto_obj_list)
+        return batch_put(proto_obj_list, check_for_changes=check_for_changes)
+
+    def record_put(proto_obj, check_for_changes=True, condition=None):
+        written.append(proto_obj.id)
+        return put(proto_obj, check_for_changes=check_for_changes, condition=condition)
+
+    monkeypatch.setattr(table, "batch_put", record_batch_put)
+    monkeypatch.setattr(table, "put", record_put)
+    return written
+
+
+def make_session_db() -> ComposedDB:
+    return ComposedDB(Session, url=MEMORY_URL, primary_key="session_id", storage="binary", incremental=True,
+                      projected_attributes=["version"],
+                      sub_proto_config={'turn': {'proto_class': ConversationTurn, 'primary_key': 'id'}})
+
+
+def test_incremental_put_only_writes_changed_turns(monkeypatch) -> None:
+    db = make_session_db()
+    written = record_turn_writes(db, monkeypatch)
+    session = Session(session_id="session_1")
+    for idx in range(3):
+        session.turn.add(id=f"turn_{idx}").user_request.interaction.text = f"utterance {idx}"
+    db.put(session)
+    assert written == ["turn_0", "turn_1", "turn_2"]
+
+    written.clear()
+    session.turn.add(id="turn_3").user_request.interaction.text = "utterance 3"
+    db.put(session)
+    assert written == ["turn_3"]
+
+    written.clear()
+    session.turn[1].agent_response.interaction.speech_text = "edited"
+    db.put(session)
+    assert written == ["turn_1"]
+    assert make_session_db().get("session_1") == session
+
+    # a DB that didn't track the session loads the stored one to find what changed
+    other_db = make_session_db()
+    other_written = record_turn_writes(other_db, monkeypatch)
+    session.turn[2].agent_response.interaction.speech_text = "edited"
+    other_db.put(session)
+    assert other_written == ["turn_2"]
+    assert make_session_db().get("session_1") == session
+
+
+def test_rejected_put_clears_the_fingerprints(monkeypatch) -> None:
+    db = make_session_db()
+    written = record_turn_writes(db, monkeypatch)
+    session = Session(session_id="session_1", version=1)
+    session.turn.add(id="turn_1")
+    db.put(session)
+
+    # another process saved a newer version with edited turns
+    newer = Session()
+    newer.CopyFrom(session)
+    newer.version = 2
+    newer.turn[0].user_request.interaction.text = "edited elsewhere"
+    make_session_db().put(newer)
+
+    written.clear()
+    session.turn.add(id="turn_2")
+    with pytest.raises(ClientError):
+        db.put(session, condition=Attr("version").lt(1))
+    assert written == []
+
+    # the fingerprints of the rejected session are forgotten, so the next put writes every turn
+    session.version = 3
+    db.put(session, condition=Attr("version").lt(3))
+    assert written == ["turn_1", "turn_2"]
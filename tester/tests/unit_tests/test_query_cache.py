@@ -0,0 +1,136 @@
+import threading
+import time
+
+import pytest
+
+from searcher_pb2 import SearchResults
+from service_modules import load_service_module
+
+query_cache = load_service_module('functionalities', 'searcher/query_cache.py')
+QueryResultCache = query_cache.QueryResultCache
+
+
+def make_results(*taskmap_ids: str) -> SearchResults:
+    results = SearchResults()
+    for taskmap_id in taskmap_ids:
+        results.candidate_list.candidates.add().task.taskmap_id = taskmap_id
+    return results
+
+
+def candidates(results: SearchResults) -> list:
+    return [candidate.task.taskmap_id for candidate in results.candidate_list.candidates]
+
+
+class SlowSearch:
+    """ Returns its results after `delay` seconds, counting the calls. """
+
+    def __init__(self, results: SearchResults, delay: float = 0.0):
+        self.results = results
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self) -> SearchResults:
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return self.results
+
+
+def test_concurrent_misses_search_once() -> None:
+    cache = QueryResultCache()
+    search = SlowSearch(make_results("taskmap_1"), delay=0.2)
+    results = []
+
+    def lookup():
+        results.append(cache.get_or_compute(("pancakes", 1, False, 10), search))
+
+    threads = [threading.Thread(target=lookup) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert search.calls == 1
+    assert [candidates(result) for result in results] == [["taskmap_1"]] * 5
+    assert cache.stats() == {'size': 1, 'hits': 4, 'misses': 1}
+
+
+def test_results_are_copies() -> None:
+    cache = QueryResultCache()
+    cache.get_or_compute("pancakes", SlowSearch(make_results("taskmap_1")))
+    cache.get("pancakes").candidate_list.candidates.add().task.taskmap_id = "taskmap_2"
+
+    assert candidates(cache.get("pancakes")) == ["taskmap_1"]
+
+
+def test_expired_results_are_searched_again() -> None:
+    cache = QueryResultCache(ttl_seconds=0.1)
+    search = SlowSearch(make_results("taskmap_1"))
+    cache.get_or_compute("pancakes", search)
+    cache.get_or_compute("pancakes", search)
+    assert search.calls == 1
+
+    time.sleep(0.15)
+    assert cache.get("pancakes") is None
+    cache.get_or_compute("pancakes", search)
+    assert search.calls == 2
+
+
+def test_least_recently_used_results_are_evicted() -> None:
+    cache = QueryResultCache(max_size=2)
+    for query in ("pancakes", "waffles"):
+        cache.get_or_compute(query, SlowSearch(make_results(query)))
+    cache.get("pancakes")
+    cache.get_or_compute("crepes", SlowSearch(make_results("crepes")))
+
+    assert cache.get("waffles") is None
+    assert candidates(cache.get("pancakes")) == ["pancakes"]
+    assert candidates(cache.get("crepes")) == ["crepes"]
+
+
+def test_failed_and_empty_searches_are_not_cached() -> None:
+    cache = QueryResultCache()
+
+    def fail():
+        raise TimeoutError("searcher timed out")
+
+    with pytest.raises(TimeoutError):
+        cache.get_or_compute("pancakes", fail)
+    empty = SlowSearch(make_results())
+    cache.get_or_compute("pancakes", empty)
+    cache.get_or_compute("pancakes", empty)
+    assert empty.calls == 2
+
+    search = SlowSearch(make_results("taskmap_1"))
+    assert candidates(cache.get_or_compute("pancakes", search)) == ["taskmap_1"]
+    assert search.calls == 1
+    assert cache.stats()['size'] == 1
+
+
+def test_failure_reaches_the_waiting_callers() -> None:
+    cache = QueryResultCache()
+    started = threading.Event()
+    errors = []
+
+    def fail():
+        started.set()
+        time.sleep(0.2)
+        raise TimeoutError("searcher timed out")
+
+    def lookup(compute):
+        try:
+            cache.get_or_compute("pancakes", compute)
+        except TimeoutError as e:
+            errors.append(e)
+
+    owner = threading.Thread(target=lookup, args=(fail,))
+    owner.start()
+    started.wait(timeout=5)
+    waiter = threading.Thread(target=lookup, args=(SlowSearch(make_results("taskmap_1")),))
+    waiter.start()
+    owner.join()
+    waiter.join()
+
+    assert len(errors) == 2
+    assert cache.get("pancakes") is None
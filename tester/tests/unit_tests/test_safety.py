@@ -3,7 +3,7 @@ import os
 import grpc
 
 from safety_pb2_grpc import SafetyStub
-from safety_pb2 import SafetyUtterance
+from safety_pb2 import SafetyUtterance, SafetyUtteranceBatch
 
 
 def test_suicide_prevention_check():
@@ -52,3 +52,23 @@ def test_privacy_check():
         utterance_request.text = utterance
         privacy_assessment = safety_service.privacy_check(utterance_request)
         print(f'Privacy assessment for "{utterance}" is {privacy_assessment.is_safe}.')
+
+
+def test_check_all():
+    channel = grpc.insecure_channel(os.environ['FUNCTIONALITIES_URL'])
+    safety_service = SafetyStub(channel)
+
+    utterances = ['I hate myself.', 'My debit card number is 958302912902.', 'How do I make pancakes?', '']
+    batch = SafetyUtteranceBatch()
+    for utterance in utterances:
+        batch.utterances.add().text = utterance
+
+    response = safety_service.check_all(batch)
+    assert len(response.reports) == len(utterances)
+
+    for utterance, report in zip(utterances, response.reports):
+        print(f'Safety report for "{utterance}" is {report}.')
+
+    # the empty utterance passes every check
+    assert report.privacy_safe and report.sensitivity_safe
+    assert report.offensive_speech_safe and report.suicide_prevention_safe
@@ -0,0 +1,157 @@
+import threading
+import time
+
+from typing import Callable, Dict, List
+
+import pytest
+
+from taskmap_pb2 import Session
+from service_modules import load_service_module
+
+session_cache = load_service_module('orchestrator', 'session_cache.py')
+SessionCache = session_cache.SessionCache
+VersionConflict = session_cache.VersionConflict
+
+
+class InMemorySessions:
+    """ Stands in for the database service, rejecting saves that aren't newer than the stored version. """
+
+    def __init__(self, failures: int = 0):
+        self.sessions: Dict[str, Session] = {}
+        self.loads: List[str] = []
+        self.writes: List[tuple] = []
+        self.failures = failures
+        self.lock = threading.Lock()
+
+    def load(self, session_id: str) -> Session:
+        with self.lock:
+            self.loads.append(session_id)
+            session = Session(session_id=session_id)
+            if session_id in self.sessions:
+                session.CopyFrom(self.sessions[session_id])
+            return session
+
+    def save(self, session_id: str, session: Session) -> None:
+        with self.lock:
+            if self.failures > 0:
+                self.failures -= 1
+                raise RuntimeError("database unavailable")
+            stored = self.sessions.get(session_id)
+            if stored is not None and stored.version >= session.version:
+                raise VersionConflict(f"stored version {stored.version}")
+            self.sessions[session_id] = Session()
+            self.sessions[session_id].CopyFrom(session)
+            self.writes.append((session_id, session.version))
+
+
+def wait_until(condition: Callable[[], bool], timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def add_turn(cache: SessionCache, session_id: str, turn_id: str) -> None:
+    session = cache.load(session_id)
+    session.turn.add(id=turn_id)
+    cache.save(session_id, session)
+
+
+@pytest.fixture
+def db():
+    return InMemorySessions()
+
+
+def test_cache_hit_skips_the_database(db) -> None:
+    cache = SessionCache(db.load, db.save, flush_delay=60)
+    add_turn(cache, "session_1", "turn_1")
+    session = cache.load("session_1")
+
+    assert db.loads == ["session_1"]
+    assert [turn.id for turn in session.turn] == ["turn_1"]
+    assert cache.stats['hits'] == 1
+    cache.close()
+
+
+def test_saves_are_coalesced_into_one_write(db) -> None:
+    cache = SessionCache(db.load, db.save, flush_delay=0.2)
+    for idx in range(5):
+        add_turn(cache, "session_1", f"turn_{idx}")
+
+    wait_until(lambda: len(db.writes) > 0)
+    time.sleep(0.3)
+    assert db.writes == [("session_1", 5)]
+    assert len(db.sessions["session_1"].turn) == 5
+    cache.close()
+
+
+def test_version_conflict_drops_the_session(db) -> None:
+    cache = SessionCache(db.load, db.save, flush_delay=60)
+    add_turn(cache, "session_1", "turn_1")
+    # another process saved newer turns in the meantime
+    db.sessions["session_1"] = Session(session_id="session_1", version=10)
+
+    assert cache.flush("session_1")
+    assert cache.stats['conflicts'] == 1
+    assert "session_1" not in cache.entries
+
+    assert cache.load("session_1").version == 10
+    assert db.loads == ["session_1", "session_1"]
+    cache.close()
+
+
+def test_failed_write_is_retried(db) -> None:
+    db.failures = 1
+    cache = SessionCache(db.load, db.save, flush_delay=0, retry_delay=0.3)
+    start = time.monotonic()
+    add_turn(cache, "session_1", "turn_1")
+
+    wait_until(lambda: len(db.writes) == 1)
+    assert time.monotonic() - start >= 0.3
+    assert cache.stats['errors'] == 1
+    assert db.writes == [("session_1", 1)]
+    cache.close()
+
+
+def test_evicted_sessions_are_flushed(db) -> None:
+    cache = SessionCache(db.load, db.save, max_sessions=2, flush_delay=60)
+    for session_id in ("session_1", "session_2", "session_3"):
+        add_turn(cache, session_id, "turn_1")
+
+    # the least recently used session is written straight away, without waiting for its flush
+    wait_until(lambda: len(db.writes) == 1)
+    assert db.writes == [("session_1", 1)]
+    assert list(cache.entries) == ["session_2", "session_3"]
+
+    assert [turn.id for turn in cache.load("session_1").turn] == ["turn_1"]
+    assert db.loads.count("session_1") == 2
+    cache.close()
+
+
+def test_close_writes_every_pending_session(db) -> None:
+    cache = SessionCache(db.load, db.save, flush_delay=60)
+    for idx in range(10):
+        add_turn(cache, f"session_{idx}", "turn_1")
+    assert db.writes == []
+
+    cache.close()
+    assert sorted(db.writes) == sorted((f"session_{idx}", 1) for idx in range(10))
+    assert not cache.dirty
+
+
+def test_disabled_cache_writes_directly(db) -> None:
+    cache = SessionCache(db.load, db.save, max_sessions=0)
+    session = cache.load("session_1")
+    cache.save("session_1", session, wait=True)
+    assert db.writes == [("session_1", 1)]
+
+    session = cache.load("session_1")
+    stale = cache.load("session_1")
+    cache.save("session_1", session)
+    wait_until(lambda: len(db.writes) == 2)
+
+    assert db.loads == ["session_1"] * 3
+    assert db.writes[-1] == ("session_1", 2)
+    # a save based on an older version is rejected by the database and only logged
+    cache.save("session_1", stale, wait=True)
+    assert len(db.writes) == 2
@@ -0,0 +1,82 @@
+import pytest
+
+from phase_intent_classifier_pb2 import IntentRequest
+from taskmap_pb2 import Session
+from utils import INTENT_CONTEXT_TURNS, build_intent_request, compact_session, compact_turns
+
+
+@pytest.fixture
+def session() -> Session:
+    """ A session of 5 turns, each carrying a screen and an image the classifiers don't read. """
+    session = Session(session_id="session_1", domain=Session.Domain.COOKING, headless=True)
+    for idx in range(5):
+        turn = session.turn.add(id=f"turn_{idx}")
+        turn.user_request.interaction.text = f"user {idx}"
+        turn.user_request.interaction.intents.append(f"Intent{idx}")
+        turn.agent_response.interaction.speech_text = f"system {idx}"
+        turn.agent_response.interaction.screen.headline = f"headline {idx}"
+        turn.agent_response.interaction.screen.image_list.add(path=f"image_{idx}.jpg")
+    return session
+
+
+def rind_inputs(turns) -> dict:
+    """ The fields PhaseIntentClassifier.classify_intent reads from IntentRequest.turns. """
+    inputs = {'user': turns[-1].user_request.interaction.text}
+    if len(turns) > 1:
+        inputs['system'] = turns[-2].agent_response.interaction.speech_text
+        inputs['previous_user'] = turns[-2].user_request.interaction.text
+    if len(turns) > 2:
+        inputs['previous_system'] = turns[-3].agent_response.interaction.speech_text
+    return inputs
+
+
+def test_compact_turns_keep_the_last_three_turns(session) -> None:
+    turns = compact_turns(session)
+
+    assert INTENT_CONTEXT_TURNS == 3
+    assert [turn.id for turn in turns] == ["turn_2", "turn_3", "turn_4"]
+    assert [turn.id for turn in compact_turns(session, window=10)] == [f"turn_{idx}" for idx in range(5)]
+
+
+def test_compact_turns_only_keep_the_conversation(session) -> None:
+    turn = compact_turns(session)[-1]
+
+    assert turn.user_request.interaction.text == "user 4"
+    assert list(turn.user_request.interaction.intents) == ["Intent4"]
+    assert turn.agent_response.interaction.speech_text == "system 4"
+    assert not turn.agent_response.interaction.HasField("screen")
+    # the session itself is left untouched
+    assert session.turn[-1].agent_response.interaction.screen.headline == "headline 4"
+
+
+def test_intent_request_holds_what_the_intent_classifier_reads(session) -> None:
+    full_request = IntentRequest(utterance="user 4")
+    full_request.turns.extend(session.turn)
+    intent_request = build_intent_request(session)
+
+    assert intent_request.utterance == "user 4"
+    assert len(intent_request.turns) == INTENT_CONTEXT_TURNS
+    assert rind_inputs(intent_request.turns) == rind_inputs(full_request.turns)
+    assert intent_request.ByteSize() < full_request.ByteSize()
+
+
+def test_intent_request_for_a_new_session(session) -> None:
+    del session.turn[1:]
+    intent_request = build_intent_request(session)
+
+    # with a single turn the classifier falls back to its greeting as the system utterance
+    assert len(intent_request.turns) == 1
+    assert rind_inputs(intent_request.turns) == {'user': "user 0"}
+
+
+def test_compact_session_holds_what_the_session_classifiers_read(session) -> None:
+    compact = compact_session(session)
+
+    assert compact.session_id == "session_1"
+    assert compact.domain == Session.Domain.COOKING
+    assert compact.headless
+    # DomainClassifier and the execution IntentClassifier read the text and intents of the last turn
+    assert [turn.id for turn in compact.turn] == ["turn_4"]
+    last_interaction = compact.turn[-1].user_request.interaction
+    assert last_interaction.text == session.turn[-1].user_request.interaction.text
+    assert list(last_interaction.intents) == list(session.turn[-1].user_request.interaction.intents)
@@ -0,0 +1,57 @@
+from taskmap_pb2 import TaskMap, TaskState
+from task_graph import TaskGraph, TaskGraphScheduler
+
+
+def build_taskmap() -> TaskMap:
+    """
+    step_1 -> step_2 -> step_4
+           -> step_3 /
+    condition -> step_5 (only if the condition is true)
+    """
+    taskmap = TaskMap()
+    taskmap.taskmap_id = "scheduler_test"
+    for idx in range(1, 6):
+        step = taskmap.steps.add()
+        step.unique_id = f"step_{idx}"
+        step.response.speech_text = f"Step {idx}"
+    condition = taskmap.condition_list.add()
+    condition.unique_id = "condition"
+    condition.text = "Do you want to decorate it?"
+
+    for id_from, id_to in [("step_1", "step_2"), ("step_1", "step_3"), ("step_2", "step_4"),
+                           ("step_3", "step_4"), ("condition", "step_5")]:
+        connection = taskmap.connection_list.add()
+        connection.id_from = id_from
+        connection.id_to = id_to
+    return taskmap
+
+
+def test_schedule_in_order():
+    scheduler = TaskGraphScheduler(TaskGraph(build_taskmap()))
+    assert scheduler.schedule() == ["step_1", "step_2", "step_3", "step_4"]
+
+
+def test_schedule_skips_executed_steps():
+    state = TaskState()
+    state.execution_list.extend(["step_1", "step_2"])
+    state.index_to_next = 2
+
+    scheduler = TaskGraphScheduler(TaskGraph(build_taskmap()), state)
+    assert scheduler.schedule() == ["step_3", "step_4"]
+
+
+def test_resolve_condition():
+    scheduler = TaskGraphScheduler(TaskGraph(build_taskmap()))
+    assert scheduler.schedule() == ["step_1", "step_2", "step_3", "step_4"]
+
+    # answering the condition releases the steps that depend on it
+    scheduler.resolve(true_ids=["condition"])
+    assert scheduler.schedule() == ["step_5"]
+
+
+def test_false_condition_blocks_steps():
+    state = TaskState()
+    state.false_statements_ids.append("condition")
+
+    scheduler = TaskGraphScheduler(TaskGraph(build_taskmap()), state)
+    assert "step_5" not in scheduler.schedule()
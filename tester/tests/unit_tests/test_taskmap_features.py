@@ -0,0 +1,132 @@
+import pytest
+
+from taskmap_pb2 import TaskMap
+from utils.taskmap_features import STATIC_FEATURES, static_features, read_taskmap_features, write_taskmap_features
+
+
+def baseline_scores(candidate: TaskMap) -> dict:
+    """ The static features as FeatureReRanker.re_rank computed them inline for every candidate. """
+    scores = {}
+
+    num_steps = len(candidate.steps)
+    if num_steps < 4:
+        scores['step_score'] = 0.5
+    elif 4 <= num_steps < 10:
+        scores['step_score'] = 1.0
+    elif 10 <= num_steps < 15:
+        scores['step_score'] = 0.7
+    elif 15 <= num_steps < 20:
+        scores['step_score'] = 0.4
+    else:
+        scores['step_score'] = 0.0
+
+    w_steps = [len(s.response.speech_text.split(" ")) for s in candidate.steps]
+    av_w_steps = sum(w_steps) / len(w_steps)
+    if av_w_steps < 5:
+        scores['av_w_steps_score'] = 0.5
+    elif 5 <= av_w_steps < 20:
+        scores['av_w_steps_score'] = 1.0
+    elif 20 <= av_w_steps < 30:
+        scores['av_w_steps_score'] = 0.7
+    elif 30 <= av_w_steps < 40:
+        scores['av_w_steps_score'] = 0.25
+    else:
+        scores['av_w_steps_score'] = 0.0
+
+    num_requirements = len(candidate.requirement_list)
+    if num_requirements < 4:
+        scores['requirements_score'] = 0.5
+    elif 4 <= num_requirements < 8:
+        scores['requirements_score'] = 1.0
+    elif 8 <= num_steps < 12:
+        scores['requirements_score'] = 0.7
+    elif 12 <= num_steps < 16:
+        scores['requirements_score'] = 0.5
+    else:
+        scores['requirements_score'] = 0.0
+
+    scores['rating_score'] = float(candidate.rating_out_100) / 100 if candidate.rating_out_100 else 0.35
+    scores['image_score'] = 1.0 if candidate.thumbnail_url and \
+        "https://oat-2-data.s3.amazonaws.com/" != candidate.thumbnail_url else 0.0
+
+    rating_count = candidate.rating_count
+    if rating_count == 0:
+        scores['rating_count_score'] = 0.0
+    elif 1 <= rating_count < 25:
+        scores['rating_count_score'] = 0.2
+    elif 25 <= num_steps < 100:
+        scores['rating_count_score'] = 0.4
+    elif 100 <= num_steps < 250:
+        scores['rating_count_score'] = 0.6
+    else:
+        scores['rating_count_score'] = 1.0
+
+    views = candidate.rating_count
+    if views == 0:
+        scores['views_score'] = 0.0
+    elif 1 <= views < 100:
+        scores['views_score'] = 0.2
+    elif 100 <= views < 1000:
+        scores['views_score'] = 0.4
+    elif 1000 <= views < 10000:
+        scores['views_score'] = 0.6
+    else:
+        scores['views_score'] = 1.0
+
+    scores['staged_score'] = 1.0 if "staged" in candidate.dataset else 0.0
+    return scores
+
+
+def make_taskmap(num_steps: int, words_per_step: int, num_requirements: int, **fields) -> TaskMap:
+    taskmap = TaskMap(title="Fluffy pancakes", **fields)
+    for idx in range(num_steps):
+        taskmap.steps.add(unique_id=f"step_{idx}").response.speech_text = " ".join(["word"] * words_per_step)
+    for idx in range(num_requirements):
+        taskmap.requirement_list.add(name=f"ingredient {idx}")
+    return taskmap
+
+
+SAMPLES = [
+    make_taskmap(2, 3, 1),
+    make_taskmap(6, 12, 5, rating_out_100=92, rating_count=12, thumbnail_url="https://example.com/pancakes.jpg"),
+    make_taskmap(11, 25, 9, rating_count=400, thumbnail_url="https://oat-2-data.s3.amazonaws.com/",
+                 dataset="staged-recipes"),
+    make_taskmap(17, 35, 13, rating_out_100=40, rating_count=5000),
+    make_taskmap(30, 50, 20, rating_count=20000, dataset="wikihow"),
+]
+
+
+@pytest.mark.parametrize("taskmap", SAMPLES)
+def test_static_features_match_the_baseline(taskmap) -> None:
+    features = static_features(taskmap)
+
+    assert list(features) == STATIC_FEATURES
+    assert features == baseline_scores(taskmap)
+
+
+def test_taskmap_without_steps() -> None:
+    # the baseline raised ZeroDivisionError here
+    assert static_features(TaskMap())['av_w_steps_score'] == 0.5
+
+
+def test_features_file_round_trip(tmp_path) -> None:
+    path = str(tmp_path / "objects" / "taskmap_features.jsonl")
+    records = [(f"taskmap_{idx}", dict(static_features(taskmap), title=["pancak"], requirements=[], tags=[]))
+               for idx, taskmap in enumerate(SAMPLES)]
+
+    assert write_taskmap_features(path, records) == len(SAMPLES)
+    assert list(read_taskmap_features(path)) == records
+
+
+def test_extracted_text_features() -> None:
+    pytest.importorskip("pyserini")
+    from utils.taskmap_features import TaskMapFeatureExtractor
+
+    taskmap = TaskMap()
+    taskmap.CopyFrom(SAMPLES[1])
+    taskmap.tags.extend(["breakfast", "Pancakes"])
+    features = TaskMapFeatureExtractor().extract(taskmap)
+
+    assert features['title'] == ["fluffi", "pancak"]
+    assert "pancak" in features['tags']
+    assert {name: features[name] for name in STATIC_FEATURES} == baseline_scores(taskmap)
@@ -0,0 +1,120 @@
+import threading
+import time
+
+import pytest
+
+from phase_intent_classifier_pb2 import IntentClassification, IntentRequest
+from taskmap_pb2 import Session
+from service_modules import load_service_module
+
+turn_executor = load_service_module('orchestrator', 'policy/turn_executor.py')
+TurnExecutor = turn_executor.TurnExecutor
+TurnStep = turn_executor.TurnStep
+IntentPrefetch = turn_executor.IntentPrefetch
+
+
+def sleeping(seconds: float, value):
+    def func(inputs):
+        time.sleep(seconds)
+        return value
+    return func
+
+
+def test_independent_steps_run_concurrently() -> None:
+    executor = TurnExecutor()
+    start = time.monotonic()
+    results = executor.run([
+        TurnStep('personality', sleeping(0.3, 'personality')),
+        TurnStep('safety', sleeping(0.3, [True])),
+        TurnStep('intent', sleeping(0.3, 'intent')),
+        TurnStep('routing', lambda inputs: (inputs['safety'], inputs['intent']), requires=['safety', 'intent']),
+    ])
+
+    # the three independent steps overlap, then the one requiring two of them runs
+    assert time.monotonic() - start < 0.6
+    assert results.get('personality') == 'personality'
+    assert results.get('routing') == ([True], 'intent')
+
+
+def test_failed_safety_check_short_circuits_the_turn() -> None:
+    executor = TurnExecutor()
+    slow_step_finished = threading.Event()
+
+    def slow(inputs):
+        time.sleep(0.5)
+        slow_step_finished.set()
+        return 'intent'
+
+    start = time.monotonic()
+    results = executor.run([
+        TurnStep('safety', sleeping(0.05, [True, False]), short_circuit=lambda checks: not all(checks)),
+        TurnStep('intent', slow),
+        TurnStep('routing', lambda inputs: 'routed', requires=['intent']),
+    ])
+
+    assert time.monotonic() - start < 0.4
+    assert results.short_circuited_by == 'safety'
+    assert results.get('safety') == [True, False]
+    assert 'intent' not in results and 'routing' not in results
+    assert not slow_step_finished.is_set()
+
+
+def test_failed_step_skips_the_steps_requiring_it() -> None:
+    def fail(inputs):
+        raise ConnectionError("classifier unavailable")
+
+    results = TurnExecutor().run([
+        TurnStep('intent', fail),
+        TurnStep('routing', lambda inputs: 'routed', requires=['intent']),
+        TurnStep('personality', lambda inputs: 'personality'),
+    ])
+
+    assert results.failed('routing')
+    assert results.get('personality') == 'personality'
+    with pytest.raises(ConnectionError):
+        results.get('intent')
+
+
+class CountingClassifier:
+
+    def __init__(self):
+        self.requests = []
+
+    def classify_intent(self, intent_request: IntentRequest) -> IntentClassification:
+        self.requests.append(intent_request)
+        return IntentClassification(classification='classified')
+
+
+def make_session(utterance: str) -> Session:
+    session = Session(session_id='session_1')
+    turn = session.turn.add(id='turn_1')
+    turn.user_request.interaction.text = utterance
+    return session
+
+
+def test_prefetched_intent_is_reused_for_the_same_request() -> None:
+    prefetch = IntentPrefetch()
+    classifier = CountingClassifier()
+    session = make_session('next step')
+    request = IntentRequest(utterance='next step')
+    request.turns.extend(session.turn)
+    prefetch.put(session, request, IntentClassification(classification='prefetched'))
+
+    same_request = IntentRequest()
+    same_request.CopyFrom(request)
+    assert prefetch.classify_intent(classifier, session, same_request).classification == 'prefetched'
+    assert classifier.requests == []
+    # a prefetched classification is only used once
+    assert prefetch.classify_intent(classifier, session, same_request).classification == 'classified'
+
+
+def test_prefetched_intent_is_ignored_for_another_request() -> None:
+    prefetch = IntentPrefetch()
+    classifier = CountingClassifier()
+    session = make_session('next step')
+    prefetch.put(session, IntentRequest(utterance='next step'), IntentClassification(classification='prefetched'))
+
+    other_request = IntentRequest(utterance='next step')
+    other_request.turns.extend(session.turn)
+    assert prefetch.classify_intent(classifier, session, other_request).classification == 'classified'
+    assert classifier.requests == [other_request]
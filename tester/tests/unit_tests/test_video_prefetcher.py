@@ -0,0 +1,123 @@
+import threading
+
+from typing import List
+
+import pytest
+
+from task_manager_pb2 import TMRequest
+from taskmap_pb2 import Session, Video
+from service_modules import load_service_module
+
+video_prefetcher = load_service_module('orchestrator', 'policy/execution_policy/video_prefetcher.py')
+VideoPrefetcher = video_prefetcher.VideoPrefetcher
+
+STEPS = ["step_a", "step_b", "step_c", "step_d", "step_e"]
+
+
+class StubSearcher:
+    """ Finds the video "video_<node ID>" for the current step, failing for the steps in `failing`. """
+
+    def __init__(self, failing: List[str] = ()):
+        self.failing = set(failing)
+        self.requests: List[str] = []
+        self.lock = threading.Lock()
+
+    def search(self, request: TMRequest) -> Video:
+        node_id = request.state.execution_list[request.state.index_to_next - 1]
+        with self.lock:
+            self.requests.append(node_id)
+        if node_id in self.failing:
+            self.failing.discard(node_id)
+            raise ConnectionError("video searcher unavailable")
+        return Video(title=f"video_{node_id}")
+
+
+def make_session(index_to_next: int) -> Session:
+    session = Session(session_id="session_1")
+    session.task.taskmap.taskmap_id = "taskmap_1"
+    session.task.state.execution_list.extend(STEPS)
+    session.task.state.index_to_next = index_to_next
+    return session
+
+
+def prefetch_and_wait(prefetcher: VideoPrefetcher, session: Session) -> None:
+    prefetcher.prefetch(session)
+    _, entries = prefetcher.sessions[session.session_id]
+    for future in list(entries.values()):
+        try:
+            future.result(timeout=5)
+        except ConnectionError:
+            pass
+
+
+@pytest.fixture
+def searcher():
+    return StubSearcher()
+
+
+def test_upcoming_steps_are_requested_once(searcher) -> None:
+    prefetcher = VideoPrefetcher(searcher.search, lookahead=2, session_budget=4)
+    prefetch_and_wait(prefetcher, make_session(index_to_next=1))
+    assert sorted(searcher.requests) == ["step_b", "step_c"]
+
+    # the next turn only looks up the step that came into range
+    prefetch_and_wait(prefetcher, make_session(index_to_next=2))
+    prefetch_and_wait(prefetcher, make_session(index_to_next=2))
+    assert sorted(searcher.requests) == ["step_b", "step_c", "step_d"]
+    assert prefetcher.stats['submitted'] == 3
+
+
+def test_prefetched_video_is_served(searcher) -> None:
+    prefetcher = VideoPrefetcher(searcher.search)
+    prefetch_and_wait(prefetcher, make_session(index_to_next=1))
+    searcher.requests.clear()
+
+    session = make_session(index_to_next=2)
+    assert prefetcher.retrieve(session).title == "video_step_b"
+    assert searcher.requests == []
+    assert prefetcher.stats['hits'] == 1
+
+
+def test_failed_prefetch_falls_back_to_the_inline_search() -> None:
+    searcher = StubSearcher(failing=["step_b"])
+    prefetcher = VideoPrefetcher(searcher.search)
+    prefetch_and_wait(prefetcher, make_session(index_to_next=1))
+
+    session = make_session(index_to_next=2)
+    assert prefetcher.get(session) is None
+    assert prefetcher.retrieve(session).title == "video_step_b"
+    # once by the failed prefetch, once inline
+    assert searcher.requests.count("step_b") == 2
+    assert prefetcher.stats['misses'] == 2
+
+
+def test_steps_that_were_not_prefetched_are_searched_inline(searcher) -> None:
+    prefetcher = VideoPrefetcher(searcher.search)
+
+    assert prefetcher.retrieve(make_session(index_to_next=1)).title == "video_step_a"
+    assert searcher.requests == ["step_a"]
+    assert prefetcher.stats == {'submitted': 0, 'hits': 0, 'misses': 1}
+
+
+def test_prefetched_videos_are_dropped_for_another_task(searcher) -> None:
+    prefetcher = VideoPrefetcher(searcher.search)
+    prefetch_and_wait(prefetcher, make_session(index_to_next=1))
+    searcher.requests.clear()
+
+    session = make_session(index_to_next=2)
+    session.task.taskmap.taskmap_id = "taskmap_2"
+    assert prefetcher.retrieve(session).title == "video_step_b"
+    assert searcher.requests == ["step_b"]
+
+
+def test_failed_prefetch_is_submitted_again() -> None:
+    searcher = StubSearcher(failing=["step_b"])
+    prefetcher = VideoPrefetcher(searcher.search, lookahead=1, session_budget=1)
+    prefetch_and_wait(prefetcher, make_session(index_to_next=1))
+    assert prefetcher.get(make_session(index_to_next=2)) is None
+
+    # the failed lookup no longer holds the session's only budget slot
+    prefetch_and_wait(prefetcher, make_session(index_to_next=1))
+    assert searcher.requests == ["step_b", "step_b"]
+    assert prefetcher.get(make_session(index_to_next=2)).title == "video_step_b"
+    assert prefetcher.stats == {'submitted': 2, 'hits': 1, 'misses': 1}
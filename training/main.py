@@ -2,21 +2,43 @@ import argparse
 
 from utils import logger
 import train_intent_classifier
+import train_l2r_weights
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
+    parser.add_argument("-t", "--task", help="What to train", default="intent_classifier",
+                        choices=["intent_classifier", "l2r_weights"])
     parser.add_argument("-b", "--batch_size", help="Training batch size", default=32, type=int)
     parser.add_argument("-s", "--seed", help="Random seed", default=42, type=int)
     parser.add_argument("-a", "--batch_accum", help="batch_accum", default=1, type=int)
     parser.add_argument("-g", "--grad_steps", help="grad_steps", default=2000, type=int)
     parser.add_argument("-d", "--dev_steps", help="dev_steps", default=400, type=int)
     parser.add_argument("-e", "--only_eval", help="only run evaluation, no training", action='store_true')
+    # L2R weights
+    parser.add_argument("--search_logs", help="search logs dump (download_search_logs.py)",
+                        default="/shared/utils/scripts/search_logs.json")
+    parser.add_argument("--sessions", help="sessions dump (download_sessions.py)",
+                        default="/shared/utils/scripts/sessions_dump.json")
+    parser.add_argument("--base_weights", help="weights kept for domains without enough clicks",
+                        default="/searcher_data/l2r_weights.json")
+    parser.add_argument("--output", help="where to write the learned weights",
+                        default="/searcher_data/l2r_weights_learned.json")
+    parser.add_argument("--version", help="version string stored in the weights file", default="learned")
+    parser.add_argument("--min_pairs", help="minimum preference pairs to learn a domain", default=50, type=int)
+    parser.add_argument("--regularization", help="inverse regularization strength", default=1.0, type=float)
     args = parser.parse_args()
     logger.info("Training container has started with configuration:")
-    logger.info(f"batch_size = {args.batch_size}")
-    logger.info(f"seed = {args.seed}")
-    logger.info(f"batch_accum = {args.batch_accum}")
-    logger.info(f"grad_steps = {args.grad_steps}")
-    logger.info(f"dev_steps = {args.dev_steps}")
-    logger.info(f"only_eval = {args.only_eval}")
-    train_intent_classifier.train(args)
+    logger.info(f"task = {args.task}")
+    if args.task == "l2r_weights":
+        logger.info(f"search_logs = {args.search_logs}")
+        logger.info(f"sessions = {args.sessions}")
+        logger.info(f"base_weights = {args.base_weights}")
+        train_l2r_weights.train(args)
+    else:
+        logger.info(f"batch_size = {args.batch_size}")
+        logger.info(f"seed = {args.seed}")
+        logger.info(f"batch_accum = {args.batch_accum}")
+        logger.info(f"grad_steps = {args.grad_steps}")
+        logger.info(f"dev_steps = {args.dev_steps}")
+        logger.info(f"only_eval = {args.only_eval}")
+        train_intent_classifier.train(args)
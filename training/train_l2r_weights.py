@@ -0,0 +1,98 @@
+import json
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+
+from utils import logger
+from utils.l2r_weights import L2RWeights, L2R_FEATURES, DEFAULT_DOMAIN
+
+
+def load_selected_taskmaps(sessions_path: str) -> Dict[str, str]:
+    """Map session_id to the taskmap_id of the task the user started, from a sessions dump."""
+    with open(sessions_path, 'r') as f:
+        sessions = json.load(f)
+
+    selected = {}
+    for session in sessions:
+        taskmap_id = session.get('task', {}).get('taskmap', {}).get('taskmap_id', '')
+        if taskmap_id:
+            selected[session['session_id']] = taskmap_id
+    logger.info(f"{len(selected)} of {len(sessions)} sessions have a selected task")
+    return selected
+
+
+def vector(doc: dict, feature_names: List[str]) -> np.ndarray:
+    """Return the features of a logged L2RDoc, reordered to match L2R_FEATURES."""
+    logged = dict(zip(feature_names, doc.get('features', [])))
+    return np.array([float(logged.get(name, 0.0)) for name in L2R_FEATURES], dtype=np.float64)
+
+
+def build_pairs(search_logs_path: str, selected: Dict[str, str]) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """Build pairwise training data per domain from search logs and the tasks users clicked.
+
+    In every logged result list that contains the selected TaskMap, the selected candidate
+    is preferred over each other candidate. Each preference becomes the feature difference
+    (selected - other) with label 1, and its mirror image with label 0.
+    """
+    with open(search_logs_path, 'r') as f:
+        search_logs = json.load(f)
+
+    differences = defaultdict(list)
+    for search_log in search_logs:
+        feature_names = search_log.get('feature_names', [])
+        docs = search_log.get('l2r_doc', [])
+        if not feature_names or not docs:
+            # logged before the L2R features were recorded
+            continue
+        session_id = search_log.get('search_query', {}).get('session_id', '')
+        taskmap_id = selected.get(session_id)
+        positives = [doc for doc in docs if taskmap_id and doc.get('taskmap_id') == taskmap_id]
+        if not positives:
+            continue
+
+        domain = search_log['search_query'].get('domain', DEFAULT_DOMAIN)
+        if isinstance(domain, int) or domain in ['', 'UNKNOWN']:
+            domain = DEFAULT_DOMAIN
+        positive = vector(positives[0], feature_names)
+        for doc in docs:
+            if doc.get('taskmap_id') != taskmap_id:
+                differences[domain].append(positive - vector(doc, feature_names))
+
+    pairs = {}
+    for domain, diffs in differences.items():
+        diffs = np.stack(diffs)
+        x = np.concatenate([diffs, -diffs])
+        y = np.concatenate([np.ones(len(diffs)), np.zeros(len(diffs))])
+        pairs[domain] = (x, y)
+        logger.info(f"{domain}: {len(diffs)} preference pairs")
+    return pairs
+
+
+def train(args):
+    base_weights = L2RWeights.from_file(args.base_weights)
+    selected = load_selected_taskmaps(args.sessions)
+    pairs = build_pairs(args.search_logs, selected)
+
+    weights = {}
+    for domain, base_vector in base_weights.vectors.items():
+        base = dict(zip(L2R_FEATURES, base_vector.tolist()))
+        if domain not in pairs or len(pairs[domain][1]) < 2 * args.min_pairs:
+            logger.info(f"Not enough clicks for {domain}, keeping the weights of '{base_weights.version}'")
+            weights[domain] = base
+            continue
+
+        x, y = pairs[domain]
+        model = LogisticRegression(fit_intercept=False, C=args.regularization, max_iter=1000)
+        model.fit(x, y)
+        accuracy = model.score(x, y)
+        logger.info(f"{domain}: pairwise training accuracy {accuracy:.3f}")
+
+        # ranking is unchanged by positive scaling, so keep the learned weights on the same
+        # scale as the base ones to make the two files easy to compare
+        learned = model.coef_[0]
+        scale = np.abs(base_vector).sum() / max(np.abs(learned).sum(), 1e-9)
+        weights[domain] = dict(zip(L2R_FEATURES, (learned * scale).tolist()))
+
+    L2RWeights(args.version, weights).save(args.output)